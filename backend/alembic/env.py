@@ -46,6 +46,7 @@ from app.models.agent_team import AgentTeam
 from app.models.workflow import Workflow, WorkflowNode, WorkflowEdge
 from app.models.task import Task, Execution, NodeExecution
 from app.models.microverse import MicroverseCharacter
+from app.repositories.search_index import AGENTS_FTS, SKILLS_FTS
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -66,6 +67,17 @@ if config.config_file_name is not None:
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """忽略 FTS5 虚拟表及其影子表、schema 指纹表（不在 Base.metadata 中，由迁移 / init_db 单独维护）"""
+    if type_ != "table":
+        return True
+    if name == "schema_stamp":
+        return False
+    # FTS5 影子表名为 <虚拟表>_data / _idx / _content / _docsize / _config
+    return not any(name == table or name.startswith(f"{table}_") for table in (SKILLS_FTS, AGENTS_FTS))
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -88,6 +100,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -111,7 +124,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
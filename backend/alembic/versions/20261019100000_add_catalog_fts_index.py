@@ -0,0 +1,58 @@
+"""add_catalog_fts_index
+
+Revision ID: 20261019100000
+Revises: 20260321200000
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.repositories.search_index import AGENTS_FTS, SKILLS_FTS, fts_table_ddl
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019100000'
+down_revision: Union[str, Sequence[str], None] = '20260321200000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """创建 skills_fts / agents_fts 全文索引表并回填现有数据
+
+    SKILL.md 正文不在数据库中，由下一次同步时写入索引。
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+
+    op.execute(fts_table_ddl(SKILLS_FTS))
+    op.execute(fts_table_ddl(AGENTS_FTS))
+
+    # tags 为 JSON 数组，使用 json_each 拼接成空格分隔的文本
+    op.execute("""
+        INSERT INTO skills_fts (rowid, name, description, tags, body)
+        SELECT s.id, s.name, s.description,
+               COALESCE((SELECT group_concat(value, ' ') FROM json_each(s.tags)), ''),
+               ''
+        FROM skills s
+    """)
+    op.execute("""
+        INSERT INTO agents_fts (rowid, name, description, tags, body)
+        SELECT a.id, a.name, a.description,
+               COALESCE((SELECT group_concat(value, ' ') FROM json_each(a.tags)), ''),
+               COALESCE(a.system_prompt, '')
+        FROM agents a
+    """)
+
+
+def downgrade() -> None:
+    """删除全文索引表"""
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TABLE IF EXISTS agents_fts")
+    op.execute("DROP TABLE IF EXISTS skills_fts")
@@ -0,0 +1,123 @@
+"""add_catalog_category_columns
+
+Revision ID: 20261019110000
+Revises: 20261019100000
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+import json
+from pathlib import PurePath
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019110000'
+down_revision: Union[str, Sequence[str], None] = '20261019100000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _project_name(path):
+    parts = PurePath(path or "").parts
+    if ".claude" in parts:
+        claude_index = parts.index(".claude")
+        if claude_index > 0:
+            return parts[claude_index - 1]
+    return None
+
+
+def _is_user_plugin_path(path):
+    path = path or ""
+    has_claude_plugins = "/.claude/plugins/" in path or "\\.claude\\plugins\\" in path
+    has_project_markers = any(
+        marker in path for marker in ("/.git/", "\\.git\\", "/package.json", "\\package.json")
+    )
+    return has_claude_plugins and not has_project_markers
+
+
+def _meta(value):
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return {}
+    return value if isinstance(value, dict) else {}
+
+
+def upgrade() -> None:
+    """添加分类字段（plugin_name / project_name / user_scope）并从 meta.path 回填"""
+    with op.batch_alter_table('skills', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('plugin_name', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('project_name', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('user_scope', sa.String(length=200), nullable=True))
+        batch_op.create_index('ix_skills_plugin_name', ['plugin_name'])
+        batch_op.create_index('ix_skills_project_name', ['project_name'])
+        batch_op.create_index('ix_skills_user_scope', ['user_scope'])
+        batch_op.create_index('ix_skills_source', ['source'])
+
+    with op.batch_alter_table('agents', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('plugin_name', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('project_name', sa.String(length=200), nullable=True))
+        batch_op.create_index('ix_agents_plugin_name', ['plugin_name'])
+        batch_op.create_index('ix_agents_project_name', ['project_name'])
+
+    bind = op.get_bind()
+
+    for row in bind.execute(sa.text("SELECT id, source, meta FROM skills")).all():
+        meta = _meta(row.meta)
+        source = (row.source or "").lower()
+        path = meta.get("path", "")
+        plugin_name = meta.get("plugin_name")
+        user_scope = None
+        if source == "user":
+            user_scope = "public"
+        elif source == "plugin" and plugin_name and _is_user_plugin_path(path):
+            user_scope = f"plugin:{plugin_name}"
+        bind.execute(
+            sa.text(
+                "UPDATE skills SET plugin_name = :plugin_name, project_name = :project_name, "
+                "user_scope = :user_scope WHERE id = :id"
+            ),
+            {
+                "id": row.id,
+                "plugin_name": plugin_name if source == "plugin" and plugin_name != "unknown" else None,
+                "project_name": _project_name(path) if source == "project" else None,
+                "user_scope": user_scope,
+            },
+        )
+
+    for row in bind.execute(sa.text("SELECT id, scope, meta FROM agents")).all():
+        meta = _meta(row.meta)
+        plugin_name = meta.get("plugin_name")
+        bind.execute(
+            sa.text(
+                "UPDATE agents SET plugin_name = :plugin_name, project_name = :project_name "
+                "WHERE id = :id"
+            ),
+            {
+                "id": row.id,
+                "plugin_name": plugin_name if row.scope == "plugin" and plugin_name != "unknown" else None,
+                "project_name": _project_name(meta.get("path", "")) if row.scope == "project" else None,
+            },
+        )
+
+
+def downgrade() -> None:
+    """移除分类字段"""
+    with op.batch_alter_table('agents', schema=None) as batch_op:
+        batch_op.drop_index('ix_agents_project_name')
+        batch_op.drop_index('ix_agents_plugin_name')
+        batch_op.drop_column('project_name')
+        batch_op.drop_column('plugin_name')
+
+    with op.batch_alter_table('skills', schema=None) as batch_op:
+        batch_op.drop_index('ix_skills_source')
+        batch_op.drop_index('ix_skills_user_scope')
+        batch_op.drop_index('ix_skills_project_name')
+        batch_op.drop_index('ix_skills_plugin_name')
+        batch_op.drop_column('user_scope')
+        batch_op.drop_column('project_name')
+        batch_op.drop_column('plugin_name')
@@ -0,0 +1,42 @@
+"""add_execution_history_indexes
+
+Revision ID: 20261019120000
+Revises: 20261019110000
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019120000'
+down_revision: Union[str, Sequence[str], None] = '20261019110000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+HISTORY_INDEXES = {
+    'ix_executions_history': ['updated_at', 'id'],
+    'ix_executions_type_history': ['execution_type', 'updated_at', 'id'],
+    'ix_executions_task_history': ['task_id', 'updated_at', 'id'],
+    'ix_executions_workflow_history': ['workflow_id', 'updated_at', 'id'],
+    'ix_executions_status_history': ['status', 'updated_at', 'id'],
+}
+
+
+def upgrade() -> None:
+    """为 History keyset 分页添加 (filter, updated_at, id) 复合索引"""
+    # 排序键改为 updated_at 本身（不再 coalesce），旧数据缺失时用 created_at 回填
+    op.execute(sa.text("UPDATE executions SET updated_at = created_at WHERE updated_at IS NULL"))
+
+    for name, columns in HISTORY_INDEXES.items():
+        op.create_index(name, 'executions', columns, unique=False)
+
+
+def downgrade() -> None:
+    """移除 History 复合索引"""
+    for name in reversed(list(HISTORY_INDEXES)):
+        op.drop_index(name, table_name='executions')
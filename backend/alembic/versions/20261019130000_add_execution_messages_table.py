@@ -0,0 +1,100 @@
+"""add_execution_messages_table
+
+Revision ID: 20261019130000
+Revises: 20261019120000
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+import json
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20261019130000'
+down_revision: Union[str, Sequence[str], None] = '20261019120000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_COLUMN_KEYS = ("role", "content", "seq")
+
+
+def upgrade() -> None:
+    """创建 execution_messages 表，并把 executions.chat_history 拆分为逐条消息"""
+    messages = op.create_table(
+        'execution_messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('execution_id', sa.Integer(), nullable=False),
+        sa.Column('seq', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['execution_id'], ['executions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('execution_id', 'seq', name='uq_execution_messages_execution_seq'),
+    )
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, chat_history, COALESCE(last_activity_at, updated_at, created_at) AS ts "
+        "FROM executions WHERE chat_history IS NOT NULL AND chat_history NOT IN ('', '[]')"
+    )).all()
+
+    for row in rows:
+        try:
+            history = json.loads(row.chat_history)
+        except ValueError:
+            continue
+        if not isinstance(history, list):
+            continue
+
+        created_at = row.ts
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at)
+
+        batch = []
+        for seq, message in enumerate(m for m in history if isinstance(m, dict)):
+            payload = {k: v for k, v in message.items() if k not in _COLUMN_KEYS}
+            batch.append({
+                'execution_id': row.id,
+                'seq': seq,
+                'role': str(message.get('role') or 'user'),
+                'content': message.get('content') or '',
+                'payload': payload or None,
+                'created_at': created_at or datetime.utcnow(),
+            })
+        if batch:
+            op.bulk_insert(messages, batch)
+
+    op.execute(sa.text("UPDATE executions SET chat_history = NULL"))
+
+
+def downgrade() -> None:
+    """把逐条消息合并回 executions.chat_history 并删除表"""
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT execution_id, role, content, payload FROM execution_messages "
+        "ORDER BY execution_id, seq"
+    )).all()
+
+    histories = {}
+    for row in rows:
+        payload = row.payload
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+        histories.setdefault(row.execution_id, []).append(
+            {**(payload or {}), 'role': row.role, 'content': row.content}
+        )
+
+    for execution_id, history in histories.items():
+        bind.execute(
+            sa.text("UPDATE executions SET chat_history = :history WHERE id = :id"),
+            {'id': execution_id, 'history': json.dumps(history, ensure_ascii=False)},
+        )
+
+    op.drop_table('execution_messages')
@@ -180,10 +180,13 @@ class HealthChecker(ABC):
     """健康检查接口"""
 
     @abstractmethod
-    async def check_health(self) -> Dict[str, Any]:
+    async def check_health(self, fresh: bool = False) -> Dict[str, Any]:
         """
         检查 AI 环境健康状态
 
+        Args:
+            fresh: 为 True 时忽略缓存结果，重新探测
+
         Returns:
             Dict: 健康状态，包含:
                 - available: 是否可用
@@ -96,6 +96,6 @@ class ClaudeAdapter(AdapterProvider):
         return await self.cli_client.execute_with_team(team_name, prompt, context)
 
     # HealthChecker 实现
-    async def check_health(self) -> Dict[str, Any]:
-        """检查 Claude 环境健康状态"""
-        return await self.health_checker.check_health()
+    async def check_health(self, fresh: bool = False) -> Dict[str, Any]:
+        """检查 Claude 环境健康状态（默认使用缓存，fresh=True 时重新探测）"""
+        return await self.health_checker.check_health(fresh=fresh)
@@ -12,6 +12,7 @@ from datetime import datetime
 
 from app.config.settings import settings
 from app.core.logging import get_logger
+from app.core.streaming import OutputLine, iter_process_output
 
 logger = get_logger(__name__)
 
@@ -266,35 +267,53 @@ class ClaudeCliClient:
                 "returncode": -1
             }
 
-    async def run_command_with_streaming(
+    async def stream_command(
         self,
         cmd: List[str],
-        log_callback: Optional[Callable[[str, str], None]] = None,
         timeout: int = 300,
         env: Optional[Dict[str, str]] = None
-    ) -> Dict[str, Any]:
+    ) -> AsyncIterator[Dict[str, Any]]:
         """
-        运行命令并实时输出日志
+        运行命令并按批次产出日志
+
+        输出经 iter_process_output 读取：突发输出合并为一个批次，消费者慢时反压到子进程。
 
         Args:
             cmd: 命令列表
-            log_callback: 日志回调函数，接收 (stream_type, line) 参数
-                         stream_type 为 'stdout' 或 'stderr'
-            timeout: 超时时间（秒）
+            timeout: 超时时间（秒），超时后结束进程
             env: 自定义环境变量字典（可选）
 
-        Returns:
-            Dict: 包含 success, output, error, stderr, logs
+        Yields:
+            Dict: {"type": "log", "lines": List[OutputLine]}，
+                  OutputLine.stream 为 'stdout' / 'stderr' / 'info' / 'error'；
+                  最后一个事件为 {"type": "result", "data": {...}}，
+                  data 包含 success, output, error, stderr, returncode, logs, duration
         """
         start_time = datetime.now()
-        stdout_lines = []
-        stderr_lines = []
+        stdout_lines: List[str] = []
+        stderr_lines: List[str] = []
 
-        try:
-            # 记录开始执行
-            if log_callback:
-                log_callback("info", f"[{start_time.strftime('%H:%M:%S')}] 开始执行命令: {' '.join(cmd)}")
+        def result(success: bool, error: str, returncode: int) -> Dict[str, Any]:
+            return {
+                "type": "result",
+                "data": {
+                    "success": success,
+                    "output": "\n".join(stdout_lines),
+                    "error": error,
+                    "stderr": "\n".join(stderr_lines),
+                    "returncode": returncode,
+                    "logs": stdout_lines + stderr_lines,
+                    "duration": (datetime.now() - start_time).total_seconds()
+                }
+            }
+
+        # 记录开始执行
+        yield {"type": "log", "lines": [
+            OutputLine("info", f"[{start_time.strftime('%H:%M:%S')}] 开始执行命令: {' '.join(cmd)}")
+        ]}
 
+        timed_out = False
+        try:
             # 设置工作目录为用户 home 目录
             home_dir = os.path.expanduser('~')
 
@@ -306,83 +325,78 @@ class ClaudeCliClient:
                 cwd=home_dir
             )
 
-            async def read_stream(stream, stream_type: str, lines_buffer: List[str]):
-                """读取流并实时输出"""
-                try:
-                    while True:
-                        line = await stream.readline()
-                        if not line:
-                            break
-
-                        decoded_line = line.decode("utf-8").rstrip()
-                        lines_buffer.append(decoded_line)
-
-                        # 实时回调
-                        if log_callback:
-                            timestamp = datetime.now().strftime('%H:%M:%S')
-                            log_callback(stream_type, f"[{timestamp}] {decoded_line}")
-
-                except Exception as e:
-                    logger.error(f"Error reading {stream_type}: {e}")
+            def on_timeout():
+                nonlocal timed_out
+                timed_out = True
+                process.kill()
 
-            # 并发读取 stdout 和 stderr
+            # 超时直接结束进程，管道关闭后读取自然结束，无需轮询
+            timer = asyncio.get_running_loop().call_later(timeout, on_timeout)
             try:
-                await asyncio.wait_for(
-                    asyncio.gather(
-                        read_stream(process.stdout, "stdout", stdout_lines),
-                        read_stream(process.stderr, "stderr", stderr_lines),
-                        process.wait()
-                    ),
-                    timeout=timeout
-                )
-            except asyncio.TimeoutError:
-                process.kill()
+                async for batch in iter_process_output(process):
+                    timestamp = datetime.now().strftime('%H:%M:%S')
+                    for line in batch:
+                        (stdout_lines if line.stream == "stdout" else stderr_lines).append(line.text)
+                    yield {"type": "log", "lines": [
+                        OutputLine(line.stream, f"[{timestamp}] {line.text}") for line in batch
+                    ]}
                 await process.wait()
-                if log_callback:
-                    log_callback("error", f"命令执行超时（{timeout}秒）")
-
-                return {
-                    "success": False,
-                    "output": "\n".join(stdout_lines),
-                    "error": f"Command timed out after {timeout} seconds",
-                    "stderr": "\n".join(stderr_lines),
-                    "returncode": -1,
-                    "logs": stdout_lines + stderr_lines,
-                    "duration": (datetime.now() - start_time).total_seconds()
-                }
-
-            # 计算执行时长
-            duration = (datetime.now() - start_time).total_seconds()
-
-            # 记录完成状态
-            if log_callback:
-                status = "成功" if process.returncode == 0 else f"失败 (退出码: {process.returncode})"
-                log_callback("info", f"命令执行{status}，耗时: {duration:.2f}秒")
-
-            return {
-                "success": process.returncode == 0,
-                "output": "\n".join(stdout_lines),
-                "error": "\n".join(stderr_lines) if process.returncode != 0 else "",
-                "stderr": "\n".join(stderr_lines),
-                "returncode": process.returncode,
-                "logs": stdout_lines + stderr_lines,
-                "duration": duration
-            }
+            finally:
+                timer.cancel()
+                # 消费者提前退出（如客户端断开）时结束进程
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
 
         except Exception as e:
-            duration = (datetime.now() - start_time).total_seconds()
             logger.error(f"Error running command {' '.join(cmd)}: {e}")
+            yield {"type": "log", "lines": [OutputLine("error", f"执行异常: {str(e)}")]}
+            yield result(False, str(e), -1)
+            return
+
+        if timed_out:
+            yield {"type": "log", "lines": [OutputLine("error", f"命令执行超时（{timeout}秒）")]}
+            yield result(False, f"Command timed out after {timeout} seconds", -1)
+            return
+
+        # 记录完成状态
+        final = result(
+            process.returncode == 0,
+            "\n".join(stderr_lines) if process.returncode != 0 else "",
+            process.returncode
+        )
+        status = "成功" if process.returncode == 0 else f"失败 (退出码: {process.returncode})"
+        yield {"type": "log", "lines": [
+            OutputLine("info", f"命令执行{status}，耗时: {final['data']['duration']:.2f}秒")
+        ]}
+        yield final
 
-            if log_callback:
-                log_callback("error", f"执行异常: {str(e)}")
+    async def run_command_with_streaming(
+        self,
+        cmd: List[str],
+        log_callback: Optional[Callable[[str, str], None]] = None,
+        timeout: int = 300,
+        env: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        运行命令并实时输出日志（stream_command 的回调形式）
 
-            return {
-                "success": False,
-                "output": "\n".join(stdout_lines),
-                "error": str(e),
-                "stderr": "\n".join(stderr_lines),
-                "returncode": -1,
-                "logs": stdout_lines + stderr_lines,
-                "duration": duration
-            }
+        Args:
+            cmd: 命令列表
+            log_callback: 日志回调函数，接收 (stream_type, line) 参数
+                         stream_type 为 'stdout' 或 'stderr'
+            timeout: 超时时间（秒）
+            env: 自定义环境变量字典（可选）
+
+        Returns:
+            Dict: 包含 success, output, error, stderr, logs
+        """
+        result: Dict[str, Any] = {}
+        async for event in self.stream_command(cmd, timeout=timeout, env=env):
+            if event["type"] == "result":
+                result = event["data"]
+            elif log_callback:
+                for line in event["lines"]:
+                    log_callback(line.stream, line.text)
+        return result
 
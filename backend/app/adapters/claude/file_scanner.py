@@ -10,6 +10,7 @@ from datetime import datetime
 
 from app.config.settings import settings
 from app.core.logging import get_logger
+from app.core.metrics import timed_scan
 
 logger = get_logger(__name__)
 
@@ -22,6 +23,7 @@ class ClaudeFileScanner:
         self.skills_dir = settings.claude_skills_dir
         self.plugins_dir = settings.claude_plugins_dir
 
+    @timed_scan("skills")
     async def scan_skills(self, project_paths: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """
         扫描所有技能
@@ -516,6 +518,7 @@ class ClaudeFileScanner:
         
         return info
 
+    @timed_scan("agents")
     async def scan_agents(self, project_paths: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """
         扫描所有 Claude Code 子代理（Subagents）
@@ -1077,6 +1080,7 @@ class ClaudeFileScanner:
 
         return agents
 
+    @timed_scan("agent_teams")
     async def scan_agent_teams(self) -> List[Dict[str, Any]]:
         """
         扫描所有智能体队伍
@@ -2,20 +2,34 @@
 Claude Health Checker
 
 检查 Claude Code CLI 环境的健康状态
+
+健康检查和模型可用性探测结果缓存在进程级 AsyncTTLCache 中（TTL + single-flight），
+并发调用方共享同一个进行中的探测；后台刷新任务在缓存过期前主动更新。
 """
 import asyncio
 import json
 import subprocess
 import os
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.config.settings import settings
+from app.core.async_cache import AsyncTTLCache
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
 
+# 进程级缓存（ClaudeHealthChecker 按请求创建，缓存需跨实例共享）
+_probe_cache = AsyncTTLCache()
+_refresher_task: Optional[asyncio.Task] = None
+
+
+def invalidate_health_cache() -> None:
+    """配置变更（如 settings.json 更新）后清空健康检查缓存"""
+    _probe_cache.invalidate()
+
+
 class ClaudeHealthChecker:
     """Claude 环境健康检查器"""
 
@@ -82,7 +96,45 @@ class ClaudeHealthChecker:
                 seen[alias] = model
         return list(seen.values())
 
-    async def check_model_availability(self, model_alias: str, model_full_name: str) -> bool:
+    def _load_api_credentials(self) -> Tuple[Optional[str], str]:
+        """
+        读取模型探测使用的 API key 和 base URL（settings.json 优先，其次环境变量）
+
+        Returns:
+            (api_key, base_url)
+        """
+        api_key = None
+        base_url = None
+
+        settings_file = self.config_dir / "settings.json"
+        if settings_file.exists():
+            try:
+                with open(settings_file, 'r') as f:
+                    settings_data = json.load(f)
+                    env = settings_data.get("env", {})
+                    api_key = env.get("ANTHROPIC_AUTH_TOKEN")
+                    base_url = env.get("ANTHROPIC_BASE_URL")
+            except Exception as e:
+                logger.error(f"Failed to read settings.json: {e}")
+
+        # 如果没有配置，尝试从环境变量读取
+        if not api_key:
+            api_key = os.environ.get("ANTHROPIC_API_KEY") or os.environ.get("ANTHROPIC_AUTH_TOKEN")
+        if not base_url:
+            base_url = os.environ.get("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
+
+        # 如果 API key 是 PROXY_MANAGED，使用 test 作为占位符
+        if api_key == "PROXY_MANAGED":
+            api_key = "test"
+
+        return api_key, base_url
+
+    async def check_model_availability(
+        self,
+        model_alias: str,
+        model_full_name: str,
+        credentials: Optional[Tuple[Optional[str], str]] = None
+    ) -> bool:
         """
         检查特定模型是否可用
 
@@ -91,32 +143,13 @@ class ClaudeHealthChecker:
         Args:
             model_alias: 模型别名（opus/sonnet/haiku）
             model_full_name: 模型完整名称（claude-opus-4-6）
+            credentials: 预先读取的 (api_key, base_url)，为空时从配置读取
 
         Returns:
             bool: 模型是否可用
         """
         try:
-            # 读取环境变量配置
-            settings_file = self.config_dir / "settings.json"
-            api_key = None
-            base_url = None
-
-            if settings_file.exists():
-                with open(settings_file, 'r') as f:
-                    settings_data = json.load(f)
-                    env = settings_data.get("env", {})
-                    api_key = env.get("ANTHROPIC_AUTH_TOKEN")
-                    base_url = env.get("ANTHROPIC_BASE_URL")
-
-            # 如果没有配置，尝试从环境变量读取
-            if not api_key:
-                api_key = os.environ.get("ANTHROPIC_API_KEY") or os.environ.get("ANTHROPIC_AUTH_TOKEN")
-            if not base_url:
-                base_url = os.environ.get("ANTHROPIC_BASE_URL", "https://api.anthropic.com")
-
-            # 如果 API key 是 PROXY_MANAGED，使用 test 作为占位符
-            if api_key == "PROXY_MANAGED":
-                api_key = "test"
+            api_key, base_url = credentials or self._load_api_credentials()
 
             # 如果没有 API key，无法检测
             if not api_key:
@@ -199,10 +232,29 @@ class ClaudeHealthChecker:
             # 出错时假设不可用（更保守）
             return False
 
-    async def get_model_info(self) -> Dict[str, Any]:
+    async def _cached_model_availability(
+        self,
+        model_alias: str,
+        model_full_name: str,
+        credentials: Tuple[Optional[str], str],
+        fresh: bool = False
+    ) -> bool:
+        """按 (模型, base_url) 缓存的模型可用性探测"""
+        key = f"model:{credentials[1]}:{model_full_name}"
+        return await _probe_cache.get(
+            key,
+            lambda: self.check_model_availability(model_alias, model_full_name, credentials),
+            ttl=settings.claude_model_probe_cache_ttl,
+            fresh=fresh,
+        )
+
+    async def get_model_info(self, fresh: bool = False) -> Dict[str, Any]:
         """
         获取 Claude 模型配置信息（支持 cc-switch 和 settings.json）
 
+        Args:
+            fresh: 为 True 时忽略缓存，重新探测模型可用性
+
         Returns:
             Dict: 包含当前模型、可用模型列表等信息
         """
@@ -264,9 +316,10 @@ class ClaudeHealthChecker:
         models = self._deduplicate_models(models)
         logger.info(f"Total models to check: {len(models)}")
 
-        # 3. 并发检测所有模型的可用性
+        # 3. 并发检测所有模型的可用性（settings.json 只读一次，结果按模型缓存）
+        credentials = self._load_api_credentials()
         availability_tasks = [
-            self.check_model_availability(model["alias"], model["full_name"])
+            self._cached_model_availability(model["alias"], model["full_name"], credentials, fresh)
             for model in models
         ]
 
@@ -286,25 +339,41 @@ class ClaudeHealthChecker:
 
         return model_info
 
-    async def check_health(self) -> Dict[str, Any]:
+    async def check_health(self, fresh: bool = False, fresh_models: Optional[bool] = None) -> Dict[str, Any]:
         """
-        检查 Claude 环境健康状态
+        检查 Claude 环境健康状态（TTL 缓存，并发调用共享同一次探测）
+
+        Args:
+            fresh: 为 True 时忽略缓存，重新探测
+            fresh_models: 是否同时忽略模型可用性探测缓存（默认同 fresh）；
+                后台刷新传 False，模型探测按 claude_model_probe_cache_ttl 过期
 
         Returns:
             Dict: 健康状态信息
         """
+        if fresh_models is None:
+            fresh_models = fresh
+        return await _probe_cache.get(
+            "health",
+            lambda: self._probe_health(fresh_models),
+            ttl=settings.claude_health_cache_ttl,
+            fresh=fresh,
+        )
+
+    async def _probe_health(self, fresh: bool = False) -> Dict[str, Any]:
+        """实际执行健康检查探测"""
         issues: List[str] = []
         version = None
         cli_available = False
 
         # 检查 CLI 是否可用
         # 尝试多个可能的路径
-        cli_paths_to_try = [
+        cli_paths_to_try = list(dict.fromkeys([
             self.cli_path,  # 配置的路径
             "claude",  # PATH 中的命令
             str(Path.home() / ".local" / "bin" / "claude"),  # Linux 用户安装路径
             "/usr/local/bin/claude",  # 系统安装路径
-        ]
+        ]))
 
         for cli_path in cli_paths_to_try:
             try:
@@ -349,7 +418,7 @@ class ClaudeHealthChecker:
         available = cli_available and config_dir_exists and config_dir_readable
 
         # 获取模型信息
-        model_info = await self.get_model_info()
+        model_info = await self.get_model_info(fresh=fresh)
 
         return {
             "available": available,
@@ -411,3 +480,39 @@ class ClaudeHealthChecker:
                 "error": str(e),
                 "returncode": -1
             }
+
+
+async def _refresh_loop(interval: float) -> None:
+    """后台定期刷新健康检查缓存，使请求路径始终命中缓存"""
+    while True:
+        try:
+            # 只刷新 CLI / 配置目录部分；模型探测会发出真实 API 请求，按自身 TTL 过期
+            await ClaudeHealthChecker().check_health(fresh=True, fresh_models=False)
+            logger.debug("Claude health cache refreshed")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to refresh Claude health cache: {e}")
+        await asyncio.sleep(interval)
+
+
+def start_health_refresher() -> None:
+    """启动后台健康检查刷新任务（间隔为 0 时不启动）"""
+    global _refresher_task
+    interval = settings.claude_health_refresh_interval
+    if interval <= 0 or (_refresher_task and not _refresher_task.done()):
+        return
+    _refresher_task = asyncio.create_task(_refresh_loop(interval))
+    logger.info(f"Claude health refresher started (interval={interval}s)")
+
+
+async def stop_health_refresher() -> None:
+    """停止后台健康检查刷新任务"""
+    global _refresher_task
+    if _refresher_task:
+        _refresher_task.cancel()
+        try:
+            await _refresher_task
+        except asyncio.CancelledError:
+            pass
+        _refresher_task = None
@@ -9,6 +9,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+from app.core.catalog import bump_catalog_version
+
 
 class SettingsAdapter:
     """Claude 配置文件适配器"""
@@ -113,6 +115,7 @@ class SettingsAdapter:
             raise PermissionError(f"无权限写入配置文件: {self.settings_file}")
         except Exception as e:
             raise IOError(f"写入配置文件失败: {e}")
+        bump_catalog_version("claude_settings")
 
     def _create_backup(self) -> Path:
         """
@@ -3,6 +3,8 @@ Git Adapter - Git 操作适配器
 """
 from __future__ import annotations
 
+import asyncio
+import os
 import subprocess
 from pathlib import Path
 from typing import Optional
@@ -54,3 +56,54 @@ class GitAdapter:
         cmd = ["git", "rev-parse", f"origin/{branch}"]
         success, stdout, _ = self._run_command(cmd, cwd=repo_path)
         return stdout if success else None
+
+    # ---------- 异步版本（不占用线程池，供批量检查使用） ----------
+
+    async def _run_command_async(self, cmd: list[str], cwd: Optional[Path] = None) -> tuple[bool, str, str]:
+        """异步执行 Git 命令（禁止交互式认证提示，超时后结束进程）"""
+        env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=cwd,
+                env=env,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except Exception as e:
+            return False, "", str(e)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            process.kill()
+            await process.wait()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return False, "", f"timed out after {self.timeout}s"
+        return (
+            process.returncode == 0,
+            stdout.decode("utf-8", errors="replace").strip(),
+            stderr.decode("utf-8", errors="replace").strip(),
+        )
+
+    async def get_head_async(self, repo_path: Path) -> Optional[tuple[str, str]]:
+        """一次调用获取仓库根目录和本地 commit hash，返回 (toplevel, hash)"""
+        cmd = ["git", "rev-parse", "--show-toplevel", "HEAD"]
+        success, stdout, _ = await self._run_command_async(cmd, cwd=repo_path)
+        lines = stdout.splitlines()
+        if not success or len(lines) != 2:
+            return None
+        return lines[0], lines[1]
+
+    async def get_remote_head_async(self, repo_path: Path, branch: str = "main") -> Optional[str]:
+        """
+        通过 ls-remote 获取远程分支 commit hash
+
+        只查询单个 ref，不下载对象也不修改本地仓库，比 fetch + rev-parse 轻得多。
+        """
+        cmd = ["git", "ls-remote", "origin", f"refs/heads/{branch}"]
+        success, stdout, _ = await self._run_command_async(cmd, cwd=repo_path)
+        if not success or not stdout:
+            return None
+        return stdout.split()[0]
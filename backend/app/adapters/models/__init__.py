@@ -6,6 +6,8 @@ Model Provider Adapters - 统一模型 API 接口层
 from .base import ModelProvider, Message
 from .factory import ModelProviderFactory
 from .anthropic_provider import AnthropicProvider
+from .compaction import CompactionPolicy
+from .session_store import SessionState, SessionStore, get_session_store
 from .claude_cli_provider import ClaudeCliProvider
 from .claude_cli_noninteractive_provider import ClaudeCliNonInteractiveProvider
 
@@ -14,6 +16,10 @@ __all__ = [
     "Message",
     "ModelProviderFactory",
     "AnthropicProvider",
+    "CompactionPolicy",
+    "SessionState",
+    "SessionStore",
+    "get_session_store",
     "ClaudeCliProvider",
     "ClaudeCliNonInteractiveProvider",
 ]
@@ -1,31 +1,109 @@
 """
 Anthropic API Provider - Anthropic API 提供商实现
+
+请求构建时自动添加 prompt cache 断点（系统提示词、压缩摘要、历史前缀），
+会话历史按 token 预算压缩，会话状态存放在 LRU SessionStore 中并溢出到数据库。
 """
 import uuid
 from typing import AsyncIterator, Dict, Any, Optional, List
 from datetime import datetime
 
-from anthropic import AsyncAnthropic
-from anthropic.types import MessageStreamEvent
-
 from .base import ModelProvider, Message
+from .compaction import CompactionPolicy
+from .session_store import SessionState, SessionStore, get_session_store
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# prompt cache 断点
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# 从 API usage 中累计的字段
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
+
+
+def _text_block(text: str, cached: bool = False) -> Dict[str, Any]:
+    block: Dict[str, Any] = {"type": "text", "text": text}
+    if cached:
+        block["cache_control"] = CACHE_CONTROL
+    return block
+
+
+def build_request_params(state: SessionState) -> Dict[str, Any]:
+    """
+    根据会话状态构建 Messages API 请求参数（system + messages）
+
+    缓存断点布局（最多 4 个）：
+    - 系统提示词
+    - 压缩摘要（存在时）
+    - 上一轮的 user 消息（稳定前缀，保证下一轮可命中）
+    - 最新的 user 消息（写入本轮前缀供下一轮读取）
+    """
+    system: List[Dict[str, Any]] = []
+    if state.system_prompt:
+        system.append(_text_block(state.system_prompt, cached=True))
+    if state.summary:
+        system.append(_text_block(
+            "Summary of earlier conversation (older turns were compacted):\n" + state.summary,
+            cached=True,
+        ))
+
+    user_indexes = [i for i, msg in enumerate(state.messages) if msg.role == "user"]
+    cached_indexes = set(user_indexes[-2:])
+
+    messages = []
+    for i, msg in enumerate(state.messages):
+        if i in cached_indexes:
+            content: Any = [_text_block(msg.content, cached=True)]
+        else:
+            content = msg.content
+        messages.append({"role": msg.role, "content": content})
+
+    params: Dict[str, Any] = {"messages": messages}
+    if system:
+        params["system"] = system
+    return params
+
 
 class AnthropicProvider(ModelProvider):
     """Anthropic API 提供商实现"""
 
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        session_store: Optional[SessionStore] = None,
+        compaction_policy: Optional[CompactionPolicy] = None,
+    ):
         """
         初始化 Anthropic 提供商
 
         Args:
             api_key: Anthropic API Key
+            base_url: 可选的 API 地址（用于指向本地 mock Messages 端点）
+            session_store: 会话存储，默认使用全局 LRU 存储
+            compaction_policy: 上下文压缩策略，默认按配置的 token 预算压缩
         """
-        self.client = AsyncAnthropic(api_key=api_key)
-        self.sessions: Dict[str, List[Message]] = {}
+        client_kwargs: Dict[str, Any] = {"api_key": api_key}
+        if base_url:
+            client_kwargs["base_url"] = base_url
+        # anthropic SDK 导入较慢，创建提供商时再加载
+        from anthropic import AsyncAnthropic
+
+        self.client = AsyncAnthropic(**client_kwargs)
+
+        if compaction_policy is None:
+            from app.config.settings import settings
+            compaction_policy = CompactionPolicy(
+                max_context_tokens=settings.model_context_token_budget
+            )
+        self.compaction_policy = compaction_policy
+        self.sessions: SessionStore = session_store if session_store is not None else get_session_store()
         logger.info("AnthropicProvider initialized")
 
     async def create_session(
@@ -45,22 +123,23 @@ class AnthropicProvider(ModelProvider):
         Returns:
             session_id: 会话 ID
         """
-        if not session_id:
+        if session_id:
+            # 恢复现有会话（内存或溢出存储中）
+            existing = await self.sessions.get(session_id)
+            if existing is not None:
+                if agent_config.get('system_prompt'):
+                    existing.system_prompt = agent_config['system_prompt']
+                logger.info(f"Resumed session {session_id} for agent {agent_id}")
+                return session_id
+        else:
             session_id = str(uuid.uuid4())
 
         logger.info(f"Creating session {session_id} for agent {agent_id}")
 
-        # 初始化会话历史
-        self.sessions[session_id] = []
-
-        # 如果有 system_prompt，添加到会话历史
-        if agent_config.get('system_prompt'):
-            system_msg = Message(
-                role='system',
-                content=agent_config['system_prompt'],
-                timestamp=datetime.utcnow().isoformat()
-            )
-            self.sessions[session_id].append(system_msg)
+        # 初始化会话状态（system_prompt 单独保存，便于作为缓存断点）
+        state = SessionState(system_prompt=agent_config.get('system_prompt') or None)
+        await self.sessions.put(session_id, state)
+        if state.system_prompt:
             logger.debug(f"Added system prompt to session {session_id}")
 
         return session_id
@@ -82,7 +161,8 @@ class AnthropicProvider(ModelProvider):
         Yields:
             Message: 流式返回的消息块
         """
-        if session_id not in self.sessions:
+        state = await self.sessions.get(session_id)
+        if state is None:
             logger.error(f"Session {session_id} not found")
             raise ValueError(f"Session {session_id} not found")
 
@@ -95,19 +175,19 @@ class AnthropicProvider(ModelProvider):
             content=message,
             timestamp=datetime.utcnow().isoformat()
         )
-        self.sessions[session_id].append(user_msg)
-
-        # 构建 API 请求
-        messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in self.sessions[session_id]
-            if msg.role != 'system'
-        ]
-
-        system_prompt = next(
-            (msg.content for msg in self.sessions[session_id] if msg.role == 'system'),
-            None
+        state.messages.append(user_msg)
+
+        # 超出 token 预算时压缩最早的对话
+        summary, kept, dropped = self.compaction_policy.compact(
+            state.system_prompt, state.summary, state.messages
         )
+        if dropped:
+            state.summary = summary
+            state.messages = kept
+            logger.info(f"Compacted {dropped} messages in session {session_id}")
+
+        # 构建 API 请求（带缓存断点）
+        request_params = build_request_params(state)
 
         # 获取模型配置
         model = context.get('model', 'claude-opus-4-6')
@@ -131,8 +211,7 @@ class AnthropicProvider(ModelProvider):
             async with self.client.messages.stream(
                 model=model,
                 max_tokens=max_tokens,
-                system=system_prompt,
-                messages=messages
+                **request_params
             ) as stream:
                 async for text in stream.text_stream:
                     assistant_content += text
@@ -142,6 +221,9 @@ class AnthropicProvider(ModelProvider):
                         timestamp=datetime.utcnow().isoformat(),
                         metadata={'is_chunk': True}
                     )
+                final_message = await stream.get_final_message()
+
+            self._record_usage(state, getattr(final_message, 'usage', None))
 
             # 添加完整的 assistant 消息到历史
             assistant_msg = Message(
@@ -149,13 +231,42 @@ class AnthropicProvider(ModelProvider):
                 content=assistant_content,
                 timestamp=datetime.utcnow().isoformat()
             )
-            self.sessions[session_id].append(assistant_msg)
+            state.messages.append(assistant_msg)
             logger.info(f"Message sent successfully to session {session_id}")
 
         except Exception as e:
+            # 请求失败时撤回本轮用户消息，保持 user/assistant 交替
+            if state.messages and state.messages[-1] is user_msg:
+                state.messages.pop()
             logger.error(f"Error sending message to session {session_id}: {e}")
             raise
 
+    def _record_usage(self, state: SessionState, usage: Any) -> None:
+        """累计 token 用量（包括缓存写入/命中）"""
+        if usage is None:
+            return
+        for name in USAGE_FIELDS:
+            value = getattr(usage, name, None) or 0
+            state.usage[name] = state.usage.get(name, 0) + value
+        logger.debug(
+            f"Usage: input={getattr(usage, 'input_tokens', 0)}, "
+            f"cache_read={getattr(usage, 'cache_read_input_tokens', 0)}, "
+            f"cache_write={getattr(usage, 'cache_creation_input_tokens', 0)}"
+        )
+
+    async def get_session_usage(self, session_id: str) -> Dict[str, int]:
+        """
+        获取会话累计 token 用量
+
+        Args:
+            session_id: 会话 ID
+
+        Returns:
+            Dict[str, int]: input/output/cache_creation/cache_read token 数
+        """
+        state = await self.sessions.get(session_id)
+        return dict(state.usage) if state else {}
+
     async def close_session(self, session_id: str) -> None:
         """
         关闭会话
@@ -163,8 +274,7 @@ class AnthropicProvider(ModelProvider):
         Args:
             session_id: 会话 ID
         """
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        if await self.sessions.delete(session_id):
             logger.info(f"Session {session_id} closed")
         else:
             logger.warning(f"Attempted to close non-existent session {session_id}")
@@ -179,4 +289,19 @@ class AnthropicProvider(ModelProvider):
         Returns:
             List[Message]: 会话历史消息列表
         """
-        return self.sessions.get(session_id, [])
+        state = await self.sessions.get(session_id)
+        if state is None:
+            return []
+
+        history: List[Message] = []
+        if state.system_prompt:
+            history.append(Message(role='system', content=state.system_prompt, timestamp=''))
+        if state.summary:
+            history.append(Message(
+                role='system',
+                content=state.summary,
+                timestamp='',
+                metadata={'is_summary': True}
+            ))
+        history.extend(state.messages)
+        return history
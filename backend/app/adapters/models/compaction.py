@@ -0,0 +1,92 @@
+"""
+Context Compaction - 会话上下文压缩策略
+
+按 token 预算裁剪会话历史：超出预算时丢弃最早的若干轮对话，
+并把被丢弃内容折叠成一段摘要文本，保持请求前缀稳定以提高 prompt cache 命中率。
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .base import Message
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """粗略估算 token 数（约 4 字符 / token）"""
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+
+@dataclass
+class CompactionPolicy:
+    """基于 token 预算的上下文压缩策略"""
+
+    max_context_tokens: int = 100_000  # 超过该预算时触发压缩
+    target_ratio: float = 0.5  # 压缩后历史占预算的比例（一次压够，避免每轮都改动前缀）
+    keep_recent_messages: int = 6  # 始终保留的最近消息数
+    summary_chars_per_message: int = 200  # 每条被丢弃消息写入摘要的最大字符数
+    max_summary_chars: int = 8000  # 摘要最大长度（超出时保留最新部分）
+    per_message_overhead: int = 4  # 每条消息的固定 token 开销
+
+    def message_tokens(self, message: Message) -> int:
+        return estimate_tokens(message.content) + self.per_message_overhead
+
+    def context_tokens(
+        self,
+        system_prompt: Optional[str],
+        summary: str,
+        messages: List[Message],
+    ) -> int:
+        """估算完整请求上下文的 token 数"""
+        return (
+            estimate_tokens(system_prompt)
+            + estimate_tokens(summary)
+            + sum(self.message_tokens(msg) for msg in messages)
+        )
+
+    def compact(
+        self,
+        system_prompt: Optional[str],
+        summary: str,
+        messages: List[Message],
+    ) -> Tuple[str, List[Message], int]:
+        """
+        按预算压缩会话历史
+
+        Args:
+            system_prompt: 系统提示词
+            summary: 现有摘要
+            messages: 会话消息（user/assistant 交替）
+
+        Returns:
+            (新摘要, 保留的消息, 被丢弃的消息数)
+        """
+        if self.context_tokens(system_prompt, summary, messages) <= self.max_context_tokens:
+            return summary, messages, 0
+
+        target = int(self.max_context_tokens * self.target_ratio)
+        fixed = estimate_tokens(system_prompt) + estimate_tokens(summary)
+        total = fixed + sum(self.message_tokens(msg) for msg in messages)
+
+        drop = 0
+        max_drop = max(0, len(messages) - self.keep_recent_messages)
+        while drop < max_drop and total > target:
+            total -= self.message_tokens(messages[drop])
+            drop += 1
+
+        # 保留部分必须以 user 消息开头（Messages API 要求）
+        while drop < len(messages) - 1 and messages[drop].role != "user":
+            drop += 1
+
+        if drop == 0:
+            return summary, messages, 0
+
+        lines = [summary] if summary else []
+        for msg in messages[:drop]:
+            snippet = " ".join(msg.content.split())[: self.summary_chars_per_message]
+            lines.append(f"{msg.role}: {snippet}")
+        new_summary = "\n".join(lines)
+        if len(new_summary) > self.max_summary_chars:
+            new_summary = new_summary[-self.max_summary_chars:]
+
+        return new_summary, messages[drop:], drop
@@ -39,7 +39,11 @@ class ModelProviderFactory:
             api_key = config.get('api_key')
             if not api_key:
                 raise ValueError("Anthropic provider requires 'api_key' in config")
-            return AnthropicProvider(api_key=api_key)
+            from app.config.settings import settings
+            return AnthropicProvider(
+                api_key=api_key,
+                base_url=config.get('base_url') or settings.anthropic_base_url,
+            )
 
         elif provider_type == 'claude_cli':
             cli_path = config.get('cli_path', 'claude')
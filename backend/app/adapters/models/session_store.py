@@ -0,0 +1,204 @@
+"""
+Model Session Store - 模型会话存储
+
+进程内 LRU 会话缓存，超出容量的会话溢出到数据库（Execution.meta），
+再次访问时按 session_id 从数据库恢复。
+"""
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Protocol
+
+from .base import Message
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Execution.meta 中保存溢出会话的键名
+SPILL_META_KEY = "provider_session"
+
+
+@dataclass
+class SessionState:
+    """单个模型会话的状态"""
+    system_prompt: Optional[str] = None
+    messages: List[Message] = field(default_factory=list)
+    summary: str = ""  # 被压缩掉的早期对话摘要
+    usage: Dict[str, int] = field(default_factory=dict)  # 累计 token 用量（含缓存命中）
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可 JSON 序列化的字典"""
+        return {
+            "system_prompt": self.system_prompt,
+            "messages": [msg.to_dict() for msg in self.messages],
+            "summary": self.summary,
+            "usage": dict(self.usage),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SessionState":
+        """从字典恢复会话状态"""
+        return cls(
+            system_prompt=data.get("system_prompt"),
+            messages=[
+                Message(
+                    role=item["role"],
+                    content=item.get("content", ""),
+                    timestamp=item.get("timestamp", ""),
+                    metadata=item.get("metadata") or {},
+                )
+                for item in data.get("messages", [])
+            ],
+            summary=data.get("summary", ""),
+            usage=dict(data.get("usage") or {}),
+        )
+
+
+class SessionSpill(Protocol):
+    """会话溢出存储接口"""
+
+    async def save(self, session_id: str, state: SessionState) -> None: ...
+
+    async def load(self, session_id: str) -> Optional[SessionState]: ...
+
+    async def delete(self, session_id: str) -> None: ...
+
+
+class ExecutionMetaSpill:
+    """将会话溢出到同 session_id 最新一条 Execution 的 meta 字段"""
+
+    async def _latest_execution(self, db, session_id: str):
+        from sqlalchemy import select
+        from app.models.task import Execution
+
+        result = await db.execute(
+            select(Execution)
+            .where(Execution.session_id == session_id)
+            .order_by(Execution.id.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def save(self, session_id: str, state: SessionState) -> None:
+        from app.core.db_writer import get_write_queue
+
+        async def write(db) -> None:
+            execution = await self._latest_execution(db, session_id)
+            if not execution:
+                logger.warning(f"No execution found for session {session_id}, dropping spilled state")
+                return
+            # JSON 列需要整体赋值才能被 SQLAlchemy 识别为变更
+            meta = dict(execution.meta or {})
+            meta[SPILL_META_KEY] = state.to_dict()
+            execution.meta = meta
+
+        # 读-改-写经由写队列串行执行，并与其他短写操作合并提交
+        await get_write_queue().submit(write)
+
+    async def load(self, session_id: str) -> Optional[SessionState]:
+        from app.core.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            execution = await self._latest_execution(db, session_id)
+            if not execution or not execution.meta or SPILL_META_KEY not in execution.meta:
+                return None
+            return SessionState.from_dict(execution.meta[SPILL_META_KEY])
+
+    async def delete(self, session_id: str) -> None:
+        from app.core.db_writer import get_write_queue
+
+        async def write(db) -> None:
+            execution = await self._latest_execution(db, session_id)
+            if execution and execution.meta and SPILL_META_KEY in execution.meta:
+                meta = dict(execution.meta)
+                meta.pop(SPILL_META_KEY, None)
+                execution.meta = meta
+
+        await get_write_queue().submit(write)
+
+
+class SessionStore:
+    """LRU 会话存储，超过 max_sessions 时将最久未使用的会话溢出"""
+
+    def __init__(self, max_sessions: int = 256, spill: Optional[SessionSpill] = None):
+        """
+        Args:
+            max_sessions: 内存中最多保留的会话数
+            spill: 溢出存储，None 表示直接丢弃被淘汰的会话
+        """
+        self.max_sessions = max_sessions
+        self.spill = spill
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def get(self, session_id: str) -> Optional[SessionState]:
+        """获取会话，内存未命中时尝试从溢出存储恢复"""
+        state = self._sessions.get(session_id)
+        if state is not None:
+            self._sessions.move_to_end(session_id)
+            return state
+
+        if self.spill is None:
+            return None
+
+        try:
+            state = await self.spill.load(session_id)
+        except Exception as e:
+            logger.error(f"Failed to load spilled session {session_id}: {e}")
+            return None
+
+        if state is not None:
+            logger.info(f"Restored session {session_id} from spill storage")
+            await self.put(session_id, state)
+        return state
+
+    async def put(self, session_id: str, state: SessionState) -> None:
+        """写入会话并按 LRU 淘汰超出容量的会话"""
+        evicted = []
+        async with self._lock:
+            self._sessions[session_id] = state
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                evicted.append(self._sessions.popitem(last=False))
+
+        for evicted_id, evicted_state in evicted:
+            logger.info(f"Evicting session {evicted_id} from memory")
+            if self.spill is None:
+                continue
+            try:
+                await self.spill.save(evicted_id, evicted_state)
+            except Exception as e:
+                logger.error(f"Failed to spill session {evicted_id}: {e}")
+
+    async def delete(self, session_id: str) -> bool:
+        """删除会话（内存和溢出存储）"""
+        existed = self._sessions.pop(session_id, None) is not None
+        if self.spill is not None:
+            try:
+                await self.spill.delete(session_id)
+            except Exception as e:
+                logger.error(f"Failed to delete spilled session {session_id}: {e}")
+        return existed
+
+
+# 全局会话存储实例（所有 Provider 实例共享）
+_session_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """获取全局会话存储实例"""
+    global _session_store
+    if _session_store is None:
+        from app.config.settings import settings
+
+        _session_store = SessionStore(
+            max_sessions=settings.model_session_cache_size,
+            spill=ExecutionMetaSpill(),
+        )
+    return _session_store
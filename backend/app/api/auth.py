@@ -23,7 +23,7 @@ from app.core.database import get_db
 from app.core.security import (
     authenticate_user,
     create_access_token,
-    get_password_hash,
+    get_password_hash_async,
     get_current_active_user,
     get_user_by_username,
     get_user_by_email,
@@ -92,7 +92,7 @@ async def register(
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -157,7 +157,7 @@ async def update_user_me(
         current_user.full_name = user_update.full_name
 
     if user_update.password is not None:
-        current_user.hashed_password = get_password_hash(user_update.password)
+        current_user.hashed_password = await get_password_hash_async(user_update.password)
 
     await db.commit()
     await db.refresh(current_user)
@@ -8,21 +8,26 @@ Agent API Router - Claude Code Subagent 管理
 - 文件内容读写
 """
 from typing import Optional
-from fastapi import APIRouter, Depends, Query, status, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, Depends, Query, Request, Response, status, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pathlib import Path
 
+from app.core.catalog import catalog_etag
 from app.core.database import get_db
 from app.core.exceptions import ConflictException, NotFoundException
 from app.core.logging import get_logger
 from app.repositories.agent_repository import AgentRepository
+from app.repositories.execution_message_repository import ExecutionMessageRepository
 from app.repositories.executions_repo import ExecutionRepository
 from app.services.agent_service import AgentService
+from app.services.job_manager import JobContext, get_job_manager
 from app.services.agent_test_service import AgentTestService
 from app.services.agent_runtime_service import AgentRuntimeService
 from app.adapters.claude.file_scanner import ClaudeFileScanner
 from app.config.settings import settings
+from app.core.streaming import sse_log_event
+from app.schemas.job import JobResponse
 from app.models.task import ExecutionStatus, ExecutionType, Execution
 from datetime import datetime
 import time
@@ -123,13 +128,13 @@ async def test_agent_websocket(
 
         logger.info(f"[WebSocket] Session {session_execution.session_id} for agent {agent_id}, is_reconnect: {is_reconnect}")
 
-        # 解析聊天历史
-        chat_history = []
-        if session_execution.chat_history:
-            try:
-                chat_history = json.loads(session_execution.chat_history)
-            except:
-                chat_history = []
+        # 读取最近的聊天历史（更早的消息由前端按 seq 懒加载）
+        message_repo = ExecutionMessageRepository(db)
+        chat_history = await message_repo.tail(
+            session_execution.id, limit=settings.chat_history_tail_size + 1
+        )
+        history_has_more = len(chat_history) > settings.chat_history_tail_size
+        chat_history = chat_history[-settings.chat_history_tail_size:]
 
         # 发送就绪消息（包含会话信息和聊天历史）
         logger.info(f"[WebSocket] Sending ready message for agent {agent_id}")
@@ -139,7 +144,8 @@ async def test_agent_websocket(
             'session_id': session_execution.session_id,
             'execution_id': session_execution.id,
             'is_reconnect': is_reconnect,  # 基于是否找到活跃会话来判断
-            'chat_history': chat_history  # 返回聊天历史
+            'chat_history': chat_history,  # 返回最近的聊天历史
+            'history_has_more': history_has_more
         })
         logger.info(f"[WebSocket] Ready message sent successfully for agent {agent_id}")
 
@@ -165,15 +171,7 @@ async def test_agent_websocket(
                     execution.started_at = datetime.utcnow()
                 await db.commit()
 
-                # 添加用户消息到聊天历史
-                if execution.chat_history:
-                    try:
-                        chat_history = json.loads(execution.chat_history)
-                    except:
-                        chat_history = []
-                else:
-                    chat_history = []
-
+                # 用户消息与 Agent 响应在本轮结束时一起追加到聊天历史
                 user_message = {
                     'id': f'user-{int(time.time() * 1000)}',
                     'role': 'user',
@@ -181,7 +179,6 @@ async def test_agent_websocket(
                     'timestamp': datetime.utcnow().isoformat(),
                     'status': 'success'
                 }
-                chat_history.append(user_message)
 
                 execution_id = session_execution_id
 
@@ -226,69 +223,23 @@ Please respond according to your role and capabilities."""
                     'message': '执行命令...'
                 })
 
-                # 使用队列来传递日志
-                log_queue = asyncio.Queue()
-                execution_done = asyncio.Event()
-
-                # 定义日志回调函数
-                def log_callback(stream_type: str, line: str):
-                    asyncio.create_task(log_queue.put((stream_type, line)))
-
-                # 在后台执行命令
-                async def run_command():
-                    try:
-                        # 创建环境变量副本，移除 CLAUDECODE
-                        env = os.environ.copy()
-                        env.pop("CLAUDECODE", None)
-
-                        client = ClaudeCliClient()
-                        result = await client.run_command_with_streaming(
-                            cmd=cmd,
-                            log_callback=log_callback,
-                            timeout=180,
-                            env=env
-                        )
-                        await log_queue.put(('result', result))
-                    except Exception as e:
-                        await log_queue.put(('error', str(e)))
-                    finally:
-                        execution_done.set()
-
-                # 启动后台任务
-                asyncio.create_task(run_command())
+                # 创建环境变量副本，移除 CLAUDECODE
+                env = os.environ.copy()
+                env.pop("CLAUDECODE", None)
 
-                # 持续从队列中读取日志并推送
+                # 直接迭代命令输出：突发输出合并为一条消息，发送慢时反压到 CLI 进程
                 result_data = None
-                while not execution_done.is_set() or not log_queue.empty():
-                    try:
-                        item = await asyncio.wait_for(log_queue.get(), timeout=0.1)
-
-                        if item[0] == 'result':
-                            result_data = item[1]
-                            break
-                        elif item[0] == 'error':
-                            await websocket.send_json({
-                                'type': 'error',
-                                'message': f'执行错误: {item[1]}'
-                            })
-
-                            # 更新为失败状态
-                            execution = await execution_repo.get(execution_id)
-                            execution.status = ExecutionStatus.FAILED
-                            execution.error_message = item[1]
-                            execution.finished_at = datetime.utcnow()
-                            await db.commit()
-                            break
-                        else:
-                            # 推送日志
-                            stream_type, line = item
-                            await websocket.send_json({
-                                'type': 'log',
-                                'message': line
-                            })
-
-                    except asyncio.TimeoutError:
-                        continue
+                client = ClaudeCliClient()
+                async for event in client.stream_command(cmd=cmd, timeout=180, env=env):
+                    if event["type"] == "result":
+                        result_data = event["data"]
+                    else:
+                        lines = [line.text for line in event["lines"]]
+                        await websocket.send_json({
+                            'type': 'log',
+                            'message': "\n".join(lines),
+                            'lines': lines
+                        })
 
                 # 发送完成消息并更新 Execution 状态
                 if result_data:
@@ -303,12 +254,11 @@ Please respond according to your role and capabilities."""
                             'timestamp': datetime.utcnow().isoformat(),
                             'status': 'success'
                         }
-                        chat_history.append(agent_message)
+                        await message_repo.append(execution_id, user_message, agent_message)
 
                         # 更新为成功状态
                         execution.status = ExecutionStatus.SUCCEEDED
                         execution.test_output = result_data['output']
-                        execution.chat_history = json.dumps(chat_history)
                         execution.finished_at = datetime.utcnow()
                         await db.commit()
 
@@ -331,13 +281,12 @@ Please respond according to your role and capabilities."""
                             'timestamp': datetime.utcnow().isoformat(),
                             'status': 'error'
                         }
-                        chat_history.append(agent_message)
+                        await message_repo.append(execution_id, user_message, agent_message)
 
                         # 更新为失败状态
                         execution.status = ExecutionStatus.FAILED
                         execution.error_message = result_data['error']
                         execution.test_output = error_msg
-                        execution.chat_history = json.dumps(chat_history)
                         execution.finished_at = datetime.utcnow()
                         await db.commit()
 
@@ -468,54 +417,29 @@ async def list_agents(
 
 @router.get(
     "/categories",
-    summary="Get agent categories and subcategories"
+    summary="获取分类和子分类"
 )
 async def get_agent_categories(
+    request: Request,
+    response: Response,
     service: AgentService = Depends(get_agent_service)
 ):
-    """Get all agent categories with their subcategories (plugins and projects)"""
-    agents = await service.list_agents(skip=0, limit=10000)
-
-    # Count by scope
-    counts = {
-        "builtin": 0,
-        "user": 0,
-        "project": 0,
-        "plugin": 0
-    }
+    """
+    获取子代理的分类统计和子分类列表
 
-    # Collect unique plugins and projects
-    plugins = {}  # plugin_name -> count
-    projects = {}  # project_name -> count
-
-    for agent in agents.items:
-        scope = agent.scope.value if hasattr(agent.scope, 'value') else agent.scope
-        counts[scope] = counts.get(scope, 0) + 1
-
-        # Extract project name from path
-        if scope == "project" and agent.meta:
-            path = agent.meta.get("path", "")
-            if path:
-                # Extract project directory name from path
-                parts = Path(path).parts
-                if ".claude" in parts:
-                    claude_index = parts.index(".claude")
-                    if claude_index > 0:
-                        project_name = parts[claude_index - 1]
-                        projects[project_name] = projects.get(project_name, 0) + 1
+    返回：
+    - counts: 各作用域的数量统计
+    - plugins: 插件子分类列表
+    - projects: 项目子分类列表
 
-    return {
-        "counts": counts,
-        "plugins": [
-            {"id": name, "name": name, "count": count}
-            for name, count in sorted(plugins.items())
-        ],
-        "projects": [
-            {"id": name, "name": name, "count": count}
-            for name, count in sorted(projects.items())
-        ]
-    }
+    响应带 ETag，客户端携带 If-None-Match 且目录未变化时返回 304。
+    """
+    etag = catalog_etag("agents")
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
+    response.headers["ETag"] = etag
+    return await service.get_categories()
 
 
 @router.get(
@@ -544,24 +468,6 @@ async def get_scope_stats(
     return await service.get_scope_stats()
 
 
-@router.get(
-    "/categories",
-    summary="获取分类和子分类"
-)
-async def get_categories(
-    service: AgentService = Depends(get_agent_service)
-):
-    """
-    获取子代理的分类统计和子分类列表
-
-    返回：
-    - counts: 各作用域的数量统计
-    - plugins: 插件子分类列表
-    - projects: 项目子分类列表
-    """
-    return await service.get_categories()
-
-
 @router.get(
     "/{agent_id}",
     response_model=AgentResponse,
@@ -873,7 +779,8 @@ async def test_agent_stream(
             yield f"data: {json.dumps({'type': 'log', 'message': f'开始执行 Agent: {agent.name}'})}\n\n"
 
             # 判断是否有历史对话（决定用 --session-id 还是 --resume）
-            has_history = bool(execution.chat_history and json.loads(execution.chat_history))
+            message_repo = ExecutionMessageRepository(db)
+            has_history = await message_repo.count(execution_id) > 0
 
             if has_history:
                 # 后续对话：只发用户消息，CLI 通过 --resume 恢复上下文
@@ -923,61 +830,19 @@ Please respond according to your role and capabilities."""
             yield f"data: {json.dumps({'type': 'log', 'message': f'使用模型: {model_name}'})}\n\n"
             yield f"data: {json.dumps({'type': 'log', 'message': '执行命令...'})}\n\n"
 
-            # 使用队列来传递日志
-            log_queue = asyncio.Queue()
-            execution_done = asyncio.Event()
+            # 创建环境变量副本，移除 CLAUDECODE
+            import os
+            env = os.environ.copy()
+            env.pop("CLAUDECODE", None)
 
-            # 定义日志回调函数
-            def log_callback(stream_type: str, line: str):
-                # 将日志放入队列
-                asyncio.create_task(log_queue.put((stream_type, line)))
-
-            # 在后台执行命令
-            async def run_command():
-                try:
-                    # 创建环境变量副本，移除 CLAUDECODE
-                    import os
-                    env = os.environ.copy()
-                    env.pop("CLAUDECODE", None)
-
-                    client = ClaudeCliClient()
-                    result = await client.run_command_with_streaming(
-                        cmd=cmd,
-                        log_callback=log_callback,
-                        timeout=180,
-                        env=env
-                    )
-                    # 将结果放入队列
-                    await log_queue.put(('result', result))
-                except Exception as e:
-                    await log_queue.put(('error', str(e)))
-                finally:
-                    execution_done.set()
-
-            # 启动后台任务
-            asyncio.create_task(run_command())
-
-            # 持续从队列中读取日志并推送
+            # 直接迭代命令输出：突发输出合并为一个 SSE 事件，客户端读取慢时反压到 CLI 进程
             result_data = None
-            while not execution_done.is_set() or not log_queue.empty():
-                try:
-                    # 等待日志消息，超时 0.1 秒
-                    item = await asyncio.wait_for(log_queue.get(), timeout=0.1)
-
-                    if item[0] == 'result':
-                        result_data = item[1]
-                        break
-                    elif item[0] == 'error':
-                        yield f"data: {json.dumps({'type': 'error', 'message': f'执行错误: {item[1]}'})}\n\n"
-                        return
-                    else:
-                        # 推送日志
-                        stream_type, line = item
-                        yield f"data: {json.dumps({'type': 'log', 'message': line})}\n\n"
-
-                except asyncio.TimeoutError:
-                    # 超时，继续等待
-                    continue
+            client = ClaudeCliClient()
+            async for event in client.stream_command(cmd=cmd, timeout=180, env=env):
+                if event["type"] == "result":
+                    result_data = event["data"]
+                else:
+                    yield sse_log_event([line.text for line in event["lines"]])
 
             # 发送完成消息并更新 Execution 状态
             if result_data:
@@ -1013,9 +878,6 @@ Please respond according to your role and capabilities."""
                     
                     content_type = detect_content_type(result_data['output'])
                     
-                    # 加载现有历史
-                    chat_history = json.loads(execution.chat_history) if execution.chat_history else []
-                    
                     # 追加用户消息
                     user_message = {
                         "id": f"user-{int(time.time() * 1000)}",
@@ -1024,7 +886,6 @@ Please respond according to your role and capabilities."""
                         "timestamp": datetime.utcnow().isoformat(),
                         "status": "success"
                     }
-                    chat_history.append(user_message)
                     
                     # 追加 AI 回复
                     assistant_message = {
@@ -1035,13 +896,12 @@ Please respond according to your role and capabilities."""
                         "status": "success",
                         "content_type": content_type
                     }
-                    chat_history.append(assistant_message)
+                    await message_repo.append(execution_id, user_message, assistant_message)
                     
                     # 更新为成功状态并保存历史
                     execution.status = ExecutionStatus.SUCCEEDED
                     execution.test_output = result_data['output']
                     execution.finished_at = datetime.utcnow()
-                    execution.chat_history = json.dumps(chat_history, ensure_ascii=False)
                     execution.last_activity_at = datetime.utcnow()
                     await db.commit()
 
@@ -1089,20 +949,9 @@ Please respond according to your role and capabilities."""
     )
 
 
-@router.post(
-    "/generate",
-    response_model=AgentGenerateResponse,
-    summary="使用 Claude 生成子代理"
-)
-async def generate_agent(
-    request: AgentGenerateRequest
-):
-    """
-    使用 Claude 生成子代理配置
-
-    类似 /agents 命令的 "Generate with Claude" 功能
-    """
-    import subprocess
+async def _generate_agent(request: AgentGenerateRequest, job: JobContext) -> AgentGenerateResponse:
+    """调用 Claude CLI 生成子代理配置（在后台 Job 中运行）"""
+    import asyncio
     import re
     import os
 
@@ -1151,21 +1000,29 @@ You are a senior code reviewer. When invoked:
         env = os.environ.copy()
         env.pop("CLAUDECODE", None)
 
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=120,
+        job.report("调用 Claude CLI...", 0.1)
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
             env=env
         )
-
-        if result.returncode != 0:
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=120)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # 超时或 Job 被取消时结束 CLI 进程
+            process.kill()
+            await process.wait()
+            raise
+
+        if process.returncode != 0:
             raise HTTPException(
                 status_code=500,
-                detail=f"Claude CLI 错误: {result.stderr}"
+                detail=f"Claude CLI 错误: {stderr.decode('utf-8', errors='replace')}"
             )
 
-        output = result.stdout.strip()
+        output = stdout.decode("utf-8", errors="replace").strip()
+        job.report("解析生成结果...", 0.9)
 
         # 提取 Markdown 内容
         md_match = re.search(r'(---[\s\S]*?)(?:```|$)', output)
@@ -1210,7 +1067,7 @@ You are a senior code reviewer. When invoked:
             preview_content=markdown_content
         )
 
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
         raise HTTPException(
             status_code=504,
             detail="生成超时，请稍后重试"
@@ -1220,6 +1077,8 @@ You are a senior code reviewer. When invoked:
             status_code=500,
             detail="未找到 Claude CLI，请确保已安装"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -1227,6 +1086,41 @@ You are a senior code reviewer. When invoked:
         )
 
 
+@router.post(
+    "/generate",
+    response_model=AgentGenerateResponse,
+    summary="使用 Claude 生成子代理"
+)
+async def generate_agent(
+    request: AgentGenerateRequest
+):
+    """
+    使用 Claude 生成子代理配置
+
+    类似 /agents 命令的 "Generate with Claude" 功能。
+    同步等待结果；耗时较长时建议使用 POST /agents/generate/jobs。
+    """
+    return await get_job_manager().run("agent_generate", lambda job: _generate_agent(request, job))
+
+
+@router.post(
+    "/generate/jobs",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="提交子代理生成任务"
+)
+async def submit_generate_agent_job(
+    request: AgentGenerateRequest
+):
+    """
+    提交后台生成任务并立即返回 Job
+
+    通过 GET /jobs/{id}/events 订阅进度，成功后 result 与 POST /agents/generate 的响应一致。
+    """
+    job = await get_job_manager().submit("agent_generate", lambda job: _generate_agent(request, job))
+    return JobResponse(**job.to_dict())
+
+
 @router.post(
     "/generate/save",
     response_model=AgentResponse,
@@ -1614,24 +1508,22 @@ async def unified_agent_session(
         # 启动输出读取任务
         async def read_output_task():
             try:
-                async for output in process_manager.read_from_process(agent_id, db):
-                    if mode == 'chat':
-                        # 对话模式：解析为聊天消息
-                        chat_msg = process_manager.parse_chat_message(output)
-                        if chat_msg:
-                            process_info.chat_history.append(chat_msg)
-                            await websocket.send_json({
-                                'type': 'chat_message',
-                                'message': {
-                                    'id': chat_msg.id,
-                                    'role': chat_msg.role,
-                                    'content': chat_msg.content,
-                                    'timestamp': chat_msg.timestamp,
-                                    'status': chat_msg.status
-                                }
-                            })
-                    else:
-                        # Terminal 模式：直接发送原始输出
+                if mode == 'chat':
+                    # 对话模式：进程管理器统一解析并写入聊天历史（多个连接不会重复追加）
+                    async for chat_msg in process_manager.read_chat_from_process(agent_id):
+                        await websocket.send_json({
+                            'type': 'chat_message',
+                            'message': {
+                                'id': chat_msg.id,
+                                'role': chat_msg.role,
+                                'content': chat_msg.content,
+                                'timestamp': chat_msg.timestamp,
+                                'status': chat_msg.status
+                            }
+                        })
+                else:
+                    # Terminal 模式：直接发送原始输出
+                    async for output in process_manager.read_from_process(agent_id):
                         await websocket.send_json({
                             'type': 'output',
                             'data': output
@@ -1706,6 +1598,8 @@ async def unified_agent_session(
                 await read_task
             except asyncio.CancelledError:
                 pass
+            # 写入尚未落库的输出和聊天消息
+            await process_manager.flush_activity(agent_id)
 
     except Exception as e:
         logger.error(f"[UnifiedSession] Error: {e}")
@@ -1883,8 +1777,7 @@ async def api_agent_session(
             session_id=session_id,
             status=ExecutionStatus.RUNNING,
             started_at=datetime.utcnow(),
-            test_input='',  # 初始为空，收到第一条消息时更新
-            chat_history='[]'
+            test_input=''  # 初始为空，收到第一条消息时更新
         )
         await execution_repo.create(execution)
 
@@ -1918,15 +1811,13 @@ async def api_agent_session(
                         await db.commit()
                         logger.info(f"[ApiSession] Updated test_input for execution {execution_id}")
 
-                    # 更新聊天历史 - 添加用户消息
-                    chat_history = json.loads(execution.chat_history) if execution.chat_history else []
+                    # 用户消息在助手响应完成后一起追加到聊天历史
                     user_message = {
                         'id': f'user-{int(time.time() * 1000)}',
                         'role': 'user',
                         'content': user_input,
                         'timestamp': datetime.utcnow().isoformat()
                     }
-                    chat_history.append(user_message)
 
                     # 发送到模型提供商，流式返回
                     try:
@@ -1972,8 +1863,9 @@ async def api_agent_session(
                                 'content': assistant_content,
                                 'timestamp': datetime.utcnow().isoformat()
                             }
-                            chat_history.append(assistant_message)
-                            execution.chat_history = json.dumps(chat_history, ensure_ascii=False)
+                            await ExecutionMessageRepository(db).append(
+                                execution_id, user_message, assistant_message
+                            )
                             execution.last_activity_at = datetime.utcnow()
                             await db.commit()
                             logger.info(f"[ApiSession] Updated chat history for execution {execution_id}")
@@ -2232,17 +2124,16 @@ async def list_agent_sessions(
     Returns:
         Session 列表
     """
-    import json
-    
     repo = ExecutionRepository(db)
     sessions = await repo.list_agent_sessions(agent_id, limit)
+    message_counts = await ExecutionMessageRepository(db).count_many(s.id for s in sessions)
     
     return [
         {
             "session_id": s.session_id,
             "execution_id": s.id,
             "last_activity": s.last_activity_at.isoformat() if s.last_activity_at else None,
-            "message_count": len(json.loads(s.chat_history)) if s.chat_history else 0,
+            "message_count": message_counts.get(s.id, 0),
             "created_at": s.created_at.isoformat() if s.created_at else None
         }
         for s in sessions
@@ -2265,7 +2156,6 @@ async def fork_session(
     Returns:
         新 session 的信息
     """
-    import json
     import uuid
     from app.models.task import Task, TaskStatus
     from app.services.agent_session_service_async import AgentSessionServiceAsync
@@ -2278,11 +2168,6 @@ async def fork_session(
     
     # 创建新 session
     new_session_id = str(uuid.uuid4())
-    history = json.loads(source.chat_history) if source.chat_history else []
-    
-    # 截取到分叉点
-    if request.fork_point_index is not None:
-        history = history[:request.fork_point_index + 1]
     
     # 创建虚拟 Task
     task = Task(
@@ -2303,18 +2188,23 @@ async def fork_session(
         session_id=new_session_id,
         last_activity_at=datetime.utcnow(),
         is_background=True,
-        started_at=datetime.utcnow(),
-        chat_history=json.dumps(history)
+        started_at=datetime.utcnow()
     )
     
     db.add(new_execution)
+    await db.flush()
+    
+    # 复制历史到分叉点（seq 即消息在历史中的下标）
+    message_count = await ExecutionMessageRepository(db).copy(
+        source.id, new_execution.id, upto_seq=request.fork_point_index
+    )
     await db.commit()
     await db.refresh(new_execution)
     
     return {
         "session_id": new_session_id,
         "execution_id": new_execution.id,
-        "message_count": len(history),
+        "message_count": message_count,
         "created_at": new_execution.created_at.isoformat() if new_execution.created_at else None
     }
 
@@ -2342,7 +2232,7 @@ async def clear_session(
         raise HTTPException(status_code=404, detail="Session not found")
     
     # 清空历史并标记为完成
-    execution.chat_history = '[]'
+    await ExecutionMessageRepository(db).clear(execution.id)
     execution.status = ExecutionStatus.COMPLETED
     execution.finished_at = datetime.utcnow()
     await db.commit()
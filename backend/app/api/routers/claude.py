@@ -14,9 +14,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.services.sync_service import SyncService
+from app.schemas.job import JobResponse
+from app.services.job_manager import JobContext, get_job_manager
 from app.services.prompt_optimizer_service import PromptOptimizerService, OptimizerMode
 from app.adapters.claude import ClaudeAdapter
 from app.adapters.claude.cli_client import ClaudeCliClient
+from app.adapters.claude.health_checker import invalidate_health_cache
+from app.core.catalog import bump_catalog_version
 from app.config.settings import settings
 
 router = APIRouter(prefix="/claude", tags=["claude"])
@@ -229,14 +233,15 @@ async def sync_agent_teams(session: AsyncSession = Depends(get_db)):
 
 
 @router.get("/health")
-async def check_claude_health():
+async def check_claude_health(fresh: bool = False):
     """
     检查 Claude 环境健康状态
 
-    检查 Claude CLI 是否可用、配置目录是否可读等
+    检查 Claude CLI 是否可用、配置目录是否可读等。
+    结果默认来自缓存，传入 ?fresh=1 时强制重新探测。
     """
     adapter = ClaudeAdapter()
-    health = await adapter.check_health()
+    health = await adapter.check_health(fresh=fresh)
     return health
 
 
@@ -392,6 +397,8 @@ async def update_claude_settings(update: ClaudeSettingsUpdate):
                 conn.close()
 
                 logger.info(f"Updated cc-switch config for provider {provider_id}")
+                invalidate_health_cache()
+                bump_catalog_version("claude_settings")
                 return settings_config
 
             conn.close()
@@ -436,6 +443,8 @@ async def update_claude_settings(update: ClaudeSettingsUpdate):
             json.dump(current_settings, f, indent=2, ensure_ascii=False)
 
         logger.info("Updated settings.json")
+        invalidate_health_cache()
+        bump_catalog_version("claude_settings")
         return current_settings
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update settings: {str(e)}")
@@ -555,13 +564,13 @@ async def initialize_system(session: AsyncSession = Depends(get_db)):
         # Step 7: 自动扫描并配置 Git 仓库
         logger.info("Scanning git repositories...")
         try:
-            from app.services.git_repo_scanner import GitRepoScanner
+            from app.services.git_repo_scanner import get_git_repo_scanner
             from app.repositories.project_path_repository import ProjectPathRepository
             from app.services.project_path_service import ProjectPathService
 
-            scanner = GitRepoScanner()
+            scanner = get_git_repo_scanner()
             base_dirs = ["/mnt", str(Path.home())]
-            git_repos = scanner.scan_directories(base_dirs, max_depth=3)
+            git_repos = await scanner.scan_directories_async(base_dirs, max_depth=3)
 
             # 添加到项目路径配置
             project_path_repo = ProjectPathRepository(session)
@@ -620,21 +629,8 @@ async def initialize_system(session: AsyncSession = Depends(get_db)):
         }
 
 
-@router.post("/optimize-prompt", response_model=PromptOptimizeResponse)
-async def optimize_prompt(request: PromptOptimizeRequest):
-    """
-    优化用户输入的 prompt
-
-    支持两种模式：
-    - rule: 基于规则的本地优化（默认，不需要 API Key）
-    - ai: 使用 Anthropic API 进行 AI 优化（需要配置 API Key）
-
-    Args:
-        request: 包含原始 prompt、可选上下文和优化模式的请求
-
-    Returns:
-        PromptOptimizeResponse: 包含原始和优化后的 prompt 及分析说明
-    """
+async def _optimize_prompt(request: PromptOptimizeRequest, job: JobContext) -> PromptOptimizeResponse:
+    """执行 prompt 优化（在后台 Job 中运行），AI 模式失败时降级到规则模式"""
     try:
         # 根据请求的模式选择优化器
         mode = OptimizerMode.AI if request.mode == "ai" else OptimizerMode.RULE
@@ -643,6 +639,7 @@ async def optimize_prompt(request: PromptOptimizeRequest):
         optimizer = PromptOptimizerService(mode=mode)
 
         # 执行优化
+        job.report(f"使用 {mode.value} 模式优化...", 0.1)
         result = await optimizer.optimize_prompt(
             prompt=request.prompt,
             context=request.context
@@ -659,6 +656,7 @@ async def optimize_prompt(request: PromptOptimizeRequest):
     except Exception as e:
         # 如果 AI 模式失败，自动降级到规则模式
         if request.mode == "ai":
+            job.report("AI 模式失败，降级到规则模式...", 0.5)
             try:
                 optimizer = PromptOptimizerService(mode=OptimizerMode.RULE)
                 result = await optimizer.optimize_prompt(
@@ -691,3 +689,32 @@ async def optimize_prompt(request: PromptOptimizeRequest):
             success=False,
             error=str(e)
         )
+
+
+@router.post("/optimize-prompt", response_model=PromptOptimizeResponse)
+async def optimize_prompt(request: PromptOptimizeRequest):
+    """
+    优化用户输入的 prompt
+
+    支持两种模式：
+    - rule: 基于规则的本地优化（默认，不需要 API Key）
+    - ai: 使用 Anthropic API 进行 AI 优化（需要配置 API Key）
+
+    Args:
+        request: 包含原始 prompt、可选上下文和优化模式的请求
+
+    Returns:
+        PromptOptimizeResponse: 包含原始和优化后的 prompt 及分析说明
+    """
+    return await get_job_manager().run("prompt_optimize", lambda job: _optimize_prompt(request, job))
+
+
+@router.post("/optimize-prompt/jobs", response_model=JobResponse, status_code=202)
+async def submit_optimize_prompt_job(request: PromptOptimizeRequest):
+    """
+    提交 prompt 优化后台任务并立即返回 Job
+
+    通过 GET /jobs/{id}/events 订阅进度，成功后 result 与 /claude/optimize-prompt 的响应一致。
+    """
+    job = await get_job_manager().submit("prompt_optimize", lambda job: _optimize_prompt(request, job))
+    return JobResponse(**job.to_dict())
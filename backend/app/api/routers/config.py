@@ -10,6 +10,8 @@ from pydantic import BaseModel
 import os
 import json
 
+from app.core.catalog import bump_catalog_version
+
 router = APIRouter(prefix="/config", tags=["config"])
 
 
@@ -328,6 +330,7 @@ async def update_models_config(update: ModelsConfigUpdate):
         # 写入文件
         with open(custom_file, 'w', encoding='utf-8') as f:
             json.dump(models_data, f, indent=2, ensure_ascii=False)
+        bump_catalog_version("models")
 
         return {
             "success": True,
@@ -353,6 +356,7 @@ async def reset_models_config():
         # 删除自定义模型文件
         if custom_file.exists():
             custom_file.unlink()
+        bump_catalog_version("models")
 
         return {
             "success": True,
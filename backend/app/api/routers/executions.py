@@ -3,24 +3,29 @@
 """
 from __future__ import annotations
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_claude_adapter
 from app.services.execution_engine import ExecutionEngine, WorkflowValidationError
-from app.repositories.executions_repo import ExecutionRepository
-from app.models.task import ExecutionType
+from app.repositories.execution_message_repository import ExecutionMessageRepository
+from app.repositories.executions_repo import ExecutionRepository, encode_cursor
+from app.models.task import ExecutionStatus, ExecutionType
 from app.schemas.executions import (
     ExecutionResponse,
     NodeExecutionResponse,
     ExecutionListResponse,
+    ExecutionMessagesResponse,
     TerminalExecutionCreate,
     TerminalExecutionUpdate
 )
 
 router = APIRouter(prefix="/executions", tags=["executions"])
 
+# count=estimate 时最多统计的记录数
+ESTIMATE_COUNT_CAP = 10000
+
 
 @router.post("/{task_id}/start", response_model=ExecutionResponse)
 async def start_execution(
@@ -93,24 +98,62 @@ async def get_execution_nodes(
     return [NodeExecutionResponse.model_validate(node) for node in nodes]
 
 
+@router.get("/{execution_id}/messages", response_model=ExecutionMessagesResponse)
+async def get_execution_messages(
+    execution_id: int,
+    limit: int = Query(50, ge=1, le=500),
+    before_seq: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    获取会话聊天消息（从最新往前分页，用于懒加载历史）
+
+    Args:
+        execution_id: 执行 ID
+        limit: 返回消息数
+        before_seq: 只返回 seq 小于该值的消息；不传则返回最新的消息
+
+    Returns:
+        ExecutionMessagesResponse: 按 seq 升序的消息列表
+    """
+    if not await ExecutionRepository(db).get(execution_id):
+        raise HTTPException(status_code=404, detail="Execution not found")
+
+    messages = await ExecutionMessageRepository(db).tail(
+        execution_id, limit=limit + 1, before_seq=before_seq
+    )
+    return ExecutionMessagesResponse(
+        execution_id=execution_id,
+        messages=messages[-limit:],
+        has_more=len(messages) > limit,
+    )
+
+
 @router.get("/", response_model=ExecutionListResponse)
 async def list_executions(
     skip: int = 0,
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=1000),
     task_id: Optional[int] = None,
     workflow_id: Optional[int] = None,
     execution_type: Optional[ExecutionType] = None,
+    status: Optional[ExecutionStatus] = None,
+    cursor: Optional[str] = None,
+    count: Literal["exact", "estimate", "none"] = "exact",
     db: AsyncSession = Depends(get_db)
 ):
     """
     获取执行列表
 
     Args:
-        skip: 跳过记录数
+        skip: 跳过记录数（传入 cursor 时忽略）
         limit: 返回记录数
         task_id: 按任务 ID 过滤
         workflow_id: 按工作流 ID 过滤
         execution_type: 按执行类型过滤 (workflow/agent_test/agent_team)
+        status: 按执行状态过滤
+        cursor: 上一页响应中的 next_cursor，使用 keyset 分页
+        count: 总数统计方式：exact 精确统计，estimate 最多统计到
+            ESTIMATE_COUNT_CAP 条，none 不统计
 
     Returns:
         ExecutionListResponse: 执行列表
@@ -124,15 +167,31 @@ async def list_executions(
         filters["workflow_id"] = workflow_id
     if execution_type is not None:
         filters["execution_type"] = execution_type
+    if status is not None:
+        filters["status"] = status
+
+    try:
+        executions = await repo.list_for_history(
+            skip=skip, limit=limit, filters=filters, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    executions = await repo.list_for_history(skip=skip, limit=limit, filters=filters)
-    total = await repo.count(filters=filters)
+    total = None
+    total_is_estimate = False
+    if count == "exact":
+        total = await repo.count_for_history(filters=filters)
+    elif count == "estimate":
+        total = await repo.count_for_history(filters=filters, cap=ESTIMATE_COUNT_CAP)
+        total_is_estimate = total >= ESTIMATE_COUNT_CAP
 
     return ExecutionListResponse(
         items=[ExecutionResponse.model_validate(e) for e in executions],
         total=total,
-        skip=skip,
-        limit=limit
+        total_is_estimate=total_is_estimate,
+        skip=0 if cursor else skip,
+        limit=limit,
+        next_cursor=encode_cursor(executions[-1]) if len(executions) == limit else None,
     )
 
 
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config.settings import settings
 from app.core.database import get_db, engine
+from app.core import metrics, startup_timing
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -32,6 +33,18 @@ async def health_check(request: Request) -> dict:
     }
 
 
+@router.get("/startup")
+async def startup_report() -> dict:
+    """启动耗时报告（各阶段耗时与总耗时，单位毫秒）"""
+    return startup_timing.report()
+
+
+@router.get("/metrics")
+async def metrics_summary() -> dict:
+    """运行时指标汇总（路由耗时分位数、事件循环延迟、SQL、子进程、WebSocket 队列、扫描耗时）"""
+    return metrics.dashboard_snapshot()
+
+
 @router.get("/health/detailed")
 async def detailed_health_check(db: AsyncSession = Depends(get_db)) -> dict:
     """
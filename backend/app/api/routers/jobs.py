@@ -0,0 +1,65 @@
+"""
+Jobs API - 后台任务查询、事件订阅和取消
+"""
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.schemas.job import JobListResponse, JobResponse
+from app.services.job_manager import Job, get_job_manager
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+def _get_job_or_404(job_id: str) -> Job:
+    job = get_job_manager().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get("", response_model=JobListResponse, summary="列出后台任务")
+async def list_jobs(
+    kind: Optional[str] = Query(None, description="按任务类型过滤"),
+):
+    """列出保留期内的后台任务（按创建时间倒序）"""
+    jobs = get_job_manager().list(kind=kind)
+    return JobListResponse(items=[JobResponse(**job.to_dict()) for job in jobs], total=len(jobs))
+
+
+@router.get("/{job_id}", response_model=JobResponse, summary="获取后台任务状态")
+async def get_job(job_id: str):
+    """获取任务状态；成功时 result 字段为结果"""
+    return JobResponse(**_get_job_or_404(job_id).to_dict())
+
+
+@router.get("/{job_id}/events", summary="订阅后台任务事件（SSE）")
+async def stream_job_events(job_id: str):
+    """
+    以 SSE 推送任务事件，先回放已有事件，任务结束后关闭连接
+
+    事件类型：
+    - status: 状态变化（结束时附带 result / error）
+    - progress: 进度信息（message / progress）
+    """
+    _get_job_or_404(job_id)
+
+    async def generate():
+        async for event in get_job_manager().events(job_id):
+            yield f"data: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse, summary="取消后台任务")
+async def cancel_job(job_id: str):
+    """取消排队中或运行中的任务；已结束的任务原样返回"""
+    job = _get_job_or_404(job_id)
+    get_job_manager().cancel(job_id)
+    return JobResponse(**job.to_dict())
@@ -2,24 +2,35 @@
 本地文件系统 HTTP 服务路由。
 将本地绝对路径通过 HTTP 暴露，使 file:// URL 可以在 iframe 中加载。
 仅允许访问已在 projects 表中登记的项目目录，防止任意路径穿越。
+
+- 项目根目录来自内存索引（ProjectRootIndex），单个请求不再查询全部项目
+- 响应带 ETag / Last-Modified，条件请求返回 304；非 HTML 文件支持 Range
+- HTML 文件流式输出，只缓冲 <head> 部分用于注入 <base> 标签
 """
 from __future__ import annotations
 
 import mimetypes
+import os
+import stat
 import urllib.parse
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
+from typing import Iterator
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config.settings import settings
 from app.core.database import get_db
-from app.repositories.project_repository import ProjectRepository
+from app.services.project_root_index import get_project_root_index
 
 router = APIRouter(prefix="/localfs", tags=["localfs"])
 
+_CHUNK_SIZE = 64 * 1024
+
 
-async def _resolve_and_check(file_path: str, db: AsyncSession) -> Path:
+async def _resolve_and_check(file_path: str, db: AsyncSession) -> tuple[Path, os.stat_result]:
     """
     解析路径并验证它属于某个已登记项目目录。
     防止路径穿越攻击（../）。
@@ -27,25 +38,83 @@ async def _resolve_and_check(file_path: str, db: AsyncSession) -> Path:
     decoded = urllib.parse.unquote(file_path)
     resolved = Path("/" + decoded).resolve()
 
-    repo = ProjectRepository(db)
-    projects, _ = await repo.list_all(skip=0, limit=10000)
-    allowed_roots = [Path(p.path).resolve() for p in projects if p.path]
-
-    if not any(str(resolved).startswith(str(root)) for root in allowed_roots):
+    if await get_project_root_index().find_root(resolved, db) is None:
         raise HTTPException(status_code=403, detail="路径不在任何已登记的项目目录下")
 
-    if not resolved.exists():
+    try:
+        st = resolved.stat()
+    except OSError:
         raise HTTPException(status_code=404, detail="文件不存在")
 
-    if not resolved.is_file():
+    if not stat.S_ISREG(st.st_mode):
         raise HTTPException(status_code=400, detail="不是文件")
 
-    return resolved
+    return resolved, st
+
+
+def _cache_headers(st: os.stat_result) -> dict[str, str]:
+    """根据文件 mtime/size 生成校验头；no-cache 让浏览器每次重新验证，文件改动后立即可见"""
+    return {
+        "ETag": f'"{st.st_mtime_ns:x}-{st.st_size:x}"',
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+
+def _is_not_modified(request: Request, headers: dict[str, str], st: os.stat_result) -> bool:
+    """If-None-Match 优先；没有时按 If-Modified-Since 判断"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = headers["ETag"]
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(st.st_mtime) <= since
+    return False
+
+
+def _iter_html_with_base(path: Path, base_href: str) -> Iterator[bytes]:
+    """
+    流式输出 HTML 并注入 <base> 标签
+
+    只缓冲到 </head>（最多 localfs_html_head_scan_bytes 字节）来决定注入位置，
+    其余内容原样分块输出。已有 <base> 时不修改。
+    """
+    tag = f'<base href="{base_href}">'.encode()
+    with open(path, "rb") as f:
+        head = b""
+        while len(head) < settings.localfs_html_head_scan_bytes:
+            chunk = f.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            head += chunk
+            if b"</head>" in head.lower():
+                break
+
+        lowered = head.lower()
+        index = lowered.find(b"<head>")
+        if b"<base " in lowered:
+            yield head
+        elif index >= 0:
+            index += len(b"<head>")
+            yield head[:index] + b"\n  " + tag + head[index:]
+        else:
+            yield tag + b"\n" + head
+
+        while chunk := f.read(_CHUNK_SIZE):
+            yield chunk
 
 
 @router.get("/{file_path:path}")
 async def serve_local_file(
     file_path: str,
+    request: Request,
     db: AsyncSession = Depends(get_db),
 ):
     """通过 HTTP 提供本地文件访问，路径为去掉开头斜杠的绝对路径。
@@ -54,21 +123,24 @@ async def serve_local_file(
 
     对 HTML 文件自动注入 <base> 标签，确保相对路径资源正确加载。
     """
-    resolved = await _resolve_and_check(file_path, db)
-    media_type, _ = mimetypes.guess_type(str(resolved))
+    resolved, st = await _resolve_and_check(file_path, db)
+    headers = _cache_headers(st)
+    if _is_not_modified(request, headers, st):
+        return Response(status_code=304, headers=headers)
 
     # HTML 文件：注入 <base> 标签，使相对路径相对于文件所在目录
     if resolved.suffix.lower() == ".html":
-        parent_path = str(resolved.parent)
-        base_href = f"/api/localfs{parent_path}/"
-        content = resolved.read_text(encoding="utf-8", errors="replace")
-        if "<base " not in content:
-            content = content.replace("<head>", f"<head>\n  <base href=\"{base_href}\">", 1)
-            if "<head>" not in content:
-                content = f'<base href="{base_href}">\n' + content
-        return HTMLResponse(content=content)
+        base_href = f"/api/localfs{resolved.parent}/"
+        return StreamingResponse(
+            _iter_html_with_base(resolved, base_href),
+            media_type="text/html",
+            headers=headers,
+        )
 
+    media_type, _ = mimetypes.guess_type(str(resolved))
     return FileResponse(
         path=str(resolved),
         media_type=media_type or "application/octet-stream",
+        headers=headers,
+        stat_result=st,
     )
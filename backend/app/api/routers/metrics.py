@@ -0,0 +1,13 @@
+"""Prometheus metrics endpoint."""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import get_registry
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics() -> PlainTextResponse:
+    """Prometheus 文本格式的运行时指标"""
+    return PlainTextResponse(get_registry().render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -2,7 +2,7 @@
 Plugin API Router
 """
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
@@ -59,10 +59,11 @@ async def scan_marketplace(
 
 @router.post("/check-all-updates", response_model=PluginListResponse)
 async def check_all_updates(
+    fresh: bool = Query(False, description="Bypass the cached remote heads"),
     service: PluginService = Depends(get_plugin_service)
 ):
-    """Check for updates for all plugins"""
-    return await service.check_all_updates()
+    """Check for updates for all plugins (concurrently, remote heads cached per repository)"""
+    return await service.check_all_updates(fresh=fresh)
 
 
 @router.get("/{plugin_id}", response_model=PluginResponse)
@@ -0,0 +1,95 @@
+"""
+Profiler API - 采样性能分析的开关、慢请求剖面和火焰图下载
+
+折叠栈（text/plain）可直接用 flamegraph.pl 生成火焰图，或拖入 https://www.speedscope.app 查看。
+"""
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.profiler import Profile, get_profiler
+from app.schemas.profiler import (
+    ProfileDetail,
+    ProfileListResponse,
+    ProfileSummary,
+    ProfilerStartRequest,
+    ProfilerStatusResponse,
+)
+
+router = APIRouter(prefix="/profiler", tags=["system"])
+
+
+def _folded_response(content: str, filename: str) -> PlainTextResponse:
+    return PlainTextResponse(
+        content,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _get_profile_or_404(profile_id: str) -> Profile:
+    profile = get_profiler().get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return profile
+
+
+@router.get("", response_model=ProfilerStatusResponse, summary="采样分析器状态")
+async def get_profiler_status():
+    return ProfilerStatusResponse(**get_profiler().status())
+
+
+@router.post("/start", response_model=ProfilerStatusResponse, summary="开启采样")
+async def start_profiler(request: Optional[ProfilerStartRequest] = None):
+    """开启采样；已开启时更新采样间隔和慢请求阈值"""
+    request = request or ProfilerStartRequest()
+    profiler = get_profiler()
+    profiler.start(
+        sample_interval=request.sample_interval,
+        slow_request_threshold=request.slow_request_threshold,
+    )
+    return ProfilerStatusResponse(**profiler.status())
+
+
+@router.post("/stop", response_model=ProfilerStatusResponse, summary="停止采样")
+async def stop_profiler():
+    """停止采样；已保存的剖面和全局火焰图保留到下次开启"""
+    profiler = get_profiler()
+    profiler.stop()
+    return ProfilerStatusResponse(**profiler.status())
+
+
+@router.get("/folded", response_class=PlainTextResponse, summary="下载全局折叠栈")
+async def download_folded(reset: bool = Query(False, description="下载后清空，便于按时间段采集")):
+    profiler = get_profiler()
+    content = profiler.folded()
+    if reset:
+        profiler.reset()
+    return _folded_response(content, "profile.folded")
+
+
+@router.get("/profiles", response_model=ProfileListResponse, summary="列出慢请求剖面")
+async def list_profiles():
+    """最近的慢请求剖面（新的在前）"""
+    profiles = get_profiler().profiles()
+    return ProfileListResponse(
+        items=[ProfileSummary(**profile.summary()) for profile in profiles],
+        total=len(profiles),
+    )
+
+
+@router.delete("/profiles", status_code=204, summary="清空慢请求剖面")
+async def clear_profiles():
+    get_profiler().clear_profiles()
+
+
+@router.get("/profiles/{profile_id}", response_model=ProfileDetail, summary="获取慢请求剖面")
+async def get_profile(profile_id: str):
+    """剖面详情：SQL 时间线和采样最多的栈"""
+    return ProfileDetail(**_get_profile_or_404(profile_id).to_dict())
+
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse, summary="下载慢请求折叠栈")
+async def download_profile_folded(profile_id: str):
+    profile = _get_profile_or_404(profile_id)
+    return _folded_response(profile.folded(), f"profile-{profile.id}.folded")
@@ -170,11 +170,11 @@ async def scan_git_repos(
     扫描 /mnt 和用户主目录下的所有 Git 仓库，自动添加到项目路径配置
     """
     try:
-        from app.services.git_repo_scanner import GitRepoScanner
+        from app.services.git_repo_scanner import get_git_repo_scanner
 
-        scanner = GitRepoScanner()
+        scanner = get_git_repo_scanner()
         base_dirs = ["/mnt", str(Path.home())]
-        git_repos = scanner.scan_directories(base_dirs, max_depth=3)
+        git_repos = await scanner.scan_directories_async(base_dirs, max_depth=3)
 
         added_count = 0
         skipped_count = 0
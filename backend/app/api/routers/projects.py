@@ -3,10 +3,11 @@ Project 索引 API：元数据 CRUD、.claude 与 web/ 操作、Workspace 进程
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
@@ -24,13 +25,20 @@ from app.schemas.project import (
     ProjectScanResult,
     ProjectUpdate,
     ScanResultResponse,
+    ScreenshotRefreshRequest,
     ScreenshotResponse,
     WorkspaceConfig,
     WorkspaceStatusResponse,
 )
+from app.schemas.job import JobResponse
 from app.services import project_filesystem_service as pfs
+from app.services.job_manager import JobContext, get_job_manager
 from app.services.project_service import ProjectService
 from app.services.screenshot_service import get_screenshot_service
+from app.services.workspace_process_service import (
+    get_running_workspace_ids,
+    get_workspace_process_service,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -112,6 +120,40 @@ async def scan_projects(
     return ProjectScanResult(discovered=discovered, created_ids=created_ids)
 
 
+async def _refresh_screenshots(project_ids: Optional[list[int]], job: JobContext) -> dict[str, Any]:
+    """截取运行中 Workspace 的缩略图（并行度由截图页面池限制）"""
+    running = set(get_running_workspace_ids())
+    ids = [pid for pid in project_ids if pid in running] if project_ids is not None else sorted(running)
+    ws_service = get_workspace_process_service()
+    statuses = await asyncio.gather(*(ws_service.status(pid) for pid in ids))
+    targets = {pid: st["url"] for pid, st in zip(ids, statuses) if st.get("running") and st.get("url")}
+
+    job.report(f"截取 {len(targets)} 个项目的缩略图", 0.0)
+    results = await get_screenshot_service().capture_many(
+        targets,
+        on_progress=lambda done, total: job.report(f"{done}/{total}", done / total),
+    )
+    skipped = [pid for pid in (project_ids or []) if pid not in targets]
+    return {"results": results, "skipped": skipped}
+
+
+@router.post(
+    "/screenshots/refresh",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def refresh_screenshots(body: ScreenshotRefreshRequest):
+    """
+    批量刷新项目缩略图（后台 Job）
+
+    立即返回 Job，通过 GET /jobs/{id}/events 订阅进度；未运行 Workspace 的项目计入 skipped。
+    """
+    job = await get_job_manager().submit(
+        "screenshot_refresh", lambda job: _refresh_screenshots(body.project_ids, job)
+    )
+    return JobResponse(**job.to_dict())
+
+
 @router.post("/sync-from-paths")
 async def sync_from_project_paths(
     db: AsyncSession = Depends(get_db),
@@ -276,7 +318,7 @@ async def workspace_status(
     p = await service.get(project_id)
     if not p:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
-    st = service.workspace_status(project_id)
+    st = await service.workspace_status(project_id)
     port = st.get("port")
     url: Optional[str] = st.get("url")
     if url is None and port and p:
@@ -331,7 +373,7 @@ async def workspace_stop(
     p = await service.get(project_id)
     if not p:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
-    return service.workspace_stop(project_id)
+    return await service.workspace_stop(project_id)
 
 
 @router.post("/{project_id}/workspace/restart", response_model=WorkspaceStatusResponse)
@@ -378,13 +420,67 @@ async def workspace_init(
 @router.get("/{project_id}/workspace/logs", response_model=dict[str, Any])
 async def workspace_logs(
     project_id: int,
+    tail: int = Query(200, ge=0, le=5000, description="返回最近多少行"),
     service: ProjectService = Depends(get_project_service),
 ):
     p = await service.get(project_id)
     if not p:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
-    # 进程 stdout 未持久化；预留字段供后续接入文件日志
-    return {"lines": [], "note": "当前版本未采集 dev server 日志，请在本机终端查看。"}
+    lines = await get_workspace_process_service().get_logs(project_id, tail=tail)
+    return {"lines": lines}
+
+
+async def _wait_disconnect(websocket: WebSocket) -> None:
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.websocket("/{project_id}/workspace/logs/ws")
+async def workspace_logs_ws(websocket: WebSocket, project_id: int, tail: int = 200):
+    """
+    实时 dev server 日志
+
+    连接后先发送最近 tail 行（snapshot），之后每批输出发送一条 log 消息；
+    进程结束时发送 exit 并关闭连接。
+    """
+    await websocket.accept()
+    ws_service = get_workspace_process_service()
+    queue = ws_service.subscribe_logs(project_id)
+    try:
+        await websocket.send_json({
+            "type": "snapshot",
+            "lines": await ws_service.get_logs(project_id, tail=tail),
+            "running": queue is not None,
+        })
+        if queue is None:
+            await websocket.close()
+            return
+
+        # 同时等待客户端断开，断开时立即退出（不必等到下一批日志）
+        disconnected = asyncio.create_task(_wait_disconnect(websocket))
+        try:
+            while True:
+                getter = asyncio.create_task(queue.get())
+                await asyncio.wait({getter, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    return
+                lines = getter.result()
+                if lines is None:
+                    await websocket.send_json({"type": "exit"})
+                    await websocket.close()
+                    return
+                await websocket.send_json({"type": "log", "lines": lines})
+        finally:
+            disconnected.cancel()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if queue is not None:
+            ws_service.unsubscribe_logs(project_id, queue)
 
 
 # ========== Project Agent 关联 API ==========
@@ -454,7 +550,7 @@ async def capture_screenshot(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="项目不存在")
 
     # 检查 Workspace 是否运行中
-    ws_status = service.workspace_status(project_id)
+    ws_status = await service.workspace_status(project_id)
     if not ws_status.get("running"):
         return ScreenshotResponse(
             success=False,
@@ -513,6 +609,6 @@ async def get_thumbnail(
 
     return FileResponse(
         path,
-        media_type="image/webp",
+        media_type="image/png" if path.endswith(".png") else "image/webp",
         headers={"Cache-Control": "max-age=60"}  # 缓存 60 秒
     )
@@ -7,14 +7,17 @@ import json
 import re
 from typing import Optional, List, Dict, Any
 from pathlib import Path
-from fastapi import APIRouter, Depends, Query, status, HTTPException
+from fastapi import APIRouter, Depends, Query, Request, Response, status, HTTPException
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 
+from app.core.catalog import catalog_etag
 from app.core.database import get_db
 from app.repositories.skill_repository import SkillRepository
+from app.services.job_manager import JobContext, get_job_manager
 from app.services.skill_service import SkillService
+from app.schemas.job import JobResponse
 from app.schemas.skill import SkillCreate, SkillUpdate, SkillResponse, SkillListResponse
 from app.models.skill import SkillSource
 from app.config.settings import settings
@@ -188,90 +191,17 @@ async def list_skills(
     summary="Get skill categories and subcategories"
 )
 async def get_skill_categories(
+    request: Request,
+    response: Response,
     service: SkillService = Depends(get_skill_service)
 ):
-    """Get all skill categories with their subcategories (plugins and projects)"""
-    skills = await service.list_skills(skip=0, limit=10000)
-
-    # Count by source
-    counts = {
-        "builtin": 0,
-        "user": 0,
-        "project": 0,
-        "plugin": 0
-    }
-
-    # Collect unique plugins and projects
-    plugins = {}  # plugin_name -> count
-    projects = {}  # project_name -> count
-    users = {}  # user_scope(public/plugin:xxx) -> count
-
-    for skill in skills.items:
-        source = skill.source.value if hasattr(skill.source, 'value') else skill.source
-        # Map 'global' to 'builtin'
-        if source == "global":
-            source = "builtin"
-        counts[source] = counts.get(source, 0) + 1
-
-        # Extract plugin name
-        if source == "plugin" and skill.meta:
-            plugin_name = skill.meta.get("plugin_name", "unknown")
-            if plugin_name and plugin_name != "unknown":
-                plugins[plugin_name] = plugins.get(plugin_name, 0) + 1
-
-        # User 分组的二级标签：public + plugin
-        if source == "user":
-            users["public"] = users.get("public", 0) + 1
-
-        # plugin source 里也有一部分属于 user（~/.claude/plugins/...）
-        if source == "plugin" and skill.meta:
-            path = skill.meta.get("path", "")
-            has_claude_plugins = "/.claude/plugins/" in path or "\\.claude\\plugins\\" in path
-            has_project_markers = (
-                "/.git/" in path
-                or "\\.git\\" in path
-                or "/package.json" in path
-                or "\\package.json" in path
-            )
-            is_user_plugin = has_claude_plugins and not has_project_markers
-            if is_user_plugin:
-                plugin_name = skill.meta.get("plugin_name")
-                if plugin_name:
-                    user_scope = f"plugin:{plugin_name}"
-                    users[user_scope] = users.get(user_scope, 0) + 1
-
-        # Extract project name from path
-        if source == "project" and skill.meta:
-            path = skill.meta.get("path", "")
-            if path:
-                # Extract project directory name from path
-                # Example: /path/to/project/.claude/skills/skill_name -> project
-                parts = Path(path).parts
-                if ".claude" in parts:
-                    claude_index = parts.index(".claude")
-                    if claude_index > 0:
-                        project_name = parts[claude_index - 1]
-                        projects[project_name] = projects.get(project_name, 0) + 1
+    """Get all skill categories with their subcategories (plugins, projects and users)"""
+    etag = catalog_etag("skills")
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
-    return {
-        "counts": counts,
-        "plugins": [
-            {"id": name, "name": name, "count": count}
-            for name, count in sorted(plugins.items())
-        ],
-        "projects": [
-            {"id": name, "name": name, "count": count}
-            for name, count in sorted(projects.items())
-        ],
-        "users": [
-            {
-                "id": name,
-                "name": ("public" if name == "public" else name.replace("plugin:", "plugin/")),
-                "count": count
-            }
-            for name, count in sorted(users.items())
-        ]
-    }
+    response.headers["ETag"] = etag
+    return await service.get_categories()
 
 
 @router.get(
@@ -358,23 +288,8 @@ async def generate_skill(
         )
 
 
-@router.post(
-    "/generate-with-claude",
-    response_model=ClaudeGenerateResponse,
-    status_code=status.HTTP_200_OK,
-    summary="使用 Claude AI 生成完整 Skill"
-)
-async def generate_skill_with_claude(
-    request: ClaudeGenerateRequest,
-    service: SkillService = Depends(get_skill_service)
-):
-    """
-    使用 Claude Code CLI 生成完整的 Skill 结构。
-    
-    - 调用 Claude CLI 并传入系统 prompt + 用户描述
-    - 返回完整的 Skill 结构（SKILL.md + scripts + references + assets）
-    - 可选择直接保存到全局 skills 目录
-    """
+async def _generate_skill_with_claude(request: ClaudeGenerateRequest, job: JobContext) -> ClaudeGenerateResponse:
+    """调用 Claude CLI 生成 Skill 结构（在后台 Job 中运行）"""
     try:
         # 步骤1：构建完整的 prompt
         full_prompt = f"{SKILL_CREATOR_SYSTEM_PROMPT}\n\n## 用户需求\n{request.description}"
@@ -394,6 +309,7 @@ async def generate_skill_with_claude(
         ]
         
         logger.info(f"Calling Claude CLI to generate skill: {request.description[:50]}...")
+        job.report("调用 Claude CLI...", 0.1)
         
         # 清除 CLAUDECODE 环境变量，避免嵌套会话检测
         import os
@@ -420,6 +336,11 @@ async def generate_skill_with_claude(
                 status_code=504,
                 detail="Claude CLI 调用超时，请稍后重试"
             )
+        except asyncio.CancelledError:
+            # Job 被取消时结束 CLI 进程
+            process.kill()
+            await process.wait()
+            raise
         
         if process.returncode != 0:
             error_msg = stderr.decode("utf-8") if stderr else "未知错误"
@@ -434,6 +355,7 @@ async def generate_skill_with_claude(
         logger.debug(f"Claude CLI output: {output[:1000]}...")
         
         # 步骤3：解析 Claude 输出中的 JSON
+        job.report("解析生成结果...", 0.8)
         skill_data = None
         
         # 方法1：尝试匹配 ```json ... ``` 代码块
@@ -594,6 +516,44 @@ description: {request.description[:100]}
         )
 
 
+@router.post(
+    "/generate-with-claude",
+    response_model=ClaudeGenerateResponse,
+    status_code=status.HTTP_200_OK,
+    summary="使用 Claude AI 生成完整 Skill"
+)
+async def generate_skill_with_claude(
+    request: ClaudeGenerateRequest
+):
+    """
+    使用 Claude Code CLI 生成完整的 Skill 结构。
+    
+    - 调用 Claude CLI 并传入系统 prompt + 用户描述
+    - 返回完整的 Skill 结构（SKILL.md + scripts + references + assets）
+    - 可选择直接保存到全局 skills 目录
+    - 同步等待结果；耗时较长时建议使用 POST /skills/generate-with-claude/jobs
+    """
+    return await get_job_manager().run("skill_generate", lambda job: _generate_skill_with_claude(request, job))
+
+
+@router.post(
+    "/generate-with-claude/jobs",
+    response_model=JobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="提交 Skill 生成任务"
+)
+async def submit_generate_skill_job(
+    request: ClaudeGenerateRequest
+):
+    """
+    提交后台生成任务并立即返回 Job。
+
+    通过 GET /jobs/{id}/events 订阅进度，成功后 result 与 /skills/generate-with-claude 的响应一致。
+    """
+    job = await get_job_manager().submit("skill_generate", lambda job: _generate_skill_with_claude(request, job))
+    return JobResponse(**job.to_dict())
+
+
 @router.post(
     "/save-to-global",
     response_model=SaveSkillResponse,
@@ -10,6 +10,7 @@ from fastapi.responses import StreamingResponse
 from app.api.routers.skills import ClaudeGenerateRequest, SkillFileItem, SKILL_CREATOR_SYSTEM_PROMPT, get_skill_service
 from app.services.skill_service import SkillService
 from app.config.settings import settings
+from app.core.streaming import iter_process_output, sse_log_event
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
@@ -71,30 +72,29 @@ async def generate_skill_with_claude_stream(
                 env=env
             )
 
-            # 实时读取 stdout
+            # 同时读取 stdout / stderr，每批输出合并为一个 SSE 事件
             output_lines = []
-
-            # 读取 stdout 并实时发送
-            while True:
-                line = await process.stdout.readline()
-                if not line:
-                    break
-
-                line_text = line.decode('utf-8', errors='ignore').strip()
-                if line_text:
-                    output_lines.append(line_text)
-                    # 发送日志到前端
-                    yield f"data: {json.dumps({'type': 'log', 'message': f'[Claude] {line_text}'}, ensure_ascii=False)}\n\n"
-
-            # 等待进程结束
-            await process.wait()
-
-            # 读取 stderr（如果有）
-            stderr_data = await process.stderr.read()
-            if stderr_data:
-                stderr_text = stderr_data.decode('utf-8', errors='ignore').strip()
-                if stderr_text:
-                    yield f"data: {json.dumps({'type': 'log', 'message': f'[Error] {stderr_text}'}, ensure_ascii=False)}\n\n"
+            stderr_lines = []
+            try:
+                async for batch in iter_process_output(process):
+                    stdout_batch = [line.text.strip() for line in batch if line.stream == "stdout" and line.text.strip()]
+                    stderr_lines.extend(line.text for line in batch if line.stream == "stderr")
+                    if stdout_batch:
+                        output_lines.extend(stdout_batch)
+                        yield sse_log_event(stdout_batch, prefix="[Claude] ")
+
+                # 等待进程结束
+                await process.wait()
+            finally:
+                # 客户端断开时结束 CLI 进程
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+
+            # stderr（如果有）
+            stderr_text = "\n".join(stderr_lines).strip()
+            if stderr_text:
+                yield f"data: {json.dumps({'type': 'log', 'message': f'[Error] {stderr_text}'}, ensure_ascii=False)}\n\n"
 
             # 检查返回码
             if process.returncode != 0:
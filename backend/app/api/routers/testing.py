@@ -2,14 +2,19 @@
 测试模块 API 路由
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
 from typing import List, Optional
 
 from app.core.database import get_db
+from app.core.streaming import sse_event
 from app.testing.models import TestNode, TestExecution
 from app.testing.test_tree import TestTreeManager
+from app.testing.result_cache import get_test_result_cache
 from app.testing.test_runner import TestRunner
 
 router = APIRouter(prefix="/api/testing", tags=["testing"])
@@ -72,32 +77,90 @@ async def get_test_node(node_id: str, db: AsyncSession = Depends(get_db)):
     }
 
 
+def _execution_result(execution: TestExecution) -> dict:
+    return {
+        "id": execution.id,
+        "node_id": execution.test_node_id,
+        "status": execution.status,
+        "started_at": execution.started_at.isoformat() if execution.started_at else None,
+        "completed_at": execution.completed_at.isoformat() if execution.completed_at else None,
+        "duration": execution.duration,
+        "total": execution.total_tests,
+        "passed": execution.passed_tests,
+        "failed": execution.failed_tests,
+        "skipped": execution.skipped_tests,
+        "output": execution.output,
+        "error_message": execution.error_message
+    }
+
+
 @router.post("/run/{node_id}")
-async def run_test(node_id: str, db: AsyncSession = Depends(get_db)):
-    """执行测试"""
-    runner = TestRunner()
+async def run_test(
+    node_id: str,
+    use_cache: bool = Query(True, description="依赖未变化时复用上次通过的结果"),
+    max_workers: Optional[int] = Query(None, ge=1, description="并行执行的套件数，默认 CPU 核数"),
+    db: AsyncSession = Depends(get_db)
+):
+    """执行测试（分类节点下的套件并行执行）"""
+    runner = TestRunner(max_workers=max_workers, use_cache=use_cache)
 
     try:
         execution = await runner.run_test_node(node_id, db)
-
-        return {
-            "id": execution.id,
-            "node_id": execution.test_node_id,
-            "status": execution.status,
-            "started_at": execution.started_at.isoformat() if execution.started_at else None,
-            "completed_at": execution.completed_at.isoformat() if execution.completed_at else None,
-            "duration": execution.duration,
-            "total": execution.total_tests,
-            "passed": execution.passed_tests,
-            "failed": execution.failed_tests,
-            "skipped": execution.skipped_tests,
-            "output": execution.output,
-            "error_message": execution.error_message
-        }
+        return _execution_result(execution)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"测试执行失败: {str(e)}")
 
 
+@router.post("/run/{node_id}/stream")
+async def run_test_stream(
+    node_id: str,
+    use_cache: bool = Query(True, description="依赖未变化时复用上次通过的结果"),
+    max_workers: Optional[int] = Query(None, ge=1, description="并行执行的套件数，默认 CPU 核数"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    执行测试并以 SSE 推送逐套件进度
+
+    事件类型：
+    - suite_start / suite_complete: 单个套件开始 / 结束（cached 表示复用了缓存结果）
+    - complete: 全部结束，data 与 POST /run/{node_id} 的响应一致
+    - error: 执行失败
+    """
+    runner = TestRunner(max_workers=max_workers, use_cache=use_cache)
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def run():
+        try:
+            execution = await runner.run_test_node(node_id, db, on_progress=events.put_nowait)
+            events.put_nowait({"type": "complete", "data": _execution_result(execution)})
+        except Exception as e:
+            events.put_nowait({"type": "error", "message": f"测试执行失败: {str(e)}"})
+        finally:
+            events.put_nowait(None)
+
+    async def generate():
+        task = asyncio.create_task(run())
+        try:
+            while (event := await events.get()) is not None:
+                yield sse_event(event)
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.delete("/cache")
+async def clear_test_cache(node_id: Optional[str] = None):
+    """清除测试结果缓存（不指定 node_id 时清除全部）"""
+    await asyncio.to_thread(get_test_result_cache().invalidate, node_id)
+    return {"message": "测试结果缓存已清除"}
+
+
 @router.get("/executions")
 async def get_executions(
     node_id: Optional[str] = None,
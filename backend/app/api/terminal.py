@@ -20,6 +20,7 @@ from fastapi.responses import JSONResponse
 from sqlalchemy import select as sql_select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.coordination import get_coordinator
 from app.core.database import get_db, AsyncSessionLocal
 from app.repositories.project_path_repository import ProjectPathRepository
 from app.services.project_path_service import ProjectPathService
@@ -505,6 +506,9 @@ async def reconcile_orphan_terminal_executions() -> None:
                     continue
                 if session_id in sessions:
                     continue
+                # 多 worker 部署时会话可能由其他存活的 worker 持有
+                if await get_coordinator().owner(TERMINAL_OWNER_KIND, session_id):
+                    continue
 
                 await _mark_terminal_execution_cancelled(
                     db,
@@ -523,6 +527,9 @@ async def reconcile_orphan_terminal_executions() -> None:
 # Store active sessions - 使用持久化的 session ID
 sessions: Dict[str, TerminalSession] = {}
 
+# 协调层中终端会话的归属类型（SessionAffinityMiddleware 据此把重连和会话操作路由到持有 PTY 的 worker）
+TERMINAL_OWNER_KIND = "terminal"
+
 # 后台清理任务
 cleanup_task = None
 
@@ -565,6 +572,7 @@ async def cleanup_dead_sessions():
 
                     session.close()
                     del sessions[session_id]
+                    await get_coordinator().release(TERMINAL_OWNER_KIND, session_id)
                     print(f"[Terminal] Cleaned up dead session: {session_id}")
 
         except Exception as e:
@@ -624,6 +632,7 @@ async def terminal_websocket(
             print(f"[Terminal] ❌ Session {session_id} process is dead, creating new session")
             session.close()
             del sessions[session_id]
+            await get_coordinator().release(TERMINAL_OWNER_KIND, session_id)
             session_id = None  # 创建新 session
         else:
             # 检查是否有旧的 WebSocket 连接
@@ -719,6 +728,7 @@ async def terminal_websocket(
         print(f"[Terminal] Creating new TerminalSession with ID: {session_id}")
         print(f"[Terminal] Initial dir: {initial_dir}, Auto-start Claude: {auto_start_claude}, Claude resume: {claude_resume_session}, Use tmux: {use_tmux}, Tmux session: {tmux_session_name}")  # 🔧 更新日志
         sessions[session_id] = session
+        await get_coordinator().claim(TERMINAL_OWNER_KIND, session_id)
         session.websocket = websocket
         print(f"[Terminal] Active sessions after: {len(sessions)}")
 
@@ -1462,6 +1472,7 @@ async def close_session(
 
     session.close()
     del sessions[session_id]
+    await get_coordinator().release(TERMINAL_OWNER_KIND, session_id)
 
     logger.info(
         "[Terminal] Session closed: session_id=%s, active_sessions_count=%s",
@@ -22,6 +22,8 @@ class Settings(BaseSettings):
     # Security
     secret_key: str = "your-secret-key-here-change-in-production"
     access_token_expire_minutes: int = 30
+    password_hash_workers: int = 2  # bcrypt 专用线程数（同时进行的哈希 / 校验上限）
+    jwt_cache_size: int = 1024  # 已验证 JWT 的内存缓存条数
 
     # Internet access password (empty = disabled, set via ACCESS_PASSWORD env var)
     access_password: str = ""
@@ -35,19 +37,92 @@ class Settings(BaseSettings):
 
     # Claude Configuration
     anthropic_api_key: Optional[str] = None
+    anthropic_base_url: Optional[str] = None  # 可指向本地 mock Messages 端点（离线基准测试）
     claude_cli_path: str = "claude"
     claude_config_dir: Path = Path.home() / ".claude"
     claude_skills_dir: Path = Path.home() / ".claude" / "skills"
     claude_plugins_dir: Path = Path.home() / ".claude" / "plugins"
 
+    # Claude 健康检查缓存（秒）
+    claude_health_cache_ttl: int = 300  # 健康检查结果缓存时间
+    claude_model_probe_cache_ttl: int = 600  # 单个模型可用性探测缓存时间
+    claude_health_refresh_interval: int = 240  # 后台刷新间隔，0 表示不启用
+
     # Model Provider Configuration
     default_model_provider: str = "anthropic"  # 默认使用 Anthropic API
     openai_api_key: Optional[str] = None  # 未来扩展用
+    model_session_cache_size: int = 256  # 内存中保留的模型会话数（LRU，超出溢出到数据库）
+    model_context_token_budget: int = 100_000  # 会话上下文 token 预算（超出时压缩最早的对话）
+    chat_history_tail_size: int = 100  # 会话重连时下发的最近消息数（更早的消息按需分页加载）
+
+    # 后台 Job（生成类长耗时接口）
+    job_max_workers: int = 4  # 同时运行的 Job 数上限
+    job_retention_seconds: int = 3600  # 已结束 Job 的结果保留时间
+
+    # 插件更新检查
+    plugin_update_check_concurrency: int = 16  # 同时进行的 git 远程查询数
+    plugin_remote_head_ttl: int = 300  # 远程分支 head 缓存时间（秒）
+
+    # Agent PTY 会话活动持久化（写回式，按进程合并）
+    agent_activity_flush_interval: float = 5.0  # 两次落库之间的最长间隔（秒）
+    agent_activity_flush_bytes: int = 1024 * 1024  # 未落库的输出累计超过该字节数时提前落库
+    agent_output_buffer_bytes: int = 256 * 1024  # 内存中保留的最近终端输出字节数
+
+    # Workspace 开发服务器
+    workspace_health_ttl: float = 5.0  # 探活结果缓存时间（秒）
+    workspace_health_timeout: float = 2.0  # 单次 HTTP 探活超时（秒）
+    workspace_log_buffer_lines: int = 2000  # 内存中保留的最近日志行数
+    workspace_log_max_bytes: int = 5 * 1024 * 1024  # 单个日志文件大小上限，超出后轮转
+
+    # /localfs 本地文件服务
+    localfs_root_index_ttl: int = 60  # 项目根目录索引缓存时间（秒）；项目增删时立即失效
+    localfs_html_head_scan_bytes: int = 64 * 1024  # 注入 <base> 时最多缓冲的 HTML 头部字节数
+
+    # 项目缩略图截图
+    screenshot_pool_size: int = 4  # 复用的浏览器上下文数（并行截图上限）
+    screenshot_thumbnail_width: int = 640  # 缩略图最大宽度（像素）
 
     # 项目路径配置（用于扫描项目级 agents）
     # 可以通过环境变量 PROJECT_PATH 设置
     project_path: Optional[str] = None
 
+    # SQLite 性能配置：WAL + 调优 pragma、复用的读连接池、单写入连接的批量写队列
+    sqlite_wal: bool = True  # False 时回退为默认日志模式 + NullPool
+    sqlite_busy_timeout_ms: int = 5000  # 等待其他连接释放锁的时间
+    sqlite_cache_size_kb: int = 64 * 1024  # 每个连接的页缓存大小
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # 内存映射读取的字节数上限
+    sqlite_pool_size: int = 4  # 常驻的读连接数
+    sqlite_write_batch_size: int = 64  # 写队列单个事务最多合并的写操作数
+
+    # 多 worker 协调：跨 worker 广播、锁、leader 选举和会话粘性路由
+    coordination_backend: str = "local"  # local：单进程；sqlite：同一主机上的多个 worker 通过共享 SQLite 文件协调
+    coordination_dir: Path = Path.home() / ".open_adventure" / "coordination"  # 协调数据库和各 worker 内部 socket 所在目录
+    coordination_poll_interval: float = 0.05  # 轮询其他 worker 广播的间隔（秒）
+    coordination_heartbeat_interval: float = 2.0  # worker 心跳间隔（秒）
+    coordination_worker_ttl: float = 10.0  # 超过该时间没有心跳的 worker 视为失联，其会话归属失效
+
+    # 目录类 GET 接口（/skills、/agents、/projects、/claude/settings 等）的进程内响应缓存
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 512  # LRU 最多保留的响应数（按路由 + 查询参数区分）
+    response_cache_ttl: float = 60.0  # 数据库目录响应的最长缓存时间（秒）；应用内写入会立即失效，TTL 兜底外部修改
+    response_cache_file_ttl: float = 5.0  # 直接读取配置文件的响应（settings.json、模型列表）的缓存时间，CLI 等外部工具可能随时修改
+
+    # 运行时指标（/metrics 与 /api/system/metrics）
+    metrics_enabled: bool = True
+    metrics_loop_lag_interval: float = 0.25  # 事件循环延迟采样间隔（秒）
+    metrics_loop_stall_threshold: float = 0.1  # 事件循环延迟超过该值（秒）视为阻塞，记录警告和进行中的请求
+
+    # 采样性能分析（可通过 /api/system/profiler 在运行时开关；SQL 时间线依赖 metrics_enabled）
+    profiler_enabled: bool = False  # 启动时即开始采样
+    profiler_sample_interval: float = 0.02  # 采样间隔（秒）；长期开启时建议不低于 0.01
+    profiler_slow_request_threshold: float = 2.0  # 耗时超过该值（秒）的请求保存栈剖面和 SQL 时间线
+    profiler_max_profiles: int = 20  # 保留最近的慢请求剖面数
+    profiler_max_sql_statements: int = 500  # 每个剖面最多记录的 SQL 语句数
+    profiler_all_threads: bool = False  # 同时采样线程池等其他线程（仅计入全局火焰图）
+
+    # 启动时 schema 指纹未变化则跳过 Alembic 迁移检查和 create_all
+    fast_start: bool = True
+
     # Logging
     log_level: str = "INFO"
     log_format: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
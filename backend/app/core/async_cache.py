@@ -0,0 +1,54 @@
+"""
+异步 TTL 缓存
+
+按 key 缓存异步加载结果：过期前直接返回，同一 key 同时只有一个加载在执行（single-flight）。
+用于 Claude 健康检查探测、插件远程分支 head 查询等慢速外部调用。
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class AsyncTTLCache:
+    """带 TTL 和 single-flight 去重的异步结果缓存"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+
+    async def get(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+        fresh: bool = False,
+    ) -> Any:
+        """
+        获取缓存结果，过期或 fresh=True 时调用 loader 重新加载
+
+        同一 key 同时只有一个 loader 在执行，其余调用方等待同一结果。
+        """
+        if not fresh:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, ttl))
+            self._inflight[key] = task
+        # shield：单个调用方被取消时不影响其他等待者
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        try:
+            value = await loader()
+            self._entries[key] = (time.monotonic() + ttl, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, prefix: str = "") -> None:
+        """使缓存失效（prefix 为空时清空全部）"""
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
@@ -4,11 +4,11 @@ Optional authentication dependencies
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
+from jose import JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.core.security import get_user_by_username, SECRET_KEY, ALGORITHM
+from app.core.security import decode_access_token, get_user_by_username
 from app.models.user import User
 
 # Optional bearer token scheme
@@ -28,7 +28,7 @@ async def get_current_user_optional(
 
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username: str = payload.get("sub")
         if username is None:
             return None
@@ -0,0 +1,232 @@
+"""
+Catalog helpers - Skills / Agents 目录的派生分类字段与版本计数
+
+分类字段（plugin_name / project_name / user_scope）在写入时由 meta.path 等信息计算并落库，
+分类统计接口直接 GROUP BY，无需加载全部记录。
+版本计数在每次目录写入后递增，用于生成 ETag 和使响应缓存失效：
+
+- 数据库写入由 track_catalog_writes 注册的 Session 事件按表名自动递增（提交后生效）
+- settings.json、custom_models.json 等文件写入处显式调用 bump_catalog_version
+- 多 worker 时 start_catalog_sync 通过协调层把递增广播给其他 worker
+"""
+import asyncio
+import uuid
+from pathlib import PurePath
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# 进程启动标识：重启后计数器归零，ETag 仍然不会与旧值冲突
+_BOOT_ID = uuid.uuid4().hex[:8]
+_versions: Dict[str, int] = {}
+_listeners: List[Callable[[str], None]] = []
+
+CATALOG_CHANNEL = "catalog"
+
+# 表名 -> 目录；写入这些表的事务提交后递增对应目录的版本号
+TABLE_KINDS: Dict[str, str] = {
+    "skills": "skills",
+    "agents": "agents",
+    "agent_teams": "agent_teams",
+    "workflows": "workflows",
+    "workflow_nodes": "workflows",
+    "workflow_edges": "workflows",
+    "projects": "projects",
+    "project_paths": "projects",
+}
+_PENDING_KEY = "catalog_pending_kinds"
+
+
+def project_name_from_path(path: Optional[str]) -> Optional[str]:
+    """
+    从路径中提取项目名（.claude 目录的上一级目录名）
+
+    Example: /path/to/project/.claude/skills/skill_name -> project
+    """
+    if not path:
+        return None
+    parts = PurePath(path).parts
+    if ".claude" in parts:
+        claude_index = parts.index(".claude")
+        if claude_index > 0:
+            return parts[claude_index - 1]
+    return None
+
+
+def is_user_plugin_path(path: Optional[str]) -> bool:
+    """判断插件路径是否属于用户级插件（~/.claude/plugins/ 且不在项目中）"""
+    if not path:
+        return False
+    has_claude_plugins = "/.claude/plugins/" in path or "\\.claude\\plugins\\" in path
+    has_project_markers = (
+        "/.git/" in path
+        or "\\.git\\" in path
+        or "/package.json" in path
+        or "\\package.json" in path
+    )
+    return has_claude_plugins and not has_project_markers
+
+
+def _plugin_name(meta: Dict[str, Any]) -> Optional[str]:
+    plugin_name = meta.get("plugin_name")
+    if not plugin_name or plugin_name == "unknown":
+        return None
+    return str(plugin_name)
+
+
+def skill_category_fields(source: Any, meta: Optional[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    """
+    计算技能的分类字段
+
+    Returns:
+        {"plugin_name", "project_name", "user_scope"}；user_scope 为 "public" 或 "plugin:<name>"
+    """
+    source = getattr(source, "value", source)
+    meta = meta or {}
+    path = meta.get("path", "")
+    plugin_name = _plugin_name(meta)
+
+    user_scope = None
+    if source == "user":
+        user_scope = "public"
+    elif source == "plugin" and meta.get("plugin_name") and is_user_plugin_path(path):
+        user_scope = f"plugin:{meta['plugin_name']}"
+
+    return {
+        "plugin_name": plugin_name if source == "plugin" else None,
+        "project_name": project_name_from_path(path) if source == "project" else None,
+        "user_scope": user_scope,
+    }
+
+
+def agent_category_fields(scope: Optional[str], meta: Optional[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    """
+    计算子代理的分类字段
+
+    Returns:
+        {"plugin_name", "project_name"}
+    """
+    meta = meta or {}
+    return {
+        "plugin_name": _plugin_name(meta) if scope == "plugin" else None,
+        "project_name": project_name_from_path(meta.get("path", "")) if scope == "project" else None,
+    }
+
+
+def bump_catalog_version(kind: str, notify: bool = True) -> int:
+    """
+    目录写入后递增版本号（kind: skills / agents / claude_settings 等）
+
+    Args:
+        notify: 是否通知监听者（收到其他 worker 的广播时为 False，避免回传）
+    """
+    _versions[kind] = _versions.get(kind, 0) + 1
+    if notify:
+        for listener in list(_listeners):
+            listener(kind)
+    return _versions[kind]
+
+
+def add_catalog_listener(listener: Callable[[str], None]) -> Callable[[], None]:
+    """注册版本递增监听（同步回调），返回取消函数"""
+    _listeners.append(listener)
+    return lambda: _listeners.remove(listener)
+
+
+def get_catalog_version(kind: str) -> int:
+    """获取目录当前版本号"""
+    return _versions.get(kind, 0)
+
+
+def catalog_etag(*kinds: str) -> str:
+    """根据一个或多个目录的版本号生成弱 ETag"""
+    versions = "-".join(f"{kind}.{get_catalog_version(kind)}" for kind in kinds)
+    return f'W/"{_BOOT_ID}-{versions}"'
+
+
+def _pending_kinds(session: Session) -> Set[str]:
+    return session.info.setdefault(_PENDING_KEY, set())
+
+
+def _collect_flushed(session: Session, flush_context: Any) -> None:
+    pending = _pending_kinds(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table in TABLE_KINDS:
+            pending.add(TABLE_KINDS[table])
+
+
+def _collect_executed(state: Any) -> None:
+    # session.execute(insert / update / delete(...)) 不经过 flush，单独记录
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(getattr(state.statement, "table", None), "name", None)
+        if table in TABLE_KINDS:
+            _pending_kinds(state.session).add(TABLE_KINDS[table])
+
+
+def _bump_committed(session: Session) -> None:
+    # 回滚不清空：多递增一次只会让缓存多失效一次
+    for kind in session.info.pop(_PENDING_KEY, ()):
+        bump_catalog_version(kind)
+
+
+_tracking = False
+
+
+def track_catalog_writes() -> None:
+    """
+    注册 Session 事件：写入 TABLE_KINDS 中的表并提交后递增对应目录版本（幂等）
+
+    覆盖仓储层之外直接 commit 的服务代码，目录版本不依赖每个写入点手动维护。
+    """
+    global _tracking
+    if _tracking:
+        return
+    event.listen(Session, "after_flush", _collect_flushed)
+    event.listen(Session, "do_orm_execute", _collect_executed)
+    event.listen(Session, "after_commit", _bump_committed)
+    _tracking = True
+
+
+def start_catalog_sync() -> Callable[[], None]:
+    """
+    多 worker 时在 worker 之间同步版本递增（单进程时不做任何事）
+
+    本 worker 的递增通过协调层广播；收到其他 worker 的广播后在本地递增同一目录。
+    只传递"发生了变化"，各 worker 的计数值不要求一致。
+
+    Returns:
+        停止同步的函数
+    """
+    from app.core.coordination import get_coordinator
+
+    coordinator = get_coordinator()
+    if not coordinator.distributed:
+        return lambda: None
+
+    tasks: Set[asyncio.Task] = set()
+
+    def announce(kind: str) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(
+            coordinator.publish(CATALOG_CHANNEL, {"kind": kind, "origin": coordinator.worker_id})
+        )
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    async def apply(message: Dict[str, Any]) -> None:
+        if message.get("origin") != coordinator.worker_id and message.get("kind"):
+            bump_catalog_version(message["kind"], notify=False)
+
+    remove_listener = add_catalog_listener(announce)
+    unsubscribe = coordinator.subscribe(CATALOG_CHANNEL, apply)
+
+    def stop() -> None:
+        remove_listener()
+        unsubscribe()
+
+    return stop
@@ -0,0 +1,451 @@
+"""
+多 worker 协调层
+
+终端会话、Agent PTY 进程、Workspace dev server、后台 Job 等状态只存在于创建它们的进程中。
+协调层为多个 uvicorn worker 提供：
+
+- pub/sub：跨 worker 广播消息（如 WebSocket 推送）
+- 锁：跨 worker 互斥，以及只需一个 worker 执行的后台循环的 leader 选举
+- 会话归属：记录某个会话（kind, key）由哪个 worker 持有，供 SessionAffinityMiddleware 粘性路由
+
+实现：
+- LocalCoordinator：单进程默认实现，全部在内存中完成
+- SqliteCoordinator：同一主机多 worker，通过共享的 SQLite 文件（WAL）协调；
+  每个 worker 心跳续约，超时的 worker 持有的会话和锁自动失效
+
+通过 settings.coordination_backend 选择（local / sqlite）。
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+# 广播消息在共享表中的保留时间（秒），只需覆盖轮询间隔
+_MESSAGE_RETENTION = 60.0
+
+
+@dataclass(frozen=True)
+class WorkerInfo:
+    """worker 标识及其内部地址（Unix socket 路径，单进程时为 None）"""
+    worker_id: str
+    address: Optional[str] = None
+
+
+class Coordinator(ABC):
+    """协调层接口"""
+
+    # 是否存在其他 worker（False 时粘性路由直接放行）
+    distributed = False
+
+    def __init__(self, address: Optional[str] = None):
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.address = address
+        self._handlers: Dict[str, List[MessageHandler]] = defaultdict(list)
+
+    @property
+    def me(self) -> WorkerInfo:
+        return WorkerInfo(self.worker_id, self.address)
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    # ---------- pub/sub ----------
+
+    def subscribe(self, channel: str, handler: MessageHandler) -> Callable[[], None]:
+        """订阅频道（在本 worker 内回调），返回取消订阅函数"""
+        self._handlers[channel].append(handler)
+        return lambda: self._handlers[channel].remove(handler)
+
+    @abstractmethod
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        """向所有 worker（含本 worker）的订阅者发布消息"""
+        pass
+
+    async def _dispatch(self, channel: str, message: Dict[str, Any]) -> None:
+        for handler in list(self._handlers.get(channel, ())):
+            try:
+                await handler(message)
+            except Exception as e:
+                logger.error(f"Coordination handler for {channel} failed: {e}")
+
+    # ---------- 锁 ----------
+
+    @abstractmethod
+    def lock(self, name: str, ttl: Optional[float] = None) -> contextlib.AbstractAsyncContextManager:
+        """
+        跨 worker 互斥锁
+
+        持有者进程崩溃时锁在 ttl 秒（默认 coordination_worker_ttl）后自动失效；
+        临界区可能超过默认时长时（如数据库迁移）需传入更长的 ttl。
+        """
+        pass
+
+    @abstractmethod
+    async def is_leader(self, name: str, ttl: Optional[float] = None) -> bool:
+        """
+        本 worker 是否为 name 的 leader（只需一个 worker 执行的后台任务在每轮执行前检查）
+
+        leader 每次检查时续约 ttl 秒（默认 coordination_worker_ttl）；ttl 应大于检查间隔，
+        否则 leader 会在两次检查之间失去租约。
+        """
+        pass
+
+    # ---------- 会话归属 ----------
+
+    @abstractmethod
+    async def claim(self, kind: str, key: str) -> None:
+        """声明本 worker 持有会话（覆盖原有归属）"""
+        pass
+
+    @abstractmethod
+    async def claim_if_absent(self, kind: str, key: str) -> WorkerInfo:
+        """会话没有存活的持有者时由本 worker 持有；返回最终的持有者"""
+        pass
+
+    @abstractmethod
+    async def release(self, kind: str, key: str) -> None:
+        """释放本 worker 持有的会话"""
+        pass
+
+    @abstractmethod
+    async def owner(self, kind: str, key: str) -> Optional[WorkerInfo]:
+        """会话的存活持有者；没有时返回 None"""
+        pass
+
+
+class LocalCoordinator(Coordinator):
+    """单进程实现"""
+
+    def __init__(self, address: Optional[str] = None):
+        super().__init__(address)
+        self._owners: Dict[tuple, WorkerInfo] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        await self._dispatch(channel, message)
+
+    @contextlib.asynccontextmanager
+    async def lock(self, name: str, ttl: Optional[float] = None) -> AsyncIterator[None]:
+        async with self._locks[name]:
+            yield
+
+    async def is_leader(self, name: str, ttl: Optional[float] = None) -> bool:
+        return True
+
+    async def claim(self, kind: str, key: str) -> None:
+        self._owners[(kind, key)] = self.me
+
+    async def claim_if_absent(self, kind: str, key: str) -> WorkerInfo:
+        return self._owners.setdefault((kind, key), self.me)
+
+    async def release(self, kind: str, key: str) -> None:
+        self._owners.pop((kind, key), None)
+
+    async def owner(self, kind: str, key: str) -> Optional[WorkerInfo]:
+        return self._owners.get((kind, key))
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    address TEXT,
+    pid INTEGER,
+    heartbeat_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS owners (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    worker_id TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class SqliteCoordinator(Coordinator):
+    """
+    同一主机多 worker 实现：共享 SQLite 文件
+
+    所有 SQLite 操作在一个专用线程中执行，不阻塞事件循环。广播消息写入 messages 表，
+    其他 worker 按 coordination_poll_interval 轮询新消息（本 worker 的订阅者直接回调）。
+    """
+
+    distributed = True
+
+    def __init__(
+        self,
+        db_path: Path,
+        address: Optional[str] = None,
+        poll_interval: Optional[float] = None,
+        heartbeat_interval: Optional[float] = None,
+        worker_ttl: Optional[float] = None,
+    ):
+        super().__init__(address)
+        self.db_path = Path(db_path)
+        self.poll_interval = poll_interval or settings.coordination_poll_interval
+        self.heartbeat_interval = heartbeat_interval or settings.coordination_heartbeat_interval
+        self.worker_ttl = worker_ttl or settings.coordination_worker_ttl
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="coordination")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_message_id = 0
+        self._tasks: List[asyncio.Task] = []
+        self._local_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    # ---------- SQLite 访问（专用线程） ----------
+
+    async def _call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), isolation_level=None, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        conn = self._db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _live_after(self) -> float:
+        return time.time() - self.worker_ttl
+
+    # ---------- 生命周期 ----------
+
+    async def start(self) -> None:
+        def register() -> int:
+            conn = self._db()
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (worker_id, address, pid, heartbeat_at) VALUES (?, ?, ?, ?)",
+                (self.worker_id, self.address, os.getpid(), time.time()),
+            )
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0]
+
+        self._last_message_id = await self._call(register)
+        self._tasks = [
+            asyncio.create_task(self._poll_messages()),
+            asyncio.create_task(self._heartbeat()),
+        ]
+        logger.info(f"Coordination started: worker={self.worker_id}, db={self.db_path}")
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        def unregister() -> None:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM owners WHERE worker_id = ?", (self.worker_id,))
+                conn.execute("DELETE FROM leases WHERE worker_id = ?", (self.worker_id,))
+                conn.execute("DELETE FROM workers WHERE worker_id = ?", (self.worker_id,))
+            self._conn.close()
+            self._conn = None
+
+        try:
+            await self._call(unregister)
+        finally:
+            self._executor.shutdown(wait=False)
+
+    async def _heartbeat(self) -> None:
+        def beat() -> None:
+            now = time.time()
+            with self._transaction() as conn:
+                conn.execute(
+                    "UPDATE workers SET heartbeat_at = ? WHERE worker_id = ?", (now, self.worker_id)
+                )
+                # 清理失联 worker 遗留的记录和过期广播
+                dead = "SELECT worker_id FROM workers WHERE heartbeat_at < ?"
+                conn.execute(f"DELETE FROM owners WHERE worker_id IN ({dead})", (self._live_after(),))
+                conn.execute("DELETE FROM workers WHERE heartbeat_at < ?", (self._live_after(),))
+                conn.execute("DELETE FROM messages WHERE created_at < ?", (now - _MESSAGE_RETENTION,))
+
+        while True:
+            try:
+                await self._call(beat)
+            except Exception as e:
+                logger.warning(f"Coordination heartbeat failed: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    # ---------- pub/sub ----------
+
+    async def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        payload = json.dumps(message, default=str)
+        await self._call(
+            lambda: self._db().execute(
+                "INSERT INTO messages (channel, payload, origin, created_at) VALUES (?, ?, ?, ?)",
+                (channel, payload, self.worker_id, time.time()),
+            )
+        )
+        await self._dispatch(channel, message)
+
+    async def _poll_messages(self) -> None:
+        def fetch(after: int) -> list:
+            return self._db().execute(
+                "SELECT id, channel, payload, origin FROM messages WHERE id > ? ORDER BY id",
+                (after,),
+            ).fetchall()
+
+        while True:
+            try:
+                rows = await self._call(fetch, self._last_message_id)
+                for message_id, channel, payload, origin in rows:
+                    self._last_message_id = message_id
+                    if origin != self.worker_id and channel in self._handlers:
+                        await self._dispatch(channel, json.loads(payload))
+            except Exception as e:
+                logger.warning(f"Coordination poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    # ---------- 锁 ----------
+
+    def _try_lease(self, name: str, ttl: float) -> bool:
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT worker_id, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != self.worker_id and row[1] > now:
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (name, worker_id, expires_at) VALUES (?, ?, ?)",
+                (name, self.worker_id, now + ttl),
+            )
+            return True
+
+    @contextlib.asynccontextmanager
+    async def lock(self, name: str, ttl: Optional[float] = None) -> AsyncIterator[None]:
+        # 先在进程内排队，再竞争跨进程租约（租约以 worker 为单位）
+        async with self._local_locks[name]:
+            lease = f"lock:{name}"
+            while not await self._call(self._try_lease, lease, ttl or self.worker_ttl):
+                await asyncio.sleep(self.poll_interval)
+            try:
+                yield
+            finally:
+                await self._call(
+                    lambda: self._db().execute(
+                        "DELETE FROM leases WHERE name = ? AND worker_id = ?", (lease, self.worker_id)
+                    )
+                )
+
+    async def is_leader(self, name: str, ttl: Optional[float] = None) -> bool:
+        # leader 每次检查时续约；进程退出或失联后租约过期，由其他 worker 接管
+        return await self._call(self._try_lease, f"leader:{name}", ttl or self.worker_ttl)
+
+    # ---------- 会话归属 ----------
+
+    def _live_owner(self, conn: sqlite3.Connection, kind: str, key: str) -> Optional[WorkerInfo]:
+        row = conn.execute(
+            "SELECT w.worker_id, w.address FROM owners o JOIN workers w ON w.worker_id = o.worker_id "
+            "WHERE o.kind = ? AND o.key = ? AND w.heartbeat_at >= ?",
+            (kind, key, self._live_after()),
+        ).fetchone()
+        return WorkerInfo(row[0], row[1]) if row else None
+
+    async def claim(self, kind: str, key: str) -> None:
+        await self._call(
+            lambda: self._db().execute(
+                "INSERT OR REPLACE INTO owners (kind, key, worker_id) VALUES (?, ?, ?)",
+                (kind, key, self.worker_id),
+            )
+        )
+
+    async def claim_if_absent(self, kind: str, key: str) -> WorkerInfo:
+        def claim() -> WorkerInfo:
+            with self._transaction() as conn:
+                current = self._live_owner(conn, kind, key)
+                if current:
+                    return current
+                conn.execute(
+                    "INSERT OR REPLACE INTO owners (kind, key, worker_id) VALUES (?, ?, ?)",
+                    (kind, key, self.worker_id),
+                )
+                return self.me
+
+        return await self._call(claim)
+
+    async def release(self, kind: str, key: str) -> None:
+        await self._call(
+            lambda: self._db().execute(
+                "DELETE FROM owners WHERE kind = ? AND key = ? AND worker_id = ?",
+                (kind, key, self.worker_id),
+            )
+        )
+
+    async def owner(self, kind: str, key: str) -> Optional[WorkerInfo]:
+        return await self._call(lambda: self._live_owner(self._db(), kind, key))
+
+
+# 全局单例
+_coordinator: Optional[Coordinator] = None
+
+
+def worker_socket_path() -> Path:
+    """本 worker 内部服务的 Unix socket 路径"""
+    return Path(settings.coordination_dir) / f"worker-{os.getpid()}.sock"
+
+
+def get_coordinator() -> Coordinator:
+    """获取协调层实例（按 settings.coordination_backend 创建）"""
+    global _coordinator
+    if _coordinator is None:
+        backend = settings.coordination_backend
+        if backend == "sqlite":
+            _coordinator = SqliteCoordinator(
+                Path(settings.coordination_dir) / "coordination.db",
+                address=str(worker_socket_path()),
+            )
+        else:
+            if backend != "local":
+                logger.warning(f"Unknown coordination backend {backend!r}, using local")
+            _coordinator = LocalCoordinator()
+    return _coordinator
+
+
+async def close_coordinator() -> None:
+    global _coordinator
+    if _coordinator is not None:
+        await _coordinator.close()
+        _coordinator = None
@@ -1,12 +1,14 @@
 """Database configuration and session management."""
 import os
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
-from sqlalchemy import MetaData, pool
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import MetaData, event, pool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
 from app.config.settings import settings
+from app.core.catalog import track_catalog_writes
+from app.core.metrics import instrument_engine
 
 # Naming convention for constraints
 convention = {
@@ -19,6 +21,9 @@ convention = {
 
 metadata = MetaData(naming_convention=convention)
 
+# 目录表（skills / agents / projects 等）写入提交后自动递增目录版本，响应缓存和 ETag 依赖它失效
+track_catalog_writes()
+
 
 class Base(DeclarativeBase):
     """Base class for all database models."""
@@ -26,17 +31,77 @@ class Base(DeclarativeBase):
     metadata = metadata
 
 
-# 检查是否在 Alembic 迁移模式下
-# 在迁移模式下，不创建 async engine（避免同步/异步冲突）
-if os.environ.get("ALEMBIC_MIGRATION_MODE") != "1":
+def uses_sqlite_profile(database_url: str) -> bool:
+    """文件型 SQLite 且启用了 sqlite_wal 时使用性能配置（内存数据库无法共享连接，不适用）"""
+    return (
+        settings.sqlite_wal
+        and database_url.startswith("sqlite")
+        and ":memory:" not in database_url
+        and "mode=memory" not in database_url
+    )
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """新建 SQLite 连接时设置 WAL 与性能相关 pragma"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def _use_immediate_transactions(engine: AsyncEngine) -> None:
+    """
+    写入连接：关闭驱动自带的隐式 BEGIN，由 SQLAlchemy 显式发出 BEGIN IMMEDIATE
+
+    事务开始即取得写锁，避免读事务升级为写事务时的 SQLITE_BUSY；同时让 SAVEPOINT 行为正确。
+    """
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _begin_immediate(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def create_db_engine(
+    database_url: str,
+    *,
+    sqlite_profile: Optional[bool] = None,
+    writer: bool = False,
+) -> AsyncEngine:
+    """
+    创建异步引擎
+
+    Args:
+        database_url: 数据库 URL
+        sqlite_profile: 是否使用 SQLite 性能配置，None 表示按 uses_sqlite_profile 判断
+        writer: 是否为单写入连接引擎（仅 SQLite 性能配置下使用）
+    """
     # 根据数据库类型配置引擎参数
     engine_kwargs = {
         "echo": settings.debug,
         "future": True,
     }
+    if sqlite_profile is None:
+        sqlite_profile = uses_sqlite_profile(database_url)
 
-    # SQLite 不支持连接池参数，使用 NullPool
-    if settings.database_url.startswith("sqlite"):
+    if sqlite_profile:
+        # WAL 下读写互不阻塞，复用少量常驻连接，避免每个请求重新打开数据库
+        engine_kwargs.update({
+            "poolclass": pool.AsyncAdaptedQueuePool,
+            "pool_size": 1 if writer else settings.sqlite_pool_size,
+            "max_overflow": 0 if writer else settings.sqlite_pool_size * 2,
+        })
+    elif database_url.startswith("sqlite"):
+        # 默认日志模式下 SQLite 不使用连接池
         engine_kwargs["poolclass"] = pool.NullPool
     else:
         # 其他数据库（PostgreSQL, MySQL 等）使用连接池
@@ -47,22 +112,58 @@ if os.environ.get("ALEMBIC_MIGRATION_MODE") != "1":
             "pool_pre_ping": True,     # 连接前检查可用性，防止使用失效连接
         })
 
-    # Create async engine with optimized settings
-    engine = create_async_engine(settings.database_url, **engine_kwargs)
+    engine = create_async_engine(database_url, **engine_kwargs)
+    if sqlite_profile:
+        event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+        if writer:
+            _use_immediate_transactions(engine)
+    if settings.metrics_enabled:
+        instrument_engine(engine)
+    return engine
 
-    # Create async session factory
-    AsyncSessionLocal = async_sessionmaker(
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
         engine,
         class_=AsyncSession,
         expire_on_commit=False,
         autocommit=False,
         autoflush=False,
     )
+
+
+# 检查是否在 Alembic 迁移模式下
+# 在迁移模式下，不创建 async engine（避免同步/异步冲突）
+if os.environ.get("ALEMBIC_MIGRATION_MODE") != "1":
+    # Create async engine with optimized settings
+    engine = create_db_engine(settings.database_url)
+
+    # Create async session factory
+    AsyncSessionLocal = create_session_factory(engine)
 else:
     # 迁移模式下，不创建 engine 和 session factory
     engine = None
     AsyncSessionLocal = None
 
+# 单写入连接引擎（首次使用写队列时创建）
+_writer_engine: Optional[AsyncEngine] = None
+_writer_sessions: Optional[async_sessionmaker] = None
+
+
+def get_writer_session_factory() -> async_sessionmaker:
+    """
+    写队列使用的 session 工厂
+
+    SQLite 性能配置下使用独立的单连接引擎（BEGIN IMMEDIATE）；否则复用 AsyncSessionLocal。
+    """
+    global _writer_engine, _writer_sessions
+    if not uses_sqlite_profile(settings.database_url):
+        return AsyncSessionLocal
+    if _writer_sessions is None:
+        _writer_engine = create_db_engine(settings.database_url, writer=True)
+        _writer_sessions = create_session_factory(_writer_engine)
+    return _writer_sessions
+
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency to get database session.
@@ -82,13 +183,26 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 
 
 async def init_db() -> None:
-    """Initialize database tables and run migrations."""
-    # 先执行自动迁移
-    from app.database.migration import auto_migrate
+    """Initialize database tables and run migrations.
+
+    schema 指纹与上次成功初始化时一致时（fast_start），跳过迁移和 create_all。
+    """
     import logging
+    from app.database.schema_stamp import read_schema_stamp, schema_fingerprint, write_schema_stamp
 
     logger = logging.getLogger(__name__)
 
+    fingerprint = schema_fingerprint(Base.metadata)
+    if settings.fast_start:
+        async with engine.connect() as conn:
+            stamp = await conn.run_sync(read_schema_stamp)
+        if stamp == fingerprint:
+            logger.info("Database schema unchanged, skipping migrations")
+            return
+
+    # 先执行自动迁移
+    from app.database.migration import auto_migrate
+
     # 将异步数据库 URL 转换为同步 URL（Alembic 需要同步连接）
     sync_db_url = settings.database_url.replace("+aiosqlite", "")
 
@@ -103,9 +217,25 @@ async def init_db() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
+        # FTS5 全文索引是虚拟表，不在 Base.metadata 中，单独确保存在
+        from app.repositories.search_index import ensure_search_index
+        await conn.run_sync(ensure_search_index)
+
+        # 记录指纹：代码中的 schema 不变时，下次启动跳过以上步骤。
+        # 迁移失败时不记录（create_all 无法给已有表补列），下次启动重新迁移并再次报告失败
+        if migration_success:
+            await conn.run_sync(write_schema_stamp, fingerprint)
+
 
 async def close_db() -> None:
     """Close database connections."""
+    global _writer_engine, _writer_sessions
+    from app.core.db_writer import close_write_queue
+
+    await close_write_queue()
+    if _writer_engine is not None:
+        await _writer_engine.dispose()
+        _writer_engine = _writer_sessions = None
     await engine.dispose()
 
 
@@ -0,0 +1,152 @@
+"""
+串行化数据库写队列
+
+SQLite 同一时刻只允许一个写事务。多个协程各自开事务提交时会互相等待写锁
+（超时即 "database is locked"），且每次提交都要单独 fsync。写队列由单个后台任务
+持有唯一的写连接，把排队中的短写操作合并到一个事务中提交：
+
+- 每个写操作在独立的 SAVEPOINT 中执行，单个操作失败只回滚它自己
+- 一批最多 sqlite_write_batch_size 个操作，整批一次 COMMIT
+- 写操作只应包含数据库读写，不要自行 commit，也不要有外部副作用
+
+用法：
+    await get_write_queue().submit(lambda db: repo_fn(db, ...))
+"""
+import asyncio
+import contextlib
+import logging
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+WriteOperation = Callable[[AsyncSession], Awaitable[Any]]
+_Job = Tuple[WriteOperation, "asyncio.Future[Any]"]
+
+
+class WriteQueue:
+    """单写入者的批量写队列"""
+
+    def __init__(self, session_factory: async_sessionmaker, max_batch: Optional[int] = None):
+        """
+        Args:
+            session_factory: 写连接的 session 工厂
+            max_batch: 单个事务最多合并的写操作数
+        """
+        self._session_factory = session_factory
+        self.max_batch = max_batch or settings.sqlite_write_batch_size
+        self._queue: "asyncio.Queue[_Job]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        self.batches = 0  # 已提交的事务数
+        self.operations = 0  # 已执行的写操作数
+
+    async def submit(self, operation: Callable[[AsyncSession], Awaitable[T]]) -> T:
+        """
+        提交写操作并等待其所在事务提交
+
+        Args:
+            operation: 接收 AsyncSession 的协程函数
+
+        Returns:
+            operation 的返回值；operation 或提交失败时抛出对应异常
+        """
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((operation, future))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch: List[_Job] = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._run_batch(batch)
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                # 提交失败：整批回滚，通知仍在等待的调用方
+                logger.error(f"Write batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _run_batch(self, batch: List[_Job]) -> None:
+        outcomes: List[Tuple[bool, Any]] = []
+        async with self._session_factory() as session:
+            async with session.begin():
+                for operation, future in batch:
+                    if future.cancelled():
+                        # 调用方已放弃，不再执行
+                        outcomes.append((True, None))
+                        continue
+                    try:
+                        async with session.begin_nested():
+                            outcomes.append((True, await operation(session)))
+                    except Exception as e:
+                        outcomes.append((False, e))
+        self.batches += 1
+        self.operations += len(batch)
+
+        for (_, future), (ok, value) in zip(batch, outcomes):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """
+        停止后台任务
+
+        先等待已排队的写操作执行完（最多 timeout 秒，应用关闭时不丢失最后的落库），
+        仍未执行的写操作以异常结束。
+        """
+        if self._worker is not None:
+            if not self._worker.done():
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._queue.join(), timeout)
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("write queue closed"))
+
+
+# 全局单例
+_write_queue: Optional[WriteQueue] = None
+
+
+def get_write_queue() -> WriteQueue:
+    """获取全局写队列"""
+    global _write_queue
+    if _write_queue is None:
+        from app.core.database import get_writer_session_factory
+
+        _write_queue = WriteQueue(get_writer_session_factory())
+    return _write_queue
+
+
+async def close_write_queue() -> None:
+    """关闭全局写队列（应用关闭时调用）"""
+    global _write_queue
+    if _write_queue is not None:
+        await _write_queue.close()
+        _write_queue = None
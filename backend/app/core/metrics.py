@@ -0,0 +1,567 @@
+"""
+运行时指标
+
+进程内的轻量指标注册表（Counter / Gauge / Histogram，支持标签），用于定位请求耗时和阻塞事件循环的调用：
+
+- 每个路由的请求耗时直方图、进行中的请求数（MetricsMiddleware）
+- 事件循环延迟采样（EventLoopMonitor）；延迟超过阈值时记录当时正在处理的请求
+- 每个请求的 SQL 查询次数和耗时（instrument_engine 挂在引擎的 cursor 事件上）
+- 子进程启动次数（审计钩子 subprocess.Popen / os.forkpty）
+- WebSocket 订阅队列深度（各服务通过 register_queue_source 登记）
+- 扫描耗时（timed_scan 装饰器）
+
+GET /metrics 输出 Prometheus 文本格式；GET /api/system/metrics 返回仪表盘使用的 JSON 汇总。
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import math
+import os
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+# 请求耗时（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 事件循环延迟（秒）
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+# 单个请求的 SQL 查询次数
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterable[Tuple[str, LabelValues, float]]:
+        """(后缀, 标签值, 数值)"""
+        pass
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self):
+        for key, value in self.values().items():
+            yield "_total", key, value
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels: Any) -> None:
+        """采集时调用 fn 取值"""
+        self._functions[self._key(labels)] = fn
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            values = dict(self._values)
+        for key, fn in list(self._functions.items()):
+            try:
+                values[key] = float(fn())
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} collector failed: {e}")
+        return values
+
+    def samples(self):
+        for key, value in self.values().items():
+            yield "", key, value
+
+
+@dataclass
+class HistogramStats:
+    buckets: Tuple[float, ...]
+    counts: List[int]  # 各桶（非累计）计数，最后一个为 +Inf
+    total: float = 0.0
+    count: int = 0
+    max: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """按桶线性插值估算分位数"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(self.counts):
+            upper = self.buckets[index] if index < len(self.buckets) else self.max
+            if seen + bucket_count >= rank and bucket_count:
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+            lower = upper
+        return self.max
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._stats: Dict[LabelValues, HistogramStats] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = HistogramStats(self.buckets, [0] * (len(self.buckets) + 1))
+            stats.counts[index] += 1
+            stats.total += value
+            stats.count += 1
+            stats.max = max(stats.max, value)
+
+    def stats(self) -> Dict[LabelValues, HistogramStats]:
+        with self._lock:
+            return {
+                key: HistogramStats(s.buckets, list(s.counts), s.total, s.count, s.max)
+                for key, s in self._stats.items()
+            }
+
+    def samples(self):
+        for key, stats in self.stats().items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), stats.counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else _format_value(bound)
+                yield "_bucket", key + (le,), cumulative
+            yield "_sum", key, stats.total
+            yield "_count", key, stats.count
+
+
+def _format_value(value: float) -> str:
+    if math.isfinite(value) and value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self.started_at = time.time()
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Prometheus 文本格式"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for suffix, key, value in metric.samples():
+                names = metric.labelnames + (("le",) if suffix == "_bucket" else ())
+                labels = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, key))
+                label_text = f"{{{labels}}}" if labels else ""
+                lines.append(f"{metric.name}{suffix}{label_text} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+# ---------- 指标定义 ----------
+
+HTTP_REQUEST_DURATION = _registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"),
+))
+HTTP_REQUESTS_IN_FLIGHT = _registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled",
+))
+HTTP_REQUEST_DB_QUERIES = _registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ("route",), buckets=COUNT_BUCKETS,
+))
+HTTP_REQUEST_DB_SECONDS = _registry.register(Histogram(
+    "http_request_db_seconds", "Time spent in SQL per HTTP request", ("route",),
+))
+WEBSOCKET_CONNECTIONS = _registry.register(Gauge(
+    "websocket_connections", "Open WebSocket connections by route", ("route",),
+))
+WEBSOCKET_QUEUE_DEPTH = _registry.register(Gauge(
+    "websocket_queue_depth", "Buffered messages in WebSocket subscriber queues", ("source", "stat"),
+))
+WEBSOCKET_SUBSCRIBERS = _registry.register(Gauge(
+    "websocket_subscribers", "Subscriber queues by source", ("source",),
+))
+DB_QUERIES = _registry.register(Counter(
+    "db_queries", "SQL statements executed",
+))
+DB_QUERY_DURATION = _registry.register(Histogram(
+    "db_query_duration_seconds", "SQL statement latency",
+))
+EVENT_LOOP_LAG = _registry.register(Histogram(
+    "event_loop_lag_seconds", "Delay of a scheduled event loop wakeup", buckets=LAG_BUCKETS,
+))
+EVENT_LOOP_STALLS = _registry.register(Counter(
+    "event_loop_stalls", "Event loop wakeups delayed beyond the stall threshold",
+))
+SUBPROCESS_SPAWNS = _registry.register(Counter(
+    "subprocess_spawns", "Child processes started", ("executable",),
+))
+SCAN_DURATION = _registry.register(Histogram(
+    "scan_duration_seconds", "Filesystem and catalog scan duration", ("scanner",),
+))
+
+
+# ---------- 请求上下文（SQL 统计） ----------
+
+@dataclass
+class RequestDbStats:
+    queries: int = 0
+    seconds: float = 0.0
+    # 性能分析时记录 SQL 时间线：(开始时刻 perf_counter, 耗时, 语句)，最多 timeline_limit 条
+    timeline: Optional[List[Tuple[float, float, str]]] = None
+    timeline_limit: int = 0
+
+
+_request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def begin_request_db_stats() -> RequestDbStats:
+    stats = RequestDbStats()
+    _request_db_stats.set(stats)
+    return stats
+
+
+def current_request_db_stats() -> Optional[RequestDbStats]:
+    return _request_db_stats.get()
+
+
+def instrument_engine(engine: Any) -> None:
+    """在引擎上统计 SQL 次数和耗时（AsyncEngine 或同步 Engine）"""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_metrics_query_start")
+        if not starts:
+            return
+        started = starts.pop()
+        elapsed = time.perf_counter() - started
+        DB_QUERIES.inc()
+        DB_QUERY_DURATION.observe(elapsed)
+        stats = _request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+            if stats.timeline is not None and len(stats.timeline) < stats.timeline_limit:
+                stats.timeline.append((started, elapsed, statement))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        connection = exception_context.connection
+        starts = connection.info.get("_metrics_query_start") if connection is not None else None
+        if starts:
+            starts.pop()
+
+
+# ---------- 进行中的请求（事件循环阻塞时用于定位） ----------
+
+_in_flight: Dict[int, Tuple[str, float]] = {}
+
+
+def request_started(token: int, description: str) -> None:
+    _in_flight[token] = (description, time.perf_counter())
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+
+
+def request_finished(token: int) -> None:
+    if _in_flight.pop(token, None) is not None:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+
+
+def in_flight_requests() -> List[Dict[str, Any]]:
+    now = time.perf_counter()
+    return sorted(
+        ({"request": description, "elapsed_ms": round((now - started) * 1000, 1)}
+         for description, started in list(_in_flight.values())),
+        key=lambda item: -item["elapsed_ms"],
+    )
+
+
+# ---------- 事件循环延迟 ----------
+
+class EventLoopMonitor:
+    """
+    周期性调度一次唤醒并测量实际延迟。延迟即事件循环被同步代码占用的时间；
+    超过 stall_threshold 时记录警告和当时进行中的请求。
+    """
+
+    def __init__(self, interval: float, stall_threshold: float):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.last_lag = lag
+            EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.stall_threshold:
+                EVENT_LOOP_STALLS.inc()
+                busy = ", ".join(item["request"] for item in in_flight_requests()[:5]) or "none"
+                logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms (in flight: {busy})")
+
+
+_loop_monitor: Optional[EventLoopMonitor] = None
+
+
+def get_loop_monitor() -> EventLoopMonitor:
+    global _loop_monitor
+    if _loop_monitor is None:
+        from app.config.settings import settings
+
+        _loop_monitor = EventLoopMonitor(settings.metrics_loop_lag_interval, settings.metrics_loop_stall_threshold)
+    return _loop_monitor
+
+
+# ---------- 子进程启动 ----------
+
+# subprocess.Popen 内部的 fork/posix_spawn 不单独计数
+_SPAWN_EVENTS = frozenset({"subprocess.Popen", "os.forkpty", "os.fork"})
+_audit_hook_installed = False
+
+
+def _audit_hook(event: str, args: tuple) -> None:
+    if event not in _SPAWN_EVENTS:
+        return
+    if event == "subprocess.Popen":
+        executable, argv = args[0], args[1]
+        if not executable:
+            if isinstance(argv, (str, bytes)):
+                parts = argv.split()
+                executable = parts[0] if parts else ""
+            elif argv:
+                executable = argv[0]
+        name = os.path.basename(os.fsdecode(executable)) if executable else "unknown"
+    else:
+        name = "pty" if event == "os.forkpty" else "fork"
+    SUBPROCESS_SPAWNS.inc(executable=name)
+
+
+def install_subprocess_hook() -> None:
+    """通过审计钩子统计所有子进程启动（审计钩子无法移除，只安装一次）"""
+    global _audit_hook_installed
+    if not _audit_hook_installed:
+        sys.addaudithook(_audit_hook)
+        _audit_hook_installed = True
+
+
+# ---------- WebSocket 队列深度 ----------
+
+def register_queue_source(source: str, queues: Callable[[], Iterable[asyncio.Queue]]) -> None:
+    """登记一类订阅队列；采集时统计队列数、最大深度和总深度"""
+
+    def snapshot() -> List[int]:
+        return [queue.qsize() for queue in queues()]
+
+    WEBSOCKET_SUBSCRIBERS.set_function(lambda: len(snapshot()), source=source)
+    WEBSOCKET_QUEUE_DEPTH.set_function(lambda: max(snapshot(), default=0), source=source, stat="max")
+    WEBSOCKET_QUEUE_DEPTH.set_function(lambda: sum(snapshot()), source=source, stat="total")
+
+
+# ---------- 扫描耗时 ----------
+
+def timed_scan(scanner: str) -> Callable:
+    """记录扫描函数（同步或异步）的耗时"""
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    SCAN_DURATION.observe(time.perf_counter() - started, scanner=scanner)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                SCAN_DURATION.observe(time.perf_counter() - started, scanner=scanner)
+        return wrapper
+
+    return decorator
+
+
+# ---------- 仪表盘汇总 ----------
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def dashboard_snapshot() -> Dict[str, Any]:
+    """仪表盘使用的汇总数据（耗时单位毫秒）"""
+    routes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    merged: Dict[Tuple[str, str], HistogramStats] = {}
+    for (method, route, status), stats in HTTP_REQUEST_DURATION.stats().items():
+        key = (method, route)
+        entry = routes.setdefault(key, {"method": method, "route": route, "count": 0, "errors": 0})
+        entry["count"] += stats.count
+        if status.startswith("5"):
+            entry["errors"] += stats.count
+        total = merged.get(key)
+        if total is None:
+            merged[key] = HistogramStats(stats.buckets, list(stats.counts), stats.total, stats.count, stats.max)
+        else:
+            total.counts = [a + b for a, b in zip(total.counts, stats.counts)]
+            total.total += stats.total
+            total.count += stats.count
+            total.max = max(total.max, stats.max)
+
+    db_queries = HTTP_REQUEST_DB_QUERIES.stats()
+    db_seconds = HTTP_REQUEST_DB_SECONDS.stats()
+    for key, stats in merged.items():
+        route = key[1]
+        queries = db_queries.get((route,))
+        seconds = db_seconds.get((route,))
+        routes[key].update({
+            "avg_ms": _ms(stats.mean),
+            "p50_ms": _ms(stats.quantile(0.5)),
+            "p95_ms": _ms(stats.quantile(0.95)),
+            "p99_ms": _ms(stats.quantile(0.99)),
+            "max_ms": _ms(stats.max),
+            "db_queries_avg": round(queries.mean, 2) if queries else 0.0,
+            "db_ms_avg": _ms(seconds.mean) if seconds else 0.0,
+        })
+
+    lag = EVENT_LOOP_LAG.stats().get((), HistogramStats(LAG_BUCKETS, [0] * (len(LAG_BUCKETS) + 1)))
+    monitor = _loop_monitor
+    query_stats = DB_QUERY_DURATION.stats().get(())
+
+    queues: Dict[str, Dict[str, float]] = {}
+    for (source,), value in WEBSOCKET_SUBSCRIBERS.values().items():
+        queues.setdefault(source, {})["subscribers"] = value
+    for (source, stat), value in WEBSOCKET_QUEUE_DEPTH.values().items():
+        queues.setdefault(source, {})[f"{stat}_depth"] = value
+
+    return {
+        "uptime_s": round(time.time() - _registry.started_at, 1),
+        "routes": sorted(routes.values(), key=lambda r: -r.get("p99_ms", 0)),
+        "in_flight": in_flight_requests(),
+        "event_loop": {
+            "lag_ms": _ms(monitor.last_lag) if monitor else None,
+            "p99_ms": _ms(lag.quantile(0.99)),
+            "max_ms": _ms(lag.max),
+            "samples": lag.count,
+            "stalls": int(EVENT_LOOP_STALLS.values().get((), 0)),
+        },
+        "db": {
+            "queries": int(DB_QUERIES.values().get((), 0)),
+            "avg_ms": _ms(query_stats.mean) if query_stats else 0.0,
+            "p99_ms": _ms(query_stats.quantile(0.99)) if query_stats else 0.0,
+        },
+        "subprocesses": {key[0]: int(value) for key, value in SUBPROCESS_SPAWNS.values().items()},
+        "websockets": {key[0]: int(value) for key, value in WEBSOCKET_CONNECTIONS.values().items()},
+        "queues": queues,
+        "scans": [
+            {
+                "scanner": key[0],
+                "count": stats.count,
+                "avg_ms": _ms(stats.mean),
+                "max_ms": _ms(stats.max),
+            }
+            for key, stats in sorted(SCAN_DURATION.stats().items())
+        ],
+    }
@@ -0,0 +1,421 @@
+"""
+采样性能分析
+
+后台线程按固定间隔读取事件循环线程的调用栈（sys._current_frames），不修改被分析的代码，
+开销只与采样频率有关，低频采样时可以在生产环境长期开启：
+
+- 全局火焰图：开启以来所有采样的折叠栈（folded stacks，flamegraph.pl / speedscope 可直接读取）
+- 慢请求剖面：ProfilerMiddleware 把请求所在的 asyncio Task 登记进来。每次采样，正在运行的请求
+  记录事件循环线程的调用栈，挂起的请求记录其协程的 await 链（根帧为 "[await]"），因此剖面按
+  墙钟时间分布，等待 I/O、锁或子进程的时间同样可见；请求耗时超过阈值时保存该请求的折叠栈
+  和 SQL 时间线，保留最近 N 个
+
+SQL 时间线来自 metrics.instrument_engine 的 cursor 事件（请求上下文中的 RequestDbStats）。
+线程池中执行的同步代码在事件循环线程上表现为 await 点；开启 profiler_all_threads 后
+其他线程的栈计入全局火焰图（以线程名为根帧）。
+
+分析器按进程工作：多 worker 部署时每个 worker 各自采样、各自保存剖面。
+"""
+from __future__ import annotations
+
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core import metrics
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 单个栈最多记录的帧数（从栈顶算起），更深的栈以 TRUNCATED_ROOT 为根帧
+MAX_STACK_DEPTH = 128
+TRUNCATED_ROOT = "[truncated]"
+# 全局火焰图最多保留的不同栈数，超出后的采样计入 OVERFLOW_STACK
+MAX_AGGREGATE_STACKS = 20000
+OVERFLOW_STACK = "[other stacks]"
+# 挂起请求的 await 链的根帧
+AWAIT_ROOT = "[await]"
+# SQL 时间线中每条语句保留的最大长度
+MAX_STATEMENT_LENGTH = 2000
+
+_BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep
+_STDLIB_ROOT = os.path.dirname(os.__file__) + os.sep
+
+
+def _short_path(filename: str) -> str:
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        index = filename.rfind(marker)
+        if index != -1:
+            return filename[index + len(marker):]
+    if filename.startswith(_BACKEND_ROOT):
+        return filename[len(_BACKEND_ROOT):]
+    if filename.startswith(_STDLIB_ROOT):
+        return filename[len(_STDLIB_ROOT):]
+    return filename
+
+
+def _frame_label(code: CodeType) -> str:
+    # 折叠栈格式以 ";" 分隔帧，帧名中不能出现分号
+    label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+    return label.replace(";", ":")
+
+
+@dataclass
+class SqlStatement:
+    offset_ms: float  # 相对请求开始
+    duration_ms: float
+    statement: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"offset_ms": self.offset_ms, "duration_ms": self.duration_ms, "statement": self.statement}
+
+
+@dataclass
+class Profile:
+    """一次慢请求的栈剖面和 SQL 时间线"""
+    id: str
+    method: str
+    path: str
+    route: str
+    status: int
+    duration_ms: float
+    started_at: datetime
+    sample_interval: float
+    stacks: Dict[str, int]
+    sql: List[SqlStatement]
+    sql_count: int  # 请求执行的 SQL 总数（超出上限的语句不进入时间线）
+    sql_ms: float
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "duration_ms": self.duration_ms,
+            "started_at": self.started_at,
+            "samples": self.samples,
+            "sql_count": self.sql_count,
+            "sql_ms": self.sql_ms,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "sample_interval": self.sample_interval,
+            "sql": [item.to_dict() for item in self.sql],
+            "top_stacks": [
+                {"stack": stack, "samples": count}
+                for stack, count in collections.Counter(self.stacks).most_common(20)
+            ],
+        }
+
+    def folded(self) -> str:
+        return format_folded(self.stacks)
+
+
+def format_folded(stacks: Dict[str, int]) -> str:
+    """折叠栈文本：每行 "帧1;帧2;...;帧N 采样数" """
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+@dataclass
+class RequestCapture:
+    """进行中的被分析请求"""
+    task: asyncio.Task
+    method: str
+    path: str
+    started: float  # perf_counter
+    started_at: datetime
+    db_stats: metrics.RequestDbStats
+    stacks: Dict[str, int] = field(default_factory=lambda: collections.defaultdict(int))
+
+
+class SamplingProfiler:
+    def __init__(
+        self,
+        sample_interval: float,
+        slow_request_threshold: float,
+        max_profiles: int,
+        max_sql_statements: int,
+        all_threads: bool = False,
+    ):
+        self.sample_interval = sample_interval
+        self.slow_request_threshold = slow_request_threshold
+        self.max_sql_statements = max_sql_statements
+        self.all_threads = all_threads
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+
+        self._captures: Dict[asyncio.Task, RequestCapture] = {}
+        self._aggregate: Dict[str, int] = collections.defaultdict(int)
+        self._profiles: Deque[Profile] = collections.deque(maxlen=max_profiles)
+        self._labels: Dict[CodeType, str] = {}
+
+        self._started_at: Optional[datetime] = None
+        self._started: float = 0.0
+        self._samples = 0
+        self._sampling_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._thread is not None
+
+    def start(
+        self,
+        sample_interval: Optional[float] = None,
+        slow_request_threshold: Optional[float] = None,
+    ) -> None:
+        """开始采样；必须在事件循环线程中调用。已在运行时只更新参数"""
+        if sample_interval is not None:
+            self.sample_interval = sample_interval
+        if slow_request_threshold is not None:
+            self.slow_request_threshold = slow_request_threshold
+        if self._thread is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self.reset()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Sampling profiler started (interval {self.sample_interval * 1000:.0f}ms, "
+            f"slow request threshold {self.slow_request_threshold}s)"
+        )
+
+    def stop(self) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop_event.set()
+        thread.join()
+        self._thread = None
+        with self._lock:
+            self._captures.clear()
+        logger.info(f"Sampling profiler stopped after {self._samples} samples")
+
+    def reset(self) -> None:
+        """清空全局火焰图（保留慢请求剖面）"""
+        with self._lock:
+            self._aggregate.clear()
+            self._samples = 0
+            self._sampling_seconds = 0.0
+            self._started = time.perf_counter()
+            self._started_at = datetime.now(timezone.utc)
+
+    # ---------- 采样线程 ----------
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.sample_interval):
+            try:
+                self._sample()
+            except Exception as e:  # 采样失败不能影响服务
+                logger.warning(f"Profiler sample failed: {e}")
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def _fold(self, frame: Optional[FrameType]) -> str:
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        if frame is not None:
+            labels.append(TRUNCATED_ROOT)
+        labels.reverse()
+        return ";".join(labels)
+
+    def _fold_awaiting(self, task: asyncio.Task) -> str:
+        """挂起 Task 的 await 链（外层协程在前）"""
+        labels = [AWAIT_ROOT]
+        coro: Any = task.get_coro()
+        while coro is not None and len(labels) < MAX_STACK_DEPTH:
+            frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+            if frame is None:
+                break
+            labels.append(self._label(frame.f_code))
+            coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+        return ";".join(labels)
+
+    def _add(self, stack: str) -> None:
+        if stack not in self._aggregate and len(self._aggregate) >= MAX_AGGREGATE_STACKS:
+            stack = OVERFLOW_STACK
+        self._aggregate[stack] += 1
+
+    def _sample(self) -> None:
+        sampled = time.thread_time()
+        frames = sys._current_frames()
+        loop_frame = frames.get(self._loop_thread_id)
+        # 采样时事件循环正在执行的 Task（空闲或执行普通回调时为 None）
+        running = asyncio.current_task(self._loop) if loop_frame is not None else None
+
+        stacks = []
+        if loop_frame is not None:
+            stacks.append(self._fold(loop_frame))
+        if self.all_threads:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            own = threading.get_ident()
+            for thread_id, frame in frames.items():
+                if thread_id not in (self._loop_thread_id, own):
+                    name = names.get(thread_id, str(thread_id)).replace(";", ":")
+                    stacks.append(f"{name};{self._fold(frame)}")
+        del frames, loop_frame
+
+        with self._lock:
+            captures = list(self._captures.values())
+        request_stacks = [
+            (capture, stacks[0] if capture.task is running and stacks else self._fold_awaiting(capture.task))
+            for capture in captures
+        ]
+
+        with self._lock:
+            for stack in stacks:
+                self._add(stack)
+            for capture, stack in request_stacks:
+                capture.stacks[stack] += 1
+            self._samples += 1
+            self._sampling_seconds += time.thread_time() - sampled
+
+    # ---------- 请求 ----------
+
+    def begin_request(self, method: str, path: str) -> Optional[RequestCapture]:
+        """登记当前 Task 正在处理的请求，并开启该请求的 SQL 时间线"""
+        task = asyncio.current_task()
+        if task is None or not self.enabled:
+            return None
+        db_stats = metrics.current_request_db_stats() or metrics.begin_request_db_stats()
+        db_stats.timeline = []
+        db_stats.timeline_limit = self.max_sql_statements
+        capture = RequestCapture(
+            task=task,
+            method=method,
+            path=path,
+            started=time.perf_counter(),
+            started_at=datetime.now(timezone.utc),
+            db_stats=db_stats,
+        )
+        with self._lock:
+            self._captures[task] = capture
+        return capture
+
+    def finish_request(self, capture: Optional[RequestCapture], route: str, status: int) -> Optional[Profile]:
+        """请求结束；耗时超过阈值时保存剖面并返回"""
+        if capture is None:
+            return None
+        duration = time.perf_counter() - capture.started
+        with self._lock:
+            self._captures.pop(capture.task, None)
+            stacks = dict(capture.stacks)
+
+        db_stats = capture.db_stats
+        timeline = db_stats.timeline or []
+        db_stats.timeline = None
+        if duration < self.slow_request_threshold:
+            return None
+
+        profile = Profile(
+            id=uuid.uuid4().hex[:12],
+            method=capture.method,
+            path=capture.path,
+            route=route,
+            status=status,
+            duration_ms=round(duration * 1000, 1),
+            started_at=capture.started_at,
+            sample_interval=self.sample_interval,
+            stacks=stacks,
+            sql=[
+                SqlStatement(
+                    offset_ms=round((started - capture.started) * 1000, 2),
+                    duration_ms=round(elapsed * 1000, 2),
+                    statement=statement[:MAX_STATEMENT_LENGTH],
+                )
+                for started, elapsed, statement in timeline
+            ],
+            sql_count=db_stats.queries,
+            sql_ms=round(db_stats.seconds * 1000, 1),
+        )
+        with self._lock:
+            self._profiles.append(profile)
+        logger.warning(
+            f"Slow request captured: {capture.method} {capture.path} took {profile.duration_ms:.0f}ms "
+            f"({profile.samples} samples, {profile.sql_count} SQL) - profile {profile.id}"
+        )
+        return profile
+
+    # ---------- 查询 ----------
+
+    def profiles(self) -> List[Profile]:
+        """最近的慢请求剖面（新的在前）"""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get_profile(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return next((p for p in self._profiles if p.id == profile_id), None)
+
+    def clear_profiles(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+    def folded(self) -> str:
+        """开启以来的全局折叠栈"""
+        with self._lock:
+            return format_folded(self._aggregate)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = time.perf_counter() - self._started if self._started_at else 0.0
+            return {
+                "enabled": self.enabled,
+                "sample_interval": self.sample_interval,
+                "slow_request_threshold": self.slow_request_threshold,
+                "all_threads": self.all_threads,
+                "started_at": self._started_at if self.enabled else None,
+                "samples": self._samples,
+                "unique_stacks": len(self._aggregate),
+                # 采样线程 CPU 时间 / 运行时间：采样开销的估计
+                "overhead_ratio": round(self._sampling_seconds / elapsed, 5) if elapsed > 0 else 0.0,
+                "active_requests": len(self._captures),
+                "profiles": len(self._profiles),
+                "max_profiles": self._profiles.maxlen,
+            }
+
+
+_profiler: Optional[SamplingProfiler] = None
+
+
+def get_profiler() -> SamplingProfiler:
+    global _profiler
+    if _profiler is None:
+        from app.config.settings import settings
+
+        _profiler = SamplingProfiler(
+            sample_interval=settings.profiler_sample_interval,
+            slow_request_threshold=settings.profiler_slow_request_threshold,
+            max_profiles=settings.profiler_max_profiles,
+            max_sql_statements=settings.profiler_max_sql_statements,
+            all_threads=settings.profiler_all_threads,
+        )
+    return _profiler
@@ -0,0 +1,156 @@
+"""
+目录类 GET 接口的进程内响应缓存
+
+前端几乎每次加载页面都会请求 /skills、/agents、/agent-teams、/workflows、/projects、
+/config/models 和 /claude/settings；每次都要查询数据库、逐行校验为 Pydantic 模型或重新读取配置文件。
+缓存保存完整的响应体（按路由 + 规范化后的查询参数区分，LRU 淘汰）：
+
+- 每条规则声明依赖的目录（见 app.core.catalog）；条目记录生成时的目录版本，版本变化即失效
+- TTL 兜底应用之外的修改（CLI 编辑 settings.json、cc-switch 切换等）
+- ETag 为响应体摘要，客户端携带 If-None-Match 且内容未变化时返回 304
+
+由 ResponseCacheMiddleware 使用。
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from app.config.settings import settings
+from app.core.catalog import get_catalog_version
+
+
+@dataclass(frozen=True)
+class CacheRule:
+    """一个可缓存的 GET 路由"""
+    path: str
+    kinds: Tuple[str, ...]  # 响应依赖的目录，任一版本变化即失效
+    file_backed: bool = False  # 直接读取配置文件（使用较短的 response_cache_file_ttl）
+
+    @property
+    def ttl(self) -> float:
+        return settings.response_cache_file_ttl if self.file_backed else settings.response_cache_ttl
+
+    def versions(self) -> Tuple[int, ...]:
+        return tuple(get_catalog_version(kind) for kind in self.kinds)
+
+
+def _default_rules() -> List[CacheRule]:
+    prefix = settings.api_prefix
+    return [
+        CacheRule(f"{prefix}/skills", ("skills",)),
+        # inherit 模型按 settings.json 中的 model 解析
+        CacheRule(f"{prefix}/agents", ("agents", "claude_settings")),
+        CacheRule(f"{prefix}/agent-teams", ("agent_teams",)),
+        CacheRule(f"{prefix}/workflows", ("workflows",)),
+        CacheRule(f"{prefix}/projects", ("projects",)),
+        CacheRule(f"{prefix}/config/models", ("models",), file_backed=True),
+        CacheRule(f"{prefix}/claude/settings", ("claude_settings",), file_backed=True),
+    ]
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    etag: str
+    versions: Tuple[int, ...]
+    expires_at: float
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较：忽略 W/ 前缀）"""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def cache_key(path: str, query_string: bytes) -> str:
+    """路由 + 排序后的查询参数（参数顺序不同的请求共用同一条目）"""
+    query = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return f"{path}?{urlencode(sorted(query))}" if query else path
+
+
+class ResponseCache:
+    """按 cache_key 保存响应的 LRU"""
+
+    def __init__(self, rules: Optional[List[CacheRule]] = None, max_entries: Optional[int] = None):
+        self.rules: Dict[str, CacheRule] = {rule.path: rule for rule in (rules or _default_rules())}
+        self.max_entries = max_entries or settings.response_cache_max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def match(self, path: str) -> Optional[CacheRule]:
+        return self.rules.get(path.rstrip("/") or path)
+
+    def get(self, key: str, versions: Tuple[int, ...]) -> Optional[CachedResponse]:
+        """取出仍然有效的条目（目录版本一致且未过期）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.versions != versions or entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(
+        self,
+        key: str,
+        rule: CacheRule,
+        versions: Tuple[int, ...],
+        status: int,
+        headers: List[Tuple[bytes, bytes]],
+        body: bytes,
+    ) -> CachedResponse:
+        entry = CachedResponse(
+            status=status,
+            headers=headers,
+            body=body,
+            etag=make_etag(body),
+            versions=versions,
+            expires_at=time.monotonic() + rule.ttl,
+        )
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+# 全局单例
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """获取 ResponseCache 单例"""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
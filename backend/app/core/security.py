@@ -1,8 +1,16 @@
 """
 Authentication and security utilities
+
+bcrypt runs on a small dedicated executor so logins do not block the event loop,
+and successfully decoded JWTs are cached until they expire.
 """
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 from jose import JWTError, jwt
 import bcrypt
@@ -40,6 +48,46 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+# bcrypt releases the GIL, so a capped thread pool keeps hashing off the event loop
+# and bounds how many CPU-heavy hashes run at once.
+_password_executor: Optional[ThreadPoolExecutor] = None
+_password_executor_lock = threading.Lock()
+
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    if _password_executor is None:
+        with _password_executor_lock:
+            if _password_executor is None:
+                _password_executor = ThreadPoolExecutor(
+                    max_workers=max(1, settings.password_hash_workers),
+                    thread_name_prefix="password-hash",
+                )
+    return _password_executor
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_password_executor(), verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_password_executor(), get_password_hash, password)
+
+
+def shutdown_password_executor() -> None:
+    """Stop the password executor threads"""
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -52,6 +100,37 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+# token -> (expiry timestamp, payload); LRU bounded by settings.jwt_cache_size
+_token_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    Decode and verify a JWT, reusing earlier verifications of the same token
+
+    Raises:
+        JWTError: the token is invalid or expired
+    """
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+        if cached is not None:
+            if cached[0] > now:
+                _token_cache.move_to_end(token)
+                return cached[1]
+            del _token_cache[token]
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)) and settings.jwt_cache_size > 0:
+        with _token_cache_lock:
+            _token_cache[token] = (float(exp), payload)
+            while len(_token_cache) > settings.jwt_cache_size:
+                _token_cache.popitem(last=False)
+    return payload
+
+
 async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
     """Get user by username"""
     result = await db.execute(select(User).where(User.username == username))
@@ -69,7 +148,7 @@ async def authenticate_user(db: AsyncSession, username: str, password: str) -> O
     user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
@@ -85,7 +164,7 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
@@ -0,0 +1,54 @@
+"""
+启动耗时统计
+
+记录各启动阶段（导入、数据库初始化、后台服务启动等）的耗时，
+启动完成后输出一行汇总日志，并可通过 GET /api/system/startup 查询。
+
+打包入口（main_packaged.py）通过环境变量 OPEN_ADVENTURE_START_TIME 传入进程启动时间，
+总耗时从该时间点开始计算；未设置时从本模块导入开始计算。
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+START_TIME_ENV = "OPEN_ADVENTURE_START_TIME"
+
+_origin = float(os.environ.get(START_TIME_ENV) or time.time())
+_phases: List[Tuple[str, float]] = []
+_ready_at: Optional[float] = None
+
+
+def record(name: str, seconds: float) -> None:
+    """记录一个阶段的耗时"""
+    _phases.append((name, seconds))
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """统计 with 块的耗时"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def mark_ready() -> None:
+    """标记启动完成（lifespan startup 结束）"""
+    global _ready_at
+    _ready_at = time.time()
+
+
+def report() -> Dict[str, Any]:
+    """启动耗时报告（毫秒）"""
+    return {
+        "total_ms": round((_ready_at - _origin) * 1000, 1) if _ready_at else None,
+        "phases": [{"name": name, "ms": round(seconds * 1000, 1)} for name, seconds in _phases],
+    }
+
+
+def format_report() -> str:
+    data = report()
+    phases = ", ".join(f"{p['name']}={p['ms']}ms" for p in data["phases"])
+    return f"Startup completed in {data['total_ms']}ms ({phases})"
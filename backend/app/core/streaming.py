@@ -0,0 +1,120 @@
+"""
+子进程输出流式管道
+
+把子进程 stdout / stderr 转成按批次产出的异步生成器：
+- 每个流只有一个读取任务，按块读取后切分为行（不再每行创建一个 Task）
+- 读取任务和消费者之间是有界队列，消费者（客户端）慢时反压到子进程管道
+- 消费者一次唤醒取走队列中已就绪的全部行，突发输出合并为一个批次 / 一个 SSE 事件
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 单次从管道读取的字节数
+READ_CHUNK_SIZE = 64 * 1024
+# 没有换行时强制切分的单行上限
+MAX_LINE_BYTES = 256 * 1024
+
+
+class OutputLine(NamedTuple):
+    """一行子进程输出"""
+    stream: str  # "stdout" / "stderr"
+    text: str
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace").rstrip("\r")
+
+
+async def _pump(
+    stream: asyncio.StreamReader,
+    name: str,
+    queue: asyncio.Queue,
+) -> None:
+    """读取单个流并按行切分，每个数据块整体入队一次；结束时放入 None"""
+    pending = b""
+    try:
+        while True:
+            chunk = await stream.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            pending += chunk
+            *complete, pending = pending.split(b"\n")
+            if len(pending) > MAX_LINE_BYTES:
+                complete.append(pending)
+                pending = b""
+            if complete:
+                await queue.put([OutputLine(name, _decode(line)) for line in complete])
+        if pending:
+            await queue.put([OutputLine(name, _decode(pending))])
+    except Exception as e:
+        logger.error(f"Error reading {name}: {e}")
+    await queue.put(None)
+
+
+async def iter_process_output(
+    process: asyncio.subprocess.Process,
+    max_batch_lines: int = 500,
+    queue_size: int = 16,
+) -> AsyncIterator[List[OutputLine]]:
+    """
+    逐批产出子进程的输出行，直到 stdout 和 stderr 都关闭
+
+    Args:
+        process: 以 PIPE 方式打开 stdout / stderr 的子进程
+        max_batch_lines: 单个批次的最大行数
+        queue_size: 读取任务与消费者之间缓冲的数据块数（反压阈值）
+
+    Yields:
+        List[OutputLine]: 一个批次内按到达顺序排列的输出行
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    pumps = [
+        asyncio.create_task(_pump(stream, name, queue))
+        for name, stream in (("stdout", process.stdout), ("stderr", process.stderr))
+        if stream is not None
+    ]
+    open_streams = len(pumps)
+
+    try:
+        while open_streams:
+            item = await queue.get()
+            batch: List[OutputLine] = []
+            while True:
+                if item is None:
+                    open_streams -= 1
+                else:
+                    batch.extend(item)
+                if len(batch) >= max_batch_lines or queue.empty():
+                    break
+                item = queue.get_nowait()
+
+            while len(batch) > max_batch_lines:
+                yield batch[:max_batch_lines]
+                batch = batch[max_batch_lines:]
+            if batch:
+                yield batch
+    finally:
+        for pump in pumps:
+            pump.cancel()
+        await asyncio.gather(*pumps, return_exceptions=True)
+
+
+def sse_event(data: Dict[str, Any]) -> str:
+    """序列化一个 SSE 事件"""
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_log_event(lines: List[str], prefix: Optional[str] = None) -> str:
+    """
+    把多行日志合并为一个 SSE log 事件
+
+    message 为合并后的文本（兼容逐行消费的客户端），lines 为逐行内容。
+    """
+    if prefix:
+        lines = [f"{prefix}{line}" for line in lines]
+    return sse_event({"type": "log", "message": "\n".join(lines), "lines": lines})
@@ -0,0 +1,80 @@
+"""
+worker 内部服务
+
+多 worker 部署时，每个 worker 在自己的 Unix socket 上额外运行一个 uvicorn 服务（同一个 app，
+不执行 lifespan），SessionAffinityMiddleware 把属于本 worker 的会话请求转发到这里。
+
+转发的请求经 Unix socket 到达，没有客户端地址；转发方在 CLIENT_HEADER 中附上原始客户端地址，
+内部服务据此恢复 scope["client"]（AccessGuard 的本机豁免依赖它）。该头只在内部 socket 上生效，
+对外端口上伪造它没有作用。
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from pathlib import Path
+from typing import Generator, Optional
+
+import uvicorn
+
+from app.core.logging import get_logger
+from app.middleware.session_affinity import CLIENT_HEADER
+
+logger = get_logger(__name__)
+
+
+class _ForwardedClientApp:
+    """内部 socket 上的请求：用转发方提供的原始客户端地址替换 scope["client"]"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            for key, value in scope["headers"]:
+                if key == CLIENT_HEADER:
+                    host, _, port = value.decode("latin-1").rpartition(":")
+                    scope = {**scope, "client": (host, int(port) if port.isdigit() else 0)}
+                    break
+        await self.app(scope, receive, send)
+
+
+class _InternalServer(uvicorn.Server):
+    """信号由外层 uvicorn 处理，内部服务不接管"""
+
+    @contextlib.contextmanager
+    def capture_signals(self) -> Generator[None, None, None]:
+        yield
+
+
+class WorkerServer:
+    """在 Unix socket 上运行的内部 uvicorn 服务"""
+
+    def __init__(self, app, path: Path):
+        self.path = Path(path)
+        self._server = _InternalServer(uvicorn.Config(
+            _ForwardedClientApp(app),
+            uds=str(self.path),
+            lifespan="off",
+            access_log=False,
+            log_level="warning",
+        ))
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.unlink(missing_ok=True)
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._task.done():
+                self._task.result()  # 启动失败时抛出异常
+            await asyncio.sleep(0.01)
+        logger.info(f"Worker internal server listening on {self.path}")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._server.should_exit = True
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self.path.unlink(missing_ok=True)
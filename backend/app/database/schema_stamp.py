@@ -0,0 +1,75 @@
+"""
+Schema 指纹（快速启动）
+
+指纹由迁移脚本列表和 ORM 表结构计算得出，迁移和 create_all 成功后写入数据库的
+schema_stamp 表。下次启动时指纹一致即说明 schema 已是最新，可以跳过 Alembic
+（配置加载、脚本目录解析、版本检查）和 create_all。
+
+本模块只依赖 SQLAlchemy，不导入 Alembic。
+"""
+import hashlib
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import MetaData, text
+
+logger = logging.getLogger(__name__)
+
+STAMP_TABLE = "schema_stamp"
+_STAMP_KEY = "fingerprint"
+
+
+def schema_fingerprint(metadata: MetaData) -> str:
+    """根据迁移脚本（文件名和大小）与 ORM 表结构计算指纹"""
+    from app.core.path_resolver import get_alembic_dir
+    from app.repositories.search_index import AGENTS_FTS, SKILLS_FTS, fts_table_ddl
+
+    hasher = hashlib.sha256()
+    versions_dir = get_alembic_dir() / "versions"
+    try:
+        with os.scandir(versions_dir) as entries:
+            scripts = sorted(
+                (entry.name, entry.stat().st_size)
+                for entry in entries
+                if entry.name.endswith(".py")
+            )
+    except OSError:
+        scripts = []
+    for name, size in scripts:
+        hasher.update(f"migration:{name}:{size}\n".encode())
+
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        hasher.update(f"table:{table.name}\n".encode())
+        for column in table.columns:
+            hasher.update(f"  {column.name}:{column.type!r}:{column.nullable}\n".encode())
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            hasher.update(f"  index:{index.name}\n".encode())
+
+    # FTS5 虚拟表不在 metadata 中，DDL 变化同样需要重新初始化
+    for table in (SKILLS_FTS, AGENTS_FTS):
+        hasher.update(fts_table_ddl(table).encode())
+    return hasher.hexdigest()
+
+
+def read_schema_stamp(conn) -> Optional[str]:
+    """读取数据库中记录的指纹（同步连接），表不存在时返回 None"""
+    try:
+        row = conn.execute(
+            text(f"SELECT value FROM {STAMP_TABLE} WHERE key = :key"), {"key": _STAMP_KEY}
+        ).first()
+    except Exception:
+        return None
+    return row[0] if row else None
+
+
+def write_schema_stamp(conn, fingerprint: str) -> None:
+    """记录指纹（同步连接，调用方负责事务）"""
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {STAMP_TABLE} (key VARCHAR(64) PRIMARY KEY, value TEXT NOT NULL)"
+    ))
+    conn.execute(text(f"DELETE FROM {STAMP_TABLE} WHERE key = :key"), {"key": _STAMP_KEY})
+    conn.execute(
+        text(f"INSERT INTO {STAMP_TABLE} (key, value) VALUES (:key, :value)"),
+        {"key": _STAMP_KEY, "value": fingerprint},
+    )
@@ -1,11 +1,19 @@
 """FastAPI application entry point."""
+import asyncio
 import os
+import time
 from contextlib import asynccontextmanager
 
+from app.core import startup_timing
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routers import health, skills, agents, agent_teams, workflows, tasks, claude, executions, workflow_templates, stats, team_messages, team_tasks, team_state, skills_stream, websocket, project_paths, projects, token_usage, plugins, processes, config, microverse, tasks_ws, testing, logs, localfs
+from app.api.routers import health, skills, agents, agent_teams, workflows, tasks, claude, executions, workflow_templates, stats, team_messages, team_tasks, team_state, skills_stream, websocket, project_paths, projects, token_usage, plugins, processes, config, microverse, tasks_ws, testing, logs, localfs, jobs
+from app.api.routers import metrics as metrics_router
+from app.api.routers import profiler as profiler_router
 from app.api.routers import settings as settings_router
 from app.api import dashboard, auth, terminal
 from app.config.settings import settings
@@ -15,6 +23,8 @@ from app.core.logging import setup_logging, get_logger
 # 导入所有模型以确保它们被注册到 Base.metadata（必须在 init_db 之前）
 from app.models import Skill, Agent, AgentTeam, Workflow, Task, User, TeamMessage, TeamTask, TeamState, ProjectPath, Project
 
+startup_timing.record("import", time.perf_counter() - _import_started)
+
 # Setup logging
 setup_logging()
 logger = get_logger(__name__)
@@ -25,21 +35,53 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     # Startup
     logger.info("Starting Open Adventure Backend...")
-    await init_db()
+
+    # 运行时指标：子进程启动计数与事件循环延迟采样
+    if settings.metrics_enabled:
+        from app.core.metrics import get_loop_monitor, install_subprocess_hook
+        install_subprocess_hook()
+        get_loop_monitor().start()
+
+    # 采样性能分析（默认关闭，可通过 /api/system/profiler 在运行时开启）
+    if settings.profiler_enabled:
+        from app.core.profiler import get_profiler
+        get_profiler().start()
+
+    # 多 worker 协调层；sqlite 后端时同时启动本 worker 的内部服务供粘性路由转发
+    from app.core.coordination import get_coordinator, worker_socket_path
+    coordinator = get_coordinator()
+    worker_server = None
+    if coordinator.distributed:
+        from app.core.worker_server import WorkerServer
+        worker_server = WorkerServer(app, worker_socket_path())
+        await worker_server.start()
+    await coordinator.start()
+    # 目录版本递增在 worker 之间同步（响应缓存、目录 ETag 依赖它失效）
+    from app.core.catalog import start_catalog_sync
+    stop_catalog_sync = start_catalog_sync()
+
+    # 多个 worker 同时启动时串行执行迁移
+    with startup_timing.phase("init_db"):
+        async with coordinator.lock("init_db", ttl=600):
+            await init_db()
     logger.info("Database initialized")
 
-    # 启动终端清理任务
+    # 启动 Claude 健康检查缓存后台刷新
+    from app.adapters.claude.health_checker import start_health_refresher, stop_health_refresher
+    start_health_refresher()
+
+    # 启动终端清理任务；孤儿记录收敛在后台执行，不阻塞启动（首次查询需要初始化 ORM 映射）
     terminal.start_cleanup_task()
-    await terminal.reconcile_orphan_terminal_executions()
+    reconcile_task = asyncio.create_task(terminal.reconcile_orphan_terminal_executions())
 
     # 启动 Agent Monitor Service
-    from app.services.agent_monitor_service import get_monitor_service
-    monitor_service = get_monitor_service()
-    await monitor_service.start()
+    with startup_timing.phase("agent_monitor"):
+        from app.services.agent_monitor_service import get_monitor_service
+        monitor_service = get_monitor_service()
+        await monitor_service.start()
     logger.info("Agent Monitor Service started")
 
     # 启动 Agent Session 清理任务
-    import asyncio
     from app.core.database import AsyncSessionLocal
     from app.services.agent_session_service_async import AgentSessionServiceAsync
 
@@ -78,11 +120,16 @@ async def lifespan(app: FastAPI):
     cleanup_task = asyncio.create_task(cleanup_agent_sessions())
     logger.info("Agent session cleanup task started")
 
+    startup_timing.mark_ready()
+    logger.info(startup_timing.format_report())
+
     yield
 
     # Shutdown
     logger.info("Shutting down Open Adventure Backend...")
 
+    await stop_health_refresher()
+
     # 停止 Agent Monitor Service
     from app.services.agent_monitor_service import get_monitor_service
     monitor_service = get_monitor_service()
@@ -99,14 +146,47 @@ async def lifespan(app: FastAPI):
         logger.info("Agent session cleanup task stopped")
 
     # 停止终端清理任务并清理所有会话
+    await asyncio.gather(reconcile_task, return_exceptions=True)
     terminal.stop_cleanup_task()
     terminal.cleanup_dead_sessions()
 
+    # 停止各项目的 Workspace 开发服务器
+    from app.services.workspace_process_service import get_workspace_process_service
+    await get_workspace_process_service().shutdown()
+
+    # 关闭截图用的浏览器
+    from app.services.screenshot_service import get_screenshot_service
+    await get_screenshot_service().close()
+
+    # 停止密码哈希线程
+    from app.core.security import shutdown_password_executor
+    shutdown_password_executor()
+
+    # 取消未完成的后台 Job
+    from app.services.job_manager import get_job_manager
+    await get_job_manager().shutdown()
+
     # 清理所有 WebSocket 连接
     from app.services.websocket_manager import get_connection_manager
     manager = get_connection_manager()
     await manager.shutdown()
 
+    # 注销本 worker 并停止内部服务
+    from app.core.coordination import close_coordinator
+    from app.middleware.session_affinity import close_affinity_clients
+    await close_affinity_clients()
+    stop_catalog_sync()
+    if worker_server:
+        await worker_server.stop()
+    await close_coordinator()
+
+    from app.core.profiler import get_profiler
+    get_profiler().stop()
+
+    if settings.metrics_enabled:
+        from app.core.metrics import get_loop_monitor
+        await get_loop_monitor().stop()
+
     await close_db()
     logger.info("Database connections closed")
     logger.info("All processes cleaned up")
@@ -120,21 +200,28 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Response cache for read-heavy catalog GET routes (innermost: hits still pass metrics, CORS and the access guard)
+if settings.response_cache_enabled:
+    from app.middleware.response_cache import ResponseCacheMiddleware
+
+    app.add_middleware(ResponseCacheMiddleware)
+
 # Request ID Middleware
-import uuid
-from starlette.middleware.base import BaseHTTPMiddleware
-
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        request_id = request.headers.get('X-Request-ID', str(uuid.uuid4()))
-        from app.core.logging import set_request_id
-        set_request_id(request_id)
-        response = await call_next(request)
-        response.headers['X-Request-ID'] = request_id
-        return response
+from app.middleware.request_id import RequestIDMiddleware
 
 app.add_middleware(RequestIDMiddleware)
 
+# Sampling profiler hook (slow-request profiles; no-op while the profiler is off)
+from app.middleware.profiling import ProfilerMiddleware
+
+app.add_middleware(ProfilerMiddleware)
+
+# Metrics (per-route latency, in-flight requests, SQL per request, WebSocket connections)
+if settings.metrics_enabled:
+    from app.middleware.metrics import MetricsMiddleware
+
+    app.add_middleware(MetricsMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -150,9 +237,15 @@ if settings.internet_access_enabled:
     from app.middleware.access_guard import AccessGuardMiddleware
     app.add_middleware(AccessGuardMiddleware, password=settings.access_password)
 
+# Session affinity (outermost): forwards session requests to the worker that owns them
+from app.middleware.session_affinity import SessionAffinityMiddleware
+
+app.add_middleware(SessionAffinityMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix=f"{settings.api_prefix}")
 app.include_router(health.router, prefix=f"{settings.api_prefix}/system")
+app.include_router(profiler_router.router, prefix=f"{settings.api_prefix}/system")
 app.include_router(claude.router, prefix=f"{settings.api_prefix}")
 app.include_router(skills.router, prefix=f"{settings.api_prefix}")
 app.include_router(skills_stream.router, prefix=f"{settings.api_prefix}")
@@ -176,11 +269,13 @@ app.include_router(microverse.router, prefix=f"{settings.api_prefix}")
 app.include_router(dashboard.router, prefix=f"{settings.api_prefix}/dashboard", tags=["dashboard"])
 app.include_router(terminal.router, prefix=f"{settings.api_prefix}/terminal", tags=["terminal"])
 app.include_router(processes.router, prefix=f"{settings.api_prefix}")
+app.include_router(jobs.router, prefix=f"{settings.api_prefix}")
 app.include_router(websocket.router, prefix=f"{settings.api_prefix}/ws")
 app.include_router(tasks_ws.router, prefix=f"{settings.api_prefix}/ws")
 app.include_router(testing.router)
 app.include_router(logs.router)
 app.include_router(localfs.router, prefix=f"{settings.api_prefix}")
+app.include_router(metrics_router.router)
 
 
 # 静态文件服务配置 - 先定义目录路径
@@ -2,15 +2,18 @@
 
 When ACCESS_PASSWORD is set, all /api/* requests must carry a valid Bearer token.
 Non-API paths (frontend static files) are always allowed through.
+
+Implemented as plain ASGI: allowed requests are passed straight to the app
+without the per-request overhead of BaseHTTPMiddleware.
 """
 from __future__ import annotations
 
 import hashlib
 import hmac
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import Headers
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 # Paths exempt from the access check (always allowed)
 _EXEMPT_PREFIXES = (
@@ -30,42 +33,49 @@ def _derive_token(password: str) -> str:
     return hashlib.sha256(password.encode("utf-8")).hexdigest()[:32]
 
 
-class AccessGuardMiddleware(BaseHTTPMiddleware):
+class AccessGuardMiddleware:
     """Simple password-based access guard for internet exposure via frp/ngrok.
 
     Only protects /api/* routes. Frontend static files are served without
     restriction so the browser can load the app and show the password gate.
     """
 
-    def __init__(self, app, password: str) -> None:
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, password: str) -> None:
+        self.app = app
         self.valid_token = _derive_token(password)
 
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
+    def _is_allowed(self, scope: Scope) -> bool:
+        path = scope["path"]
 
-        # Non-API paths → always allow (frontend HTML/JS/CSS)
-        if not path.startswith("/api"):
-            return await call_next(request)
+        # Non-API paths → always allow (frontend HTML/JS/CSS); /metrics is guarded like the API
+        if not path.startswith("/api") and path != "/metrics":
+            return True
 
         # Exempt specific API endpoints
-        if any(path.startswith(prefix) for prefix in _EXEMPT_PREFIXES):
-            return await call_next(request)
+        if path.startswith(_EXEMPT_PREFIXES):
+            return True
 
         # Localhost requests skip password check
-        client_host = request.client.host if request.client else None
-        if client_host in _LOCAL_HOSTS:
-            return await call_next(request)
+        client = scope.get("client")
+        if client and client[0] in _LOCAL_HOSTS:
+            return True
 
         # Validate Bearer token
-        auth = request.headers.get("Authorization", "")
+        auth = Headers(scope=scope).get("Authorization", "")
         if auth.startswith("Bearer "):
             token = auth[7:]
             if hmac.compare_digest(token, self.valid_token):
-                return await call_next(request)
+                return True
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._is_allowed(scope):
+            await self.app(scope, receive, send)
+            return
 
-        return JSONResponse(
+        response = JSONResponse(
             {"detail": "Access password required"},
             status_code=401,
             headers={"X-Auth-Required": "access-password"},
         )
+        await response(scope, receive, send)
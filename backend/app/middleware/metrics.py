@@ -0,0 +1,100 @@
+"""Metrics middleware.
+
+Records per-route latency, in-flight requests, SQL statements per request and
+open WebSocket connections. Routes are labelled by their template
+(``/api/agents/{agent_id}``), never by the raw path, to keep label cardinality
+bounded. Implemented as plain ASGI, like ``RequestIDMiddleware``.
+"""
+from __future__ import annotations
+
+import itertools
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import metrics
+
+_tokens = itertools.count()
+
+
+def route_template(scope: Scope) -> str:
+    """请求匹配到的路由模板；未匹配任何路由时为 "unmatched"."""
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if not template:
+        return "unmatched"
+
+    path = scope["path"]
+    regex = getattr(route, "path_regex", None)
+    if regex is None or regex.match(path):
+        return template
+
+    # 定义在带前缀的 APIRouter 中的路由，route.path 不含前缀：从请求路径中找出前缀部分，
+    # 前缀中的路径参数（如 /team-state/{team_id}）替换回参数名
+    index = path.find("/", 1)
+    while index != -1:
+        if regex.match(path[index:]):
+            params = {
+                str(value): name
+                for name, value in (scope.get("path_params") or {}).items()
+                if f"{{{name}" not in template
+            }
+            prefix = "/".join(
+                f"{{{params[segment]}}}" if segment in params else segment
+                for segment in path[:index].split("/")
+            )
+            return prefix + template
+        index = path.find("/", index + 1)
+    return template
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            await self._http(scope, receive, send)
+        elif scope["type"] == "websocket":
+            await self._websocket(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _http(self, scope: Scope, receive: Receive, send: Send) -> None:
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = next(_tokens)
+        db_stats = metrics.begin_request_db_stats()
+        metrics.request_started(token, f"{scope['method']} {scope['path']}")
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.request_finished(token)
+            route = route_template(scope)
+            metrics.HTTP_REQUEST_DURATION.observe(elapsed, method=scope["method"], route=route, status=status)
+            metrics.HTTP_REQUEST_DB_QUERIES.observe(db_stats.queries, route=route)
+            metrics.HTTP_REQUEST_DB_SECONDS.observe(db_stats.seconds, route=route)
+
+    async def _websocket(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route = None
+
+        async def send_tracking_accept(message: Message) -> None:
+            nonlocal route
+            if message["type"] == "websocket.accept" and route is None:
+                route = route_template(scope)
+                metrics.WEBSOCKET_CONNECTIONS.inc(route=route)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_tracking_accept)
+        finally:
+            if route is not None:
+                metrics.WEBSOCKET_CONNECTIONS.dec(route=route)
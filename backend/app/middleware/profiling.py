@@ -0,0 +1,45 @@
+"""Profiling middleware.
+
+Registers HTTP requests with the sampling profiler so that samples can be
+attributed to them and requests slower than the configured threshold keep
+their stack profile and SQL timeline. While the profiler is off this is a
+single attribute check per request.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.profiler import SamplingProfiler, get_profiler
+from app.middleware.metrics import route_template
+
+
+class ProfilerMiddleware:
+    def __init__(self, app: ASGIApp, profiler: Optional[SamplingProfiler] = None) -> None:
+        self.app = app
+        self._profiler = profiler
+
+    @property
+    def profiler(self) -> SamplingProfiler:
+        return self._profiler or get_profiler()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        profiler = self.profiler
+        if scope["type"] != "http" or not profiler.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        capture = profiler.begin_request(scope["method"], scope["path"])
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            profiler.finish_request(capture, route_template(scope), status)
@@ -0,0 +1,124 @@
+"""Response cache middleware.
+
+Serves the read-heavy catalog GET routes listed in ``app.core.response_cache``
+from an in-process LRU: a hit replays the stored body without running the
+endpoint, so no database session is opened and no config file is read. Every
+cacheable response carries a body-digest ``ETag``; a matching
+``If-None-Match`` gets ``304 Not Modified``, on hits and misses alike.
+
+Entries are invalidated by catalog version bumps (sync, CRUD, settings writes)
+or by TTL. ``Cache-Control: no-cache`` on the request (a hard reload) bypasses
+the lookup and refreshes the entry. Implemented as plain ASGI, like
+``RequestIDMiddleware``, and installed innermost so metrics, CORS and the
+access guard still see every request.
+"""
+from __future__ import annotations
+
+from typing import List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.response_cache import ResponseCache, cache_key, etag_matches, get_response_cache
+
+# 存入缓存时丢弃的响应头（发送时重新生成）
+_DROPPED_HEADERS = {b"content-length", b"etag", b"x-cache"}
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ResponseCacheMiddleware:
+    def __init__(self, app: ASGIApp, cache: Optional[ResponseCache] = None) -> None:
+        self.app = app
+        self._cache = cache
+
+    @property
+    def cache(self) -> ResponseCache:
+        return self._cache or get_response_cache()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        cache = self.cache
+        rule = cache.match(scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = cache_key(scope["path"], scope.get("query_string", b""))
+        if_none_match = _header(scope, b"if-none-match")
+        request_cache_control = (_header(scope, b"cache-control") or "").lower()
+        # 版本号在执行接口之前读取：生成响应期间发生的写入会让下一次请求重新生成
+        versions = rule.versions()
+
+        entry = None if "no-cache" in request_cache_control else cache.get(key, versions)
+        if entry is not None:
+            cache.hits += 1
+            await self._send(send, entry.status, entry.headers, entry.body, entry.etag, if_none_match, b"HIT")
+            return
+
+        cache.misses += 1
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        if start is None:
+            return
+
+        body = b"".join(chunks)
+        headers = [(name, value) for name, value in start.get("headers", []) if name.lower() not in _DROPPED_HEADERS]
+        response_cache_control = next(
+            (value.decode("latin-1").lower() for name, value in headers if name.lower() == b"cache-control"), ""
+        )
+        cacheable = (
+            start["status"] == 200
+            and "no-store" not in response_cache_control
+            and not any(name.lower() == b"set-cookie" for name, _ in headers)
+        )
+        if not cacheable:
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        entry = cache.put(key, rule, versions, start["status"], headers, body)
+        await self._send(send, entry.status, entry.headers, entry.body, entry.etag, if_none_match, b"MISS")
+
+    async def _send(
+        self,
+        send: Send,
+        status: int,
+        headers: List[Tuple[bytes, bytes]],
+        body: bytes,
+        etag: str,
+        if_none_match: Optional[str],
+        cache_status: bytes,
+    ) -> None:
+        validators = [(b"etag", etag.encode("latin-1")), (b"x-cache", cache_status)]
+        if not any(name.lower() == b"cache-control" for name, _ in headers):
+            # 浏览器每次都带 If-None-Match 重新验证，内容未变化时只传 304
+            validators.append((b"cache-control", b"no-cache"))
+
+        if etag_matches(if_none_match, etag):
+            self.cache.not_modified += 1
+            await send({"type": "http.response.start", "status": 304, "headers": validators})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [*headers, *validators, (b"content-length", str(len(body)).encode("latin-1"))],
+        })
+        await send({"type": "http.response.body", "body": body})
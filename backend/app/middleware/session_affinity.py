@@ -0,0 +1,276 @@
+"""Session affinity middleware.
+
+Terminal PTYs, agent processes, workspace dev servers, background jobs and the
+team coordination services live in the worker process that created them. With
+several uvicorn workers, a request for such a session may land on any worker;
+this middleware looks up the owning worker in the coordination layer and
+proxies the HTTP request or WebSocket over that worker's internal Unix socket.
+
+Sessions that have no live owner are either claimed by the receiving worker
+(``claim=True`` routes, e.g. the first request for an agent process) or handled
+locally (the handler claims them when it creates the session). With the local
+coordinator (single worker) every request passes straight through.
+
+Proxied requests carry the original client address in ``CLIENT_HEADER``; the
+owning worker's internal server restores ``scope["client"]`` from it, so the
+access guard's localhost exemption behaves the same on every worker.
+``aiohttp`` is imported only when a request is actually proxied.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import re
+import urllib.parse
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.coordination import Coordinator, WorkerInfo, get_coordinator
+
+if TYPE_CHECKING:
+    import aiohttp
+    from yarl import URL
+
+logger = logging.getLogger(__name__)
+
+# 已被转发的请求带此头，目标 worker 不再二次路由
+ROUTED_HEADER = "x-oa-routed-by"
+
+# 转发请求携带的原始客户端地址（host:port），只在 worker 内部 socket 上生效
+CLIENT_HEADER = b"x-oa-client"
+
+_HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te",
+    "trailers", "transfer-encoding", "upgrade", "host", "content-length",
+    CLIENT_HEADER.decode("latin-1"),
+}
+
+
+@dataclass(frozen=True)
+class AffinityRule:
+    pattern: re.Pattern
+    kind: str
+    claim: bool = False  # 没有存活持有者时由接收请求的 worker 持有
+    query_key: Optional[str] = None  # 会话 key 来自查询参数而非路径
+    fixed_key: Optional[str] = None  # 整个子系统固定在一个 worker 上
+
+
+AFFINITY_RULES = (
+    AffinityRule(re.compile(r"^/api/terminal/ws$"), "terminal", query_key="session_id"),
+    AffinityRule(re.compile(r"^/api/terminal/sessions?/([^/]+)/"), "terminal"),
+    AffinityRule(re.compile(r"^/api/agents/(\d+)/(?:session-ws|stop|restart|status)$"), "agent", claim=True),
+    AffinityRule(re.compile(r"^/api/projects/(\d+)/workspace(?:/|$)"), "workspace", claim=True),
+    AffinityRule(re.compile(r"^/api/jobs/([0-9a-f]+)(?:/|$)"), "job"),
+    # 团队消息队列、状态缓存和任务依赖图是进程内单例
+    AffinityRule(
+        re.compile(r"^/api(?:/api)?/team-(?:messages|tasks|state)(?:/|$)"),
+        "team", claim=True, fixed_key="all",
+    ),
+)
+
+
+def match_affinity(path: str, query_string: bytes = b"") -> Optional[Tuple[AffinityRule, str]]:
+    """返回路径对应的规则和会话 key；不需要粘性路由时返回 None"""
+    for rule in AFFINITY_RULES:
+        match = rule.pattern.match(path)
+        if not match:
+            continue
+        if rule.fixed_key:
+            return rule, rule.fixed_key
+        if rule.query_key:
+            values = urllib.parse.parse_qs(query_string.decode("latin-1")).get(rule.query_key)
+            return (rule, values[0]) if values and values[0] else None
+        return rule, match.group(1)
+    return None
+
+
+# 每个目标 worker 一个 HTTP 客户端（连接池复用 Unix socket 连接）
+_clients: Dict[str, "aiohttp.ClientSession"] = {}
+
+
+def _client(address: str) -> "aiohttp.ClientSession":
+    # aiohttp 导入较慢，只在多 worker 实际转发时加载
+    import aiohttp
+
+    client = _clients.get(address)
+    if client is None or client.closed:
+        client = aiohttp.ClientSession(
+            connector=aiohttp.UnixConnector(path=address),
+            auto_decompress=False,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=5),
+        )
+        _clients[address] = client
+    return client
+
+
+async def close_affinity_clients() -> None:
+    for client in _clients.values():
+        await client.close()
+    _clients.clear()
+
+
+def _forward_headers(scope: Scope, worker_id: str) -> list[tuple[str, str]]:
+    headers = [
+        (key.decode("latin-1"), value.decode("latin-1"))
+        for key, value in scope["headers"]
+        if key.decode("latin-1").lower() not in _HOP_BY_HOP and not key.startswith(b"sec-websocket-")
+    ]
+    headers.append((ROUTED_HEADER, worker_id))
+    client = scope.get("client")
+    if client:
+        headers.append((CLIENT_HEADER.decode("latin-1"), f"{client[0]}:{client[1] or 0}"))
+    return headers
+
+
+def _target_url(scope: Scope) -> "URL":
+    from yarl import URL
+
+    path = scope.get("raw_path") or scope["path"].encode()
+    url = "http://worker" + path.decode("latin-1")
+    if scope.get("query_string"):
+        url += "?" + scope["query_string"].decode("latin-1")
+    return URL(url, encoded=True)
+
+
+class SessionAffinityMiddleware:
+    def __init__(self, app: ASGIApp, coordinator: Optional[Coordinator] = None) -> None:
+        self.app = app
+        self._coordinator = coordinator
+
+    @property
+    def coordinator(self) -> Coordinator:
+        return self._coordinator or get_coordinator()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        owner = None
+        if scope["type"] in ("http", "websocket") and self.coordinator.distributed:
+            owner = await self._resolve_owner(scope)
+
+        if owner is None:
+            await self.app(scope, receive, send)
+        elif scope["type"] == "http":
+            await self._proxy_http(scope, receive, send, owner)
+        else:
+            await self._proxy_websocket(scope, receive, send, owner)
+
+    async def _resolve_owner(self, scope: Scope) -> Optional[WorkerInfo]:
+        """返回需要转发到的其他 worker；本 worker 处理时返回 None"""
+        if any(key == ROUTED_HEADER.encode() for key, _ in scope["headers"]):
+            return None
+        matched = match_affinity(scope["path"], scope.get("query_string", b""))
+        if matched is None:
+            return None
+
+        rule, key = matched
+        coordinator = self.coordinator
+        try:
+            if rule.claim:
+                owner = await coordinator.claim_if_absent(rule.kind, key)
+            else:
+                owner = await coordinator.owner(rule.kind, key)
+        except Exception as e:
+            logger.warning(f"Affinity lookup failed for {rule.kind}:{key}: {e}")
+            return None
+
+        if owner is None or owner.worker_id == coordinator.worker_id or not owner.address:
+            return None
+        return owner
+
+    async def _proxy_http(self, scope: Scope, receive: Receive, send: Send, owner: WorkerInfo) -> None:
+        import aiohttp
+
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        started = False
+        try:
+            async with _client(owner.address).request(
+                scope["method"],
+                _target_url(scope),
+                headers=_forward_headers(scope, self.coordinator.worker_id),
+                data=body or None,
+                allow_redirects=False,
+            ) as resp:
+                await send({
+                    "type": "http.response.start",
+                    "status": resp.status,
+                    "headers": [
+                        (key.lower(), value)
+                        for key, value in resp.raw_headers
+                        if key.decode("latin-1").lower() not in _HOP_BY_HOP - {"content-length"}
+                    ],
+                })
+                started = True
+                async for chunk in resp.content.iter_any():
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except (aiohttp.ClientError, OSError) as e:
+            logger.error(f"Proxy to worker {owner.worker_id} failed: {e}")
+            if started:
+                raise
+            await send({
+                "type": "http.response.start",
+                "status": 502,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+            })
+            await send({"type": "http.response.body", "body": b"Session owner unavailable"})
+
+    async def _proxy_websocket(self, scope: Scope, receive: Receive, send: Send, owner: WorkerInfo) -> None:
+        import aiohttp
+
+        if (await receive())["type"] != "websocket.connect":
+            return
+        try:
+            upstream = await _client(owner.address).ws_connect(
+                _target_url(scope),
+                headers=_forward_headers(scope, self.coordinator.worker_id),
+                protocols=scope.get("subprotocols") or (),
+                autoclose=False,
+                max_msg_size=0,
+            )
+        except (aiohttp.ClientError, OSError) as e:
+            logger.error(f"WebSocket proxy to worker {owner.worker_id} failed: {e}")
+            await send({"type": "websocket.close", "code": 1011})
+            return
+
+        await send({"type": "websocket.accept", "subprotocol": upstream.protocol})
+
+        async def client_to_upstream() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    await upstream.close(code=message.get("code", 1000))
+                    return
+                if message.get("text") is not None:
+                    await upstream.send_str(message["text"])
+                elif message.get("bytes") is not None:
+                    await upstream.send_bytes(message["bytes"])
+
+        async def upstream_to_client() -> None:
+            async for message in upstream:
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    await send({"type": "websocket.send", "text": message.data})
+                elif message.type == aiohttp.WSMsgType.BINARY:
+                    await send({"type": "websocket.send", "bytes": message.data})
+                elif message.type == aiohttp.WSMsgType.ERROR:
+                    break
+            with contextlib.suppress(Exception):
+                await send({"type": "websocket.close", "code": upstream.close_code or 1000})
+
+        tasks = [asyncio.create_task(client_to_upstream()), asyncio.create_task(upstream_to_client())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await upstream.close()
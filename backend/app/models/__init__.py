@@ -10,6 +10,7 @@ from app.models.workflow import Workflow, WorkflowNode, WorkflowEdge, WorkflowTe
 from app.models.task import Task, TaskStatus, TaskType, Execution, ExecutionStatus, ExecutionType, NodeExecution
 from app.models.plan import Plan, PlanStep, PlanTemplate, PlanStatus, PlanType, StepStatus
 from app.models.user import User
+from app.models.execution_message import ExecutionMessage
 from app.models.team_message import TeamMessage
 from app.models.team_task import TeamTask
 from app.models.team_state import TeamState
@@ -36,6 +37,7 @@ __all__ = [
     "ExecutionStatus",
     "ExecutionType",
     "NodeExecution",
+    "ExecutionMessage",
     "Plan",
     "PlanStep",
     "PlanTemplate",
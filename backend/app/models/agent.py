@@ -105,6 +105,10 @@ class Agent(Base):
     scope: Mapped[str] = mapped_column(String(50), nullable=False, default="user", index=True)
     priority: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
 
+    # 分类字段（写入时由 scope + meta 计算，见 app.core.catalog）
+    plugin_name: Mapped[Optional[str]] = mapped_column(String(200), nullable=True, index=True)
+    project_name: Mapped[Optional[str]] = mapped_column(String(200), nullable=True, index=True)
+
     # 状态标记
     is_builtin: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
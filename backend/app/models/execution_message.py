@@ -0,0 +1,42 @@
+"""
+ExecutionMessage Model - 会话聊天消息模型
+
+每条消息一行，按 (execution_id, seq) 追加写入，替代 Execution.chat_history JSON 文本。
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import String, JSON, DateTime, Integer, Text, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ExecutionMessage(Base):
+    """ExecutionMessage model representing one chat message of an execution session"""
+
+    __tablename__ = "execution_messages"
+    __table_args__ = (
+        UniqueConstraint("execution_id", "seq", name="uq_execution_messages_execution_seq"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    execution_id: Mapped[int] = mapped_column(
+        ForeignKey("executions.id", ondelete="CASCADE"), nullable=False
+    )
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)  # 会话内从 0 开始递增
+    role: Mapped[str] = mapped_column(String(20), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    payload: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)  # 其余字段：id/timestamp/status 等
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        nullable=False
+    )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """还原为原 chat_history 中的消息字典（附带 seq 供分页使用）"""
+        return {**(self.payload or {}), "role": self.role, "content": self.content, "seq": self.seq}
+
+    def __repr__(self) -> str:
+        return f"<ExecutionMessage(execution_id={self.execution_id}, seq={self.seq}, role='{self.role}')>"
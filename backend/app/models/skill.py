@@ -33,11 +33,17 @@ class Skill(Base):
     source: Mapped[SkillSource] = mapped_column(
         SQLEnum(SkillSource, native_enum=False),
         default=SkillSource.GLOBAL,
-        nullable=False
+        nullable=False,
+        index=True
     )
     enabled: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     meta: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
 
+    # 分类字段（写入时由 source + meta 计算，见 app.core.catalog）
+    plugin_name: Mapped[Optional[str]] = mapped_column(String(200), nullable=True, index=True)
+    project_name: Mapped[Optional[str]] = mapped_column(String(200), nullable=True, index=True)
+    user_scope: Mapped[Optional[str]] = mapped_column(String(200), nullable=True, index=True)
+
     # 质量评估字段
     quality_score: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # 0-100
     quality_grade: Mapped[Optional[str]] = mapped_column(String(2), nullable=True)  # A/B/C/D/F
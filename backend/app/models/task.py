@@ -5,7 +5,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import String, Integer, JSON, DateTime, ForeignKey, Enum as SQLEnum, Text, Boolean
+from sqlalchemy import String, Integer, JSON, DateTime, ForeignKey, Enum as SQLEnum, Text, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
 
@@ -190,6 +190,14 @@ class Execution(Base):
     """Execution model representing workflow executions"""
 
     __tablename__ = "executions"
+    __table_args__ = (
+        # History 列表按 (updated_at DESC, id DESC) 做 keyset 分页，常用过滤条件各自带复合索引
+        Index("ix_executions_history", "updated_at", "id"),
+        Index("ix_executions_type_history", "execution_type", "updated_at", "id"),
+        Index("ix_executions_task_history", "task_id", "updated_at", "id"),
+        Index("ix_executions_workflow_history", "workflow_id", "updated_at", "id"),
+        Index("ix_executions_status_history", "status", "updated_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     task_id: Mapped[Optional[int]] = mapped_column(ForeignKey("tasks.id"), nullable=True, index=True)
@@ -218,7 +226,7 @@ class Execution(Base):
     session_id: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, index=True)
     last_activity_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     is_background: Mapped[bool] = mapped_column(default=False, nullable=False)
-    chat_history: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # JSON 格式的聊天历史
+    chat_history: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # 旧版 JSON 聊天历史，已迁移到 execution_messages
 
     # Agent Runtime 相关字段
     process_pid: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, index=True)  # claude 进程 PID
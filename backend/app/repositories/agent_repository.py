@@ -7,7 +7,9 @@ from typing import Optional, List, Dict, Any
 from sqlalchemy import select, func, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.catalog import agent_category_fields
 from app.models.agent import Agent
+from app.repositories.search_index import CatalogSearchIndex, AGENTS_FTS
 from app.schemas.agent import AgentCreate, AgentUpdate
 
 
@@ -16,11 +18,15 @@ class AgentRepository:
 
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.search_index = CatalogSearchIndex(session)
 
     async def create(self, agent_data: AgentCreate) -> Agent:
         """创建新的子代理"""
         agent = Agent(**agent_data.model_dump())
+        self._apply_category_fields(agent)
         self.session.add(agent)
+        await self.session.flush()
+        await self.search_index.index_agent(agent)
         await self.session.commit()
         await self.session.refresh(agent)
         return agent
@@ -118,6 +124,20 @@ class AgentRepository:
         )
         return dict(result.all())
 
+    async def get_group_counts(self, column, scope: Optional[str] = None) -> List[tuple[str, int]]:
+        """按分类字段分组统计子代理数量（可限定作用域）"""
+        query = select(column, func.count(Agent.id)).where(column.is_not(None))
+        if scope is not None:
+            query = query.where(Agent.scope == scope)
+        result = await self.session.execute(query.group_by(column).order_by(column))
+        return [(name, count) for name, count in result.all()]
+
+    @staticmethod
+    def _apply_category_fields(agent: Agent) -> None:
+        """根据 scope 和 meta 计算并写入分类字段"""
+        for field, value in agent_category_fields(agent.scope, agent.meta).items():
+            setattr(agent, field, value)
+
     async def update(self, agent_id: int, agent_data: AgentUpdate) -> Optional[Agent]:
         """更新子代理"""
         agent = await self.get_by_id(agent_id)
@@ -128,6 +148,8 @@ class AgentRepository:
         for field, value in update_data.items():
             setattr(agent, field, value)
 
+        self._apply_category_fields(agent)
+        await self.search_index.index_agent(agent)
         await self.session.commit()
         await self.session.refresh(agent)
         return agent
@@ -139,6 +161,7 @@ class AgentRepository:
             return False
 
         await self.session.delete(agent)
+        await self.search_index.remove_agents([agent_id])
         await self.session.commit()
         return True
 
@@ -153,18 +176,21 @@ class AgentRepository:
         for agent in agents:
             await self.session.delete(agent)
 
+        await self.search_index.remove_agents([agent.id for agent in agents])
         await self.session.commit()
         return count
 
     async def delete_by_paths(self, paths: List[str]) -> int:
         """删除指定路径列表中的子代理"""
-        count = 0
+        removed_ids = []
         for path in paths:
             agent = await self.get_by_path(path)
             if agent:
                 await self.session.delete(agent)
-                count += 1
+                removed_ids.append(agent.id)
 
+        count = len(removed_ids)
+        await self.search_index.remove_agents(removed_ids)
         await self.session.commit()
         return count
 
@@ -174,7 +200,41 @@ class AgentRepository:
         skip: int = 0,
         limit: int = 100
     ) -> tuple[list[Agent], int]:
-        """搜索子代理"""
+        """
+        搜索子代理（名称、描述、标签、system_prompt）
+
+        使用 FTS5 索引（前缀匹配 + BM25 排序），返回的 agent 带有临时属性
+        search_snippet（高亮片段）；索引不可用时回退到 ILIKE。
+        """
+        fts_result = await self.search_index.search(AGENTS_FTS, query, skip=skip, limit=limit)
+        if fts_result is None:
+            return await self._search_ilike(query, skip=skip, limit=limit)
+
+        hits, total = fts_result
+        if not hits:
+            return [], total
+
+        result = await self.session.execute(
+            select(Agent).where(Agent.id.in_([rowid for rowid, _, _ in hits]))
+        )
+        agents_by_id = {agent.id: agent for agent in result.scalars().all()}
+
+        agents = []
+        for rowid, _, snippet in hits:
+            agent = agents_by_id.get(rowid)
+            if agent is not None:
+                agent.search_snippet = snippet
+                agents.append(agent)
+
+        return agents, total
+
+    async def _search_ilike(
+        self,
+        query: str,
+        skip: int = 0,
+        limit: int = 100
+    ) -> tuple[list[Agent], int]:
+        """按名称和描述模糊搜索子代理（全表扫描）"""
         search_query = select(Agent).where(
             or_(
                 Agent.name.ilike(f"%{query}%"),
@@ -230,6 +290,8 @@ class AgentRepository:
             deduplicated_data.append(data)
 
         # 第二步：处理去重后的数据
+        touched: List[Agent] = []
+        removed_ids: List[int] = []
         for data in deduplicated_data:
             path = data.get("meta", {}).get("path", "")
 
@@ -252,16 +314,19 @@ class AgentRepository:
                     existing = existing_records[0]
                     for duplicate in existing_records[1:]:
                         await self.session.delete(duplicate)
+                        removed_ids.append(duplicate.id)
 
                     # 更新保留的记录
                     for field, value in data.items():
                         if hasattr(existing, field):
                             setattr(existing, field, value)
+                    touched.append(existing)
                     updated += 1
                 else:
                     # 创建新记录
                     agent = Agent(**data)
                     self.session.add(agent)
+                    touched.append(agent)
                     created += 1
             else:
                 # 内置 agent 没有路径，使用 name + scope
@@ -283,17 +348,28 @@ class AgentRepository:
                     existing = existing_records[0]
                     for duplicate in existing_records[1:]:
                         await self.session.delete(duplicate)
+                        removed_ids.append(duplicate.id)
 
                     # 更新保留的记录
                     for field, value in data.items():
                         if hasattr(existing, field):
                             setattr(existing, field, value)
+                    touched.append(existing)
                     updated += 1
                 else:
                     # 创建新记录
                     agent = Agent(**data)
                     self.session.add(agent)
+                    touched.append(agent)
                     created += 1
 
+        # 同步分类字段和全文索引（flush 后新建记录才有 id）
+        for agent in touched:
+            self._apply_category_fields(agent)
+        await self.session.flush()
+        await self.search_index.remove_agents(removed_ids)
+        for agent in touched:
+            await self.search_index.index_agent(agent)
+
         await self.session.commit()
         return {"created": created, "updated": updated, "skipped": skipped}
@@ -0,0 +1,145 @@
+"""
+执行会话聊天消息仓储
+
+消息按 (execution_id, seq) 追加写入，单轮对话的写入成本与历史长度无关；
+读取支持尾部窗口（tail）和按 seq 向前翻页，供 UI 懒加载更早的消息。
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.execution_message import ExecutionMessage
+
+# 消息字典中单独成列的字段，其余字段存入 payload
+_COLUMN_KEYS = ("role", "content", "seq")
+
+
+class ExecutionMessageRepository:
+    """执行会话聊天消息仓储（调用方负责 commit）"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _next_seq(self, execution_id: int) -> int:
+        result = await self.db.execute(
+            select(func.max(ExecutionMessage.seq)).where(ExecutionMessage.execution_id == execution_id)
+        )
+        last = result.scalar_one_or_none()
+        return 0 if last is None else last + 1
+
+    async def append(self, execution_id: int, *messages: Dict[str, Any]) -> List[ExecutionMessage]:
+        """
+        追加消息到会话末尾
+
+        Args:
+            execution_id: 执行 ID
+            messages: 消息字典（role/content 之外的字段原样保存在 payload 中）
+
+        Returns:
+            List[ExecutionMessage]: 新写入的消息记录
+        """
+        seq = await self._next_seq(execution_id)
+        rows = []
+        for offset, message in enumerate(messages):
+            row = ExecutionMessage(
+                execution_id=execution_id,
+                seq=seq + offset,
+                role=message.get("role", "user"),
+                content=message.get("content") or "",
+                payload={k: v for k, v in message.items() if k not in _COLUMN_KEYS} or None,
+            )
+            self.db.add(row)
+            rows.append(row)
+        await self.db.flush()
+        return rows
+
+    async def tail(
+        self,
+        execution_id: int,
+        limit: int = 50,
+        before_seq: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        获取最近的 limit 条消息（按 seq 升序返回）
+
+        Args:
+            execution_id: 执行 ID
+            limit: 返回条数
+            before_seq: 只返回 seq 小于该值的消息，用于向前翻页
+        """
+        query = select(ExecutionMessage).where(ExecutionMessage.execution_id == execution_id)
+        if before_seq is not None:
+            query = query.where(ExecutionMessage.seq < before_seq)
+        result = await self.db.execute(query.order_by(ExecutionMessage.seq.desc()).limit(limit))
+        return [row.to_dict() for row in reversed(result.scalars().all())]
+
+    async def list(
+        self,
+        execution_id: int,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """按 seq 升序分页获取消息；limit 为 None 时返回 offset 之后的全部消息"""
+        query = (
+            select(ExecutionMessage)
+            .where(ExecutionMessage.execution_id == execution_id, ExecutionMessage.seq >= offset)
+            .order_by(ExecutionMessage.seq)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        result = await self.db.execute(query)
+        return [row.to_dict() for row in result.scalars().all()]
+
+    async def count(self, execution_id: int) -> int:
+        """统计会话消息数"""
+        result = await self.db.execute(
+            select(func.count()).where(ExecutionMessage.execution_id == execution_id)
+        )
+        return result.scalar_one()
+
+    async def count_many(self, execution_ids: Iterable[int]) -> Dict[int, int]:
+        """批量统计多个会话的消息数（GROUP BY execution_id）"""
+        ids = list(execution_ids)
+        if not ids:
+            return {}
+        result = await self.db.execute(
+            select(ExecutionMessage.execution_id, func.count())
+            .where(ExecutionMessage.execution_id.in_(ids))
+            .group_by(ExecutionMessage.execution_id)
+        )
+        return dict(result.all())
+
+    async def copy(self, source_id: int, target_id: int, upto_seq: Optional[int] = None) -> int:
+        """
+        复制会话消息到另一个会话（用于 fork）
+
+        Args:
+            source_id: 源执行 ID
+            target_id: 目标执行 ID（应为空会话）
+            upto_seq: 只复制 seq 小于等于该值的消息
+
+        Returns:
+            int: 复制的消息数
+        """
+        query = select(ExecutionMessage).where(ExecutionMessage.execution_id == source_id)
+        if upto_seq is not None:
+            query = query.where(ExecutionMessage.seq <= upto_seq)
+        result = await self.db.execute(query.order_by(ExecutionMessage.seq))
+        rows = result.scalars().all()
+        for row in rows:
+            self.db.add(ExecutionMessage(
+                execution_id=target_id,
+                seq=row.seq,
+                role=row.role,
+                content=row.content,
+                payload=row.payload,
+            ))
+        await self.db.flush()
+        return len(rows)
+
+    async def clear(self, execution_id: int) -> None:
+        """删除会话的全部消息"""
+        await self.db.execute(
+            delete(ExecutionMessage).where(ExecutionMessage.execution_id == execution_id)
+        )
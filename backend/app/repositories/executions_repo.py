@@ -1,8 +1,10 @@
 """
 执行记录仓储
 """
-from typing import List, Optional, Dict, Any
-from sqlalchemy import select, func, case
+import base64
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import select, func, case, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -10,37 +12,96 @@ from app.models.task import Execution, NodeExecution
 from app.repositories.base import BaseRepository
 
 
+def encode_cursor(execution: Execution) -> str:
+    """将一条执行记录编码为 keyset 分页游标（updated_at + id）"""
+    raw = f"{execution.updated_at.isoformat()}|{execution.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    解析 keyset 分页游标
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, last_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(timestamp), int(last_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
 class ExecutionRepository(BaseRepository[Execution]):
     """执行记录仓储"""
 
     def __init__(self, db: AsyncSession):
         super().__init__(Execution, db)
 
+    def _history_query(self, filters: Optional[Dict[str, Any]] = None):
+        query = select(Execution)
+        if filters:
+            for key, value in filters.items():
+                if hasattr(Execution, key):
+                    query = query.where(getattr(Execution, key) == value)
+        return query
+
     async def list_for_history(
         self,
         skip: int = 0,
         limit: int = 100,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        cursor: Optional[str] = None,
     ) -> List[Execution]:
-        """History 专用列表：附带 task，并按更新时间倒序"""
+        """
+        History 专用列表：附带 task，并按更新时间倒序
+
+        排序键为 (updated_at DESC, id DESC)，由 ix_executions_*_history 复合索引覆盖。
+        传入 cursor（上一页最后一条的 encode_cursor 结果）时使用 keyset 分页并忽略 skip，
+        任意深度的翻页成本与第一页相同。
+
+        Raises:
+            ValueError: cursor 格式无效
+        """
         query = (
-            select(Execution)
+            self._history_query(filters)
             .options(selectinload(Execution.task))
-            .order_by(
-                func.coalesce(Execution.updated_at, Execution.created_at).desc(),
-                Execution.created_at.desc(),
-            )
+            .order_by(Execution.updated_at.desc(), Execution.id.desc())
         )
 
-        if filters:
-            for key, value in filters.items():
-                if hasattr(Execution, key):
-                    query = query.where(getattr(Execution, key) == value)
+        if cursor:
+            updated_at, last_id = decode_cursor(cursor)
+            query = query.where(
+                or_(
+                    Execution.updated_at < updated_at,
+                    and_(Execution.updated_at == updated_at, Execution.id < last_id),
+                )
+            )
+        else:
+            query = query.offset(skip)
 
-        query = query.offset(skip).limit(limit)
-        result = await self.db.execute(query)
+        result = await self.db.execute(query.limit(limit))
         return result.scalars().all()
 
+    async def count_for_history(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        cap: Optional[int] = None,
+    ) -> int:
+        """
+        统计 History 列表总数
+
+        Args:
+            filters: 过滤条件
+            cap: 最多统计到的条数；超过时返回 cap（调用方据此标记为估算值）
+        """
+        query = self._history_query(filters).with_only_columns(Execution.id)
+        if cap is not None:
+            query = query.limit(cap)
+        result = await self.db.execute(select(func.count()).select_from(query.subquery()))
+        return result.scalar_one()
+
     async def get_node_executions(self, execution_id: int) -> List[NodeExecution]:
         """
         获取执行的所有节点记录
@@ -83,6 +83,21 @@ class PluginRepository:
         await self.session.refresh(plugin)
         return plugin
 
+    async def update_many(self, updates: dict[int, PluginUpdate]) -> list[Plugin]:
+        """Update several plugins in a single transaction"""
+        if not updates:
+            return []
+        result = await self.session.execute(
+            select(Plugin).where(Plugin.id.in_(list(updates))).order_by(Plugin.id)
+        )
+        plugins = list(result.scalars().all())
+        for plugin in plugins:
+            for field, value in updates[plugin.id].model_dump(exclude_unset=True).items():
+                setattr(plugin, field, value)
+
+        await self.session.commit()
+        return plugins
+
     async def delete(self, plugin_id: int) -> bool:
         """Delete a plugin"""
         plugin = await self.get_by_id(plugin_id)
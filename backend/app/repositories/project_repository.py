@@ -36,6 +36,11 @@ class ProjectRepository:
         r = await self.session.execute(q)
         return list(r.scalars().all()), total
 
+    async def list_paths(self) -> list[str]:
+        """所有已登记项目的目录路径（轻量级项目没有路径，不包含在内）"""
+        r = await self.session.execute(select(Project.path).where(Project.path.is_not(None)))
+        return [path for path in r.scalars().all() if path]
+
     async def update(self, project: Project) -> Project:
         await self.session.commit()
         await self.session.refresh(project)
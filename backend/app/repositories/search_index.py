@@ -0,0 +1,266 @@
+"""
+Catalog Search Index - Skills / Agents 全文检索索引（SQLite FTS5）
+
+索引列：name, description, tags, body（SKILL.md 正文 / agent system_prompt）。
+rowid 与 skills.id / agents.id 一致，由 SkillRepository / AgentRepository 在写入时同步维护，
+查询支持前缀匹配、BM25 排序和 snippet 高亮。非 SQLite 数据库或 FTS5 不可用时回退到 ILIKE。
+unicode61 分词器把连续的中日韩文字当作一个词，无法匹配词内子串，含 CJK 的查询同样回退到 ILIKE。
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+SKILLS_FTS = "skills_fts"
+AGENTS_FTS = "agents_fts"
+
+# BM25 列权重：name, description, tags, body
+BM25_WEIGHTS = "10.0, 3.0, 5.0, 1.0"
+
+# 单条记录索引的正文最大长度
+MAX_BODY_CHARS = 64 * 1024
+
+# 高亮标记
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+_TOKEN_RE = re.compile(r"[\w\-.:]+", re.UNICODE)
+# 中日韩统一表意文字、平假名 / 片假名、韩文音节
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+def fts_table_ddl(table: str) -> str:
+    """FTS5 虚拟表定义（迁移和 init_db 共用）"""
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+        "name, description, tags, body, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    将用户输入转换为 FTS5 MATCH 表达式
+
+    每个词作为带引号的前缀查询（"term"*），多个词之间为 AND 关系。
+    无有效词或包含 CJK 文字（需要子串匹配）时返回 None，由调用方回退到 ILIKE。
+    """
+    if _CJK_RE.search(query):
+        return None
+    terms = [t.replace('"', '""') for t in _TOKEN_RE.findall(query)]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def read_skill_body(meta: Optional[Dict[str, Any]]) -> str:
+    """读取技能目录下 SKILL.md 的正文（用于索引；阻塞 IO，异步路径通过 to_thread 调用）"""
+    path = (meta or {}).get("path")
+    if not path:
+        return ""
+    skill_dir = Path(path)
+    for filename in ("SKILL.md", "skill.md"):
+        skill_file = skill_dir / filename
+        try:
+            if skill_file.is_file():
+                with open(skill_file, "r", encoding="utf-8", errors="ignore") as f:
+                    return f.read(MAX_BODY_CHARS)
+        except OSError as e:
+            logger.debug(f"Failed to read {skill_file} for indexing: {e}")
+    return ""
+
+
+def _tags_text(tags: Optional[Sequence[str]]) -> str:
+    return " ".join(str(tag) for tag in (tags or []))
+
+
+class CatalogSearchIndex:
+    """Skills / Agents 的 FTS5 索引维护与查询"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @property
+    def enabled(self) -> bool:
+        """仅 SQLite 数据库启用 FTS5 索引"""
+        bind = self.session.bind
+        return bind is not None and bind.dialect.name == "sqlite"
+
+    async def _upsert(self, table: str, rowid: int, name: str, description: str,
+                      tags: Optional[Sequence[str]], body: str) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self.session.execute(
+                text(f"DELETE FROM {table} WHERE rowid = :rowid"), {"rowid": rowid}
+            )
+            await self.session.execute(
+                text(
+                    f"INSERT INTO {table} (rowid, name, description, tags, body) "
+                    "VALUES (:rowid, :name, :description, :tags, :body)"
+                ),
+                {
+                    "rowid": rowid,
+                    "name": name or "",
+                    "description": description or "",
+                    "tags": _tags_text(tags),
+                    "body": (body or "")[:MAX_BODY_CHARS],
+                },
+            )
+        except OperationalError as e:
+            # 索引表缺失不应阻断 CRUD，搜索会回退到 ILIKE
+            logger.warning(f"Failed to update {table} for row {rowid}: {e}")
+
+    async def _delete(self, table: str, rowids: Sequence[int]) -> None:
+        if not self.enabled or not rowids:
+            return
+        try:
+            for rowid in rowids:
+                await self.session.execute(
+                    text(f"DELETE FROM {table} WHERE rowid = :rowid"), {"rowid": rowid}
+                )
+        except OperationalError as e:
+            logger.warning(f"Failed to delete from {table}: {e}")
+
+    async def index_skill(self, skill: Any) -> None:
+        """写入/更新单个技能的索引（调用方负责 commit）"""
+        await self._upsert(
+            SKILLS_FTS, skill.id, skill.name, skill.description, skill.tags,
+            await asyncio.to_thread(read_skill_body, skill.meta),
+        )
+
+    async def index_agent(self, agent: Any) -> None:
+        """写入/更新单个子代理的索引（调用方负责 commit）"""
+        await self._upsert(
+            AGENTS_FTS, agent.id, agent.name, agent.description, agent.tags,
+            agent.system_prompt or "",
+        )
+
+    async def remove_skills(self, skill_ids: Sequence[int]) -> None:
+        await self._delete(SKILLS_FTS, skill_ids)
+
+    async def remove_agents(self, agent_ids: Sequence[int]) -> None:
+        await self._delete(AGENTS_FTS, agent_ids)
+
+    async def search(
+        self,
+        table: str,
+        query: str,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> Optional[Tuple[List[Tuple[int, float, str]], int]]:
+        """
+        执行全文检索
+
+        Returns:
+            ([(rowid, rank, snippet), ...], total)；索引不可用或查询无有效词时返回 None
+        """
+        match = build_match_query(query)
+        if not self.enabled or match is None:
+            return None
+
+        try:
+            total = (await self.session.execute(
+                text(f"SELECT count(*) FROM {table} WHERE {table} MATCH :q"), {"q": match}
+            )).scalar_one()
+
+            rows = (await self.session.execute(
+                text(
+                    f"SELECT rowid, bm25({table}, {BM25_WEIGHTS}) AS rank, "
+                    f"snippet({table}, -1, :hl_start, :hl_end, '…', 16) AS snippet "
+                    f"FROM {table} WHERE {table} MATCH :q "
+                    "ORDER BY rank LIMIT :limit OFFSET :skip"
+                ),
+                {
+                    "q": match,
+                    "hl_start": HIGHLIGHT_START,
+                    "hl_end": HIGHLIGHT_END,
+                    "limit": limit,
+                    "skip": skip,
+                },
+            )).all()
+        except OperationalError as e:
+            logger.warning(f"Full-text search on {table} unavailable, falling back: {e}")
+            return None
+
+        return [(row[0], row[1], row[2]) for row in rows], total
+
+
+def ensure_search_index(conn) -> None:
+    """在同步连接上创建 FTS5 索引表并回填（init_db / 迁移使用）"""
+    if conn.dialect.name != "sqlite":
+        return
+    try:
+        for table in (SKILLS_FTS, AGENTS_FTS):
+            conn.execute(text(fts_table_ddl(table)))
+
+        if not conn.execute(text(f"SELECT 1 FROM {SKILLS_FTS} LIMIT 1")).first():
+            rows = conn.execute(text("SELECT id, name, description, tags, meta FROM skills")).all()
+            for row in rows:
+                conn.execute(
+                    text(
+                        f"INSERT INTO {SKILLS_FTS} (rowid, name, description, tags, body) "
+                        "VALUES (:id, :name, :description, :tags, :body)"
+                    ),
+                    {
+                        "id": row.id,
+                        "name": row.name or "",
+                        "description": row.description or "",
+                        "tags": _tags_text(_json_list(row.tags)),
+                        "body": read_skill_body(_json_dict(row.meta)),
+                    },
+                )
+            if rows:
+                logger.info(f"Backfilled {len(rows)} skills into {SKILLS_FTS}")
+
+        if not conn.execute(text(f"SELECT 1 FROM {AGENTS_FTS} LIMIT 1")).first():
+            rows = conn.execute(
+                text("SELECT id, name, description, tags, system_prompt FROM agents")
+            ).all()
+            for row in rows:
+                conn.execute(
+                    text(
+                        f"INSERT INTO {AGENTS_FTS} (rowid, name, description, tags, body) "
+                        "VALUES (:id, :name, :description, :tags, :body)"
+                    ),
+                    {
+                        "id": row.id,
+                        "name": row.name or "",
+                        "description": row.description or "",
+                        "tags": _tags_text(_json_list(row.tags)),
+                        "body": (row.system_prompt or "")[:MAX_BODY_CHARS],
+                    },
+                )
+            if rows:
+                logger.info(f"Backfilled {len(rows)} agents into {AGENTS_FTS}")
+    except OperationalError as e:
+        logger.warning(f"SQLite FTS5 not available, search will use ILIKE: {e}")
+
+
+def _json_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return []
+    return list(value) if isinstance(value, list) else []
+
+
+def _json_dict(value: Any) -> Dict[str, Any]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return {}
+    return value if isinstance(value, dict) else {}
@@ -7,7 +7,9 @@ from typing import Optional
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.catalog import skill_category_fields
 from app.models.skill import Skill, SkillSource
+from app.repositories.search_index import CatalogSearchIndex, SKILLS_FTS
 from app.schemas.skill import SkillCreate, SkillUpdate
 
 
@@ -16,6 +18,7 @@ class SkillRepository:
 
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.search_index = CatalogSearchIndex(session)
 
     async def create(self, skill_data: SkillCreate) -> Skill:
         """Create a new skill"""
@@ -23,11 +26,35 @@ class SkillRepository:
         # scope 是用于创建 skill 时指定保存位置的，不是 ORM 字段
         skill_dict = skill_data.model_dump(exclude={'scripts', 'references', 'scope'})
         skill = Skill(**skill_dict)
+        self._apply_category_fields(skill)
         self.session.add(skill)
+        await self.session.flush()
+        await self.search_index.index_skill(skill)
         await self.session.commit()
         await self.session.refresh(skill)
         return skill
 
+    @staticmethod
+    def _apply_category_fields(skill: Skill) -> None:
+        """根据 source 和 meta 计算并写入分类字段"""
+        for field, value in skill_category_fields(skill.source, skill.meta).items():
+            setattr(skill, field, value)
+
+    async def get_source_counts(self) -> dict[str, int]:
+        """Count skills per source (GROUP BY source)"""
+        result = await self.session.execute(
+            select(Skill.source, func.count(Skill.id)).group_by(Skill.source)
+        )
+        return {getattr(source, "value", source): count for source, count in result.all()}
+
+    async def get_group_counts(self, column, source: Optional[SkillSource] = None) -> list[tuple[str, int]]:
+        """Count skills grouped by a category column, optionally restricted to one source"""
+        query = select(column, func.count(Skill.id)).where(column.is_not(None))
+        if source is not None:
+            query = query.where(Skill.source == source)
+        result = await self.session.execute(query.group_by(column).order_by(column))
+        return [(name, count) for name, count in result.all()]
+
     async def get_by_id(self, skill_id: int) -> Optional[Skill]:
         """Get skill by ID"""
         result = await self.session.execute(
@@ -97,6 +124,8 @@ class SkillRepository:
         for field, value in update_data.items():
             setattr(skill, field, value)
 
+        self._apply_category_fields(skill)
+        await self.search_index.index_skill(skill)
         await self.session.commit()
         await self.session.refresh(skill)
         return skill
@@ -108,6 +137,7 @@ class SkillRepository:
             return False
 
         await self.session.delete(skill)
+        await self.search_index.remove_skills([skill_id])
         await self.session.commit()
         return True
 
@@ -117,7 +147,42 @@ class SkillRepository:
         skip: int = 0,
         limit: int = 100
     ) -> tuple[list[Skill], int]:
-        """Search skills by name or description"""
+        """
+        Search skills by name, description, tags and SKILL.md body
+
+        Uses the FTS5 index (prefix match, BM25 ranking); each returned skill
+        carries a transient ``search_snippet`` attribute with highlighted matches.
+        Falls back to ILIKE on name/description when the index is unavailable.
+        """
+        fts_result = await self.search_index.search(SKILLS_FTS, query, skip=skip, limit=limit)
+        if fts_result is None:
+            return await self._search_ilike(query, skip=skip, limit=limit)
+
+        hits, total = fts_result
+        if not hits:
+            return [], total
+
+        result = await self.session.execute(
+            select(Skill).where(Skill.id.in_([rowid for rowid, _, _ in hits]))
+        )
+        skills_by_id = {skill.id: skill for skill in result.scalars().all()}
+
+        skills = []
+        for rowid, _, snippet in hits:
+            skill = skills_by_id.get(rowid)
+            if skill is not None:
+                skill.search_snippet = snippet
+                skills.append(skill)
+
+        return skills, total
+
+    async def _search_ilike(
+        self,
+        query: str,
+        skip: int = 0,
+        limit: int = 100
+    ) -> tuple[list[Skill], int]:
+        """Search skills by name or description (full scan)"""
         search_query = select(Skill).where(
             (Skill.name.ilike(f"%{query}%")) |
             (Skill.description.ilike(f"%{query}%"))
@@ -207,6 +207,7 @@ class AgentResponse(AgentBase):
     created_at: datetime
     updated_at: datetime
     resolved_model: Optional[str] = Field(None, description="实际使用的模型（inherit 时解析后的值）")
+    search_snippet: Optional[str] = Field(None, description="搜索命中片段（<mark> 高亮，仅搜索结果返回）")
 
     model_config = ConfigDict(from_attributes=True)
 
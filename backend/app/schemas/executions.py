@@ -49,8 +49,7 @@ class ExecutionResponse(BaseModel):
     terminal_output: Optional[str] = None
     task: Optional[TaskResponse] = None
     
-    # Agent Session 字段
-    chat_history: Optional[str] = None
+    # Agent Session 字段（聊天消息通过 GET /executions/{id}/messages 分页获取）
     is_background: Optional[bool] = None
     last_activity_at: Optional[datetime] = None
 
@@ -60,9 +59,18 @@ class ExecutionResponse(BaseModel):
 class ExecutionListResponse(BaseModel):
     """执行列表响应"""
     items: List[ExecutionResponse]
-    total: int
+    total: Optional[int] = None  # count=none 时为 None
+    total_is_estimate: bool = False  # count=estimate 且达到上限时为 True
     skip: int
     limit: int
+    next_cursor: Optional[str] = None  # 下一页游标，None 表示没有更多数据
+
+
+class ExecutionMessagesResponse(BaseModel):
+    """会话聊天消息分页响应"""
+    execution_id: int
+    messages: List[Dict[str, Any]]  # 按 seq 升序，每条消息带 seq 字段
+    has_more: bool  # 是否还有更早的消息（用 messages[0].seq 作为 before_seq 继续加载）
 
 
 class TerminalExecutionCreate(BaseModel):
@@ -0,0 +1,27 @@
+"""
+Job Schemas - 后台任务接口定义
+"""
+from datetime import datetime
+from typing import Any, List, Optional
+from pydantic import BaseModel, Field
+
+
+class JobResponse(BaseModel):
+    """后台任务状态"""
+    id: str
+    kind: str = Field(..., description="任务类型，如 agent_generate / skill_generate / prompt_optimize")
+    status: str = Field(..., description="pending / running / succeeded / failed / cancelled")
+    progress: float = Field(0.0, description="进度 0~1")
+    message: str = Field("", description="最近一条进度信息")
+    result: Optional[Any] = Field(None, description="成功时的结果（与对应同步接口的响应一致）")
+    error: Optional[str] = None
+    error_status: Optional[int] = Field(None, description="失败时对应的 HTTP 状态码")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobListResponse(BaseModel):
+    """后台任务列表"""
+    items: List[JobResponse]
+    total: int
@@ -35,6 +35,7 @@ class PluginUpdate(BaseModel):
     remote_commit_hash: Optional[str] = Field(None, max_length=40)
     status: Optional[PluginStatus] = None
     enabled: Optional[bool] = None
+    last_check_time: Optional[datetime] = None
 
 
 class PluginResponse(PluginBase):
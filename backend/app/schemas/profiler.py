@@ -0,0 +1,64 @@
+"""
+Profiler Schemas - 采样性能分析接口定义
+"""
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class ProfilerStartRequest(BaseModel):
+    """开启采样（不传的参数保持当前值）"""
+    sample_interval: Optional[float] = Field(None, ge=0.001, le=1.0, description="采样间隔（秒）")
+    slow_request_threshold: Optional[float] = Field(None, ge=0, description="慢请求阈值（秒）")
+
+
+class ProfilerStatusResponse(BaseModel):
+    """采样分析器状态"""
+    enabled: bool
+    sample_interval: float
+    slow_request_threshold: float
+    all_threads: bool
+    started_at: Optional[datetime] = None
+    samples: int
+    unique_stacks: int
+    overhead_ratio: float = Field(..., description="采样线程 CPU 时间占运行时间的比例")
+    active_requests: int
+    profiles: int
+    max_profiles: Optional[int] = None
+
+
+class ProfileSummary(BaseModel):
+    """慢请求剖面摘要"""
+    id: str
+    method: str
+    path: str
+    route: str
+    status: int
+    duration_ms: float
+    started_at: datetime
+    samples: int
+    sql_count: int
+    sql_ms: float
+
+
+class SqlStatementEntry(BaseModel):
+    offset_ms: float = Field(..., description="相对请求开始的时间（毫秒）")
+    duration_ms: float
+    statement: str
+
+
+class StackSamples(BaseModel):
+    stack: str
+    samples: int
+
+
+class ProfileDetail(ProfileSummary):
+    """慢请求剖面详情"""
+    sample_interval: float
+    sql: List[SqlStatementEntry]
+    top_stacks: List[StackSamples]
+
+
+class ProfileListResponse(BaseModel):
+    items: List[ProfileSummary]
+    total: int
@@ -133,6 +133,14 @@ class ScanResultResponse(BaseModel):
     message: Optional[str] = None
 
 
+class ScreenshotRefreshRequest(BaseModel):
+    """批量刷新缩略图请求"""
+
+    project_ids: Optional[list[int]] = Field(
+        None, description="要刷新的项目 ID，为空时刷新所有运行中的 Workspace"
+    )
+
+
 class ScreenshotResponse(BaseModel):
     """截图响应"""
 
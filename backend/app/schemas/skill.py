@@ -57,6 +57,8 @@ class SkillResponse(SkillBase):
     quality_grade: Optional[str] = None
     quality_evaluation: Optional[dict] = None
     evaluated_at: Optional[datetime] = None
+    # 仅搜索结果返回：命中片段（<mark> 高亮）
+    search_snippet: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
 
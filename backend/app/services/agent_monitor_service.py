@@ -14,6 +14,7 @@ from sqlalchemy import select, and_
 from app.models.task import Execution, ExecutionStatus, ExecutionType
 from app.core.logging import get_logger
 from app.core.database import AsyncSessionLocal
+from app.core.coordination import get_coordinator
 
 logger = get_logger(__name__)
 
@@ -21,6 +22,8 @@ logger = get_logger(__name__)
 class AgentMonitorService:
     """Agent 心跳监控服务"""
 
+    GLOBAL_INTERVAL = 60  # 全局检查间隔（秒）
+
     def __init__(self):
         self.monitoring_tasks: Dict[int, asyncio.Task] = {}
         self.running = False
@@ -82,7 +85,13 @@ class AgentMonitorService:
         """全局监控循环，检查所有运行中的 Execution"""
         while self.running:
             try:
-                await asyncio.sleep(60)  # 每分钟检查一次
+                await asyncio.sleep(self.GLOBAL_INTERVAL)  # 每分钟检查一次
+
+                # 多 worker 部署时只由 leader 监控，避免重复更新同一条 Execution
+                if not await get_coordinator().is_leader("agent_monitor", ttl=self.GLOBAL_INTERVAL * 3):
+                    for execution_id in list(self.monitoring_tasks):
+                        await self.stop_monitoring(execution_id)
+                    continue
 
                 async with AsyncSessionLocal() as db:
                     # 查询所有运行中的后台 Execution
@@ -1,22 +1,32 @@
 """
 Agent Process Manager - 统一的 Agent 进程管理器
 管理 Agent 进程的生命周期，支持对话模式和 Terminal 模式
+
+活动状态采用写回式（write-behind）持久化：读写 PTY 只更新内存并标记脏字段，
+每个进程按时间间隔或累计输出字节数合并为一次 UPDATE + commit。
+
+PTY 输出由事件循环的 reader 回调驱动（loop.add_reader），每次可读时读取一次并广播给
+所有订阅者，多个 WebSocket 可同时观看同一 Agent；空闲进程不占用 CPU。
 """
 import asyncio
+import codecs
 import os
 import pty
-import select as select_module
 import signal
-import json
 import re
+import time
 from datetime import datetime
-from typing import Dict, Optional, AsyncIterator, List
-from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, AsyncIterator, List, Set
+from dataclasses import asdict, dataclass, field
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select as sql_select
+from sqlalchemy import select as sql_select, update
 import logging
 
+from app.config.settings import settings
+from app.core import metrics
+from app.core.db_writer import WriteQueue, get_write_queue
 from app.models.task import Execution, ExecutionStatus, ExecutionType, Task, TaskStatus
+from app.repositories.execution_message_repository import ExecutionMessageRepository
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +41,49 @@ class ChatMessage:
     status: str = 'success'  # 'success', 'error', 'sending'
 
 
+# 写入 Execution.terminal_output 的最近输出字节数
+TERMINAL_OUTPUT_PERSIST_BYTES = 10_000
+
+# 单次可读回调最多读取的字节数
+_READ_CHUNK_SIZE = 64 * 1024
+
+# 单个订阅者缓冲的输出块数，超出后丢弃（慢客户端不拖慢 Agent）
+_SUBSCRIBER_QUEUE_SIZE = 1024
+
+
+class OutputRing:
+    """定长字节环形缓冲：只保留最近 capacity 字节的原始终端输出"""
+
+    def __init__(self, capacity: int, initial: bytes = b""):
+        self.capacity = capacity
+        self.total = 0  # 累计写入字节数（含已被覆盖的部分）
+        self._buf = bytearray()
+        if initial:
+            self.append(initial)
+
+    def append(self, data: bytes) -> None:
+        self.total += len(data)
+        if len(data) >= self.capacity:
+            self._buf[:] = data[-self.capacity:]
+            return
+        self._buf += data
+        overflow = len(self._buf) - self.capacity
+        if overflow > 0:
+            # bytearray 删除头部只移动起始偏移，摊还 O(1)
+            del self._buf[:overflow]
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def text(self, limit: Optional[int] = None) -> str:
+        """解码最近 limit 字节（默认全部）；跳过被截断的 UTF-8 多字节字符开头"""
+        data = self._buf if limit is None or limit >= len(self._buf) else self._buf[-limit:]
+        start = 0
+        while start < len(data) and start < 4 and 0x80 <= data[start] < 0xC0:
+            start += 1
+        return bytes(data[start:]).decode("utf-8", errors="replace")
+
+
 @dataclass
 class ProcessInfo:
     """进程信息"""
@@ -41,9 +94,128 @@ class ProcessInfo:
     created_at: datetime
     last_activity_at: datetime
     chat_history: List[ChatMessage] = field(default_factory=list)
-    raw_output: str = ""  # 原始终端输出
+    # 原始终端输出（最近 agent_output_buffer_bytes 字节）
+    output: OutputRing = field(default_factory=lambda: OutputRing(settings.agent_output_buffer_bytes))
     is_new: bool = True  # 是否是新创建的进程
     execution_id: Optional[int] = None  # 关联的 Execution ID
+    persisted_messages: int = 0  # chat_history 中已写入数据库的消息数
+    # 写回状态：尚未落库的 Execution 字段、输出字节数和上次落库时间（monotonic）
+    dirty_fields: Set[str] = field(default_factory=set)
+    unflushed_bytes: int = 0
+    last_flush_at: float = field(default_factory=time.monotonic)
+    # 跨 read 边界的 UTF-8 增量解码器
+    decoder: Any = field(default_factory=lambda: codecs.getincrementaldecoder("utf-8")(errors="replace"))
+    flush_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # 输出订阅：队列 -> 是否为对话模式（接收 ChatMessage 而非原始文本）
+    subscribers: Dict[asyncio.Queue, bool] = field(default_factory=dict)
+    reading: bool = False  # 是否已注册 reader 回调
+    output_closed: bool = False  # PTY 已 EOF 或被关闭
+
+    @property
+    def raw_output(self) -> str:
+        """原始终端输出文本"""
+        return self.output.text()
+
+
+class ActivityWriter:
+    """
+    进程活动的写回式持久化
+
+    record_* 只修改内存状态；maybe_flush 在距上次落库超过 interval 秒，
+    或累计未落库输出超过 max_bytes 时，用一条只含脏字段的 UPDATE 加上新增聊天消息
+    合并提交一次。进程结束、停止或连接断开时调用 flush 写入剩余状态。
+    写入经由写队列执行，与其他进程的落库合并到同一事务中提交。
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        write_queue: Optional[WriteQueue] = None,
+    ):
+        self.interval = settings.agent_activity_flush_interval if interval is None else interval
+        self.max_bytes = settings.agent_activity_flush_bytes if max_bytes is None else max_bytes
+        self._write_queue = write_queue
+
+    @property
+    def write_queue(self) -> WriteQueue:
+        return self._write_queue or get_write_queue()
+
+    def record_activity(self, process_info: ProcessInfo) -> None:
+        process_info.last_activity_at = datetime.utcnow()
+        process_info.dirty_fields.add("last_activity_at")
+
+    def record_output(self, process_info: ProcessInfo, data: bytes) -> None:
+        process_info.output.append(data)
+        process_info.unflushed_bytes += len(data)
+        process_info.dirty_fields.add("terminal_output")
+        self.record_activity(process_info)
+
+    def seconds_until_due(self, process_info: ProcessInfo) -> Optional[float]:
+        """距下次应落库的秒数；没有待写入的状态时返回 None"""
+        has_messages = len(process_info.chat_history) > process_info.persisted_messages
+        if not process_info.dirty_fields and not has_messages:
+            return None
+        if process_info.unflushed_bytes >= self.max_bytes:
+            return 0.0
+        return max(0.0, process_info.last_flush_at + self.interval - time.monotonic())
+
+    def is_due(self, process_info: ProcessInfo) -> bool:
+        return self.seconds_until_due(process_info) == 0.0
+
+    async def maybe_flush(self, process_info: ProcessInfo) -> bool:
+        if not self.is_due(process_info):
+            return False
+        return await self.flush(process_info)
+
+    async def flush(self, process_info: ProcessInfo) -> bool:
+        """
+        立即写入脏字段和未保存的聊天消息
+
+        Returns:
+            bool: 是否执行了提交
+        """
+        # 多个订阅者可能同时触发落库，串行化以免重复追加消息
+        async with process_info.flush_lock:
+            return await self._flush(process_info)
+
+    async def _flush(self, process_info: ProcessInfo) -> bool:
+        dirty, process_info.dirty_fields = process_info.dirty_fields, set()
+        new_messages = process_info.chat_history[process_info.persisted_messages:]
+        process_info.unflushed_bytes = 0
+        process_info.last_flush_at = time.monotonic()
+        if not process_info.execution_id or (not dirty and not new_messages):
+            return False
+
+        values: Dict[str, Any] = {}
+        if "last_activity_at" in dirty:
+            values["last_activity_at"] = process_info.last_activity_at
+        if "terminal_output" in dirty:
+            values["terminal_output"] = process_info.output.text(TERMINAL_OUTPUT_PERSIST_BYTES)
+
+        execution_id = process_info.execution_id
+
+        async def write(db: AsyncSession) -> None:
+            if values:
+                await db.execute(
+                    update(Execution)
+                    .where(Execution.id == execution_id)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+            if new_messages:
+                await ExecutionMessageRepository(db).append(
+                    execution_id, *(asdict(msg) for msg in new_messages)
+                )
+
+        try:
+            await self.write_queue.submit(write)
+        except Exception:
+            # 保留脏标记，下次重试
+            process_info.dirty_fields |= dirty
+            raise
+        process_info.persisted_messages += len(new_messages)
+        return True
 
 
 class AgentProcessManager:
@@ -53,6 +225,7 @@ class AgentProcessManager:
         # 进程池：{agent_id: ProcessInfo}
         self._processes: Dict[int, ProcessInfo] = {}
         self._lock = asyncio.Lock()
+        self._activity = ActivityWriter()
 
     async def get_or_create_process(
         self,
@@ -81,7 +254,7 @@ class AgentProcessManager:
                     # 检查进程是否仍然存活
                     if self._is_process_alive(execution.terminal_pid):
                         # 从数据库恢复进程信息
-                        process_info = await self._restore_process_from_db(execution)
+                        process_info = await self._restore_process_from_db(execution, db)
                         self._processes[agent_id] = process_info
                         logger.info(f"Restored existing process for agent {agent_id}, session {session_id}")
                         return process_info
@@ -97,7 +270,7 @@ class AgentProcessManager:
                 process_info = self._processes[agent_id]
                 if self._is_process_alive(process_info.pid):
                     process_info.is_new = False
-                    process_info.last_activity_at = datetime.utcnow()
+                    self._activity.record_activity(process_info)
                     logger.info(f"Reusing existing process for agent {agent_id}")
                     return process_info
                 else:
@@ -140,7 +313,8 @@ class AgentProcessManager:
             except ProcessLookupError:
                 logger.warning(f"Process {process_info.pid} already dead")
 
-            # 关闭 PTY
+            # 关闭 PTY（先注销 reader 并通知订阅者）
+            self._close_output(process_info)
             try:
                 os.close(process_info.master_fd)
             except OSError:
@@ -193,62 +367,153 @@ class AgentProcessManager:
         # 发送消息到 PTY
         try:
             os.write(process_info.master_fd, (message + '\n').encode())
-            process_info.last_activity_at = datetime.utcnow()
-
-            # 更新数据库
-            await self._update_activity(process_info, db)
+            # 只标记活动时间，由读取循环合并落库
+            self._activity.record_activity(process_info)
 
             logger.info(f"Sent message to agent {agent_id}: {message[:50]}...")
         except OSError as e:
             logger.error(f"Failed to send message to agent {agent_id}: {e}")
             raise
 
-    async def read_from_process(self, agent_id: int, db: AsyncSession) -> AsyncIterator[str]:
+    async def read_from_process(self, agent_id: int) -> AsyncIterator[str]:
         """
         从 Agent 进程读取输出（流式）
 
+        每个调用方是一个独立订阅者，收到订阅之后的全部输出；可多个同时读取。
+
         Args:
             agent_id: Agent ID
-            db: 数据库会话
 
         Yields:
             str: 输出内容
         """
+        async for item in self._consume(agent_id, chat=False):
+            yield item
+
+    async def read_chat_from_process(self, agent_id: int) -> AsyncIterator[ChatMessage]:
+        """
+        以对话模式读取 Agent 输出（流式）
+
+        每块输出只解析一次并追加到 chat_history，再广播给所有对话模式订阅者。
+
+        Args:
+            agent_id: Agent ID
+
+        Yields:
+            ChatMessage: 解析后的 Agent 消息
+        """
+        async for item in self._consume(agent_id, chat=True):
+            yield item
+
+    async def _consume(self, agent_id: int, chat: bool) -> AsyncIterator[Any]:
         if agent_id not in self._processes:
             raise ValueError(f"No process found for agent {agent_id}")
 
         process_info = self._processes[agent_id]
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_SUBSCRIBER_QUEUE_SIZE)
+        process_info.subscribers[queue] = chat
+        if not self._start_reading(process_info):
+            queue.put_nowait(None)
 
-        # 设置非阻塞模式
-        import fcntl
-        flags = fcntl.fcntl(process_info.master_fd, fcntl.F_GETFL)
-        fcntl.fcntl(process_info.master_fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
-
-        while True:
-            try:
-                # 尝试读取数据（非阻塞）
+        try:
+            while True:
+                # 有待落库的状态时按剩余时间等待，否则无限等待（空闲时不唤醒）
+                timeout = self._activity.seconds_until_due(process_info)
                 try:
-                    data = os.read(process_info.master_fd, 4096)
-                    if not data:
-                        # EOF，进程已结束
-                        logger.info(f"Process {process_info.pid} ended")
-                        break
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    await self._activity.maybe_flush(process_info)
+                    continue
+                if item is None:
+                    break
+                await self._activity.maybe_flush(process_info)
+                yield item
+        finally:
+            process_info.subscribers.pop(queue, None)
+
+        await self._activity.flush(process_info)
+
+    def _start_reading(self, process_info: ProcessInfo) -> bool:
+        """为 PTY 注册可读回调（每个进程一次）；PTY 不可用时返回 False"""
+        if process_info.reading:
+            return True
+        if process_info.output_closed or process_info.master_fd < 0:
+            return False
+        try:
+            os.set_blocking(process_info.master_fd, False)
+            asyncio.get_running_loop().add_reader(
+                process_info.master_fd, self._on_readable, process_info
+            )
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot watch PTY of process {process_info.pid}: {e}")
+            process_info.output_closed = True
+            return False
+        process_info.reading = True
+        return True
 
-                    output = data.decode('utf-8', errors='replace')
-                    process_info.raw_output += output
-                    process_info.last_activity_at = datetime.utcnow()
+    def _on_readable(self, process_info: ProcessInfo) -> None:
+        """reader 回调：读取一次可用输出，记录并广播"""
+        try:
+            data = os.read(process_info.master_fd, _READ_CHUNK_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            # 子进程退出后 Linux 上读取 PTY master 返回 EIO
+            logger.debug(f"PTY of process {process_info.pid} closed: {e}")
+            data = b""
+        if not data:
+            logger.info(f"Process {process_info.pid} ended")
+            self._close_output(process_info)
+            return
 
-                    # 更新数据库
-                    await self._update_activity(process_info, db)
+        self._activity.record_output(process_info, data)
+        text = process_info.decoder.decode(data)
+        if not text:
+            return
 
-                    yield output
-                except BlockingIOError:
-                    # 没有数据可读，短暂等待
-                    await asyncio.sleep(0.1)
+        chat_msg = None
+        if any(process_info.subscribers.values()):
+            chat_msg = self.parse_chat_message(text)
+            if chat_msg:
+                process_info.chat_history.append(chat_msg)
+        for queue, chat in list(process_info.subscribers.items()):
+            item = chat_msg if chat else text
+            if item is None:
+                continue
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                pass
+
+    def _close_output(self, process_info: ProcessInfo) -> None:
+        """注销 reader 回调并通知所有订阅者输出结束"""
+        if process_info.reading:
+            try:
+                asyncio.get_running_loop().remove_reader(process_info.master_fd)
+            except (OSError, ValueError):
+                pass
+            process_info.reading = False
+        process_info.output_closed = True
+        for queue in list(process_info.subscribers):
+            if queue.full():
+                # 保证结束标记能送达
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    async def flush_activity(self, agent_id: int) -> bool:
+        """
+        立即写入进程尚未落库的活动状态（连接断开时调用）
+
+        Args:
+            agent_id: Agent ID
 
-            except OSError as e:
-                logger.error(f"Error reading from process {process_info.pid}: {e}")
-                break
+        Returns:
+            bool: 是否执行了提交
+        """
+        process_info = self._processes.get(agent_id)
+        if process_info is None:
+            return False
+        return await self._activity.flush(process_info)
 
     def parse_chat_message(self, output: str) -> Optional[ChatMessage]:
         """
@@ -302,7 +567,7 @@ class AgentProcessManager:
             'created_at': process_info.created_at.isoformat(),
             'last_activity_at': process_info.last_activity_at.isoformat(),
             'chat_history_count': len(process_info.chat_history),
-            'raw_output_size': len(process_info.raw_output)
+            'raw_output_size': process_info.output.total
         }
 
     # ========== 私有方法 ==========
@@ -392,7 +657,6 @@ class AgentProcessManager:
             is_background=True,
             started_at=process_info.created_at,
             terminal_pid=process_info.pid,
-            chat_history=json.dumps([]),
             terminal_output=""
         )
 
@@ -403,36 +667,15 @@ class AgentProcessManager:
         process_info.execution_id = execution.id
         logger.info(f"Saved process to database: execution_id={execution.id}")
 
-    async def _update_activity(self, process_info: ProcessInfo, db: AsyncSession):
-        """更新进程活动时间"""
-        if not process_info.execution_id:
-            return
-
-        stmt = sql_select(Execution).where(Execution.id == process_info.execution_id)
-        result = await db.execute(stmt)
-        execution = result.scalar_one_or_none()
-
-        if execution:
-            execution.last_activity_at = process_info.last_activity_at
-            execution.terminal_output = process_info.raw_output[-10000:]  # 限制大小
-            execution.chat_history = json.dumps([
-                {
-                    'id': msg.id,
-                    'role': msg.role,
-                    'content': msg.content,
-                    'timestamp': msg.timestamp,
-                    'status': msg.status
-                }
-                for msg in process_info.chat_history
-            ])
-            await db.commit()
-
     async def _cleanup_process(self, agent_id: int, db: AsyncSession):
         """清理进程信息"""
         if agent_id not in self._processes:
             return
 
         process_info = self._processes[agent_id]
+        self._close_output(process_info)
+        # 先写入尚未落库的输出和消息
+        await self._activity.flush(process_info)
 
         if process_info.execution_id:
             stmt = sql_select(Execution).where(Execution.id == process_info.execution_id)
@@ -454,18 +697,21 @@ class AgentProcessManager:
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def _restore_process_from_db(self, execution: Execution) -> ProcessInfo:
+    async def _restore_process_from_db(self, execution: Execution, db: AsyncSession) -> ProcessInfo:
         """从数据库恢复进程信息"""
-        # 解析聊天历史
+        # 读取聊天历史
         chat_history = []
-        if execution.chat_history:
+        for msg in await ExecutionMessageRepository(db).list(execution.id):
             try:
-                history_data = json.loads(execution.chat_history)
-                chat_history = [
-                    ChatMessage(**msg) for msg in history_data
-                ]
-            except (json.JSONDecodeError, TypeError):
-                logger.warning(f"Failed to parse chat history for execution {execution.id}")
+                chat_history.append(ChatMessage(
+                    id=msg.get('id', ''),
+                    role=msg['role'],
+                    content=msg['content'],
+                    timestamp=msg.get('timestamp', ''),
+                    status=msg.get('status', 'success'),
+                ))
+            except KeyError:
+                logger.warning(f"Skipping malformed chat message for execution {execution.id}")
 
         # 重新打开 PTY（这里简化处理，实际可能需要更复杂的逻辑）
         # 注意：实际上无法直接恢复 PTY，这里只是示例
@@ -479,9 +725,13 @@ class AgentProcessManager:
             created_at=execution.started_at or datetime.utcnow(),
             last_activity_at=execution.last_activity_at or datetime.utcnow(),
             chat_history=chat_history,
-            raw_output=execution.terminal_output or "",
+            output=OutputRing(
+                settings.agent_output_buffer_bytes,
+                (execution.terminal_output or "").encode("utf-8"),
+            ),
             is_new=False,
-            execution_id=execution.id
+            execution_id=execution.id,
+            persisted_messages=len(chat_history)
         )
 
         return process_info
@@ -504,4 +754,9 @@ def get_process_manager() -> AgentProcessManager:
     global _process_manager
     if _process_manager is None:
         _process_manager = AgentProcessManager()
+        manager = _process_manager
+        metrics.register_queue_source(
+            "agent_pty",
+            lambda: [queue for info in list(manager._processes.values()) for queue in info.subscribers],
+        )
     return _process_manager
@@ -336,34 +336,24 @@ class AgentService:
         - plugins: 插件子分类列表 [{id, name, count}]
         - projects: 项目子分类列表 [{id, name, count}]
         """
-        # 获取基础统计
-        counts = await self.repository.get_scope_counts()
-
-        # 获取所有 agents
-        all_agents, _ = await self.repository.get_all(skip=0, limit=10000)
-
-        # 统计项目子分类
-        project_counts: Dict[str, int] = {}
-        for agent in all_agents:
-            if agent.scope == "project" and agent.meta:
-                path = agent.meta.get("path", "")
-                # 从路径中提取项目名称
-                parts = path.split("/")
-                if ".claude" in parts:
-                    claude_index = parts.index(".claude")
-                    if claude_index > 0:
-                        project_name = parts[claude_index - 1]
-                        project_counts[project_name] = project_counts.get(project_name, 0) + 1
-
-        projects = [
-            {"id": name, "name": name, "count": count}
-            for name, count in sorted(project_counts.items())
-        ]
+        from app.models.agent import Agent
+
+        counts = {"builtin": 0, "user": 0, "project": 0, "plugin": 0}
+        counts.update(await self.repository.get_scope_counts())
+
+        plugins = await self.repository.get_group_counts(Agent.plugin_name, scope="plugin")
+        projects = await self.repository.get_group_counts(Agent.project_name, scope="project")
 
         return {
             "counts": counts,
-            "plugins": plugins,
-            "projects": projects
+            "plugins": [
+                {"id": name, "name": name, "count": count}
+                for name, count in plugins
+            ],
+            "projects": [
+                {"id": name, "name": name, "count": count}
+                for name, count in projects
+            ]
         }
 
     async def sync_agents(self, scanned_agents: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -74,7 +74,6 @@ class AgentTestService:
             created_at=datetime.utcnow(),
             session_id=session_id,
             is_background=True,
-            chat_history='[]',
             last_activity_at=datetime.utcnow()
         )
 
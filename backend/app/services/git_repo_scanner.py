@@ -1,17 +1,114 @@
-"""Git 仓库扫描服务"""
-import os
+"""Git 仓库扫描服务
+
+- 多线程并行遍历（每个线程一个双端队列，空闲时从其他线程队列窃取任务）
+- 基于 os.scandir 的 dirent 类型判断，不对每个条目额外 stat
+- 目录名黑名单 + 隐藏目录剪枝，找到仓库后不再向下
+- 目录列表按 mtime 缓存并持久化：目录未变化时复用上次的子目录列表，
+  重新扫描只读取发生变化的目录
+"""
 import asyncio
+import json
+import os
+import threading
+from collections import deque
 from pathlib import Path
-from typing import List, Set
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 import logging
 
+from app.core.metrics import timed_scan
+
 logger = logging.getLogger(__name__)
 
+# 缓存文件格式版本（黑名单变化时同样视为失效）
+_CACHE_VERSION = 1
+
+# (路径, 深度)
+_WorkItem = Tuple[str, int]
+
+
+class _WorkStealingWalker:
+    """
+    工作窃取式并行遍历
+
+    每个线程从自己队列的尾部取任务（深度优先、局部性好），
+    自己的队列为空时从其他线程队列的头部窃取；所有任务完成后线程退出。
+    """
+
+    def __init__(self, workers: int, visit: Callable[[_WorkItem], List[_WorkItem]]):
+        self._workers = max(1, workers)
+        self._visit = visit
+        self._queues = [deque() for _ in range(self._workers)]
+        self._pending = 0
+        self._idle = 0
+        self._cond = threading.Condition()
+
+    def run(self, roots: Iterable[_WorkItem]) -> None:
+        roots = list(roots)
+        if not roots:
+            return
+        for index, item in enumerate(roots):
+            self._queues[index % self._workers].append(item)
+        self._pending = len(roots)
+
+        threads = [
+            threading.Thread(target=self._worker, args=(index,), daemon=True)
+            for index in range(self._workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _take(self, index: int) -> Optional[_WorkItem]:
+        try:
+            return self._queues[index].pop()
+        except IndexError:
+            pass
+        for offset in range(1, self._workers):
+            try:
+                return self._queues[(index + offset) % self._workers].popleft()
+            except IndexError:
+                continue
+        return None
+
+    def _worker(self, index: int) -> None:
+        own = self._queues[index]
+        while True:
+            item = self._take(index)
+            if item is None:
+                with self._cond:
+                    if self._pending == 0:
+                        self._cond.notify_all()
+                        return
+                    self._idle += 1
+                    self._cond.wait()
+                    self._idle -= 1
+                continue
+
+            try:
+                children = self._visit(item)
+            except Exception as e:
+                logger.debug(f"扫描目录 {item[0]} 时出错: {e}")
+                children = []
+
+            with self._cond:
+                # 先登记子任务再完成当前任务，pending 归零即表示全部完成
+                self._pending += len(children) - 1
+                if children:
+                    own.extend(children)
+                if self._idle and (children or self._pending == 0):
+                    self._cond.notify_all()
+
 
 class GitRepoScanner:
     """扫描文件系统中的 Git 仓库"""
 
-    def __init__(self):
+    def __init__(self, cache_path: Optional[Path] = None, workers: Optional[int] = None):
+        """
+        Args:
+            cache_path: 目录缓存的持久化文件，None 表示只在内存中缓存
+            workers: 遍历线程数，默认 CPU 核数的 2 倍（上限 16）
+        """
         self.exclude_patterns = {
             "node_modules",
             ".venv",
@@ -28,66 +125,91 @@ class GitRepoScanner:
             ".rustup",
             "go/pkg",
         }
+        self.cache_path = cache_path
+        self.workers = workers or min(16, (os.cpu_count() or 1) * 2)
+        # path -> (mtime_ns, is_repo, 子目录名列表)
+        self._dir_cache: Optional[Dict[str, Tuple[int, bool, List[str]]]] = None
+        self._lock = threading.Lock()
 
-    def _is_git_repo(self, path: Path) -> bool:
-        """检查目录是否为 Git 仓库"""
-        try:
-            git_dir = path / ".git"
-            return git_dir.exists() and git_dir.is_dir()
-        except (PermissionError, OSError):
-            return False
-
-    def _should_exclude(self, path: Path) -> bool:
-        """检查是否应该排除该目录"""
-        try:
-            # 检查目录名是否在排除列表中
-            if path.name in self.exclude_patterns:
-                return True
+    def _should_exclude(self, parent: str, name: str, path_patterns: List[str]) -> bool:
+        """检查是否应该排除该目录（黑名单、隐藏目录；多级模式如 go/pkg 按路径后缀匹配）"""
+        if name in self.exclude_patterns or name.startswith("."):
+            return True
+        return any(
+            pattern.endswith("/" + name) and f"{parent}/{name}".endswith("/" + pattern)
+            for pattern in path_patterns
+        )
 
-            # 检查是否为隐藏目录（除了 .git）
-            if path.name.startswith(".") and path.name != ".git":
-                return True
+    # ---------- 目录缓存 ----------
 
-            # 检查是否有读取权限
-            if not os.access(path, os.R_OK):
-                return True
+    def _cache_fingerprint(self) -> str:
+        return f"{_CACHE_VERSION}:{','.join(sorted(self.exclude_patterns))}"
 
-            return False
-        except (PermissionError, OSError):
-            return True
+    def _load_cache(self) -> Dict[str, Tuple[int, bool, List[str]]]:
+        if self._dir_cache is None:
+            self._dir_cache = {}
+            if self.cache_path and self.cache_path.exists():
+                try:
+                    data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+                    if data.get("fingerprint") == self._cache_fingerprint():
+                        self._dir_cache = {k: tuple(v) for k, v in data.get("dirs", {}).items()}
+                except (OSError, ValueError) as e:
+                    logger.warning(f"读取 Git 扫描缓存失败: {e}")
+        return self._dir_cache
 
-    def _scan_directory(
-        self, base_path: Path, current_depth: int, max_depth: int, found_repos: Set[str]
-    ) -> None:
-        """递归扫描目录"""
-        # 检查深度限制
-        if current_depth > max_depth:
+    def _save_cache(self) -> None:
+        if not self.cache_path or self._dir_cache is None:
             return
-
-        # 检查是否应该排除
-        if self._should_exclude(base_path):
-            return
-
         try:
-            # 检查是否为 Git 仓库
-            if self._is_git_repo(base_path):
-                found_repos.add(str(base_path.resolve()))
-                # 找到 Git 仓库后不再深入扫描
-                return
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            tmp_path.write_text(
+                json.dumps({"fingerprint": self._cache_fingerprint(), "dirs": self._dir_cache}),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.warning(f"保存 Git 扫描缓存失败: {e}")
 
-            # 扫描子目录
-            try:
-                for entry in base_path.iterdir():
-                    if entry.is_dir() and not entry.is_symlink():
-                        self._scan_directory(entry, current_depth + 1, max_depth, found_repos)
-            except (PermissionError, OSError) as e:
-                logger.debug(f"无法访问目录 {base_path}: {e}")
+    def _list_directory(
+        self,
+        path: str,
+        cache: Dict[str, Tuple[int, bool, List[str]]],
+        visited: Dict[str, Tuple[int, bool, List[str]]],
+        path_patterns: List[str],
+    ) -> Tuple[bool, List[str]]:
+        """返回 (是否为 Git 仓库, 子目录名)；目录 mtime 未变化时直接使用缓存"""
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = cache.get(path)
+        if cached and cached[0] == mtime_ns:
+            visited[path] = cached
+            return cached[1], cached[2]
 
-        except Exception as e:
-            logger.warning(f"扫描目录 {base_path} 时出错: {e}")
+        is_repo = False
+        subdirs: List[str] = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name == ".git":
+                    # .git 目录或文件（worktree / submodule）都表示仓库
+                    is_repo = True
+                    break
+                if self._should_exclude(path, entry.name, path_patterns):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                except OSError:
+                    continue
+        if is_repo:
+            subdirs = []
+        visited[path] = (mtime_ns, is_repo, subdirs)
+        return is_repo, subdirs
 
+    # ---------- 扫描 ----------
+
+    @timed_scan("git_repos")
     def scan_directories(
-        self, base_dirs: List[str], max_depth: int = 3, max_repos: int = 100
+        self, base_dirs: List[str], max_depth: int = 3, max_repos: Optional[int] = 100
     ) -> List[str]:
         """
         扫描指定目录，查找所有 Git 仓库
@@ -95,39 +217,75 @@ class GitRepoScanner:
         Args:
             base_dirs: 要扫描的基础目录列表
             max_depth: 最大扫描深度（默认 3 层）
-            max_repos: 最多返回的仓库数量（默认 100）
+            max_repos: 最多返回的仓库数量（默认 100，None 表示不限制）
 
         Returns:
             Git 仓库路径列表
         """
+        roots: List[str] = []
+        for base_dir in base_dirs:
+            # 展开用户主目录
+            base_path = Path(base_dir).expanduser().resolve()
+            if not base_path.is_dir():
+                logger.warning(f"目录不存在或不是目录: {base_dir}")
+                continue
+            roots.append(str(base_path))
+
         found_repos: Set[str] = set()
+        with self._lock:
+            cache = self._load_cache()
+            visited: Dict[str, Tuple[int, bool, List[str]]] = {}
+            path_patterns = [pattern for pattern in self.exclude_patterns if "/" in pattern]
 
-        for base_dir in base_dirs:
-            try:
-                # 展开用户主目录
-                base_path = Path(base_dir).expanduser().resolve()
+            def visit(item: _WorkItem) -> List[_WorkItem]:
+                path, depth = item
+                try:
+                    is_repo, subdirs = self._list_directory(path, cache, visited, path_patterns)
+                except OSError as e:
+                    logger.debug(f"无法访问目录 {path}: {e}")
+                    return []
+                if is_repo:
+                    found_repos.add(path)
+                    # 找到 Git 仓库后不再深入扫描
+                    return []
+                if depth >= max_depth:
+                    return []
+                return [(os.path.join(path, name), depth + 1) for name in subdirs]
 
-                # 检查目录是否存在
-                if not base_path.exists() or not base_path.is_dir():
-                    logger.warning(f"目录不存在或不是目录: {base_dir}")
-                    continue
+            logger.info(f"开始扫描目录: {roots} (最大深度: {max_depth})")
+            _WorkStealingWalker(self.workers, visit).run((root, 0) for root in roots)
 
-                # 检查是否有读取权限
-                if not os.access(base_path, os.R_OK):
-                    logger.warning(f"没有读取权限: {base_dir}")
-                    continue
+            # 合并缓存：扫描范围内只保留本次访问到的目录，范围外的条目保留
+            prefixes = tuple(root.rstrip(os.sep) + os.sep for root in roots)
+            for path in list(cache):
+                if path in roots or path.startswith(prefixes):
+                    del cache[path]
+            cache.update(visited)
+            self._save_cache()
 
-                logger.info(f"开始扫描目录: {base_path} (最大深度: {max_depth})")
-                self._scan_directory(base_path, 0, max_depth, found_repos)
+        result = sorted(found_repos)
+        if max_repos is not None and len(result) > max_repos:
+            logger.warning(f"已达到最大仓库数量限制: {max_repos}")
+            result = result[:max_repos]
+        logger.info(f"扫描完成，共发现 {len(result)} 个 Git 仓库（访问 {len(visited)} 个目录）")
+        return result
 
-                # 检查是否达到最大数量
-                if len(found_repos) >= max_repos:
-                    logger.warning(f"已达到最大仓库数量限制: {max_repos}")
-                    break
+    async def scan_directories_async(
+        self, base_dirs: List[str], max_depth: int = 3, max_repos: Optional[int] = 100
+    ) -> List[str]:
+        """在线程中执行 scan_directories，不阻塞事件循环"""
+        return await asyncio.to_thread(self.scan_directories, base_dirs, max_depth, max_repos)
 
-            except Exception as e:
-                logger.error(f"扫描基础目录 {base_dir} 时出错: {e}")
 
-        result = sorted(list(found_repos))
-        logger.info(f"扫描完成，共发现 {len(result)} 个 Git 仓库")
-        return result
+# 全局单例（目录缓存跨请求复用）
+_scanner: Optional[GitRepoScanner] = None
+
+
+def get_git_repo_scanner() -> GitRepoScanner:
+    """获取全局 GitRepoScanner 实例"""
+    global _scanner
+    if _scanner is None:
+        from app.core.path_resolver import get_user_home
+
+        _scanner = GitRepoScanner(cache_path=get_user_home() / "git_scan_cache.json")
+    return _scanner
@@ -0,0 +1,283 @@
+"""
+Job Manager - 后台任务（生成类长耗时接口）
+
+长耗时的生成接口（Agent / Skill 生成、Prompt 优化）提交为后台 Job：
+- 每个 Job 有 id、状态、进度和事件流（SSE 订阅）
+- 通过信号量限制同时运行的 Job 数
+- 支持取消；结束的 Job 结果保留一段时间后清理
+- 多 worker 部署时在协调层登记 Job 归属，状态查询、事件订阅和取消路由到执行它的 worker
+"""
+import asyncio
+import contextlib
+import enum
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app.core import metrics
+from app.core.coordination import get_coordinator
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 协调层中 Job 的归属类型
+JOB_OWNER_KIND = "job"
+
+
+class JobStatus(str, enum.Enum):
+    """Job 状态"""
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+TERMINAL_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+@dataclass
+class Job:
+    """单个后台任务"""
+    id: str
+    kind: str
+    status: JobStatus = JobStatus.PENDING
+    progress: float = 0.0  # 0.0 ~ 1.0
+    message: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    error_status: Optional[int] = None  # 失败时对应的 HTTP 状态码
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+    _done: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    _subscribers: Set[asyncio.Queue] = field(default_factory=set, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def result_data(self) -> Any:
+        """可 JSON 序列化的结果"""
+        if isinstance(self.result, BaseModel):
+            return self.result.model_dump(mode="json")
+        return self.result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "progress": self.progress,
+            "message": self.message,
+            "result": self.result_data() if self.status == JobStatus.SUCCEEDED else None,
+            "error": self.error,
+            "error_status": self.error_status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobContext:
+    """传给 Job 函数的上下文，用于上报进度"""
+
+    def __init__(self, manager: "JobManager", job: Job):
+        self._manager = manager
+        self.job = job
+
+    def report(self, message: Optional[str] = None, progress: Optional[float] = None) -> None:
+        """上报进度（message 为日志文本，progress 为 0~1）"""
+        if message is not None:
+            self.job.message = message
+        if progress is not None:
+            self.job.progress = max(0.0, min(1.0, progress))
+        self._manager._emit(self.job, "progress", message=self.job.message, progress=self.job.progress)
+
+
+JobFunc = Callable[[JobContext], Awaitable[Any]]
+
+
+class JobManager:
+    """后台 Job 管理器"""
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        retention_seconds: int = 3600,
+        max_retained: int = 200,
+        max_events: int = 500,
+    ):
+        """
+        Args:
+            max_workers: 同时运行的 Job 数上限，超出的 Job 排队等待
+            retention_seconds: 结束的 Job 保留时间
+            max_retained: 最多保留的已结束 Job 数
+            max_events: 单个 Job 保留的事件数（供晚到的订阅者回放）
+        """
+        self.max_workers = max_workers
+        self.retention_seconds = retention_seconds
+        self.max_retained = max_retained
+        self.max_events = max_events
+        self._jobs: Dict[str, Job] = {}
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+    async def submit(self, kind: str, func: JobFunc) -> Job:
+        """
+        提交 Job，不等待执行（Job 在后台排队执行）
+
+        返回前先在协调层登记归属：客户端拿到 Job id 后立即发来的状态查询、订阅和取消
+        才能被路由到本 worker。
+        """
+        self._prune()
+        job = Job(id=uuid.uuid4().hex, kind=kind)
+        with contextlib.suppress(Exception):
+            await get_coordinator().claim(JOB_OWNER_KIND, job.id)
+        self._jobs[job.id] = job
+        self._emit(job, "status", status=job.status.value)
+        job._task = asyncio.create_task(self._run(job, func))
+        logger.info(f"Job {job.id} ({kind}) submitted")
+        return job
+
+    async def run(self, kind: str, func: JobFunc) -> Any:
+        """
+        提交 Job 并等待结果（同步接口使用，仍受并发上限约束）
+
+        Raises:
+            HTTPException: Job 失败或被取消
+        """
+        job = await self.submit(kind, func)
+        await job._done.wait()
+        if job.status == JobStatus.SUCCEEDED:
+            return job.result
+        if job.status == JobStatus.CANCELLED:
+            raise HTTPException(status_code=409, detail="任务已取消")
+        raise HTTPException(status_code=job.error_status or 500, detail=job.error)
+
+    async def _run(self, job: Job, func: JobFunc) -> None:
+        try:
+            async with self._semaphore:
+                job.status = JobStatus.RUNNING
+                job.started_at = datetime.utcnow()
+                self._emit(job, "status", status=job.status.value)
+
+                job.result = await func(JobContext(self, job))
+                job.progress = 1.0
+                job.status = JobStatus.SUCCEEDED
+        except asyncio.CancelledError:
+            job.status = JobStatus.CANCELLED
+        except HTTPException as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e.detail)
+            job.error_status = e.status_code
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {e}", exc_info=True)
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            job.error_status = 500
+        finally:
+            job.finished_at = datetime.utcnow()
+            self._emit(
+                job, "status", status=job.status.value,
+                result=job.result_data() if job.status == JobStatus.SUCCEEDED else None,
+                error=job.error,
+            )
+            job._done.set()
+            logger.info(f"Job {job.id} ({job.kind}) finished: {job.status.value}")
+
+    def _emit(self, job: Job, event_type: str, **data: Any) -> None:
+        event = {"type": event_type, "job_id": job.id, **data}
+        job.events.append(event)
+        if len(job.events) > self.max_events:
+            del job.events[: len(job.events) - self.max_events]
+        for queue in job._subscribers:
+            queue.put_nowait(event)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, kind: Optional[str] = None) -> List[Job]:
+        """按创建时间倒序列出 Job"""
+        self._prune()
+        jobs = [job for job in self._jobs.values() if kind is None or job.kind == kind]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        """取消未结束的 Job，返回是否发出了取消"""
+        job = self._jobs.get(job_id)
+        if not job or job.finished or job._task is None:
+            return False
+        job._task.cancel()
+        return True
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """订阅 Job 事件：先回放历史事件，再推送新事件，直到 Job 结束"""
+        job = self._jobs.get(job_id)
+        if not job:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        backlog = list(job.events)
+        job._subscribers.add(queue)
+        try:
+            for event in backlog:
+                yield event
+            if job.finished:
+                return
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] == "status" and event["status"] in {s.value for s in TERMINAL_STATUSES}:
+                    return
+        finally:
+            job._subscribers.discard(queue)
+
+    def _prune(self) -> None:
+        """清理过期和超量的已结束 Job"""
+        now = datetime.utcnow()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished and job.finished_at),
+            key=lambda job: job.finished_at,
+        )
+        excess = len(finished) - self.max_retained
+        for index, job in enumerate(finished):
+            expired = (now - job.finished_at).total_seconds() > self.retention_seconds
+            if expired or index < excess:
+                self._jobs.pop(job.id, None)
+                asyncio.create_task(get_coordinator().release(JOB_OWNER_KIND, job.id))
+
+    async def shutdown(self) -> None:
+        """取消所有未结束的 Job"""
+        tasks = [job._task for job in self._jobs.values() if job._task and not job.finished]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# 全局单例
+_job_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """获取全局 JobManager 实例"""
+    global _job_manager
+    if _job_manager is None:
+        from app.config.settings import settings
+
+        _job_manager = JobManager(
+            max_workers=settings.job_max_workers,
+            retention_seconds=settings.job_retention_seconds,
+        )
+        manager = _job_manager
+        metrics.register_queue_source(
+            "job_events", lambda: [queue for job in list(manager._jobs.values()) for queue in job._subscribers]
+        )
+    return _job_manager
@@ -8,7 +8,6 @@ import os
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 
-from anthropic import AsyncAnthropic
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from fastapi import HTTPException
@@ -18,6 +17,8 @@ from app.models.agent import Agent, AgentFramework
 from app.models.task import Task, TaskStatus, Execution, ExecutionStatus, ExecutionType
 from app.models.microverse import MicroverseCharacter
 from app.repositories.agent_repository import AgentRepository
+from app.repositories.execution_message_repository import ExecutionMessageRepository
+from app.repositories.search_index import CatalogSearchIndex
 from app.services.agent_runtime_service import AgentRuntimeService
 from app.core.logging import get_logger
 
@@ -128,6 +129,8 @@ class MicroverseAgentService:
             tags=["microverse", character_name]
         )
         self.db.add(agent)
+        await self.db.flush()
+        await CatalogSearchIndex(self.db).index_agent(agent)
         await self.db.commit()
         await self.db.refresh(agent)
 
@@ -224,6 +227,9 @@ class MicroverseAgentService:
                     messages.append({"role": role, "content": content})
         messages.append({"role": "user", "content": prompt})
 
+        # anthropic SDK 导入较慢，首次调用时再加载
+        from anthropic import AsyncAnthropic
+
         async with AsyncAnthropic(api_key=api_key) as client:
             response = await client.messages.create(
                 model=model,
@@ -782,7 +788,6 @@ class MicroverseAgentService:
             status=ExecutionStatus.RUNNING,
             session_id=session_id,
             is_background=True,
-            chat_history="[]",  # 初始化为空的 JSON 数组
             last_activity_at=datetime.utcnow(),
             started_at=datetime.utcnow()
         )
@@ -807,7 +812,6 @@ class MicroverseAgentService:
         context: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """发送消息到对话会话"""
-        import json
         import uuid
 
         # 查找会话
@@ -828,11 +832,9 @@ class MicroverseAgentService:
         if not agent:
             raise HTTPException(status_code=404, detail=f"Agent {execution.agent_id} not found")
 
-        # 解析聊天历史
-        try:
-            chat_history = json.loads(execution.chat_history or "[]")
-        except json.JSONDecodeError:
-            chat_history = []
+        # 读取聊天历史（多轮对话上下文）
+        message_repo = ExecutionMessageRepository(self.db)
+        chat_history = await message_repo.list(execution.id)
 
         # 添加用户消息
         user_message = {
@@ -854,10 +856,8 @@ class MicroverseAgentService:
                 "content": response_text,
                 "timestamp": datetime.utcnow().isoformat()
             }
-            chat_history.append(assistant_message)
-
-            # 更新会话
-            execution.chat_history = json.dumps(chat_history)
+            # 更新会话（追加本轮的两条消息）
+            await message_repo.append(execution.id, user_message, assistant_message)
             execution.last_activity_at = datetime.utcnow()
             await self.db.commit()
 
@@ -876,8 +876,6 @@ class MicroverseAgentService:
         limit: int = 50
     ) -> Dict[str, Any]:
         """获取对话历史"""
-        import json
-
         # 查找会话
         result = await self.db.execute(
             select(Execution).where(Execution.session_id == session_id)
@@ -887,15 +885,10 @@ class MicroverseAgentService:
         if not execution:
             raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
 
-        # 解析聊天历史
-        try:
-            chat_history = json.loads(execution.chat_history or "[]")
-        except json.JSONDecodeError:
-            chat_history = []
-
-        # 分页
-        total = len(chat_history)
-        messages = chat_history[offset:offset + limit]
+        # 分页（seq 即消息下标）
+        message_repo = ExecutionMessageRepository(self.db)
+        total = await message_repo.count(execution.id)
+        messages = await message_repo.list(execution.id, offset=offset, limit=limit)
 
         return {
             "session_id": session_id,
@@ -2,17 +2,59 @@
 Plugin Service
 """
 import asyncio
+import os
 import shutil
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
 from app.repositories.plugin_repository import PluginRepository
 from app.schemas.plugin import PluginCreate, PluginUpdate, PluginResponse, PluginListResponse
-from app.models.plugin import PluginStatus
+from app.models.plugin import Plugin, PluginStatus
+from app.config.settings import settings
+from app.core.async_cache import AsyncTTLCache
 from app.core.exceptions import NotFoundException, ConflictException
+from app.core.logging import get_logger
+from app.core.metrics import timed_scan
 from app.adapters.git import GitAdapter
 
+logger = get_logger(__name__)
+
+# 远程分支 head 缓存（key: 仓库根目录 + 分支），同一仓库内的多个插件共享一次查询
+_remote_head_cache = AsyncTTLCache()
+
+# 扫描 marketplace 时不进入的目录
+_SKIP_DIRS = {"node_modules", "__pycache__"}
+
+
+def find_plugin_roots(marketplace_dir: Path) -> List[Path]:
+    """
+    查找 marketplace 下的插件根目录（含 skills/ 或 agents/ 子目录的目录）
+
+    找到插件根目录后不再向下遍历；跳过隐藏目录（.git 等）和依赖目录。
+    """
+    roots = []
+    pending = [marketplace_dir]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                subdirs = [
+                    entry for entry in entries
+                    if entry.is_dir(follow_symlinks=False)
+                    and not entry.name.startswith(".")
+                    and entry.name not in _SKIP_DIRS
+                ]
+        except OSError:
+            continue
+
+        names = {entry.name for entry in subdirs}
+        if current != marketplace_dir and ("skills" in names or "agents" in names):
+            roots.append(current)
+            continue
+        pending.extend(Path(entry.path) for entry in subdirs)
+    return sorted(roots)
+
 
 class PluginService:
     """Service for plugin business logic"""
@@ -97,15 +139,25 @@ class PluginService:
         if not plugin_path.exists():
             raise ConflictException(f"Plugin directory not found: {plugin_path}")
 
-        # Get local and remote commit hashes
-        local_hash = await asyncio.to_thread(
-            self.git_adapter.get_local_commit_hash, plugin_path
-        )
-        remote_hash = await asyncio.to_thread(
-            self.git_adapter.get_remote_commit_hash, plugin_path, plugin.branch
-        )
+        # 单个插件检查总是查询远程最新状态
+        update_data = await self._probe_update(plugin_path, plugin.branch, fresh=True)
+        plugin = await self.repository.update(plugin_id, update_data)
+        return PluginResponse.model_validate(plugin)
+
+    async def _probe_update(self, plugin_path: Path, branch: str, fresh: bool = False) -> PluginUpdate:
+        """查询本地和远程 commit hash（不访问数据库），远程 head 按仓库缓存"""
+        head = await self.git_adapter.get_head_async(plugin_path)
+        local_hash = head[1] if head else None
+        remote_hash = None
+        if head:
+            toplevel = head[0]
+            remote_hash = await _remote_head_cache.get(
+                f"{toplevel}|{branch}",
+                lambda: self.git_adapter.get_remote_head_async(Path(toplevel), branch),
+                ttl=settings.plugin_remote_head_ttl,
+                fresh=fresh,
+            )
 
-        # Update plugin status
         update_data = PluginUpdate(
             local_commit_hash=local_hash,
             remote_commit_hash=remote_hash,
@@ -116,26 +168,39 @@ class PluginService:
             update_data.status = PluginStatus.UPDATE_AVAILABLE
         elif local_hash and remote_hash and local_hash == remote_hash:
             update_data.status = PluginStatus.INSTALLED
+        return update_data
 
-        plugin = await self.repository.update(plugin_id, update_data)
-        return PluginResponse.model_validate(plugin)
+    async def check_all_updates(self, fresh: bool = False) -> PluginListResponse:
+        """
+        Check for updates for all plugins
 
-    async def check_all_updates(self) -> PluginListResponse:
-        """Check for updates for all plugins"""
+        Plugins are probed concurrently (bounded by plugin_update_check_concurrency);
+        remote heads are looked up once per repository/branch and cached for
+        plugin_remote_head_ttl seconds unless fresh=True. Results are written in one commit.
+        """
         plugins, total = await self.repository.get_all(limit=1000)
-
-        updated_plugins = []
-        for plugin in plugins:
-            try:
-                updated_plugin = await self.check_update(plugin.id)
-                updated_plugins.append(updated_plugin)
-            except Exception as e:
-                print(f"[PluginService] Error checking update for plugin {plugin.name}: {e}")
-                updated_plugins.append(PluginResponse.model_validate(plugin))
+        semaphore = asyncio.Semaphore(settings.plugin_update_check_concurrency)
+        if fresh:
+            # 先清空缓存，同一仓库的插件在本轮检查中仍只查询一次
+            _remote_head_cache.invalidate()
+
+        async def probe(plugin: Plugin) -> Tuple[int, Optional[PluginUpdate]]:
+            if not plugin.local_path or not Path(plugin.local_path).exists():
+                return plugin.id, None
+            async with semaphore:
+                try:
+                    return plugin.id, await self._probe_update(Path(plugin.local_path), plugin.branch)
+                except Exception as e:
+                    logger.warning(f"Error checking update for plugin {plugin.name}: {e}")
+                    return plugin.id, None
+
+        results = await asyncio.gather(*(probe(plugin) for plugin in plugins))
+        updates = {plugin_id: update for plugin_id, update in results if update is not None}
+        await self.repository.update_many(updates)
 
         return PluginListResponse(
-            total=len(updated_plugins),
-            items=updated_plugins
+            total=len(plugins),
+            items=[PluginResponse.model_validate(plugin) for plugin in plugins]
         )
 
     async def install_plugin(self, plugin_id: int) -> PluginResponse:
@@ -230,6 +295,7 @@ class PluginService:
 
         return PluginResponse.model_validate(plugin)
 
+    @timed_scan("plugin_marketplace")
     async def scan_marketplace(self) -> PluginListResponse:
         """
         Scan marketplace directories and sync to database
@@ -259,20 +325,10 @@ class PluginService:
             # For project marketplace, scan recursively to find all plugin directories
             # For user marketplace, scan only direct subdirectories
             if source_type == "project":
-                # Recursively find all directories that could be plugins
-                # Look for directories that contain skills/ or agents/ subdirectories
-                for root_dir in marketplace_dir.rglob("*"):
-                    if not root_dir.is_dir():
-                        continue
-
-                    # Check if this directory contains skills/ or agents/ subdirectories
-                    has_skills = (root_dir / "skills").exists()
-                    has_agents = (root_dir / "agents").exists()
-
-                    if not (has_skills or has_agents):
-                        continue
-
-                    plugin_dir = root_dir
+                # Find directories that contain skills/ or agents/ subdirectories
+                # (pruned walk: stops descending at each plugin root)
+                plugin_roots = await asyncio.to_thread(find_plugin_roots, marketplace_dir)
+                for plugin_dir in plugin_roots:
                     plugin_name = plugin_dir.name
 
                     # Process this plugin directory
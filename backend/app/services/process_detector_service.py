@@ -8,6 +8,7 @@ from typing import List, Optional
 
 import psutil
 
+from app.core.metrics import timed_scan
 from app.schemas.process import ClaudeProcessInfo, ProcessStatus
 
 logger = logging.getLogger(__name__)
@@ -21,6 +22,7 @@ class ProcessDetectorService:
         self.current_pid = os.getpid()
         self.managed_pids = set()  # PIDs managed by this system
 
+    @timed_scan("claude_processes")
     def scan_claude_processes(self) -> List[ClaudeProcessInfo]:
         """
         Scan all running Claude Code processes.
@@ -11,6 +11,9 @@ import subprocess
 from pathlib import Path
 from typing import Any, Optional
 
+from app.core.catalog import bump_catalog_version
+from app.core.metrics import timed_scan
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,36 +21,15 @@ def _is_git_repo(root: Path) -> bool:
     return (root / ".git").exists()
 
 
+@timed_scan("project_git_roots")
 def scan_git_repositories(root_path: str, max_depth: int = 4) -> list[str]:
-    """广度优先发现含 .git 的目录（路径字符串列表）。"""
+    """发现含 .git 的目录（路径字符串列表），复用全局扫描器的黑名单与目录缓存。"""
+    from app.services.git_repo_scanner import get_git_repo_scanner
+
     root = Path(root_path).expanduser().resolve()
     if not root.is_dir():
         return []
-    found: list[str] = []
-    seen: set[Path] = set()
-    # (path, depth)
-    queue: list[tuple[Path, int]] = [(root, 0)]
-    while queue:
-        cur, depth = queue.pop(0)
-        if cur in seen:
-            continue
-        seen.add(cur)
-        try:
-            if not cur.is_dir():
-                continue
-            if _is_git_repo(cur):
-                found.append(str(cur))
-                continue
-            if depth >= max_depth:
-                continue
-            for child in cur.iterdir():
-                if child.name.startswith("."):
-                    continue
-                if child.is_dir():
-                    queue.append((child, depth + 1))
-        except PermissionError:
-            logger.warning("scan_git_repositories: permission denied: %s", cur)
-    return found
+    return get_git_repo_scanner().scan_directories([str(root)], max_depth=max_depth, max_repos=None)
 
 
 def probe_project_directory(project_path: str) -> dict[str, Any]:
@@ -141,6 +123,8 @@ def write_claude_config(project_path: str, data: dict[str, Any]) -> None:
     claude.mkdir(parents=True, exist_ok=True)
     cfg = claude / "config.json"
     cfg.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    # 项目列表的 workspace_scanned 来自该文件
+    bump_catalog_version("projects")
 
 
 def read_agent_md(project_path: str) -> Optional[str]:
@@ -300,6 +284,7 @@ def suggest_workspace_url_from_filesystem(project_path: str, port: int) -> str:
     return f"http://127.0.0.1:{port}"
 
 
+@timed_scan("project_structure")
 def scan_project_structure(project_path: str) -> dict[str, Any]:
     """
     扫描项目结构，识别前端入口和配置
@@ -0,0 +1,75 @@
+"""
+ProjectRootIndex - 已登记项目根目录的内存索引
+
+/localfs 每个文件请求都需要确认路径位于某个项目目录下。索引把全部项目根目录
+（resolve 后）保存为集合，判断时沿路径的祖先目录逐级查表，复杂度与路径深度相关，
+与项目数量无关。项目增删改时 ProjectRepository 递增 "projects" 目录版本号，索引随之失效；
+TTL 兜底数据库被外部修改的情况。
+"""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import FrozenSet, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.settings import settings
+from app.core.async_cache import AsyncTTLCache
+from app.core.catalog import get_catalog_version
+from app.repositories.project_repository import ProjectRepository
+
+
+def _resolve_roots(paths: list[str]) -> FrozenSet[str]:
+    """解析项目路径（含符号链接，阻塞，在线程中执行）"""
+    return frozenset(str(Path(path).resolve()) for path in paths)
+
+
+class ProjectRootIndex:
+    """项目根目录索引"""
+
+    def __init__(self):
+        self._cache = AsyncTTLCache()
+        self._version = -1
+
+    async def roots(self, db: AsyncSession) -> FrozenSet[str]:
+        """当前全部项目根目录（resolve 后的绝对路径）"""
+        version = get_catalog_version("projects")
+        if version != self._version:
+            self._cache.invalidate()
+            self._version = version
+
+        async def load() -> FrozenSet[str]:
+            paths = await ProjectRepository(db).list_paths()
+            return await asyncio.to_thread(_resolve_roots, paths)
+
+        return await self._cache.get(f"roots:{version}", load, ttl=settings.localfs_root_index_ttl)
+
+    async def find_root(self, path: Path, db: AsyncSession) -> Optional[Path]:
+        """
+        查找包含 path 的项目根目录
+
+        Args:
+            path: 已 resolve 的绝对路径
+            db: 数据库会话（仅在索引需要重建时使用）
+
+        Returns:
+            项目根目录；不属于任何项目时返回 None
+        """
+        roots = await self.roots(db)
+        for candidate in (path, *path.parents):
+            if str(candidate) in roots:
+                return candidate
+        return None
+
+
+# 全局单例
+_project_root_index: Optional[ProjectRootIndex] = None
+
+
+def get_project_root_index() -> ProjectRootIndex:
+    """获取 ProjectRootIndex 单例"""
+    global _project_root_index
+    if _project_root_index is None:
+        _project_root_index = ProjectRootIndex()
+    return _project_root_index
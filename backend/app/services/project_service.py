@@ -1,6 +1,7 @@
 """Project 索引业务逻辑：CRUD、同步、初始化 .claude、Workspace 生命周期。"""
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 from datetime import datetime
@@ -151,7 +152,7 @@ class ProjectService:
         p = await self.repo.get(project_id)
         if not p:
             return False
-        get_workspace_process_service().stop(project_id)
+        await get_workspace_process_service().stop(project_id)
         await self.repo.delete(p)
         return True
 
@@ -250,7 +251,7 @@ class ProjectService:
         self, root_path: str, max_depth: int = 4
     ) -> tuple[list[str], list[int]]:
         """扫描目录下 Git 仓库并为未索引路径创建 Project。"""
-        discovered = pfs.scan_git_repositories(root_path, max_depth=max_depth)
+        discovered = await asyncio.to_thread(pfs.scan_git_repositories, root_path, max_depth)
         created_ids: list[int] = []
         for path_str in discovered:
             resolved = str(Path(path_str).expanduser().resolve())
@@ -278,8 +279,8 @@ class ProjectService:
         await self.sync(project_id)
         return {"web_path": web_path, "message": "请在 web/ 目录执行 npm install 后启动开发服务"}
 
-    def workspace_status(self, project_id: int) -> dict[str, Any]:
-        return get_workspace_process_service().status(project_id)
+    async def workspace_status(self, project_id: int) -> dict[str, Any]:
+        return await get_workspace_process_service().status(project_id)
 
     async def scan_project_structure(self, project_id: int) -> dict[str, Any]:
         """
@@ -343,7 +344,7 @@ class ProjectService:
             f"frontend_entry={frontend_entry}, start_command={start_command}, port={preferred_port}"
         )
         
-        return get_workspace_process_service().start(
+        return await get_workspace_process_service().start(
             project_id,
             p.path,
             preferred_port=preferred_port,
@@ -351,8 +352,8 @@ class ProjectService:
             start_command=start_command,
         )
 
-    def workspace_stop(self, project_id: int) -> dict[str, Any]:
-        return get_workspace_process_service().stop(project_id)
+    async def workspace_stop(self, project_id: int) -> dict[str, Any]:
+        return await get_workspace_process_service().stop(project_id)
 
     async def workspace_restart(self, project_id: int) -> dict[str, Any]:
         """重启 Workspace，使用配置中的前端设置"""
@@ -368,7 +369,7 @@ class ProjectService:
         start_command = ws_cfg.get("start_command", "npm run dev")
         preferred_port = p.workspace_port or ws_cfg.get("port", 5173)
         
-        return get_workspace_process_service().restart(
+        return await get_workspace_process_service().restart(
             project_id,
             p.path,
             preferred_port=preferred_port,
@@ -5,7 +5,6 @@ Prompt Optimizer Service
 避免嵌套 Claude Code 会话的问题
 """
 import re
-import anthropic
 from typing import Optional
 from enum import Enum
 from app.config.settings import settings
@@ -45,7 +44,11 @@ class PromptOptimizerService:
                 "Please set it in backend/.env file."
             )
 
-        self.client = anthropic.Anthropic(api_key=api_key)
+        # anthropic SDK 导入较慢，只在使用 AI 模式时加载
+        import anthropic
+
+        # 异步客户端：模型调用期间不阻塞事件循环
+        self.client = anthropic.AsyncAnthropic(api_key=api_key)
 
     async def optimize_prompt(
         self,
@@ -87,7 +90,7 @@ class PromptOptimizerService:
             user_message = self._build_user_message(prompt, context)
 
             # 调用 Claude API
-            response = self.client.messages.create(
+            response = await self.client.messages.create(
                 model=self.model,
                 max_tokens=2000,
                 system=system_prompt,
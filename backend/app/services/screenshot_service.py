@@ -2,14 +2,24 @@
 ScreenshotService - 使用 Playwright 截取运行中的前端页面缩略图
 
 提供项目预览功能，截图保存为 webp 格式以优化文件大小。
+
+- 浏览器只启动一次，维护固定上限的可复用 BrowserContext/Page 池，多个截图并行执行
+- 同一项目同时只有一个截图任务，重复请求合并为同一个结果
+- 图片解码、缩放与编码在线程中执行，不阻塞事件循环
+- 每个项目最新缩略图的路径保存在内存索引中，查询时不再遍历目录
 """
 from __future__ import annotations
 
 import asyncio
+import io
 import logging
+import os
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
@@ -17,14 +27,33 @@ logger = logging.getLogger(__name__)
 from app.core.path_resolver import get_thumbnails_dir
 THUMBNAILS_DIR = get_thumbnails_dir()
 
+_THUMBNAIL_RE = re.compile(r"^project_(\d+)_.+\.(?:webp|png)$")
+
+# (context, page)
+_PageSlot = Tuple[Any, Any]
+
 
 class ScreenshotService:
     """截图服务：使用 Playwright 截取页面并保存为缩略图"""
 
-    def __init__(self):
+    def __init__(self, pool_size: Optional[int] = None, thumbnail_width: Optional[int] = None):
+        """
+        Args:
+            pool_size: 同时打开的浏览器上下文数（即并行截图数上限）
+            thumbnail_width: 缩略图最大宽度，超出时等比缩小
+        """
+        self.pool_size = pool_size or settings.screenshot_pool_size
+        self.thumbnail_width = thumbnail_width or settings.screenshot_thumbnail_width
         self._browser = None
         self._playwright = None
         self._lock = asyncio.Lock()
+        # 每个进行中的截图占用一个名额；空闲的 (context, page) 供下一次复用，没有空闲时按需新建
+        self._slots = asyncio.Semaphore(self.pool_size)
+        self._idle: asyncio.Queue = asyncio.Queue()
+        # project_id -> 进行中的截图任务
+        self._jobs: Dict[int, asyncio.Task] = {}
+        # project_id -> 最新缩略图路径（首次使用时扫描目录建立）
+        self._latest: Optional[Dict[int, Path]] = None
 
     async def _ensure_browser(self):
         """确保浏览器实例已启动"""
@@ -50,6 +79,43 @@ class ScreenshotService:
                     "pip install playwright && playwright install chromium"
                 )
 
+    # ---------- 页面池 ----------
+
+    async def _acquire_page(self) -> _PageSlot:
+        """占用一个名额（池满时等待），优先复用空闲页面，没有时新建上下文"""
+        await self._ensure_browser()
+        await self._slots.acquire()
+        try:
+            if not self._idle.empty():
+                return self._idle.get_nowait()
+            context = await self._browser.new_context()
+            return context, await context.new_page()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _release_page(self, slot: _PageSlot, healthy: bool) -> None:
+        """归还页面并释放名额；出错的上下文直接关闭，下次按需重建"""
+        context, page = slot
+        try:
+            if healthy:
+                try:
+                    # 离开 dev server 页面，避免空闲页面继续运行 HMR 等脚本
+                    await page.goto("about:blank")
+                    self._idle.put_nowait(slot)
+                    return
+                except Exception:
+                    pass
+            try:
+                await context.close()
+            except Exception as e:
+                logger.debug(f"Failed to close browser context: {e}")
+        finally:
+            # 无论页面是否可复用都释放名额，等待中的截图会新建上下文
+            self._slots.release()
+
+    # ---------- 截图 ----------
+
     async def capture(
         self,
         project_id: int,
@@ -62,6 +128,8 @@ class ScreenshotService:
         """
         截取页面并保存为缩略图
 
+        同一项目已有截图任务在执行时，直接等待该任务的结果。
+
         Args:
             project_id: 项目 ID
             url: 要截取的页面 URL
@@ -73,63 +141,133 @@ class ScreenshotService:
         Returns:
             缩略图文件路径
         """
-        # 确保目录存在
-        THUMBNAILS_DIR.mkdir(parents=True, exist_ok=True)
-
-        # 生成文件名
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        filename = f"project_{project_id}_{timestamp}.webp"
-        filepath = THUMBNAILS_DIR / filename
-
+        task = self._jobs.get(project_id)
+        if task is None:
+            task = asyncio.create_task(
+                self._capture(project_id, url, width, height, timeout, retry)
+            )
+            self._jobs[project_id] = task
+            task.add_done_callback(lambda t: self._forget_job(project_id, t))
+        # shield：单个调用方断开时不取消其他等待者共享的任务
+        return await asyncio.shield(task)
+
+    def _forget_job(self, project_id: int, task: asyncio.Task) -> None:
+        if self._jobs.get(project_id) is task:
+            del self._jobs[project_id]
+        if not task.cancelled():
+            # 所有调用方都已离开时避免 "exception was never retrieved"
+            task.exception()
+
+    async def _capture(
+        self, project_id: int, url: str, width: int, height: int, timeout: int, retry: int
+    ) -> str:
         last_error = None
         for attempt in range(retry):
+            image = None
+            slot = None
             try:
-                await self._ensure_browser()
+                slot = await self._acquire_page()
+                page = slot[1]
+                await page.set_viewport_size({"width": width, "height": height})
 
-                page = await self._browser.new_page()
-                try:
-                    await page.set_viewport_size({"width": width, "height": height})
-
-                    # 尝试加载页面
-                    logger.info(f"Screenshot attempt {attempt + 1}: loading {url}")
-                    await page.goto(url, timeout=timeout, wait_until="networkidle")
-
-                    # 等待一小段时间让动画完成
-                    await page.wait_for_timeout(500)
-
-                    # 截图并保存为 webp
-                    await page.screenshot(
-                        path=str(filepath),
-                        type="png",  # 先保存为 png，稍后可以转换
-                        full_page=False
-                    )
-
-                    # 转换为 webp（如果支持）
-                    try:
-                        from PIL import Image
-                        img = Image.open(str(filepath))
-                        webp_path = filepath.with_suffix(".webp")
-                        img.save(str(webp_path), "WEBP", quality=85)
-                        filepath.unlink()  # 删除原 png
-                        filepath = webp_path
-                    except ImportError:
-                        # 没有 PIL，保持 png 格式
-                        pass
-
-                    logger.info(f"Screenshot saved: {filepath}")
-                    return str(filepath)
-
-                finally:
-                    await page.close()
+                # 尝试加载页面
+                logger.info(f"Screenshot attempt {attempt + 1}: loading {url}")
+                await page.goto(url, timeout=timeout, wait_until="networkidle")
 
+                # 等待一小段时间让动画完成
+                await page.wait_for_timeout(500)
+
+                image = await page.screenshot(type="png", full_page=False)
             except Exception as e:
                 last_error = e
                 logger.warning(f"Screenshot attempt {attempt + 1} failed: {e}")
-                if attempt < retry - 1:
-                    await asyncio.sleep(1)  # 等待后重试
+            finally:
+                if slot is not None:
+                    await self._release_page(slot, healthy=image is not None)
+
+            if image is not None:
+                filepath = await asyncio.to_thread(self._write_thumbnail, project_id, image)
+                self._index()[project_id] = filepath
+                logger.info(f"Screenshot saved: {filepath}")
+                return str(filepath)
+
+            if attempt < retry - 1:
+                await asyncio.sleep(1)  # 等待后重试
 
         raise RuntimeError(f"截图失败（重试 {retry} 次）: {last_error}")
 
+    def _write_thumbnail(self, project_id: int, png: bytes) -> Path:
+        """缩放并编码为 webp 写入缩略图目录（阻塞，在线程中执行）"""
+        THUMBNAILS_DIR.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")
+        stem = f"project_{project_id}_{timestamp}"
+
+        try:
+            from PIL import Image
+        except ImportError:
+            # 没有 PIL，保持 png 格式
+            filepath = THUMBNAILS_DIR / f"{stem}.png"
+            filepath.write_bytes(png)
+            return filepath
+
+        img = Image.open(io.BytesIO(png))
+        if self.thumbnail_width and img.width > self.thumbnail_width:
+            height = max(1, img.height * self.thumbnail_width // img.width)
+            img = img.resize((self.thumbnail_width, height), Image.LANCZOS)
+        filepath = THUMBNAILS_DIR / f"{stem}.webp"
+        img.save(str(filepath), "WEBP", quality=85)
+        return filepath
+
+    async def capture_many(
+        self,
+        targets: Dict[int, str],
+        keep: int = 3,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[int, Dict[str, Optional[str]]]:
+        """
+        批量截图（并行度由页面池限制），完成后清理各项目的旧缩略图
+
+        Args:
+            targets: project_id -> 页面 URL
+            keep: 每个项目保留的缩略图数量
+            on_progress: 每完成一个项目回调 (已完成数, 总数)
+
+        Returns:
+            project_id -> {"path": 缩略图路径, "error": 错误信息}
+        """
+        results: Dict[int, Dict[str, Optional[str]]] = {}
+
+        async def one(project_id: int, url: str) -> None:
+            try:
+                path = await self.capture(project_id, url)
+                await self.cleanup_old_thumbnails(project_id, keep=keep)
+                results[project_id] = {"path": path, "error": None}
+            except Exception as e:
+                results[project_id] = {"path": None, "error": str(e)}
+            if on_progress:
+                on_progress(len(results), len(targets))
+
+        await asyncio.gather(*(one(project_id, url) for project_id, url in targets.items()))
+        return results
+
+    # ---------- 缩略图索引 ----------
+
+    def _index(self) -> Dict[int, Path]:
+        if self._latest is None:
+            latest: Dict[int, Tuple[float, Path]] = {}
+            if THUMBNAILS_DIR.exists():
+                with os.scandir(THUMBNAILS_DIR) as entries:
+                    for entry in entries:
+                        match = _THUMBNAIL_RE.match(entry.name)
+                        if not match:
+                            continue
+                        project_id = int(match.group(1))
+                        mtime = entry.stat().st_mtime
+                        if project_id not in latest or mtime > latest[project_id][0]:
+                            latest[project_id] = (mtime, Path(entry.path))
+            self._latest = {project_id: path for project_id, (_, path) in latest.items()}
+        return self._latest
+
     def get_thumbnail_path(self, project_id: int) -> Optional[str]:
         """
         获取项目最新的缩略图路径
@@ -140,20 +278,15 @@ class ScreenshotService:
         Returns:
             缩略图文件路径，如果不存在则返回 None
         """
-        if not THUMBNAILS_DIR.exists():
+        index = self._index()
+        path = index.get(project_id)
+        if path is None:
             return None
-
-        # 查找该项目的所有缩略图，按时间排序取最新的
-        pattern = f"project_{project_id}_*"
-        thumbnails = sorted(
-            THUMBNAILS_DIR.glob(pattern),
-            key=lambda p: p.stat().st_mtime,
-            reverse=True
-        )
-
-        if thumbnails:
-            return str(thumbnails[0])
-        return None
+        if not path.exists():
+            # 文件被外部删除
+            index.pop(project_id, None)
+            return None
+        return str(path)
 
     def get_thumbnail_url(self, project_id: int) -> Optional[str]:
         """
@@ -182,6 +315,9 @@ class ScreenshotService:
         Returns:
             删除的文件数量
         """
+        return await asyncio.to_thread(self._cleanup_old_thumbnails, project_id, keep)
+
+    def _cleanup_old_thumbnails(self, project_id: int, keep: int) -> int:
         if not THUMBNAILS_DIR.exists():
             return 0
 
@@ -203,7 +339,16 @@ class ScreenshotService:
         return deleted
 
     async def close(self):
-        """关闭浏览器实例"""
+        """关闭页面池和浏览器实例"""
+        for task in list(self._jobs.values()):
+            task.cancel()
+        while not self._idle.empty():
+            context, _ = self._idle.get_nowait()
+            try:
+                await context.close()
+            except Exception as e:
+                logger.debug(f"Failed to close browser context: {e}")
+
         if self._browser:
             try:
                 await self._browser.close()
@@ -10,7 +10,7 @@ import logging
 
 from app.repositories.skill_repository import SkillRepository
 from app.schemas.skill import SkillCreate, SkillUpdate, SkillResponse, SkillListResponse
-from app.models.skill import SkillSource
+from app.models.skill import Skill, SkillSource
 from app.core.exceptions import NotFoundException, ConflictException
 from app.adapters.claude import ClaudeAdapter
 from app.services.skill_quality_service import SkillQualityService
@@ -197,6 +197,42 @@ class SkillService:
             items=[SkillResponse.model_validate(skill) for skill in skills]
         )
 
+    async def get_categories(self) -> dict:
+        """
+        Get skill counts per source plus plugin/project/user subcategories.
+
+        Aggregated with GROUP BY on the derived category columns, so no skill rows are loaded.
+        """
+        counts = {"builtin": 0, "user": 0, "project": 0, "plugin": 0}
+        for source, count in (await self.repository.get_source_counts()).items():
+            # Map 'global' to 'builtin'
+            key = "builtin" if source == SkillSource.GLOBAL.value else source
+            counts[key] = counts.get(key, 0) + count
+
+        plugins = await self.repository.get_group_counts(Skill.plugin_name, source=SkillSource.PLUGIN)
+        projects = await self.repository.get_group_counts(Skill.project_name, source=SkillSource.PROJECT)
+        users = await self.repository.get_group_counts(Skill.user_scope)
+
+        return {
+            "counts": counts,
+            "plugins": [
+                {"id": name, "name": name, "count": count}
+                for name, count in plugins
+            ],
+            "projects": [
+                {"id": name, "name": name, "count": count}
+                for name, count in projects
+            ],
+            "users": [
+                {
+                    "id": name,
+                    "name": ("public" if name == "public" else name.replace("plugin:", "plugin/")),
+                    "count": count
+                }
+                for name, count in users
+            ]
+        }
+
     async def update_skill(self, skill_id: int, skill_data: SkillUpdate) -> SkillResponse:
         """Update a skill"""
         # Get existing skill
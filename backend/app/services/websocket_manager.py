@@ -1,6 +1,9 @@
 """
 WebSocket 连接管理器
 负责管理所有活跃的 WebSocket 连接并广播消息
+
+多 worker 部署时客户端分散在各个 worker 上，广播经协调层 pub/sub 发往所有 worker，
+由各 worker 推送给自己持有的连接。
 """
 from typing import Dict
 from fastapi import WebSocket
@@ -8,6 +11,8 @@ import logging
 import asyncio
 from datetime import datetime, timedelta
 
+from app.core.coordination import get_coordinator
+
 logger = logging.getLogger(__name__)
 
 class ConnectionManager:
@@ -17,11 +22,18 @@ class ConnectionManager:
     MAX_CONNECTIONS = 100  # 最大连接数
     CONNECTION_TIMEOUT = 3600  # 连接超时时间（秒），1小时
     CLEANUP_INTERVAL = 300  # 清理间隔（秒），5分钟
+    BROADCAST_CHANNEL = "ws.broadcast"
 
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
         self.connection_timestamps: Dict[str, datetime] = {}  # 记录连接创建时间
         self._cleanup_task = None  # 清理任务
+        self._unsubscribe = None  # 取消协调层订阅
+
+    def _ensure_subscribed(self):
+        """订阅跨 worker 广播（首次连接或广播时）"""
+        if self._unsubscribe is None:
+            self._unsubscribe = get_coordinator().subscribe(self.BROADCAST_CHANNEL, self._send_local)
 
     async def connect(self, client_id: str, websocket: WebSocket):
         """
@@ -38,6 +50,7 @@ class ConnectionManager:
             return
 
         await websocket.accept()
+        self._ensure_subscribed()
         self.active_connections[client_id] = websocket
         self.connection_timestamps[client_id] = datetime.now()
 
@@ -115,25 +128,10 @@ class ConnectionManager:
         Args:
             execution_data: 执行数据字典
         """
-        message = {
+        await self._publish({
             "type": "execution_update",
             "data": execution_data
-        }
-
-        # 广播到所有活跃连接
-        disconnected_clients = []
-        for client_id, connection in self.active_connections.items():
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Failed to send message to {client_id}: {e}")
-                disconnected_clients.append(client_id)
-
-        # 清理断开的连接
-        for client_id in disconnected_clients:
-            self.disconnect(client_id)
-
-        logger.debug(f"Broadcasted execution update to {len(self.active_connections)} clients")
+        })
 
     async def broadcast_terminal_execution_update(self, execution_data: dict):
         """
@@ -142,14 +140,20 @@ class ConnectionManager:
         Args:
             execution_data: 执行数据字典，包含 session_id 等信息
         """
-        message = {
+        await self._publish({
             "type": "terminal_execution_update",
             "data": execution_data
-        }
+        })
+
+    async def _publish(self, message: dict):
+        """经协调层发布广播，所有 worker（含本 worker）推送给各自的连接"""
+        self._ensure_subscribed()
+        await get_coordinator().publish(self.BROADCAST_CHANNEL, message)
 
-        # 广播到所有活跃连接
+    async def _send_local(self, message: dict):
+        """推送消息到本 worker 的所有活跃连接"""
         disconnected_clients = []
-        for client_id, connection in self.active_connections.items():
+        for client_id, connection in list(self.active_connections.items()):
             try:
                 await connection.send_json(message)
             except Exception as e:
@@ -160,7 +164,7 @@ class ConnectionManager:
         for client_id in disconnected_clients:
             self.disconnect(client_id)
 
-        logger.debug(f"Broadcasted terminal execution update to {len(self.active_connections)} clients")
+        logger.debug(f"Broadcasted {message.get('type')} to {len(self.active_connections)} clients")
 
     async def shutdown(self):
         """
@@ -168,6 +172,10 @@ class ConnectionManager:
         """
         logger.info("Shutting down WebSocket manager...")
 
+        if self._unsubscribe:
+            self._unsubscribe()
+            self._unsubscribe = None
+
         # 停止清理任务
         if self._cleanup_task:
             self._cleanup_task.cancel()
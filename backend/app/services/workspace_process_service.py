@@ -2,23 +2,33 @@
 管理各 Project 的前端开发服务器子进程（内存注册表，进程重启后失效）。
 
 支持可配置的前端入口目录和启动命令，首次启动时自动扫描项目结构。
+进程由 asyncio 托管：HTTP 探活异步执行并按项目缓存结果，不阻塞请求处理；
+dev server 的输出写入内存环形缓冲和按大小轮转的日志文件，并可通过 WebSocket 实时订阅。
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import shlex
+import signal
 import socket
-import subprocess
-import time
-import urllib.request
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
+from app.config.settings import settings
+from app.core import metrics
+from app.core.async_cache import AsyncTTLCache
+from app.core.streaming import iter_process_output
+
 logger = logging.getLogger(__name__)
 
+# 单个日志订阅者缓冲的批次数，超出后丢弃（慢客户端不拖慢 dev server）
+_SUBSCRIBER_QUEUE_SIZE = 256
+
 
 def _pick_free_port(preferred: Optional[int] = None) -> int:
     if preferred and preferred > 0:
@@ -33,22 +43,95 @@ def _pick_free_port(preferred: Optional[int] = None) -> int:
         return int(s.getsockname()[1])
 
 
+def _log_path(project_id: int) -> Path:
+    from app.core.path_resolver import get_user_home
+
+    return get_user_home() / "workspace_logs" / f"project-{project_id}.log"
+
+
+class _RotatingLogFile:
+    """按大小轮转的日志文件（保留一个 .1 备份）；阻塞写入，由调用方放到线程中执行"""
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write_lines(self, lines: list[str]) -> None:
+        data = "".join(f"{line}\n" for line in lines).encode("utf-8", errors="replace")
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(data) > self.max_bytes:
+            os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+        with self.path.open("ab") as f:
+            f.write(data)
+
+
+def _read_log_tail(path: Path, lines: int) -> list[str]:
+    try:
+        with path.open("rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - lines * 400))
+            text = f.read().decode("utf-8", errors="replace")
+    except OSError:
+        return []
+    return text.splitlines()[-lines:]
+
+
+async def _probe_health(port: int) -> tuple[str, Optional[str]]:
+    """HTTP 探活，返回 (health, last_error)"""
+    import aiohttp
+
+    timeout = aiohttp.ClientTimeout(total=settings.workspace_health_timeout)
+    try:
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(f"http://127.0.0.1:{port}") as resp:
+                return ("healthy" if 200 <= resp.status < 500 else "unhealthy"), None
+    except Exception as e:
+        return "unhealthy", (str(e) or type(e).__name__)[:200]
+
+
+def _signal_process_group(process: asyncio.subprocess.Process, kill: bool) -> None:
+    """向 dev server 所在进程组发信号（npm 拉起的子进程一并结束）；不支持时只处理主进程"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+        return
+    except (AttributeError, ProcessLookupError, PermissionError):
+        pass
+    try:
+        if kill:
+            process.kill()
+        else:
+            process.terminate()
+    except ProcessLookupError:
+        pass
+
+
 @dataclass
 class WorkspaceRuntime:
-    popen: subprocess.Popen
+    process: asyncio.subprocess.Process
     port: int
     started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     cwd: str = ""
+    logs: deque = field(default_factory=lambda: deque(maxlen=settings.workspace_log_buffer_lines))
+    log_file: Optional[_RotatingLogFile] = None
+    subscribers: set = field(default_factory=set)
+    pump: Optional[asyncio.Task] = None
 
 
 # project_id -> runtime
 _registry: dict[int, WorkspaceRuntime] = {}
 
+# "project_id:pid" -> (health, last_error)
+_health_cache = AsyncTTLCache()
+
 
 class WorkspaceProcessService:
-    """启动 / 停止 `npm run dev`，并做简单 HTTP 探活。"""
+    """启动 / 停止 `npm run dev`，异步 HTTP 探活，并采集输出日志。"""
 
-    def status(self, project_id: int) -> dict:
+    async def status(self, project_id: int) -> dict:
         rt = _registry.get(project_id)
         if not rt:
             return {
@@ -61,9 +144,10 @@ class WorkspaceProcessService:
                 "last_error": None,
                 "phase": "stopped",
             }
-        code = rt.popen.poll()
+        code = rt.process.returncode
         if code is not None:
             del _registry[project_id]
+            _health_cache.invalidate(f"{project_id}:")
             return {
                 "running": False,
                 "url": None,
@@ -75,28 +159,25 @@ class WorkspaceProcessService:
                 "phase": "error",
             }
         url = f"http://127.0.0.1:{rt.port}"
-        health = "unknown"
-        last_error = None
-        try:
-            req = urllib.request.Request(url, method="GET")
-            with urllib.request.urlopen(req, timeout=2) as resp:
-                health = "healthy" if 200 <= resp.status < 500 else "unhealthy"
-        except Exception as e:
-            health = "unhealthy"
-            last_error = str(e)[:200]
+        # 探活结果按项目缓存，并发的状态查询共享同一次探测
+        health, last_error = await _health_cache.get(
+            f"{project_id}:{rt.process.pid}",
+            lambda: _probe_health(rt.port),
+            ttl=settings.workspace_health_ttl,
+        )
 
         return {
             "running": True,
             "url": url,
             "port": rt.port,
-            "pid": rt.popen.pid,
+            "pid": rt.process.pid,
             "started_at": rt.started_at.isoformat(),
             "health": health,
             "last_error": last_error,
             "phase": "starting" if health != "healthy" else "running",
         }
 
-    def start(
+    async def start(
         self,
         project_id: int,
         project_path: str,
@@ -133,7 +214,7 @@ class WorkspaceProcessService:
             raise ValueError(f"package.json 不存在: {pkg}")
 
         if project_id in _registry:
-            st = self.status(project_id)
+            st = await self.status(project_id)
             if st["running"]:
                 return st
 
@@ -165,13 +246,13 @@ class WorkspaceProcessService:
         logger.info(f"Starting workspace: cwd={work_dir}, cmd={cmd}")
         
         try:
-            popen = subprocess.Popen(
-                cmd,
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
                 cwd=str(work_dir),
                 env=env,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                stdin=subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                stdin=asyncio.subprocess.DEVNULL,
                 start_new_session=True,
             )
         except FileNotFoundError:
@@ -179,26 +260,45 @@ class WorkspaceProcessService:
             pm = base_cmd[0] if base_cmd else "npm"
             raise RuntimeError(f"未找到 {pm}，请安装 Node.js 并确保 {pm} 在 PATH 中")
 
-        _registry[project_id] = WorkspaceRuntime(popen=popen, port=port, cwd=str(work_dir))
-        time.sleep(0.5)
-        return self.status(project_id)
+        rt = WorkspaceRuntime(
+            process=process,
+            port=port,
+            cwd=str(work_dir),
+            log_file=_RotatingLogFile(_log_path(project_id), settings.workspace_log_max_bytes),
+        )
+        _registry[project_id] = rt
+        _health_cache.invalidate(f"{project_id}:")
+        await self._append_logs(rt, [f"$ {shlex.join(cmd)}  (cwd={work_dir})"])
+        rt.pump = asyncio.create_task(self._pump_output(rt))
+        return await self.status(project_id)
 
-    def stop(self, project_id: int) -> dict:
+    async def stop(self, project_id: int) -> dict:
         rt = _registry.pop(project_id, None)
+        _health_cache.invalidate(f"{project_id}:")
         if not rt:
             return {"success": True, "message": "无运行中的 Workspace"}
         try:
-            rt.popen.terminate()
+            _signal_process_group(rt.process, kill=False)
             try:
-                rt.popen.wait(timeout=8)
-            except subprocess.TimeoutExpired:
-                rt.popen.kill()
+                await asyncio.wait_for(rt.process.wait(), timeout=8)
+            except asyncio.TimeoutError:
+                _signal_process_group(rt.process, kill=True)
+                await rt.process.wait()
         except Exception as e:
             logger.exception("workspace stop: %s", e)
             return {"success": False, "message": str(e)}
+        if rt.pump:
+            # 等待剩余输出写完；孙进程仍持有管道时不再等待
+            done, _ = await asyncio.wait([rt.pump], timeout=2)
+            if not done:
+                rt.pump.cancel()
         return {"success": True, "message": "Workspace 已停止"}
 
-    def restart(
+    async def shutdown(self) -> None:
+        """停止全部 Workspace（应用关闭时调用）"""
+        await asyncio.gather(*(self.stop(project_id) for project_id in list(_registry)))
+
+    async def restart(
         self,
         project_id: int,
         project_path: str,
@@ -206,8 +306,8 @@ class WorkspaceProcessService:
         frontend_entry: Optional[str] = None,
         start_command: Optional[str] = None,
     ) -> dict:
-        self.stop(project_id)
-        return self.start(
+        await self.stop(project_id)
+        return await self.start(
             project_id,
             project_path,
             preferred_port,
@@ -215,6 +315,65 @@ class WorkspaceProcessService:
             start_command,
         )
 
+    # ---------- 日志 ----------
+
+    async def _append_logs(self, rt: WorkspaceRuntime, lines: list[str]) -> None:
+        rt.logs.extend(lines)
+        for queue in list(rt.subscribers):
+            try:
+                queue.put_nowait(lines)
+            except asyncio.QueueFull:
+                pass
+        if rt.log_file:
+            try:
+                await asyncio.to_thread(rt.log_file.write_lines, lines)
+            except OSError as e:
+                logger.warning("workspace log write failed: %s", e)
+
+    async def _pump_output(self, rt: WorkspaceRuntime) -> None:
+        """读取 dev server 输出（突发输出按批合并），进程结束后通知订阅者"""
+        try:
+            async for batch in iter_process_output(rt.process):
+                await self._append_logs(rt, [line.text for line in batch])
+            code = await rt.process.wait()
+            await self._append_logs(rt, [f"[process exited with code {code}]"])
+        finally:
+            for queue in list(rt.subscribers):
+                try:
+                    queue.put_nowait(None)
+                except asyncio.QueueFull:
+                    pass
+
+    async def get_logs(self, project_id: int, tail: int = 200) -> list[str]:
+        """最近的日志行；进程已不在注册表时从日志文件读取"""
+        rt = _registry.get(project_id)
+        if rt:
+            return list(rt.logs)[-tail:] if tail > 0 else []
+        return await asyncio.to_thread(_read_log_tail, _log_path(project_id), tail)
+
+    def subscribe_logs(self, project_id: int) -> Optional[asyncio.Queue]:
+        """
+        订阅实时日志；Workspace 未运行时返回 None
+
+        队列元素为一批日志行（list[str]），进程结束后放入 None。
+        """
+        rt = _registry.get(project_id)
+        if not rt:
+            return None
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_SUBSCRIBER_QUEUE_SIZE)
+        rt.subscribers.add(queue)
+        return queue
+
+    def unsubscribe_logs(self, project_id: int, queue: asyncio.Queue) -> None:
+        rt = _registry.get(project_id)
+        if rt:
+            rt.subscribers.discard(queue)
+
+
+def get_running_workspace_ids() -> list[int]:
+    """当前注册表中的 Workspace 项目 ID"""
+    return list(_registry)
+
 
 _workspace_service: Optional[WorkspaceProcessService] = None
 
@@ -223,4 +382,7 @@ def get_workspace_process_service() -> WorkspaceProcessService:
     global _workspace_service
     if _workspace_service is None:
         _workspace_service = WorkspaceProcessService()
+        metrics.register_queue_source(
+            "workspace_logs", lambda: [queue for rt in list(_registry.values()) for queue in rt.subscribers]
+        )
     return _workspace_service
@@ -0,0 +1,207 @@
+"""
+测试结果缓存
+
+缓存 key 为测试文件及其跟踪依赖（本地 import 的源码闭包、conftest.py）的内容哈希，
+加上执行命令；key 不变且上次通过的套件直接报告为 cached-pass，不再启动子进程。
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# 单个测试文件最多跟踪的依赖文件数
+MAX_TRACKED_FILES = 2000
+
+_PY_IMPORT_RE = re.compile(r'^\s*(?:from\s+(\.*[\w.]*)\s+import\s+([\w*, ()]+)|import\s+([\w., ]+))', re.MULTILINE)
+_JS_IMPORT_RE = re.compile(
+    r'''(?:import|export)\s[^'"]*?from\s+['"](\.{1,2}/[^'"]+)['"]'''
+    r'''|import\s*\(?\s*['"](\.{1,2}/[^'"]+)['"]'''
+)
+_JS_EXTENSIONS = ("", ".ts", ".tsx", ".js", ".jsx", "/index.ts", "/index.tsx", "/index.js")
+
+
+class TestResultCache:
+    """按依赖内容哈希缓存通过的测试结果（JSON 文件持久化）"""
+
+    def __init__(self, cache_path: Path, project_root: Path):
+        self.cache_path = Path(cache_path)
+        self.project_root = Path(project_root)
+        # Python 源码的 import 搜索根（项目根和 backend/）
+        self._py_roots = [self.project_root, self.project_root / "backend"]
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        # 文件摘要按 (mtime_ns, size) 复用，未修改的文件不重复读取
+        self._digests: Dict[Path, Tuple[int, int, str]] = {}
+
+    # ---------- key 计算（阻塞 IO，调用方通过 to_thread 执行） ----------
+
+    def compute_key(self, test_file: str, test_command: str) -> Optional[str]:
+        """计算测试套件的缓存 key；测试文件不存在时返回 None"""
+        test_path = (self.project_root / test_file).resolve()
+        if not test_path.is_file():
+            return None
+
+        hasher = hashlib.sha256(f"{test_command}\0{test_file}\0".encode())
+        for path in sorted(self.tracked_files(test_path)):
+            digest = self._file_digest(path)
+            if digest:
+                hasher.update(f"{path}\0{digest}\0".encode())
+        return hasher.hexdigest()
+
+    def tracked_files(self, test_path: Path) -> Set[Path]:
+        """测试文件及其本地依赖闭包"""
+        seen: Set[Path] = set()
+        pending = [test_path]
+        pending.extend(self._conftest_files(test_path))
+        while pending and len(seen) < MAX_TRACKED_FILES:
+            path = pending.pop()
+            if path in seen:
+                continue
+            seen.add(path)
+            try:
+                source = path.read_text(encoding="utf-8", errors="ignore")
+            except OSError:
+                continue
+            if path.suffix == ".py":
+                pending.extend(self._python_imports(path, source))
+            else:
+                pending.extend(self._js_imports(path, source))
+        return seen
+
+    def _conftest_files(self, test_path: Path) -> Iterable[Path]:
+        for parent in test_path.parents:
+            conftest = parent / "conftest.py"
+            if conftest.is_file():
+                yield conftest
+            if parent == self.project_root:
+                break
+
+    def _python_imports(self, path: Path, source: str) -> List[Path]:
+        found = []
+        for match in _PY_IMPORT_RE.finditer(source):
+            if match.group(3):
+                modules = [m.strip().split(" ")[0] for m in match.group(3).split(",")]
+            else:
+                module = match.group(1)
+                names = [n.strip(" ()") for n in match.group(2).split(",")]
+                # from pkg import name 中的 name 也可能是子模块
+                sep = "." if module.strip(".") else ""
+                modules = [module] + [f"{module}{sep}{name}" for name in names if name and name != "*"]
+            for module in modules:
+                resolved = self._resolve_python_module(path, module)
+                if resolved:
+                    found.append(resolved)
+        return found
+
+    def _resolve_python_module(self, path: Path, module: str) -> Optional[Path]:
+        if module.startswith("."):
+            level = len(module) - len(module.lstrip("."))
+            base = path.parent
+            for _ in range(level - 1):
+                base = base.parent
+            roots = [base]
+            module = module.lstrip(".")
+        else:
+            roots = self._py_roots
+        parts = [p for p in module.split(".") if p]
+        if not parts:
+            return None
+        for root in roots:
+            candidate = root.joinpath(*parts)
+            for option in (candidate.with_suffix(".py"), candidate / "__init__.py"):
+                if option.is_file():
+                    return option.resolve()
+        return None
+
+    def _js_imports(self, path: Path, source: str) -> List[Path]:
+        found = []
+        for match in _JS_IMPORT_RE.finditer(source):
+            spec = match.group(1) or match.group(2)
+            base = path.parent / spec
+            for ext in _JS_EXTENSIONS:
+                candidate = Path(f"{base}{ext}")
+                if candidate.is_file():
+                    found.append(candidate.resolve())
+                    break
+        return found
+
+    def _file_digest(self, path: Path) -> Optional[str]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        cached = self._digests.get(path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        try:
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+        self._digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    # ---------- 结果读写（首次读取与每次写入都是文件 IO，调用方通过 to_thread 执行） ----------
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            try:
+                self._entries = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, node_id: str, key: str) -> Optional[Dict[str, Any]]:
+        """获取 key 匹配的缓存结果"""
+        with self._lock:
+            entry = self._load().get(node_id)
+        if entry and entry.get("key") == key:
+            return entry["result"]
+        return None
+
+    def put(self, node_id: str, key: str, result: Dict[str, Any]) -> None:
+        """写入通过的结果（原子替换缓存文件）"""
+        with self._lock:
+            entries = self._load()
+            entries[node_id] = {"key": key, "result": result}
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.cache_path.with_suffix(".tmp")
+                tmp_path.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp_path, self.cache_path)
+            except OSError as e:
+                logger.warning(f"Failed to persist test result cache: {e}")
+
+    def invalidate(self, node_id: Optional[str] = None) -> None:
+        """清除单个节点或全部缓存"""
+        with self._lock:
+            entries = self._load()
+            if node_id is None:
+                entries.clear()
+            else:
+                entries.pop(node_id, None)
+            try:
+                self.cache_path.write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+            except OSError:
+                pass
+
+
+# 全局单例
+_result_cache: Optional[TestResultCache] = None
+
+
+def get_test_result_cache() -> TestResultCache:
+    """获取全局 TestResultCache 实例"""
+    global _result_cache
+    if _result_cache is None:
+        from app.core.path_resolver import get_project_root, get_user_home
+
+        _result_cache = TestResultCache(get_user_home() / "test_result_cache.json", get_project_root())
+    return _result_cache
@@ -1,30 +1,61 @@
 """
 测试执行引擎
+
+分类节点下的所有套件在工作池中并行执行（默认按 CPU 核数），
+依赖未变化且上次通过的套件直接报告为 cached-pass；执行过程通过 on_progress 回调逐套件上报。
 """
 
 import asyncio
 import json
+import os
 import re
-from typing import Dict, Any, AsyncIterator
+import tempfile
+import uuid
+from typing import Dict, Any, List, Optional, Callable
 from datetime import datetime
 from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.testing.models import TestNode, TestExecution, TestStatus
+from app.core.streaming import iter_process_output
+from app.testing.models import TestNode, TestExecution, TestStatus, TestNodeType
+from app.testing.result_cache import TestResultCache, get_test_result_cache
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
 
 
 class TestRunner:
     """测试执行引擎"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        use_cache: bool = True,
+        cache: Optional[TestResultCache] = None
+    ):
+        """
+        Args:
+            max_workers: 并行执行的套件数，默认 CPU 核数
+            use_cache: 是否复用依赖未变化的通过结果
+            cache: 结果缓存，默认使用全局缓存
+        """
         from app.core.path_resolver import get_project_root
         self.project_root = get_project_root()
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_cache = use_cache
+        self._cache = cache
+
+    @property
+    def cache(self) -> TestResultCache:
+        if self._cache is None:
+            self._cache = get_test_result_cache()
+        return self._cache
 
     async def run_test_node(
         self,
         node_id: str,
-        db: AsyncSession
+        db: AsyncSession,
+        on_progress: Optional[ProgressCallback] = None
     ) -> TestExecution:
         """执行单个测试节点"""
         # 获取测试节点
@@ -33,26 +64,27 @@ class TestRunner:
         )
         node = result.scalar_one()
 
-        if node.type == "category":
-            return await self._run_category(node, db)
-        elif node.type == "test_suite":
-            return await self._run_test_suite(node, db)
-        elif node.type == "test_case":
-            return await self._run_test_case(node, db)
+        if node.type == TestNodeType.CATEGORY:
+            return await self._run_category(node, db, on_progress)
+        return await self._run_test_suite(node, db, on_progress)
 
     async def _run_category(
         self,
         node: TestNode,
-        db: AsyncSession
+        db: AsyncSession,
+        on_progress: Optional[ProgressCallback] = None
     ) -> TestExecution:
-        """执行分类节点（递归执行所有子节点）"""
-        # 获取所有启用的子节点
+        """执行分类节点（子树中的所有套件并行执行，结果逐级汇总）"""
+        # 一次查询加载所有启用的节点，在内存中构建子树
         result = await db.execute(
-            select(TestNode)
-            .where(TestNode.parent_id == node.id, TestNode.enabled == True)
-            .order_by(TestNode.order)
+            select(TestNode).where(TestNode.enabled == True).order_by(TestNode.order)
         )
-        children = list(result.scalars().all())
+        children_map: Dict[str, List[TestNode]] = {}
+        for child in result.scalars().all():
+            if child.parent_id:
+                children_map.setdefault(child.parent_id, []).append(child)
+
+        suites = self._collect_suites(node, children_map)
 
         # 创建分类执行记录
         execution = TestExecution(
@@ -63,45 +95,70 @@ class TestRunner:
         db.add(execution)
         await db.commit()
 
-        # 执行所有子节点
-        total_passed = 0
-        total_failed = 0
-        total_tests = 0
-        total_skipped = 0
+        results = await self._run_suites(suites, on_progress)
 
-        for child in children:
-            try:
-                child_execution = await self.run_test_node(child.id, db)
-
-                total_passed += child_execution.passed_tests
-                total_failed += child_execution.failed_tests
-                total_tests += child_execution.total_tests
-                total_skipped += child_execution.skipped_tests
-            except Exception as e:
-                print(f"Error running child node {child.id}: {e}")
-                total_failed += 1
-                total_tests += 1
-
-        # 更新执行记录
-        execution.status = TestStatus.PASSED if total_failed == 0 else TestStatus.FAILED
-        execution.total_tests = total_tests
-        execution.passed_tests = total_passed
-        execution.failed_tests = total_failed
-        execution.skipped_tests = total_skipped
-        execution.completed_at = datetime.utcnow()
+        # 子分类和套件的执行记录一次写入
+        self._record_results(node, children_map, results, db, execution)
+        await db.commit()
+        return execution
+
+    def _collect_suites(self, node: TestNode, children_map: Dict[str, List[TestNode]]) -> List[TestNode]:
+        """收集分类下所有启用的套件 / 用例节点"""
+        suites = []
+        for child in children_map.get(node.id, []):
+            if child.type == TestNodeType.CATEGORY:
+                suites.extend(self._collect_suites(child, children_map))
+            else:
+                suites.append(child)
+        return suites
+
+    def _record_results(
+        self,
+        node: TestNode,
+        children_map: Dict[str, List[TestNode]],
+        results: Dict[str, Dict[str, Any]],
+        db: AsyncSession,
+        execution: Optional[TestExecution] = None
+    ) -> TestExecution:
+        """递归写入子节点执行记录，并把结果汇总到分类节点"""
+        child_executions = []
+        for child in children_map.get(node.id, []):
+            if child.type == TestNodeType.CATEGORY:
+                child_executions.append(self._record_results(child, children_map, results, db))
+            elif child.id in results:
+                child_execution = TestExecution(test_node_id=child.id)
+                self._apply_result(child_execution, results[child.id])
+                db.add(child_execution)
+                child_executions.append(child_execution)
+
+        now = datetime.utcnow()
+        if execution is None:
+            execution = TestExecution(test_node_id=node.id)
+            db.add(execution)
+        execution.started_at = min(
+            [execution.started_at or now] + [e.started_at for e in child_executions]
+        )
+        execution.completed_at = max([now] + [e.completed_at for e in child_executions])
+        execution.total_tests = sum(e.total_tests for e in child_executions)
+        execution.passed_tests = sum(e.passed_tests for e in child_executions)
+        execution.failed_tests = sum(e.failed_tests for e in child_executions)
+        execution.skipped_tests = sum(e.skipped_tests for e in child_executions)
+        errored = any(e.status == TestStatus.ERROR for e in child_executions)
+        execution.status = (
+            TestStatus.PASSED if execution.failed_tests == 0 and not errored else TestStatus.FAILED
+        )
         execution.duration = int(
             (execution.completed_at - execution.started_at).total_seconds() * 1000
         )
-
-        await db.commit()
         return execution
 
     async def _run_test_suite(
         self,
         node: TestNode,
-        db: AsyncSession
+        db: AsyncSession,
+        on_progress: Optional[ProgressCallback] = None
     ) -> TestExecution:
-        """执行测试套件"""
+        """执行测试套件 / 单个测试用例"""
         execution = TestExecution(
             test_node_id=node.id,
             status=TestStatus.RUNNING,
@@ -110,47 +167,124 @@ class TestRunner:
         db.add(execution)
         await db.commit()
 
+        results = await self._run_suites([node], on_progress)
+        self._apply_result(execution, results[node.id])
+        await db.commit()
+        return execution
+
+    def _apply_result(self, execution: TestExecution, result: Dict[str, Any]) -> None:
+        execution.status = result["status"]
+        execution.started_at = result["started_at"]
+        execution.completed_at = result["completed_at"]
+        execution.duration = int(
+            (result["completed_at"] - result["started_at"]).total_seconds() * 1000
+        )
+        execution.total_tests = result.get("total", 0)
+        execution.passed_tests = result.get("passed", 0)
+        execution.failed_tests = result.get("failed", 0)
+        execution.skipped_tests = result.get("skipped", 0)
+        execution.output = result.get("output")
+        execution.error_message = result.get("error_message")
+
+    async def _run_suites(
+        self,
+        suites: List[TestNode],
+        on_progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """在工作池中并行执行套件，返回 {node_id: result}（不访问数据库）"""
+        semaphore = asyncio.Semaphore(self.max_workers)
+        total = len(suites)
+        completed = 0
+
+        def emit(event: Dict[str, Any]) -> None:
+            if on_progress:
+                on_progress(event)
+
+        async def run_one(suite: TestNode) -> Dict[str, Any]:
+            nonlocal completed
+            async with semaphore:
+                emit({"type": "suite_start", "node_id": suite.id, "name": suite.name})
+                result = await self._execute_suite(suite)
+            completed += 1
+            emit({
+                "type": "suite_complete",
+                "node_id": suite.id,
+                "name": suite.name,
+                "status": result["status"],
+                "cached": result["cached"],
+                "total": result.get("total", 0),
+                "passed": result.get("passed", 0),
+                "failed": result.get("failed", 0),
+                "skipped": result.get("skipped", 0),
+                "duration": int((result["completed_at"] - result["started_at"]).total_seconds() * 1000),
+                "completed": completed,
+                "suites": total
+            })
+            return result
+
+        results = await asyncio.gather(*(run_one(suite) for suite in suites))
+        return {suite.id: result for suite, result in zip(suites, results)}
+
+    async def _execute_suite(self, node: TestNode) -> Dict[str, Any]:
+        """执行单个套件（命中缓存时直接返回 cached-pass）"""
+        started_at = datetime.utcnow()
+        test_command = node.test_command or "pytest"
+
+        key = None
+        if self.use_cache and node.test_file:
+            key = await asyncio.to_thread(self.cache.compute_key, node.test_file, test_command)
+            cached = await asyncio.to_thread(self.cache.get, node.id, key) if key else None
+            if cached:
+                return {
+                    **cached,
+                    "status": TestStatus.PASSED,
+                    "output": f"[cached] 依赖未变化，复用 {cached.get('cached_at')} 的通过结果\n\n{cached.get('output') or ''}",
+                    "error_message": None,
+                    "started_at": started_at,
+                    "completed_at": datetime.utcnow(),
+                    "cached": True
+                }
+
         try:
             # 根据 test_command 选择执行方式
-            if node.test_command == "playwright test":
+            if test_command == "playwright test":
                 result = await self._run_playwright(node.test_file)
-            elif node.test_command == "vitest":
+            elif test_command == "vitest":
                 result = await self._run_vitest(node.test_file)
             else:
                 result = await self._run_pytest(node.test_file)
 
-            execution.status = TestStatus.PASSED if result["failed"] == 0 else TestStatus.FAILED
-            execution.total_tests = result["total"]
-            execution.passed_tests = result["passed"]
-            execution.failed_tests = result["failed"]
-            execution.skipped_tests = result.get("skipped", 0)
-            execution.output = result["output"]
+            result["status"] = TestStatus.PASSED if result["failed"] == 0 else TestStatus.FAILED
+            result["error_message"] = None
 
         except Exception as e:
-            execution.status = TestStatus.ERROR
-            execution.error_message = str(e)
-            execution.output = str(e)
+            result = {
+                "status": TestStatus.ERROR,
+                "error_message": str(e),
+                "output": str(e)
+            }
 
-        finally:
-            execution.completed_at = datetime.utcnow()
-            execution.duration = int(
-                (execution.completed_at - execution.started_at).total_seconds() * 1000
-            )
-            await db.commit()
+        result["started_at"] = started_at
+        result["completed_at"] = datetime.utcnow()
+        result["cached"] = False
 
-        return execution
-
-    async def _run_test_case(
-        self,
-        node: TestNode,
-        db: AsyncSession
-    ) -> TestExecution:
-        """执行单个测试用例"""
-        return await self._run_test_suite(node, db)
+        # 只缓存确实执行过测试且全部通过的结果
+        if key and result["status"] == TestStatus.PASSED and result.get("total", 0) > 0:
+            await asyncio.to_thread(self.cache.put, node.id, key, {
+                "total": result["total"],
+                "passed": result["passed"],
+                "failed": 0,
+                "skipped": result.get("skipped", 0),
+                "output": result.get("output"),
+                "cached_at": result["completed_at"].isoformat()
+            })
+        return result
 
     async def _run_pytest(self, test_file: str) -> Dict[str, Any]:
         """执行 pytest 测试"""
         test_path = self.project_root / test_file
+        # 并行执行时每个套件使用独立的报告文件
+        report_file = os.path.join(tempfile.gettempdir(), f"pytest_report_{uuid.uuid4().hex}.json")
 
         cmd = [
             "pytest",
@@ -158,7 +292,7 @@ class TestRunner:
             "-v",
             "--tb=short",
             "--json-report",
-            f"--json-report-file=/tmp/pytest_report_{id(self)}.json"
+            f"--json-report-file={report_file}"
         ]
 
         process = await asyncio.create_subprocess_exec(
@@ -168,15 +302,10 @@ class TestRunner:
             cwd=str(self.project_root)
         )
 
-        # 实时读取输出
-        output_lines = []
-        async for line in self._read_stream(process.stdout):
-            output_lines.append(line)
-
-        await process.wait()
+        output_lines = await self._collect_stdout(process)
 
         # 读取 JSON 报告
-        report_path = Path(f"/tmp/pytest_report_{id(self)}.json")
+        report_path = Path(report_file)
         if report_path.exists():
             try:
                 with open(report_path, 'r') as f:
@@ -215,12 +344,7 @@ class TestRunner:
             cwd=str(frontend_dir)
         )
 
-        # 实时读取输出
-        output_lines = []
-        async for line in self._read_stream(process.stdout):
-            output_lines.append(line)
-
-        await process.wait()
+        output_lines = await self._collect_stdout(process)
 
         # 解析 Playwright JSON 输出
         output_text = "\n".join(output_lines)
@@ -246,24 +370,19 @@ class TestRunner:
             cwd=str(frontend_dir)
         )
 
-        # 实时读取输出
-        output_lines = []
-        async for line in self._read_stream(process.stdout):
-            output_lines.append(line)
-
-        await process.wait()
+        output_lines = await self._collect_stdout(process)
 
         # 解析 Vitest 输出
         output_text = "\n".join(output_lines)
         return self._parse_vitest_output(output_text)
 
-    async def _read_stream(self, stream) -> AsyncIterator[str]:
-        """异步读取流"""
-        while True:
-            line = await stream.readline()
-            if not line:
-                break
-            yield line.decode('utf-8', errors='ignore').strip()
+    async def _collect_stdout(self, process: asyncio.subprocess.Process) -> List[str]:
+        """按批读取子进程输出并等待结束，返回 stdout 行（stderr 同时排空，避免管道写满阻塞）"""
+        output_lines: List[str] = []
+        async for batch in iter_process_output(process):
+            output_lines.extend(line.text.strip() for line in batch if line.stream == "stdout")
+        await process.wait()
+        return output_lines
 
     def _parse_pytest_text_output(self, output: str) -> Dict[str, Any]:
         """解析 pytest 文本输出"""
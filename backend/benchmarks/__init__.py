@@ -0,0 +1,16 @@
+"""
+后端基准测试套件（离线、可复现）
+
+在 backend/ 目录下运行：
+
+    python -m benchmarks run --profile default --output results/base.json
+    python -m benchmarks run --profile smoke --scenarios sync,dashboard
+    python -m benchmarks compare results/base.json results/new.json --threshold 0.15
+    python -m benchmarks generate --root /tmp/oa-bench --profile large
+    python -m benchmarks terminal --sessions 1,8,32 --output results/terminal.json
+    python -m benchmarks terminal --url http://127.0.0.1:8000 --generators echo
+
+run 会在 --root（默认临时目录）下生成合成的 ~/.claude 目录树、安装 fake claude，
+再以隔离的 HOME / 数据库启动 uvicorn 并依次运行场景，结果写成 JSON 供 compare 对比。
+同一 --root 下目录树的 spec 不变时会直接复用，大规模数据只需生成一次。
+"""
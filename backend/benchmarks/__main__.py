@@ -0,0 +1,217 @@
+"""
+命令行入口：python -m benchmarks {generate,run,compare}
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+import psutil
+
+from .datagen import load_or_generate
+from .profiles import PROFILES, get_profile
+from .results import compare, environment, format_comparison, format_headlines, write_results
+from .scenarios import SCENARIOS, BenchContext, run_scenarios
+from .server import BenchServer, ResourceSampler
+from .terminal import GENERATORS, run_terminal_load
+
+
+def _parse_env(values: List[str]) -> Dict[str, str]:
+    env = {}
+    for item in values:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise SystemExit(f"--server-env 需要 KEY=VALUE 格式: {item}")
+        env[key] = value
+    return env
+
+
+def _generate(args: argparse.Namespace) -> int:
+    profile = get_profile(args.profile)
+    started = time.perf_counter()
+    manifest = load_or_generate(Path(args.root), profile.tree)
+    print(json.dumps(manifest, indent=2))
+    print(f"[bench] tree ready in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return 0
+
+
+async def _run_async(args: argparse.Namespace, root: Path) -> Dict:
+    profile = get_profile(args.profile)
+    if args.latency is not None:
+        profile = replace(profile, fake_claude={**profile.fake_claude, "FAKE_CLAUDE_LATENCY": str(args.latency)})
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"未知场景: {', '.join(unknown)}（可选: {', '.join(SCENARIOS)}）")
+
+    started = time.perf_counter()
+    manifest = load_or_generate(root, profile.tree)
+    print(f"[bench] tree ready in {time.perf_counter() - started:.1f}s "
+          f"({manifest['transcript_bytes'] / 2**20:.0f} MB transcripts)", flush=True)
+
+    with BenchServer(root, profile.fake_claude, _parse_env(args.server_env)) as server:
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=300)
+        connector = aiohttp.TCPConnector(limit=0)
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as http:
+            ctx = BenchContext(server=server, profile=profile, http=http, manifest=manifest)
+            scenarios = await run_scenarios(ctx, names)
+        idle_rss = server.sampler.server_rss() if server.sampler else 0
+
+    return {
+        "environment": environment(),
+        "profile": {key: value for key, value in profile.to_dict().items() if key not in ("tree", "fake_claude")},
+        "tree": manifest,
+        "fake_claude": profile.fake_claude,
+        "server_env": _parse_env(args.server_env),
+        "server_rss_after_mb": round(idle_rss / 2**20, 1),
+        "scenarios": scenarios,
+    }
+
+
+def _run(args: argparse.Namespace) -> int:
+    root = Path(args.root) if args.root else Path(tempfile.mkdtemp(prefix="oa-bench-"))
+    root.mkdir(parents=True, exist_ok=True)
+    try:
+        results = asyncio.run(_run_async(args, root))
+    finally:
+        if not args.root and not args.keep_root:
+            shutil.rmtree(root, ignore_errors=True)
+    print(format_headlines(results))
+    if args.output:
+        write_results(Path(args.output), results)
+        print(f"[bench] results written to {args.output}")
+    return 1 if any("error" in result for result in results["scenarios"].values()) else 0
+
+
+def _find_listening_pid(port: int) -> Optional[int]:
+    """按监听端口查找服务进程（无权限读取连接表时返回 None）"""
+    try:
+        for conn in psutil.net_connections(kind="tcp"):
+            if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr.port == port and conn.pid:
+                return conn.pid
+    except (psutil.AccessDenied, PermissionError):
+        return None
+    return None
+
+
+async def _terminal_async(args: argparse.Namespace, base_url: str, sampler: Optional[ResourceSampler]) -> Dict:
+    profile = get_profile(args.profile)
+    overrides = {
+        "bytes_per_session": args.bytes,
+        "generators": tuple(args.generators.split(",")) if args.generators else None,
+        "keystrokes": args.keystrokes,
+        "keystroke_interval": args.keystroke_interval,
+        "restore": False if args.no_restore else None,
+    }
+    load = replace(profile.terminal, **{key: value for key, value in overrides.items() if value is not None})
+    counts = [int(value) for value in args.sessions.split(",")] if args.sessions else [load.sessions]
+
+    ws_url = "ws" + base_url[len("http"):]
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else None
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=300)
+    scenarios = {}
+    async with aiohttp.ClientSession(timeout=timeout, connector=aiohttp.TCPConnector(limit=0), headers=headers) as http:
+        for count in counts:
+            name = "terminal" if len(counts) == 1 else f"terminal_{count}"
+            print(f"[bench] {name} ...", flush=True)
+            scenarios[name] = await run_terminal_load(http, base_url, ws_url, replace(load, sessions=count), sampler)
+    return scenarios
+
+
+def _terminal(args: argparse.Namespace) -> int:
+    if args.url:
+        base_url = args.url.rstrip("/")
+        pid = args.server_pid or _find_listening_pid(urlparse(base_url).port or 80)
+        sampler = ResourceSampler(pid) if pid else None
+        if sampler is None:
+            print("[bench] 未找到服务进程（可用 --server-pid 指定），跳过 CPU / 内存统计", file=sys.stderr)
+        else:
+            sampler.start()
+        try:
+            scenarios = asyncio.run(_terminal_async(args, base_url, sampler))
+        finally:
+            if sampler:
+                sampler.stop()
+        target = base_url
+    else:
+        root = Path(tempfile.mkdtemp(prefix="oa-bench-terminal-"))
+        (root / "home").mkdir()
+        try:
+            with BenchServer(root, get_profile(args.profile).fake_claude) as server:
+                scenarios = asyncio.run(_terminal_async(args, server.base_url, server.sampler))
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        target = "isolated"
+
+    results = {"environment": environment(), "target": target, "scenarios": scenarios}
+    print(format_headlines(results))
+    if args.output:
+        write_results(Path(args.output), results)
+        print(f"[bench] results written to {args.output}")
+    return 0
+
+
+def _compare(args: argparse.Namespace) -> int:
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    rows, regressed = compare(baseline, current, args.threshold)
+    print(format_comparison(rows))
+    return 1 if regressed else 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="离线后端基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    generate = sub.add_parser("generate", help="只生成合成 ~/.claude 目录树")
+    generate.add_argument("--root", required=True, help="输出目录（目录树位于 ROOT/home/.claude）")
+    generate.add_argument("--profile", choices=PROFILES, default="default")
+    generate.set_defaults(func=_generate)
+
+    run = sub.add_parser("run", help="启动隔离的后端并运行场景")
+    run.add_argument("--profile", choices=PROFILES, default="default")
+    run.add_argument("--scenarios", help=f"逗号分隔，默认全部：{','.join(SCENARIOS)}")
+    run.add_argument("--output", help="结果 JSON 路径")
+    run.add_argument("--root", help="工作目录（复用已生成的目录树）；默认使用临时目录并在结束后删除")
+    run.add_argument("--keep-root", action="store_true", help="保留临时工作目录（含 server.log）")
+    run.add_argument("--latency", type=float, help="覆盖 fake claude 首 token 延迟（秒）")
+    run.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                     help="传给后端的额外环境变量，可重复（例如 METRICS_ENABLED=false）")
+    run.set_defaults(func=_run)
+
+    term = sub.add_parser("terminal", help="终端 WebSocket 吞吐 / 按键回显延迟 / 重连回放压测")
+    term.add_argument("--url", help="已运行后端的地址（如 http://127.0.0.1:8000）；默认启动隔离的后端")
+    term.add_argument("--server-pid", type=int, help="--url 模式下的服务进程 PID，默认按端口查找")
+    term.add_argument("--token", help="访问令牌（后端设置了 ACCESS_PASSWORD 且不在本机时需要）")
+    term.add_argument("--profile", choices=PROFILES, default="default", help="取该预设的终端负载作为默认值")
+    term.add_argument("--sessions", help="并发会话数，逗号分隔时依次运行（如 1,8,32）")
+    term.add_argument("--bytes", type=int, help="每个 bulk / ansi 会话的输出字节数")
+    term.add_argument("--generators", help=f"负载类型，按会话轮转分配（默认 {','.join(GENERATORS)}）")
+    term.add_argument("--keystrokes", type=int, help="每个 echo 会话的按键数")
+    term.add_argument("--keystroke-interval", type=float, help="按键间隔（秒）")
+    term.add_argument("--no-restore", action="store_true", help="跳过重连回放测量")
+    term.add_argument("--output", help="结果 JSON 路径")
+    term.set_defaults(func=_terminal)
+
+    cmp = sub.add_parser("compare", help="对比两个结果文件，指标变差超过阈值时退出码为 1")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=0.15, help="相对变化阈值（默认 0.15）")
+    cmp.set_defaults(func=_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
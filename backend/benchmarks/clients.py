@@ -0,0 +1,205 @@
+"""
+场景驱动使用的客户端（aiohttp：HTTP 压测、终端 WebSocket、执行广播订阅、SSE）
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+SESSION_ID_PREFIX = "\x1b]0;SESSION_ID:"
+
+
+async def run_load(
+    http: aiohttp.ClientSession,
+    method: str,
+    url: str,
+    iterations: int,
+    concurrency: int,
+    **kwargs: Any,
+) -> Tuple[List[float], int, float]:
+    """
+    以固定并发发出 iterations 个请求（响应体完整读取）
+
+    Returns:
+        (每个成功请求的耗时秒数, 失败数, 总耗时秒数)
+    """
+    latencies: List[float] = []
+    errors = 0
+    remaining = iterations
+
+    async def worker() -> None:
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                async with http.request(method, url, **kwargs) as response:
+                    await response.read()
+                    if response.status >= 400:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, iterations)))))
+    return latencies, errors, time.perf_counter() - started
+
+
+class TerminalClient:
+    """一个终端 WebSocket 会话（use_tmux=false，直接 PTY）"""
+
+    def __init__(self, http: aiohttp.ClientSession, base_url: str, ws_url: str):
+        self.http = http
+        self.base_url = base_url
+        self.ws_url = ws_url
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self.session_id: Optional[str] = None
+        self.seq = 0
+        self.received_bytes = 0
+
+    async def _connect(self, session_id: Optional[str] = None) -> None:
+        query = "use_tmux=false" + (f"&session_id={session_id}" if session_id else "")
+        self.ws = await self.http.ws_connect(f"{self.ws_url}/api/terminal/ws?{query}", max_msg_size=0, heartbeat=None)
+
+    async def open(self, timeout: float = 30.0) -> float:
+        """建立连接并等待服务端下发 SESSION_ID，返回建立耗时（秒）"""
+        started = time.perf_counter()
+        await self._connect()
+        deadline = started + timeout
+        while self.session_id is None:
+            text = await self._receive(deadline)
+            if SESSION_ID_PREFIX in text:
+                self.session_id = text.split(SESSION_ID_PREFIX, 1)[1].split("\x07", 1)[0]
+        return time.perf_counter() - started
+
+    async def reconnect(self, rows: int = 24, cols: int = 80, timeout: float = 30.0) -> Tuple[float, int]:
+        """
+        断开后按 session_id 重连并发送 restore_ready，等待 scrollback 回放
+
+        Returns:
+            (从发起连接到收到回放的耗时秒数, 回放字节数)
+        """
+        if self.ws is not None:
+            await self.ws.close()
+        started = time.perf_counter()
+        await self._connect(self.session_id)
+        assert self.ws is not None
+        await self.ws.send_str(json.dumps({"type": "restore_ready", "rows": rows, "cols": cols}))
+        deadline = started + timeout
+        while True:
+            message = await self._receive_message(deadline)
+            if message.type == aiohttp.WSMsgType.BINARY:
+                return time.perf_counter() - started, len(message.data)
+            if "no scrollback available" in message.data:
+                return time.perf_counter() - started, 0
+
+    async def _receive_message(self, deadline: float) -> aiohttp.WSMessage:
+        assert self.ws is not None
+        message = await self.ws.receive(timeout=max(0.01, deadline - time.perf_counter()))
+        if message.type == aiohttp.WSMsgType.TEXT:
+            self.received_bytes += len(message.data.encode("utf-8"))
+        elif message.type == aiohttp.WSMsgType.BINARY:
+            self.received_bytes += len(message.data)
+        else:
+            raise ConnectionError(f"终端 WebSocket 已关闭: {message.type!r}")
+        return message
+
+    async def _receive(self, deadline: float) -> str:
+        message = await self._receive_message(deadline)
+        if message.type == aiohttp.WSMsgType.BINARY:
+            return message.data.decode("utf-8", errors="ignore")
+        return message.data
+
+    async def send_input(self, data: str) -> int:
+        assert self.ws is not None
+        self.seq += 1
+        await self.ws.send_str(json.dumps({"type": "input", "data": data, "seq": self.seq}))
+        return self.seq
+
+    async def read_until(self, marker: str, timeout: float = 120.0) -> float:
+        """读取输出直到出现 marker（跨帧匹配），返回耗时（秒）；ack 等控制消息不计入匹配"""
+        started = time.perf_counter()
+        deadline = started + timeout
+        tail = ""
+        while True:
+            text = await self._receive(deadline)
+            if text.startswith('{"type"'):
+                continue
+            window = tail + text
+            if marker in window:
+                return time.perf_counter() - started
+            tail = window[-len(marker):]
+
+    async def drain(self, quiet: float = 0.05, timeout: float = 5.0) -> None:
+        """读取并丢弃输出，直到 quiet 秒内没有新数据"""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            try:
+                await self._receive(min(deadline, time.perf_counter() + quiet))
+            except asyncio.TimeoutError:
+                return
+
+    async def close(self) -> None:
+        if self.ws is not None:
+            await self.ws.close()
+        if self.session_id:
+            async with self.http.post(f"{self.base_url}/api/terminal/sessions/{self.session_id}/close") as response:
+                await response.read()
+
+
+class ExecutionSubscriber:
+    """/api/ws/executions 订阅者：记录每条广播的接收时间"""
+
+    def __init__(self, http: aiohttp.ClientSession, ws_url: str, client_id: str):
+        self.http = http
+        self.url = f"{ws_url}/api/ws/executions?client_id={client_id}"
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self.received: List[Tuple[float, Dict[str, Any]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self) -> None:
+        self.ws = await self.http.ws_connect(self.url, heartbeat=None)
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        assert self.ws is not None
+        async for message in self.ws:
+            if message.type != aiohttp.WSMsgType.TEXT or message.data == "pong":
+                continue
+            self.received.append((time.perf_counter(), json.loads(message.data)))
+
+    def first(self, predicate) -> Optional[float]:
+        for received_at, payload in self.received:
+            if predicate(payload):
+                return received_at
+        return None
+
+    async def close(self) -> None:
+        if self.ws is not None:
+            await self.ws.close()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def read_sse(response: aiohttp.ClientResponse) -> Tuple[Optional[float], List[Dict[str, Any]]]:
+    """读取 SSE 响应，返回 (首个事件到达时刻, 事件列表)"""
+    first_event_at = None
+    events: List[Dict[str, Any]] = []
+    async for raw in response.content:
+        line = raw.decode("utf-8").strip()
+        if not line.startswith("data:"):
+            continue
+        if first_event_at is None:
+            first_event_at = time.perf_counter()
+        try:
+            events.append(json.loads(line[5:].strip()))
+        except json.JSONDecodeError:
+            continue
+    return first_event_at, events
@@ -0,0 +1,286 @@
+"""
+合成 ~/.claude 目录树
+
+按 TreeSpec 生成与真实 Claude Code 目录结构一致的数据：
+
+- skills/<name>/SKILL.md（YAML front matter + 正文）
+- agents/<name>.md（子代理定义）
+- teams/<name>.json
+- plugins/marketplaces/<market>/plugins/<plugin>/{skills,agents}（settings.json 中启用）
+  以及 plugins/marketplace-plugins/<plugin>（插件市场扫描目录）
+- projects/<encoded-path>/<session>.jsonl 会话记录（user / assistant / tool_use / tool_result，
+  assistant 带 usage），总大小由 transcript_mb 控制，可生成 GB 级数据
+
+同一 seed 生成的目录树完全相同（包括文件修改时间的先后顺序），便于不同版本之间对比。
+"""
+from __future__ import annotations
+
+import json
+import os
+import random
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+MANIFEST_NAME = "manifest.json"
+
+# 固定的基准时间（2025-01-01 UTC），文件 mtime 从这里递增
+_BASE_MTIME = 1735689600
+
+_WORDS = (
+    "analyze refactor component service request latency cache database schema migration "
+    "endpoint websocket terminal session agent skill workflow plugin config parser token "
+    "stream buffer queue worker scheduler index query transaction commit review test "
+    "deploy metrics profile trace handler router model validate serialize render"
+).split()
+
+_TOOLS = ["Read", "Write", "Edit", "Bash", "Grep", "Glob"]
+_MODELS = ["claude-sonnet-4-5-20250929", "claude-opus-4-1-20250805", "claude-haiku-4-5-20251001"]
+MARKETPLACE = "bench-market"
+# 会话记录中的项目路径（固定值，保证不同 --root 下生成的目录树逐字节相同）
+SYNTHETIC_PROJECT_ROOT = "/home/bench/projects"
+
+
+@dataclass(frozen=True)
+class TreeSpec:
+    skills: int = 300
+    agents: int = 150
+    teams: int = 20
+    plugins: int = 10
+    plugin_skills: int = 5  # 每个插件的技能数
+    plugin_agents: int = 3  # 每个插件的子代理数
+    projects: int = 20
+    sessions_per_project: int = 10
+    transcript_mb: float = 256.0  # 所有会话 JSONL 的总大小
+    seed: int = 42
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _paragraphs(rng: random.Random, count: int) -> str:
+    return "\n\n".join(" ".join(_sentence(rng, rng.randint(8, 16)) for _ in range(4)) for _ in range(count))
+
+
+def _write(path: Path, content: str, mtime: int) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = content.encode("utf-8")
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+    return len(data)
+
+
+def _skill_md(rng: random.Random, name: str) -> str:
+    tags = sorted(rng.sample(_WORDS, 3))
+    return (
+        f"---\nname: {name}\ndescription: {_sentence(rng, 12)}\ntags: [{', '.join(tags)}]\n"
+        f"allowed-tools: {', '.join(rng.sample(_TOOLS, 3))}\n---\n\n"
+        f"# {name}\n\n{_paragraphs(rng, 4)}\n\n## Steps\n\n"
+        + "\n".join(f"{i}. {_sentence(rng, 10)}" for i in range(1, 8))
+        + "\n"
+    )
+
+
+def _agent_md(rng: random.Random, name: str) -> str:
+    return (
+        f"---\nname: {name}\ndescription: {_sentence(rng, 14)} Use proactively.\n"
+        f"tools: {', '.join(rng.sample(_TOOLS, 4))}\nmodel: {rng.choice(['sonnet', 'opus', 'haiku', 'inherit'])}\n"
+        f"---\n\nYou are a specialist in {' '.join(rng.sample(_WORDS, 3))}.\n\n{_paragraphs(rng, 3)}\n"
+    )
+
+
+class _TranscriptWriter:
+    """生成一个会话的 JSONL 记录（结构与 Claude Code 会话文件一致）"""
+
+    def __init__(self, rng: random.Random, session_id: str, cwd: str, skills: List[str], agents: List[str]):
+        self.rng = rng
+        self.session_id = session_id
+        self.cwd = cwd
+        self.skills = skills
+        self.agents = agents
+        self.parent: str | None = None
+        self.turn = 0
+
+    def _record(self, record_type: str, message: Dict[str, Any]) -> str:
+        record_id = str(uuid.UUID(int=self.rng.getrandbits(128)))
+        record = {
+            "parentUuid": self.parent,
+            "isSidechain": False,
+            "userType": "external",
+            "cwd": self.cwd,
+            "sessionId": self.session_id,
+            "version": "2.0.14",
+            "gitBranch": "main",
+            "type": record_type,
+            "message": message,
+            "uuid": record_id,
+            "timestamp": f"2025-01-01T00:{self.turn // 60 % 60:02d}:{self.turn % 60:02d}.000Z",
+        }
+        self.parent = record_id
+        self.turn += 1
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    def exchange(self) -> str:
+        """一轮对话：用户提问、assistant 调用工具、工具结果、assistant 回答"""
+        rng = self.rng
+        tool_id = f"toolu_{rng.getrandbits(64):016x}"
+        if rng.random() < 0.5 and self.skills:
+            tool_use = {"type": "tool_use", "id": tool_id, "name": "Skill", "input": {"skill": rng.choice(self.skills)}}
+        elif self.agents:
+            tool_use = {
+                "type": "tool_use", "id": tool_id, "name": "Task",
+                "input": {"subagent_type": rng.choice(self.agents), "prompt": _sentence(rng, 12)},
+            }
+        else:
+            tool_use = {"type": "tool_use", "id": tool_id, "name": "Read", "input": {"file_path": f"{self.cwd}/main.py"}}
+
+        model = rng.choice(_MODELS)
+
+        def usage() -> Dict[str, int]:
+            return {
+                "input_tokens": rng.randint(5, 2000),
+                "cache_creation_input_tokens": rng.randint(0, 5000),
+                "cache_read_input_tokens": rng.randint(1000, 120000),
+                "output_tokens": rng.randint(50, 2000),
+            }
+
+        return "".join([
+            self._record("user", {"role": "user", "content": _sentence(rng, rng.randint(10, 40))}),
+            self._record("assistant", {
+                "id": f"msg_{rng.getrandbits(64):016x}", "type": "message", "role": "assistant", "model": model,
+                "content": [{"type": "text", "text": _sentence(rng, 20)}, tool_use],
+                "stop_reason": "tool_use", "usage": usage(),
+            }),
+            self._record("user", {"role": "user", "content": [
+                {"type": "tool_result", "tool_use_id": tool_id, "content": _paragraphs(rng, rng.randint(1, 6))},
+            ]}),
+            self._record("assistant", {
+                "id": f"msg_{rng.getrandbits(64):016x}", "type": "message", "role": "assistant", "model": model,
+                "content": [{"type": "text", "text": _paragraphs(rng, rng.randint(1, 3))}],
+                "stop_reason": "end_turn", "usage": usage(),
+            }),
+        ])
+
+
+def _write_transcript(path: Path, writer: _TranscriptWriter, target_bytes: int, mtime: int) -> int:
+    """写入约 target_bytes 字节：先生成一组对话再整块循环写出，GB 级文件也只受磁盘速度限制"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pool: List[bytes] = []
+    while len(pool) < 16 and sum(map(len, pool)) < target_bytes:
+        pool.append(writer.exchange().encode("utf-8"))
+    block = b"".join(pool)
+    written = 0
+    with open(path, "wb") as f:
+        while written + len(block) <= target_bytes:
+            f.write(block)
+            written += len(block)
+        for item in pool:
+            if written >= target_bytes:
+                break
+            f.write(item)
+            written += len(item)
+    os.utime(path, (mtime, mtime))
+    return written
+
+
+def generate_tree(home: Path, spec: TreeSpec) -> Dict[str, Any]:
+    """在 home/.claude 下生成目录树并返回清单（同时写入 home/../manifest.json）"""
+    rng = random.Random(spec.seed)
+    claude_dir = home / ".claude"
+    mtime = _BASE_MTIME
+    totals = {"files": 0, "bytes": 0, "transcript_bytes": 0}
+
+    def add(size: int) -> None:
+        totals["files"] += 1
+        totals["bytes"] += size
+
+    skill_names = [f"bench-skill-{i:04d}" for i in range(spec.skills)]
+    for name in skill_names:
+        mtime += 1
+        add(_write(claude_dir / "skills" / name / "SKILL.md", _skill_md(rng, name), mtime))
+
+    agent_names = [f"bench-agent-{i:04d}" for i in range(spec.agents)]
+    for name in agent_names:
+        mtime += 1
+        add(_write(claude_dir / "agents" / f"{name}.md", _agent_md(rng, name), mtime))
+
+    for i in range(spec.teams):
+        members = rng.sample(agent_names, min(len(agent_names), 4))
+        team = {"name": f"bench-team-{i:03d}", "description": _sentence(rng, 10), "members": members, "tags": ["bench"]}
+        mtime += 1
+        add(_write(claude_dir / "teams" / f"bench-team-{i:03d}.json", json.dumps(team, indent=2), mtime))
+
+    enabled_plugins = {}
+    for i in range(spec.plugins):
+        plugin = f"bench-plugin-{i:03d}"
+        enabled_plugins[f"{plugin}@{MARKETPLACE}"] = True
+        manifest = json.dumps({"name": plugin, "version": "1.0.0", "description": _sentence(rng, 10)}, indent=2)
+        for base in (
+            claude_dir / "plugins" / "marketplaces" / MARKETPLACE / "plugins" / plugin,
+            claude_dir / "plugins" / "marketplace-plugins" / plugin,
+        ):
+            mtime += 1
+            add(_write(base / ".claude-plugin" / "plugin.json", manifest, mtime))
+            for j in range(spec.plugin_skills):
+                name = f"{plugin}-skill-{j:02d}"
+                add(_write(base / "skills" / name / "SKILL.md", _skill_md(rng, name), mtime))
+            for j in range(spec.plugin_agents):
+                name = f"{plugin}-agent-{j:02d}"
+                add(_write(base / "agents" / f"{name}.md", _agent_md(rng, name), mtime))
+
+    settings = {
+        "model": "sonnet",
+        "enabledPlugins": enabled_plugins,
+        "permissions": {"allow": ["Bash(git status)", "Read"], "deny": []},
+        "env": {"BENCH": "1"},
+    }
+    mtime += 1
+    add(_write(claude_dir / "settings.json", json.dumps(settings, indent=2), mtime))
+
+    # 会话大小按 1/(i+1) 分配：少数长会话占大部分数据；最大的会话最后写入（mtime 最新）
+    sessions = spec.projects * spec.sessions_per_project
+    weights = [1 / (i + 1) for i in range(sessions)]
+    scale = spec.transcript_mb * 1024 * 1024 / sum(weights) if sessions else 0
+    plan = []
+    for p in range(spec.projects):
+        cwd = f"{SYNTHETIC_PROJECT_ROOT}/project-{p:02d}"
+        for s in range(spec.sessions_per_project):
+            plan.append((cwd, str(uuid.UUID(int=rng.getrandbits(128)))))
+    for index, (cwd, session_id) in reversed(list(enumerate(plan))):
+        mtime += 1
+        writer = _TranscriptWriter(rng, session_id, cwd, skill_names[:50], agent_names[:50])
+        path = claude_dir / "projects" / cwd.replace("/", "-") / f"{session_id}.jsonl"
+        size = _write_transcript(path, writer, int(weights[index] * scale), mtime)
+        add(size)
+        totals["transcript_bytes"] += size
+
+    manifest = {
+        "spec": asdict(spec),
+        "home": str(home),
+        # 插件内容同时存在于 marketplaces/ 与 marketplace-plugins/ 两处
+        "skill_files": spec.skills + 2 * spec.plugins * spec.plugin_skills,
+        "agent_files": spec.agents + 2 * spec.plugins * spec.plugin_agents,
+        "teams": spec.teams,
+        "plugins": spec.plugins,
+        "sessions": sessions,
+        **totals,
+    }
+    (home.parent / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def load_or_generate(root: Path, spec: TreeSpec) -> Dict[str, Any]:
+    """root/home 已按相同 spec 生成过时直接复用（GB 级目录树只需生成一次）"""
+    manifest_path = root / MANIFEST_NAME
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("spec") == asdict(spec):
+            return manifest
+    home = root / "home"
+    if (home / ".claude").exists():
+        import shutil
+
+        shutil.rmtree(home / ".claude")
+    return generate_tree(home, spec)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+离线的 claude 可执行文件替身
+
+只依赖标准库，不导入 app。基准测试把它安装为 <root>/bin/claude，并通过
+CLAUDE_CLI_PATH 和 PATH 让后端的所有调用路径都指向它：
+
+- claude --version                                  健康检查
+- claude -p <prompt> --output-format text|json|stream-json [--session-id/--resume ID] [--model M]
+- claude skill|agent|team run <name> ...            旧版 CLI 客户端
+- claude [--agent NAME] ...（无 -p）                 交互模式：逐行读取 stdin 并流式回复（PTY / stdin 任务）
+
+输出按 token 逐块写出并 flush，模拟真实 CLI 的流式节奏。通过环境变量调节：
+
+    FAKE_CLAUDE_LATENCY      首个 token 前的延迟（秒，默认 0.2）
+    FAKE_CLAUDE_TOKENS       每次回复的 token 数（默认 200）
+    FAKE_CLAUDE_TOKEN_RATE   每秒输出的 token 数（默认 400，0 表示不限速）
+    FAKE_CLAUDE_SEED         回复内容的随机种子（默认 0，与 prompt 一起决定回复）
+    FAKE_CLAUDE_EXIT_CODE    退出码（默认 0，用于模拟失败）
+
+带 --session-id / --resume 时会像真实 CLI 一样把对话追加到
+~/.claude/projects/<cwd 编码>/<session>.jsonl。
+"""
+import json
+import os
+import random
+import sys
+import time
+import uuid
+import zlib
+
+VERSION = "2.0.14 (Claude Code)"
+
+_WORDS = (
+    "the service reads the request and returns a streamed response while the cache keeps "
+    "recent entries warm so repeated queries avoid the database and the terminal stays responsive "
+    "under load because output is batched before it is forwarded to the websocket"
+).split()
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _config():
+    return {
+        "latency": _env_float("FAKE_CLAUDE_LATENCY", 0.2),
+        "tokens": int(_env_float("FAKE_CLAUDE_TOKENS", 200)),
+        "token_rate": _env_float("FAKE_CLAUDE_TOKEN_RATE", 400),
+        "seed": int(_env_float("FAKE_CLAUDE_SEED", 0)),
+        "exit_code": int(_env_float("FAKE_CLAUDE_EXIT_CODE", 0)),
+    }
+
+
+def _tokens(prompt, config):
+    """同一 prompt + seed 总是产出相同的回复"""
+    rng = random.Random(zlib.crc32(prompt.encode("utf-8")) ^ config["seed"])
+    tokens = []
+    for index in range(config["tokens"]):
+        word = rng.choice(_WORDS)
+        if index % 24 == 23:
+            word += ".\n" if index % 96 == 95 else "."
+        tokens.append(word + ("" if word.endswith("\n") else " "))
+    return tokens
+
+
+def _stream(tokens, config, emit):
+    """首 token 延迟后按 token_rate 逐个输出"""
+    time.sleep(config["latency"])
+    interval = 1.0 / config["token_rate"] if config["token_rate"] > 0 else 0.0
+    started = time.monotonic()
+    for index, token in enumerate(tokens):
+        if interval:
+            delay = started + index * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        emit(token)
+
+
+def _usage(prompt, output):
+    return {
+        "input_tokens": max(1, len(prompt) // 4),
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0,
+        "output_tokens": max(1, len(output) // 4),
+    }
+
+
+def _append_transcript(session_id, prompt, output, model):
+    cwd = os.getcwd()
+    project_dir = os.path.join(os.path.expanduser("~"), ".claude", "projects", cwd.replace("/", "-"))
+    os.makedirs(project_dir, exist_ok=True)
+    now = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+    user_id, assistant_id = str(uuid.uuid4()), str(uuid.uuid4())
+    base = {"isSidechain": False, "userType": "external", "cwd": cwd, "sessionId": session_id, "version": VERSION.split()[0]}
+    records = [
+        {**base, "parentUuid": None, "type": "user", "uuid": user_id, "timestamp": now,
+         "message": {"role": "user", "content": prompt}},
+        {**base, "parentUuid": user_id, "type": "assistant", "uuid": assistant_id, "timestamp": now,
+         "message": {"id": f"msg_{uuid.uuid4().hex[:24]}", "type": "message", "role": "assistant", "model": model,
+                     "content": [{"type": "text", "text": output}], "stop_reason": "end_turn",
+                     "usage": _usage(prompt, output)}},
+    ]
+    with open(os.path.join(project_dir, f"{session_id}.jsonl"), "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _write(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def run_print(prompt, output_format, model, session_id, config):
+    """-p 模式：一次性回答 prompt"""
+    session_id = session_id or str(uuid.uuid4())
+    tokens = _tokens(prompt, config)
+    started = time.monotonic()
+
+    if output_format == "stream-json":
+        _write(json.dumps({"type": "system", "subtype": "init", "session_id": session_id, "model": model,
+                           "tools": ["Read", "Write", "Bash"]}) + "\n")
+        _stream(tokens, config, lambda token: _write(json.dumps({
+            "type": "stream_event", "session_id": session_id,
+            "event": {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": token}},
+        }) + "\n"))
+    elif output_format == "json":
+        _stream(tokens, config, lambda token: None)
+    else:
+        _stream(tokens, config, _write)
+
+    output = "".join(tokens).strip()
+    result = {
+        "type": "result", "subtype": "success" if config["exit_code"] == 0 else "error_during_execution",
+        "is_error": config["exit_code"] != 0, "duration_ms": int((time.monotonic() - started) * 1000),
+        "num_turns": 1, "result": output, "session_id": session_id, "total_cost_usd": 0.0,
+        "usage": _usage(prompt, output),
+    }
+    if output_format == "stream-json":
+        _write(json.dumps({"type": "assistant", "session_id": session_id, "message": {
+            "role": "assistant", "model": model, "content": [{"type": "text", "text": output}]}}) + "\n")
+        _write(json.dumps(result) + "\n")
+    elif output_format == "json":
+        _write(json.dumps(result) + "\n")
+    else:
+        _write("\n")
+    return output
+
+
+def run_interactive(config, agent=None):
+    """交互模式：每读到一行输入就流式回复一次，EOF 时退出"""
+    if agent:
+        _write(f"● Agent {agent} ready\n")
+    _write("> ")
+    for line in sys.stdin:
+        prompt = line.strip()
+        if prompt in ("/exit", "exit"):
+            break
+        if prompt:
+            _stream(_tokens(prompt, config), config, _write)
+            _write("\n")
+        _write("> ")
+
+
+def _option(args, name, default=None):
+    if name in args:
+        index = args.index(name)
+        if index + 1 < len(args):
+            return args[index + 1]
+    return default
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    config = _config()
+
+    if "--version" in args or "-v" in args:
+        _write(VERSION + "\n")
+        return 0
+
+    if args[:1] in (["skill"], ["agent"], ["team"]) and args[1:2] == ["run"]:
+        name = args[2] if len(args) > 2 else "unknown"
+        run_print(f"{args[0]} {name} {' '.join(args[3:])}", "text", "sonnet", None, config)
+        return config["exit_code"]
+
+    prompt = _option(args, "-p") or _option(args, "--print")
+    if prompt is None and ("-p" in args or "--print" in args) and not sys.stdin.isatty():
+        prompt = sys.stdin.read()
+    if prompt is not None:
+        model = _option(args, "--model", "sonnet")
+        session_id = _option(args, "--session-id") or _option(args, "--resume")
+        output = run_print(prompt, _option(args, "--output-format", "text"), model, session_id, config)
+        if session_id:
+            _append_transcript(session_id, prompt, output, model)
+        return config["exit_code"]
+
+    run_interactive(config, agent=_option(args, "--agent"))
+    return config["exit_code"]
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (BrokenPipeError, KeyboardInterrupt):
+        sys.exit(1)
@@ -0,0 +1,79 @@
+"""
+基准测试规模预设
+
+smoke    几秒内跑完，用于验证基准测试本身（CI / 提交前）
+default  笔记本上几分钟，日常性能改动对比用
+large    GB 级会话记录与更高并发，用于扫描 / 读取路径的压力测试
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict
+
+from .datagen import TreeSpec
+from .terminal import TerminalLoad
+
+
+@dataclass(frozen=True)
+class BenchProfile:
+    name: str
+    tree: TreeSpec
+    iterations: int = 50  # dashboard / token_usage 每个场景的请求数
+    concurrency: int = 8
+    sync_repeats: int = 3  # 冷同步之后的热同步次数
+    terminal: TerminalLoad = TerminalLoad()
+    fanout_subscribers: int = 50  # ConnectionManager 上限为 100
+    fanout_events: int = 20
+    execution_runs: int = 16
+    execution_concurrency: int = 4
+    fake_claude: Dict[str, str] = field(default_factory=lambda: {
+        "FAKE_CLAUDE_LATENCY": "0.2",
+        "FAKE_CLAUDE_TOKENS": "200",
+        "FAKE_CLAUDE_TOKEN_RATE": "400",
+        "FAKE_CLAUDE_SEED": "0",
+    })
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+PROFILES: Dict[str, BenchProfile] = {
+    "smoke": BenchProfile(
+        name="smoke",
+        tree=TreeSpec(skills=20, agents=10, teams=3, plugins=2, projects=3, sessions_per_project=3, transcript_mb=2),
+        iterations=5,
+        concurrency=2,
+        sync_repeats=1,
+        terminal=TerminalLoad(sessions=3, bytes_per_session=256 * 1024, keystrokes=50),
+        fanout_subscribers=5,
+        fanout_events=3,
+        execution_runs=3,
+        execution_concurrency=2,
+        fake_claude={
+            "FAKE_CLAUDE_LATENCY": "0.05",
+            "FAKE_CLAUDE_TOKENS": "50",
+            "FAKE_CLAUDE_TOKEN_RATE": "1000",
+            "FAKE_CLAUDE_SEED": "0",
+        },
+    ),
+    "default": BenchProfile(name="default", tree=TreeSpec()),
+    "large": BenchProfile(
+        name="large",
+        tree=TreeSpec(skills=2000, agents=800, teams=100, plugins=40, projects=60, sessions_per_project=30,
+                      transcript_mb=4096),
+        iterations=100,
+        concurrency=16,
+        terminal=TerminalLoad(sessions=24, bytes_per_session=4 * 1024 * 1024, keystrokes=500),
+        fanout_subscribers=90,
+        fanout_events=50,
+        execution_runs=64,
+        execution_concurrency=16,
+    ),
+}
+
+
+def get_profile(name: str, **overrides: Any) -> BenchProfile:
+    if name not in PROFILES:
+        raise KeyError(f"未知的规模预设: {name}（可选: {', '.join(PROFILES)}）")
+    profile = PROFILES[name]
+    return replace(profile, **{key: value for key, value in overrides.items() if value is not None})
@@ -0,0 +1,133 @@
+"""
+统计汇总、结果文件与回归对比
+
+结果文件是一个 JSON 对象：environment / profile / tree / fake_claude / scenarios。
+每个场景都有一个 headline 字典，compare 只比较 headline 中的指标：
+名称以 _per_s 结尾的指标越大越好，其余（延迟、CPU、内存）越小越好。
+"""
+from __future__ import annotations
+
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from .server import BACKEND_DIR
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize_ms(seconds: Iterable[float]) -> Dict[str, float]:
+    """秒级耗时列表 -> 毫秒分位数"""
+    values = [value * 1000 for value in seconds]
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 2),
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+        "max_ms": round(max(values), 2),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, timeout=5,
+        )
+        if output.returncode != 0:
+            return None
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip()
+        return output.stdout.strip() + ("-dirty" if dirty else "")
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "implementation": sys.implementation.name,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: Path, results: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_s")
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.15
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    对比两个结果文件的 headline 指标
+
+    Returns:
+        (rows, regressed)：rows 为每个指标的对比，regressed 表示是否有指标变差超过阈值
+    """
+    rows = []
+    regressed = False
+    for scenario, result in current.get("scenarios", {}).items():
+        base_headline = baseline.get("scenarios", {}).get(scenario, {}).get("headline", {})
+        for metric, value in result.get("headline", {}).items():
+            base = base_headline.get(metric)
+            if not isinstance(base, (int, float)) or not isinstance(value, (int, float)):
+                continue
+            if base:
+                change = (value - base) / base
+            else:
+                # 基线为 0（例如 missed）时任何增加都按 100% 计
+                change = 0.0 if value == base else (1.0 if value > base else -1.0)
+            worse = -change if higher_is_better(metric) else change
+            status = "regression" if worse > threshold else "improvement" if worse < -threshold else "ok"
+            regressed = regressed or status == "regression"
+            rows.append({
+                "scenario": scenario, "metric": metric, "baseline": base, "current": value,
+                "change": round(change, 4), "status": status,
+            })
+    return rows, regressed
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'scenario':<18} {'metric':<28} {'baseline':>12} {'current':>12} {'change':>8}  status"]
+    for row in rows:
+        lines.append(
+            f"{row['scenario']:<18} {row['metric']:<28} {row['baseline']:>12.2f} {row['current']:>12.2f} "
+            f"{row['change'] * 100:>+7.1f}%  {row['status']}"
+        )
+    return "\n".join(lines)
+
+
+def format_headlines(results: Dict[str, Any]) -> str:
+    lines = []
+    for scenario, result in results.get("scenarios", {}).items():
+        if "error" in result:
+            lines.append(f"{scenario:<18} ERROR {result['error']}")
+            continue
+        metrics = "  ".join(f"{key}={value}" for key, value in result.get("headline", {}).items())
+        lines.append(f"{scenario:<18} {metrics}")
+    return "\n".join(lines)
@@ -0,0 +1,258 @@
+"""
+场景驱动
+
+每个场景是一个 async 函数 (ctx) -> dict，返回值必须包含 headline（用于回归对比的关键指标），
+其余字段是明细。run_scenarios 负责统计每个场景期间服务进程树的 CPU 时间和峰值 RSS。
+
+- sync              POST /api/claude/sync 冷 / 热同步，POST /api/plugins/scan
+- dashboard         GET /api/dashboard/stats（读取最近的会话记录）
+- token_usage       GET /api/token-usage（扫描 projects/**/*.jsonl）
+- terminal          终端 WebSocket 吞吐、按键回显延迟、重连回放（见 terminal.py）
+- websocket_fanout  /api/ws/executions 订阅者收到终端执行广播的延迟与完整性
+- execution         并发 POST /api/agents/{id}/test-stream（fake claude 流式输出）的端到端耗时
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List
+
+import aiohttp
+
+from .clients import ExecutionSubscriber, TerminalClient, read_sse, run_load
+from .profiles import BenchProfile
+from .results import summarize_ms
+from .server import BenchServer
+from .terminal import run_terminal_load
+
+@dataclass
+class BenchContext:
+    server: BenchServer
+    profile: BenchProfile
+    http: aiohttp.ClientSession
+    manifest: Dict[str, Any]
+
+    def url(self, path: str) -> str:
+        return f"{self.server.base_url}{path}"
+
+
+Scenario = Callable[[BenchContext], Awaitable[Dict[str, Any]]]
+SCENARIOS: Dict[str, Scenario] = {}
+
+
+def scenario(name: str):
+    def decorator(func: Scenario) -> Scenario:
+        SCENARIOS[name] = func
+        return func
+    return decorator
+
+
+async def _timed_post(ctx: BenchContext, path: str) -> tuple[float, Any]:
+    started = time.perf_counter()
+    async with ctx.http.post(ctx.url(path)) as response:
+        body = await response.json()
+        response.raise_for_status()
+    return time.perf_counter() - started, body
+
+
+async def ensure_synced(ctx: BenchContext) -> None:
+    """未选 sync 场景时也需要把技能 / 子代理同步进数据库（不计时）"""
+    await _timed_post(ctx, "/api/claude/sync")
+
+
+@scenario("sync")
+async def sync_scenario(ctx: BenchContext) -> Dict[str, Any]:
+    cold, body = await _timed_post(ctx, "/api/claude/sync")
+    warm = [(await _timed_post(ctx, "/api/claude/sync"))[0] for _ in range(ctx.profile.sync_repeats)]
+    plugin_scans = [(await _timed_post(ctx, "/api/plugins/scan"))[0] for _ in range(ctx.profile.sync_repeats + 1)]
+    warm_summary = summarize_ms(warm)
+    plugin_summary = summarize_ms(plugin_scans)
+    return {
+        "headline": {
+            "cold_ms": round(cold * 1000, 2),
+            "warm_p50_ms": warm_summary.get("p50_ms", 0.0),
+            "plugin_scan_p50_ms": plugin_summary.get("p50_ms", 0.0),
+        },
+        "cold_ms": round(cold * 1000, 2),
+        "warm": warm_summary,
+        "plugin_scan": plugin_summary,
+        "synced": {
+            key: {**(body.get(key) or {}), "errors": len((body.get(key) or {}).get("errors") or [])}
+            for key in ("skills", "agents", "agent_teams")
+        },
+    }
+
+
+async def _load_scenario(ctx: BenchContext, path: str) -> Dict[str, Any]:
+    # 先单独请求一次，记录冷缓存耗时，再做并发压测
+    first, first_errors, _ = await run_load(ctx.http, "GET", ctx.url(path), 1, 1)
+    latencies, errors, elapsed = await run_load(
+        ctx.http, "GET", ctx.url(path), ctx.profile.iterations, ctx.profile.concurrency
+    )
+    summary = summarize_ms(latencies)
+    return {
+        "headline": {
+            "first_ms": round(first[0] * 1000, 2) if first else 0.0,
+            "p50_ms": summary.get("p50_ms", 0.0),
+            "p99_ms": summary.get("p99_ms", 0.0),
+            "requests_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        },
+        "latency": summary,
+        "errors": errors + first_errors,
+        "concurrency": ctx.profile.concurrency,
+    }
+
+
+@scenario("dashboard")
+async def dashboard_scenario(ctx: BenchContext) -> Dict[str, Any]:
+    return await _load_scenario(ctx, "/api/dashboard/stats")
+
+
+@scenario("token_usage")
+async def token_usage_scenario(ctx: BenchContext) -> Dict[str, Any]:
+    return await _load_scenario(ctx, "/api/token-usage")
+
+
+@scenario("terminal")
+async def terminal_scenario(ctx: BenchContext) -> Dict[str, Any]:
+    return await run_terminal_load(
+        ctx.http, ctx.server.base_url, ctx.server.ws_url, ctx.profile.terminal, ctx.server.sampler
+    )
+
+
+@scenario("websocket_fanout")
+async def websocket_fanout_scenario(ctx: BenchContext) -> Dict[str, Any]:
+    """每个事件：打开一个终端会话再关闭，关闭时的 cancelled 广播应送达每个订阅者"""
+    profile = ctx.profile
+    subscribers = [
+        ExecutionSubscriber(ctx.http, ctx.server.ws_url, f"bench-{index}") for index in range(profile.fanout_subscribers)
+    ]
+    await asyncio.gather(*(subscriber.connect() for subscriber in subscribers))
+    delays: List[float] = []
+    spreads: List[float] = []
+    missed = 0
+    try:
+        for _ in range(profile.fanout_events):
+            client = TerminalClient(ctx.http, ctx.server.base_url, ctx.server.ws_url)
+            await client.open()
+            session_id = client.session_id
+            sent_at = time.perf_counter()
+            await client.close()
+
+            def matches(payload: Dict[str, Any]) -> bool:
+                data = payload.get("data") or {}
+                return data.get("session_id") == session_id and data.get("status") == "cancelled"
+
+            deadline = time.monotonic() + 5.0
+            arrivals: List[float] = []
+            while time.monotonic() < deadline:
+                arrivals = [at for at in (subscriber.first(matches) for subscriber in subscribers) if at is not None]
+                if len(arrivals) == len(subscribers):
+                    break
+                await asyncio.sleep(0.01)
+            missed += len(subscribers) - len(arrivals)
+            delays.extend(at - sent_at for at in arrivals)
+            if arrivals:
+                spreads.append(max(arrivals) - min(arrivals))
+    finally:
+        await asyncio.gather(*(subscriber.close() for subscriber in subscribers), return_exceptions=True)
+
+    delay_summary = summarize_ms(delays)
+    return {
+        "headline": {
+            "delivery_p50_ms": delay_summary.get("p50_ms", 0.0),
+            "delivery_p99_ms": delay_summary.get("p99_ms", 0.0),
+            "spread_p50_ms": summarize_ms(spreads).get("p50_ms", 0.0),
+            "missed": missed,
+        },
+        "subscribers": len(subscribers),
+        "events": profile.fanout_events,
+        "delivery": delay_summary,
+        "spread": summarize_ms(spreads),
+    }
+
+
+@scenario("execution")
+async def execution_scenario(ctx: BenchContext) -> Dict[str, Any]:
+    """
+    子代理测试执行：后端启动 fake claude、流式转发为 SSE 并持久化消息与执行状态
+
+    工作流 DAG 执行（/api/executions/{task_id}/start）在当前代码中无法运行，
+    这里用同样经过子进程 + 流式输出 + 执行记录写入的子代理测试路径代替。
+    """
+    profile = ctx.profile
+    async with ctx.http.get(ctx.url("/api/agents"), params={"limit": 1}) as response:
+        response.raise_for_status()
+        agents = (await response.json())["items"]
+    if not agents:
+        raise RuntimeError("数据库中没有子代理，无法运行 execution 场景")
+    agent_id = agents[0]["id"]
+
+    first_events: List[float] = []
+    totals: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(profile.execution_concurrency)
+
+    async def run(index: int) -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            async with ctx.http.post(
+                ctx.url(f"/api/agents/{agent_id}/test-stream"), params={"prompt": f"benchmark prompt {index}"}
+            ) as response:
+                first_event_at, events = await read_sse(response)
+            totals.append(time.perf_counter() - started)
+            if first_event_at is not None:
+                first_events.append(first_event_at - started)
+            complete = next((event for event in events if event.get("type") == "complete"), None)
+            if not complete or not complete["data"].get("success"):
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(index) for index in range(profile.execution_runs)))
+    wall = time.perf_counter() - started
+
+    # fake claude 自身耗时（首 token 延迟 + 按速率输出），从端到端耗时中扣除即为后端开销
+    fake = profile.fake_claude
+    rate = float(fake["FAKE_CLAUDE_TOKEN_RATE"])
+    nominal = float(fake["FAKE_CLAUDE_LATENCY"]) + (int(fake["FAKE_CLAUDE_TOKENS"]) / rate if rate > 0 else 0.0)
+    total_summary = summarize_ms(totals)
+    return {
+        "headline": {
+            "first_event_p50_ms": summarize_ms(first_events).get("p50_ms", 0.0),
+            "total_p50_ms": total_summary.get("p50_ms", 0.0),
+            "overhead_p50_ms": round(max(0.0, total_summary.get("p50_ms", 0.0) - nominal * 1000), 2),
+            "runs_per_s": round(len(totals) / wall, 2) if wall else 0.0,
+        },
+        "runs": profile.execution_runs,
+        "concurrency": profile.execution_concurrency,
+        "failures": failures,
+        "fake_claude_nominal_ms": round(nominal * 1000, 2),
+        "first_event": summarize_ms(first_events),
+        "total": total_summary,
+    }
+
+
+async def run_scenarios(ctx: BenchContext, names: List[str]) -> Dict[str, Dict[str, Any]]:
+    """按顺序运行场景；单个场景失败只记录错误，不影响其余场景"""
+    results: Dict[str, Dict[str, Any]] = {}
+    sampler = ctx.server.sampler
+    if "sync" not in names:
+        await ensure_synced(ctx)
+    for name in names:
+        print(f"[bench] {name} ...", flush=True)
+        cpu_before = sampler.cpu_seconds() if sampler else 0.0
+        if sampler:
+            sampler.peak_rss = sampler.rss()
+        started = time.perf_counter()
+        try:
+            result = await SCENARIOS[name](ctx)
+        except Exception as exc:  # noqa: BLE001 - 记录到结果文件
+            result = {"error": f"{type(exc).__name__}: {exc}", "headline": {}}
+        result["wall_s"] = round(time.perf_counter() - started, 3)
+        if sampler:
+            result["server_cpu_s"] = round(sampler.cpu_seconds() - cpu_before, 3)
+            result["server_peak_rss_mb"] = round(sampler.peak_rss / 2**20, 1)
+        results[name] = result
+    return results
@@ -0,0 +1,227 @@
+"""
+在隔离环境中启动被测后端
+
+每次运行都用独立的 HOME（合成的 ~/.claude）、SQLite 数据库、协调目录和工作目录，
+CLAUDE_CLI_PATH 与 PATH 都指向 fake_claude，因此不会读写开发者本机的任何数据，也不需要网络。
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import socket
+import stat
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, Optional
+
+import psutil
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+FAKE_CLAUDE = Path(__file__).resolve().parent / "fake_claude.py"
+
+# 按当前模型建表并标记为 alembic head：全新数据库只跑迁移时部分表缺少模型中的列
+# （例如 agents.tools），会让被测接口直接 500
+_PREPARE_DB = """
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine
+
+import app.models  # noqa: F401
+from app.config.settings import settings
+from app.core.database import Base
+from app.database.migration import get_alembic_config
+
+engine = create_engine(settings.database_url.replace("+aiosqlite", ""))
+Base.metadata.create_all(engine)
+with engine.begin() as conn:
+    MigrationContext.configure(conn).stamp(ScriptDirectory.from_config(get_alembic_config()), "head")
+engine.dispose()
+"""
+
+
+def install_fake_claude(root: Path) -> Path:
+    """把 fake_claude 安装为 root/bin/claude（PTY 会话通过 PATH 查找 claude）"""
+    bin_dir = root / "bin"
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    target = bin_dir / "claude"
+    source = FAKE_CLAUDE.read_text(encoding="utf-8")
+    # 使用当前解释器，保证 venv / conda 环境下行为一致
+    target.write_text(source.replace("#!/usr/bin/env python3", f"#!{sys.executable}", 1), encoding="utf-8")
+    target.chmod(target.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return target
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ResourceSampler:
+    """后台线程定期采样服务进程（含子进程）的 CPU 时间与 RSS"""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _tree(self):
+        try:
+            return [self.process] + self.process.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def cpu_seconds(self) -> float:
+        total = 0.0
+        for proc in self._tree():
+            try:
+                times = proc.cpu_times()
+                total += times.user + times.system + times.children_user + times.children_system
+            except psutil.NoSuchProcess:
+                continue
+        return total
+
+    def server_cpu_seconds(self) -> float:
+        """只统计服务进程本身（不含 PTY shell 等子进程）"""
+        try:
+            times = self.process.cpu_times()
+            return times.user + times.system
+        except psutil.NoSuchProcess:
+            return 0.0
+
+    def rss(self) -> int:
+        total = 0
+        for proc in self._tree():
+            try:
+                total += proc.memory_info().rss
+            except psutil.NoSuchProcess:
+                continue
+        return total
+
+    def server_rss(self) -> int:
+        try:
+            return self.process.memory_info().rss
+        except psutil.NoSuchProcess:
+            return 0
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self.rss())
+
+    def start(self) -> None:
+        self.peak_rss = self.rss()
+        self._thread = threading.Thread(target=self._run, name="bench-resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+
+class BenchServer:
+    """uvicorn 子进程；用作上下文管理器"""
+
+    def __init__(self, root: Path, fake_claude_env: Dict[str, str], extra_env: Optional[Dict[str, str]] = None):
+        self.root = root
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.ws_url = f"ws://127.0.0.1:{self.port}"
+        self.fake_claude_env = fake_claude_env
+        self.extra_env = extra_env or {}
+        self.process: Optional[subprocess.Popen] = None
+        self.sampler: Optional[ResourceSampler] = None
+        self.log_path = root / "server.log"
+
+    def _env(self) -> Dict[str, str]:
+        home = self.root / "home"
+        cli = install_fake_claude(self.root)
+        env = {
+            key: value for key, value in os.environ.items()
+            if not key.startswith(("CLAUDE", "ANTHROPIC", "DATABASE_", "ACCESS_", "COORDINATION_"))
+        }
+        env.update({
+            "HOME": str(home),
+            "PATH": f"{cli.parent}{os.pathsep}{env.get('PATH', '')}",
+            "DATABASE_URL": f"sqlite+aiosqlite:///{self.root / 'bench.db'}",
+            "CLAUDE_CLI_PATH": str(cli),
+            "COORDINATION_DIR": str(self.root / "coordination"),
+            "SHELL": "/bin/bash",
+            "PYTHONUNBUFFERED": "1",
+        })
+        env.update(self.fake_claude_env)
+        env.update(self.extra_env)
+        return env
+
+    def start(self, timeout: float = 60.0) -> "BenchServer":
+        for stale in ("bench.db", "bench.db-wal", "bench.db-shm"):
+            (self.root / stale).unlink(missing_ok=True)
+        shutil.rmtree(self.root / "coordination", ignore_errors=True)
+        env = self._env()
+        subprocess.run(
+            [sys.executable, "-c", _PREPARE_DB], cwd=self.root, check=True,
+            env={**env, "PYTHONPATH": str(BACKEND_DIR)}, capture_output=True,
+        )
+        log = open(self.log_path, "wb")
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--app-dir", str(BACKEND_DIR),
+                "--host", "127.0.0.1", "--port", str(self.port),
+                "--log-level", "warning",
+            ],
+            cwd=self.root,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        log.close()
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"后端启动失败（退出码 {self.process.returncode}），日志见 {self.log_path}")
+            try:
+                with urllib.request.urlopen(f"{self.base_url}/api/system/health", timeout=1.0):
+                    self.sampler = ResourceSampler(self.process.pid)
+                    self.sampler.start()
+                    return self
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"后端 {timeout}s 内未就绪，日志见 {self.log_path}")
+
+    def stop(self) -> None:
+        if self.sampler:
+            self.sampler.stop()
+        if self.process and self.process.poll() is None:
+            # 先结束子进程（PTY shell、fake claude），再结束服务本身
+            try:
+                children = psutil.Process(self.process.pid).children(recursive=True)
+            except psutil.NoSuchProcess:
+                children = []
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            for child in children:
+                try:
+                    child.kill()
+                except psutil.NoSuchProcess:
+                    pass
+
+    def __enter__(self) -> "BenchServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,200 @@
+"""
+终端 WebSocket 吞吐 / 延迟压测
+
+同时打开 N 个终端会话（/api/terminal/ws?use_tmux=false），按轮转给每个会话分配一种确定性负载：
+
+- bulk   纯文本大批量输出（yes | head -c N）
+- ansi   TUI 风格输出：SGR 颜色、256 色、反显、清行、光标上下移动、多字节字符
+- echo   逐个发送按键，测量按键回显往返时间（与其余会话的大输出同时进行，即负载下的交互延迟）
+
+输出类负载结束后，每个会话断开并按 session_id 重连、发送 restore_ready，测量 scrollback 回放耗时。
+全程记录服务进程的 CPU 时间与 RSS，换算为每会话开销。
+
+覆盖 read_from_pty（PTY 读取与转发）、save_output（scrollback 缓冲）和重连回放路径；
+纯 Python、无浏览器，可在 CI 等无界面环境运行。
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from .clients import TerminalClient
+from .results import summarize_ms
+from .server import ResourceSampler
+
+GENERATORS = ("bulk", "ansi", "echo")
+DONE_MARKER = "__BENCH_DONE__"
+READY_MARKER = "__BENCH_READY__"
+
+# 回显测试使用的按键：不含数字和常见提示符字符，避免误匹配提示符重绘
+ECHO_KEYS = "qwertyuiopzxcvbnm"
+ECHO_LINE_LIMIT = 64  # 每输入这么多个字符用 Ctrl-U 清空一次当前行
+
+_BULK_LINE = "the quick brown fox jumps over the lazy dog 0123456789"
+# $'...' 由 shell 解释转义：清行、颜色、256 色、反显、进度条、光标上移 / 下移
+_ANSI_LINE = (
+    r"\e[2K\r\e[1;32m✔\e[0m \e[38;5;208mbuilding\e[0m \e[7m 42% \e[27m "
+    r"\e[90m[=====>    ]\e[0m \e[1;34m│\e[0m src/app/main.py\e[1A\e[1B"
+)
+
+
+@dataclass(frozen=True)
+class TerminalLoad:
+    sessions: int = 6
+    bytes_per_session: int = 1024 * 1024  # bulk / ansi 会话的输出字节数
+    generators: Tuple[str, ...] = GENERATORS
+    keystrokes: int = 200  # 每个 echo 会话的按键数
+    keystroke_interval: float = 0.01  # 按键间隔（秒）
+    restore: bool = True
+
+    def assignments(self) -> List[str]:
+        return [self.generators[index % len(self.generators)] for index in range(self.sessions)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _output_command(generator: str, size: int) -> str:
+    # printf 拼出结束标记，避免回显的命令行本身匹配到标记
+    line = f"'{_BULK_LINE}'" if generator == "bulk" else f"$'{_ANSI_LINE}'"
+    return f"yes {line} | head -c {size}; printf '\\n__BENCH_%s__\\n' DONE\r"
+
+
+async def _run_output(client: TerminalClient, generator: str, size: int, timeout: float) -> Dict[str, Any]:
+    client.received_bytes = 0
+    await client.send_input(_output_command(generator, size))
+    duration = await client.read_until(DONE_MARKER, timeout=timeout)
+    return {"generator": generator, "duration": duration, "bytes": size, "received_bytes": client.received_bytes}
+
+
+async def _run_echo(client: TerminalClient, keystrokes: int, interval: float) -> Dict[str, Any]:
+    rtts: List[float] = []
+    for index in range(keystrokes):
+        key = ECHO_KEYS[index % len(ECHO_KEYS)]
+        started = time.perf_counter()
+        await client.send_input(key)
+        await client.read_until(key, timeout=10.0)
+        rtts.append(time.perf_counter() - started)
+        if index % ECHO_LINE_LIMIT == ECHO_LINE_LIMIT - 1:
+            await client.send_input("\x15")
+            await client.drain()
+        elif interval:
+            await asyncio.sleep(interval)
+    await client.send_input("\x15")
+    await client.drain()
+    return {"generator": "echo", "rtts": rtts}
+
+
+async def _wait_ready(client: TerminalClient) -> None:
+    """等 shell 初始化完成并丢弃登录输出，保证后续测量只包含负载本身"""
+    await client.send_input("printf '__BENCH_%s__\\n' READY\r")
+    await client.read_until(READY_MARKER, timeout=30.0)
+    await client.drain()
+
+
+async def run_terminal_load(
+    http: aiohttp.ClientSession,
+    base_url: str,
+    ws_url: str,
+    load: TerminalLoad,
+    sampler: Optional[ResourceSampler] = None,
+) -> Dict[str, Any]:
+    """运行一轮终端压测，返回带 headline 的结果字典"""
+    unknown = [generator for generator in load.generators if generator not in GENERATORS]
+    if unknown:
+        raise ValueError(f"未知的终端负载: {', '.join(unknown)}（可选: {', '.join(GENERATORS)}）")
+
+    assignments = load.assignments()
+    output_sessions = sum(generator != "echo" for generator in assignments)
+    # 按最低 16 KiB/s 的总吞吐留出超时，避免慢路径被误判为卡死
+    timeout = max(120.0, load.bytes_per_session * output_sessions / 16384)
+    clients = [TerminalClient(http, base_url, ws_url) for _ in assignments]
+
+    rss_before = sampler.rss() if sampler else 0
+    server_rss_before = sampler.server_rss() if sampler else 0
+    try:
+        setup = await asyncio.gather(*(client.open() for client in clients))
+        await asyncio.gather(*(_wait_ready(client) for client in clients))
+        rss_idle = sampler.rss() if sampler else 0
+
+        cpu_before = sampler.server_cpu_seconds() if sampler else 0.0
+        tree_cpu_before = sampler.cpu_seconds() if sampler else 0.0
+        if sampler:
+            sampler.peak_rss = sampler.rss()
+        started = time.perf_counter()
+        runs = await asyncio.gather(*(
+            _run_echo(client, load.keystrokes, load.keystroke_interval) if generator == "echo"
+            else _run_output(client, generator, load.bytes_per_session, timeout)
+            for client, generator in zip(clients, assignments)
+        ))
+        wall = time.perf_counter() - started
+        server_cpu = (sampler.server_cpu_seconds() - cpu_before) if sampler else None
+        tree_cpu = (sampler.cpu_seconds() - tree_cpu_before) if sampler else None
+        peak_rss = sampler.peak_rss if sampler else 0
+        server_rss_after = sampler.server_rss() if sampler else 0
+
+        restores: List[Tuple[float, int]] = []
+        if load.restore:
+            restores = list(await asyncio.gather(*(client.reconnect() for client in clients)))
+    finally:
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+    generators: Dict[str, Dict[str, Any]] = {}
+    headline: Dict[str, float] = {"setup_p50_ms": summarize_ms(setup).get("p50_ms", 0.0)}
+    for generator in ("bulk", "ansi"):
+        outputs = [run for run in runs if run["generator"] == generator]
+        if not outputs:
+            continue
+        total_bytes = sum(run["bytes"] for run in outputs)
+        slowest = max(run["duration"] for run in outputs)
+        generators[generator] = {
+            "sessions": len(outputs),
+            "bytes": total_bytes,
+            "received_bytes": sum(run["received_bytes"] for run in outputs),
+            "duration": summarize_ms(run["duration"] for run in outputs),
+            "session_mb_per_s": round(min(run["bytes"] / run["duration"] for run in outputs) / 2**20, 3),
+        }
+        headline[f"{generator}_mb_per_s"] = round(total_bytes / slowest / 2**20, 3)
+
+    rtts = [rtt for run in runs if run["generator"] == "echo" for rtt in run["rtts"]]
+    if rtts:
+        echo = summarize_ms(rtts)
+        generators["echo"] = {"sessions": assignments.count("echo"), "rtt": echo}
+        headline["echo_p50_ms"] = echo["p50_ms"]
+        headline["echo_p99_ms"] = echo["p99_ms"]
+
+    result: Dict[str, Any] = {
+        "load": load.to_dict(),
+        "setup": summarize_ms(setup),
+        "load_wall_s": round(wall, 3),
+        "generators": generators,
+    }
+    if restores:
+        restore = summarize_ms(seconds for seconds, _ in restores)
+        result["restore"] = {**restore, "replayed_bytes": sum(size for _, size in restores)}
+        headline["restore_p50_ms"] = restore["p50_ms"]
+
+    if sampler:
+        sessions = len(clients)
+        output_mb = sum(g.get("bytes", 0) for g in generators.values()) / 2**20
+        result["resources"] = {
+            "server_cpu_s": round(server_cpu, 3),
+            "tree_cpu_s": round(tree_cpu, 3),
+            "cpu_s_per_session": round(server_cpu / sessions, 3),
+            "cpu_ms_per_mb": round(server_cpu * 1000 / output_mb, 2) if output_mb else None,
+            "rss_before_mb": round(rss_before / 2**20, 1),
+            "rss_idle_mb": round(rss_idle / 2**20, 1),
+            "rss_peak_mb": round(peak_rss / 2**20, 1),
+            # 会话 shell 进程 + 服务端每会话状态（scrollback 等），按进程树统计
+            "rss_mb_per_session": round((peak_rss - rss_before) / sessions / 2**20, 2),
+            "server_rss_growth_mb": round((server_rss_after - server_rss_before) / 2**20, 2),
+        }
+        headline["cpu_s_per_session"] = result["resources"]["cpu_s_per_session"]
+        headline["rss_mb_per_session"] = result["resources"]["rss_mb_per_session"]
+
+    result["headline"] = headline
+    return result
@@ -5,6 +5,10 @@ Open Adventure - Packaged Entry Point
 """
 import sys
 import os
+import time
+
+# 记录进程启动时间，供后端启动耗时报告使用
+os.environ.setdefault("OPEN_ADVENTURE_START_TIME", str(time.time()))
 
 # 禁用 Python 输出缓冲
 os.environ["PYTHONUNBUFFERED"] = "1"
@@ -16,7 +20,6 @@ from pathlib import Path
 import uvicorn
 import webbrowser
 import threading
-import time
 
 # 设置资源路径（PyInstaller 打包后的临时目录）
 if getattr(sys, 'frozen', False):
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+SQLite 混合读写基准：默认配置（NullPool + 默认日志模式 + 各自提交）
+对比性能配置（WAL + pragma + 读连接池 + 串行批量写队列）
+
+在临时数据库上模拟多个并发写入者（更新 Execution 活动时间并追加一条聊天消息）
+和读取者（按 id 查询、统计消息数），输出写吞吐、写/读延迟分位数和锁错误数。
+
+用法：
+    python scripts/bench_sqlite_writes.py --writers 32 --readers 8 --ops 30
+    python scripts/bench_sqlite_writes.py --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, select, update  # noqa: E402
+
+from app.core.database import Base, create_db_engine, create_session_factory  # noqa: E402
+from app.core.db_writer import WriteQueue  # noqa: E402
+import app.models  # noqa: E402,F401  注册全部模型
+from app.models.execution_message import ExecutionMessage  # noqa: E402
+from app.models.task import Execution, ExecutionType  # noqa: E402
+
+SEED_EXECUTIONS = 200
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _write(db, execution_id, seq):
+    await db.execute(
+        update(Execution)
+        .where(Execution.id == execution_id)
+        .values(last_activity_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.add(ExecutionMessage(execution_id=execution_id, seq=seq, role="agent", content="x" * 200))
+    await db.flush()
+
+
+async def run_profile(name, tuned, args):
+    tmpdir = tempfile.mkdtemp(prefix="bench_sqlite_")
+    url = f"sqlite+aiosqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    engine = create_db_engine(url, sqlite_profile=tuned)
+    sessions = create_session_factory(engine)
+    writer_engine = None
+    queue = None
+    if tuned:
+        writer_engine = create_db_engine(url, sqlite_profile=True, writer=True)
+        queue = WriteQueue(create_session_factory(writer_engine))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessions() as db:
+        db.add_all(
+            Execution(execution_type=ExecutionType.AGENT_TEST, session_id=f"s{i}")
+            for i in range(SEED_EXECUTIONS)
+        )
+        await db.commit()
+
+    write_latencies, read_latencies = [], []
+    errors = 0
+
+    async def writer(worker_id):
+        nonlocal errors
+        for op in range(args.ops):
+            execution_id = (worker_id * args.ops + op) % SEED_EXECUTIONS + 1
+            seq = worker_id * args.ops + op
+            started = time.perf_counter()
+            try:
+                if queue is not None:
+                    await queue.submit(lambda db: _write(db, execution_id, seq))
+                else:
+                    async with sessions() as db:
+                        await _write(db, execution_id, seq)
+                        await db.commit()
+            except Exception:
+                errors += 1
+                continue
+            write_latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+
+    async def reader(worker_id):
+        nonlocal errors
+        i = worker_id
+        while not stop.is_set():
+            i += 1
+            started = time.perf_counter()
+            try:
+                async with sessions() as db:
+                    await db.execute(select(Execution).where(Execution.id == i % SEED_EXECUTIONS + 1))
+                    await db.execute(
+                        select(func.count()).where(ExecutionMessage.execution_id == i % SEED_EXECUTIONS + 1)
+                    )
+            except Exception:
+                errors += 1
+                continue
+            read_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(args.read_interval)
+
+    readers = [asyncio.create_task(reader(i)) for i in range(args.readers)]
+    started = time.perf_counter()
+    await asyncio.gather(*(writer(i) for i in range(args.writers)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await asyncio.gather(*readers)
+
+    if queue is not None:
+        await queue.close()
+        await writer_engine.dispose()
+    await engine.dispose()
+
+    return {
+        "profile": name,
+        "writes": len(write_latencies),
+        "write_ops_per_s": round(len(write_latencies) / elapsed, 1),
+        "write_p50_ms": round(_percentile(write_latencies, 50) * 1000, 2),
+        "write_p99_ms": round(_percentile(write_latencies, 99) * 1000, 2),
+        "reads": len(read_latencies),
+        "read_p99_ms": round(_percentile(read_latencies, 99) * 1000, 2),
+        "errors": errors,
+        "transactions": queue.batches if queue is not None else len(write_latencies),
+        "elapsed_s": round(elapsed, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="SQLite 混合读写基准")
+    parser.add_argument("--writers", type=int, default=32, help="并发写入者数量")
+    parser.add_argument("--readers", type=int, default=8, help="并发读取者数量")
+    parser.add_argument("--ops", type=int, default=50, help="每个写入者的写操作数")
+    parser.add_argument("--read-interval", type=float, default=0.05, help="读取者两次查询之间的间隔（秒）")
+    parser.add_argument("--json", help="结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    results = [
+        await run_profile("default", False, args),
+        await run_profile("wal+write-queue", True, args),
+    ]
+
+    columns = list(results[0].keys())
+    print("  ".join(f"{c:>16}" for c in columns))
+    for row in results:
+        print("  ".join(f"{str(row[c]):>16}" for c in columns))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -15,6 +15,11 @@ fi
 echo "📊 Initializing database..."
 bash /app/scripts/init_db.sh
 
+# 多个 worker 时启用共享协调层（跨 worker 广播与会话粘性路由）
+if [ "${WORKERS:-4}" -gt 1 ]; then
+    export COORDINATION_BACKEND="${COORDINATION_BACKEND:-sqlite}"
+fi
+
 # Start Uvicorn in production mode
 echo "✅ Starting FastAPI server..."
 echo "📍 Server: http://0.0.0.0:${PORT:-8000}"
@@ -0,0 +1,3 @@
+"""
+Adapter tests package
+"""
@@ -0,0 +1,168 @@
+"""
+Tests for AnthropicProvider (prompt cache 断点、上下文压缩、LRU 会话存储)
+
+在本地启动一个 mock Messages 端点（aiohttp），通过 base_url 指向它，无需网络。
+"""
+import json
+
+import pytest
+from aiohttp import web
+
+from app.adapters.models.anthropic_provider import AnthropicProvider
+from app.adapters.models.compaction import CompactionPolicy
+from app.adapters.models.session_store import SessionState, SessionStore
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _stream_body(text: str) -> str:
+    """构造一个最小的 Messages 流式响应"""
+    return "".join([
+        _sse("message_start", {
+            "type": "message_start",
+            "message": {
+                "id": "msg_test", "type": "message", "role": "assistant", "model": "claude-test",
+                "content": [], "stop_reason": None, "stop_sequence": None,
+                "usage": {
+                    "input_tokens": 10, "output_tokens": 1,
+                    "cache_creation_input_tokens": 5, "cache_read_input_tokens": 20,
+                },
+            },
+        }),
+        _sse("content_block_start", {
+            "type": "content_block_start", "index": 0,
+            "content_block": {"type": "text", "text": ""},
+        }),
+        _sse("content_block_delta", {
+            "type": "content_block_delta", "index": 0,
+            "delta": {"type": "text_delta", "text": text},
+        }),
+        _sse("content_block_stop", {"type": "content_block_stop", "index": 0}),
+        _sse("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": 3},
+        }),
+        _sse("message_stop", {"type": "message_stop"}),
+    ])
+
+
+@pytest.fixture
+async def mock_endpoint():
+    """本地 mock Messages 端点，记录所有请求体"""
+    requests = []
+
+    async def handler(request: web.Request) -> web.Response:
+        requests.append(await request.json())
+        return web.Response(
+            body=_stream_body(f"reply {len(requests)}"),
+            content_type="text/event-stream",
+        )
+
+    app = web.Application()
+    app.router.add_post("/v1/messages", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    yield f"http://127.0.0.1:{port}", requests
+
+    await runner.cleanup()
+
+
+def _make_provider(base_url: str, **kwargs) -> AnthropicProvider:
+    return AnthropicProvider(
+        api_key="test-key",
+        base_url=base_url,
+        session_store=kwargs.pop("session_store", SessionStore(max_sessions=8)),
+        compaction_policy=kwargs.pop("compaction_policy", CompactionPolicy()),
+    )
+
+
+async def _send(provider: AnthropicProvider, session_id: str, text: str) -> str:
+    chunks = []
+    async for msg in provider.send_message(session_id, text, context={"model": "sonnet"}):
+        chunks.append(msg.content)
+    return "".join(chunks)
+
+
+@pytest.mark.asyncio
+async def test_cache_breakpoints_on_system_and_history(mock_endpoint):
+    """系统提示词和最近两条 user 消息带缓存断点"""
+    base_url, requests = mock_endpoint
+    provider = _make_provider(base_url)
+    session_id = await provider.create_session(1, {"system_prompt": "You are helpful."})
+
+    assert await _send(provider, session_id, "first") == "reply 1"
+    await _send(provider, session_id, "second")
+
+    body = requests[-1]
+    assert body["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert [m["role"] for m in body["messages"]] == ["user", "assistant", "user"]
+    assert body["messages"][0]["content"][0]["cache_control"] == {"type": "ephemeral"}
+    assert body["messages"][1]["content"] == "reply 1"
+    assert body["messages"][2]["content"][0]["text"] == "second"
+
+    usage = await provider.get_session_usage(session_id)
+    assert usage["cache_read_input_tokens"] == 40
+    assert usage["output_tokens"] == 6
+
+
+@pytest.mark.asyncio
+async def test_compaction_drops_oldest_turns(mock_endpoint):
+    """超出 token 预算时丢弃最早的对话并生成摘要"""
+    base_url, requests = mock_endpoint
+    policy = CompactionPolicy(max_context_tokens=200, keep_recent_messages=2)
+    provider = _make_provider(base_url, compaction_policy=policy)
+    session_id = await provider.create_session(1, {"system_prompt": "sys"})
+
+    for i in range(6):
+        await _send(provider, session_id, f"message {i} " + "x" * 200)
+
+    body = requests[-1]
+    assert len(body["messages"]) < 11
+    assert body["messages"][0]["role"] == "user"
+    assert "Summary of earlier conversation" in body["system"][1]["text"]
+    assert "message 0" in body["system"][1]["text"]
+
+
+@pytest.mark.asyncio
+async def test_session_store_lru_spill_and_restore(mock_endpoint):
+    """超出容量的会话溢出到 spill 存储，再次访问时恢复"""
+    base_url, _ = mock_endpoint
+
+    class MemorySpill:
+        def __init__(self):
+            self.data = {}
+
+        async def save(self, session_id, state):
+            self.data[session_id] = state.to_dict()
+
+        async def load(self, session_id):
+            data = self.data.get(session_id)
+            return SessionState.from_dict(data) if data else None
+
+        async def delete(self, session_id):
+            self.data.pop(session_id, None)
+
+    spill = MemorySpill()
+    store = SessionStore(max_sessions=1, spill=spill)
+    provider = _make_provider(base_url, session_store=store)
+
+    first = await provider.create_session(1, {"system_prompt": "a"})
+    await _send(provider, first, "hello")
+    second = await provider.create_session(2, {"system_prompt": "b"})
+
+    assert len(store) == 1
+    assert first in spill.data
+
+    history = await provider.get_session_history(first)
+    assert [m.role for m in history] == ["system", "user", "assistant"]
+    assert second in spill.data
+
+    await provider.close_session(first)
+    assert first not in spill.data
@@ -0,0 +1,91 @@
+"""
+Tests for 子进程输出流式管道（iter_process_output）和 ClaudeCliClient.stream_command
+
+用 python 子进程模拟 CLI 输出，无需安装 Claude CLI。
+"""
+import asyncio
+import sys
+
+import pytest
+
+from app.adapters.claude.cli_client import ClaudeCliClient
+from app.core.streaming import iter_process_output, sse_log_event
+
+
+async def _spawn(code: str) -> asyncio.subprocess.Process:
+    return await asyncio.create_subprocess_exec(
+        sys.executable, "-c", code,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+
+@pytest.mark.asyncio
+async def test_burst_output_is_coalesced_into_few_batches():
+    """突发的大量输出合并为少量批次，行内容与顺序保持不变"""
+    process = await _spawn(
+        "import sys\n"
+        "sys.stdout.write(''.join(f'line {i}\\n' for i in range(5000)))\n"
+        "sys.stderr.write('warn\\n')\n"
+    )
+
+    batches = [batch async for batch in iter_process_output(process, max_batch_lines=1000)]
+    await process.wait()
+
+    stdout = [line.text for batch in batches for line in batch if line.stream == "stdout"]
+    stderr = [line.text for batch in batches for line in batch if line.stream == "stderr"]
+    assert stdout == [f"line {i}" for i in range(5000)]
+    assert stderr == ["warn"]
+    assert all(len(batch) <= 1000 for batch in batches)
+    assert len(batches) < 50
+
+
+@pytest.mark.asyncio
+async def test_partial_last_line_is_flushed():
+    """没有结尾换行的最后一行也会产出"""
+    process = await _spawn("import sys; sys.stdout.write('a\\nb')")
+
+    lines = [line.text async for batch in iter_process_output(process) for line in batch]
+    await process.wait()
+
+    assert lines == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_stream_command_yields_logs_and_result():
+    """stream_command 产出带时间戳的日志批次，最后是结果"""
+    client = ClaudeCliClient()
+    events = [
+        event async for event in client.stream_command(
+            [sys.executable, "-c", "print('hello'); print('world')"], timeout=30
+        )
+    ]
+
+    assert events[-1]["type"] == "result"
+    result = events[-1]["data"]
+    assert result["success"] is True
+    assert result["output"] == "hello\nworld"
+
+    stdout = [line.text for event in events[:-1] for line in event["lines"] if line.stream == "stdout"]
+    assert [text.split("] ", 1)[1] for text in stdout] == ["hello", "world"]
+
+
+@pytest.mark.asyncio
+async def test_stream_command_kills_process_on_timeout():
+    """超时后结束进程并返回失败结果"""
+    client = ClaudeCliClient()
+    events = [
+        event async for event in client.stream_command(
+            [sys.executable, "-c", "import time; print('start', flush=True); time.sleep(30)"], timeout=1
+        )
+    ]
+
+    result = events[-1]["data"]
+    assert result["success"] is False
+    assert "timed out" in result["error"]
+    assert result["output"] == "start"
+
+
+def test_sse_log_event_merges_lines():
+    event = sse_log_event(["a", "b"], prefix="> ")
+    assert event == 'data: {"type": "log", "message": "> a\\n> b", "lines": ["> a", "> b"]}\n\n'
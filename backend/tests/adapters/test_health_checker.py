@@ -0,0 +1,90 @@
+"""
+Tests for AsyncTTLCache (TTL + single-flight) and the health refresh path
+"""
+import asyncio
+
+import pytest
+
+from app.adapters.claude import health_checker
+from app.adapters.claude.health_checker import ClaudeHealthChecker
+from app.core.async_cache import AsyncTTLCache
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_probe():
+    """并发调用方共享同一次进行中的探测"""
+    cache = AsyncTTLCache()
+    calls = 0
+
+    async def probe():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"available": True}
+
+    results = await asyncio.gather(*[cache.get("health", probe, ttl=60) for _ in range(10)])
+
+    assert calls == 1
+    assert all(result == {"available": True} for result in results)
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_fresh_override():
+    """TTL 内命中缓存，fresh=True 或过期后重新探测"""
+    cache = AsyncTTLCache()
+    calls = 0
+
+    async def probe():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await cache.get("health", probe, ttl=60) == 1
+    assert await cache.get("health", probe, ttl=60) == 1
+    assert await cache.get("health", probe, ttl=60, fresh=True) == 2
+
+    assert await cache.get("short", probe, ttl=0) == 3
+    assert await cache.get("short", probe, ttl=0) == 4
+
+    cache.invalidate()
+    assert await cache.get("health", probe, ttl=60) == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_is_not_cached():
+    """探测抛出异常时不写入缓存"""
+    cache = AsyncTTLCache()
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    async def ok():
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        await cache.get("health", failing, ttl=60)
+    assert await cache.get("health", ok, ttl=60) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_background_refresh_keeps_model_probe_ttl(monkeypatch):
+    """后台刷新只重新检查 CLI，模型可用性探测按自身 TTL 缓存"""
+    probes = []
+
+    async def fake_availability(self, alias, full_name, credentials):
+        probes.append(full_name)
+        return True
+
+    monkeypatch.setattr(ClaudeHealthChecker, "check_model_availability", fake_availability)
+    monkeypatch.setattr(health_checker, "_probe_cache", AsyncTTLCache())
+    checker = ClaudeHealthChecker()
+
+    await checker.check_health(fresh=True, fresh_models=False)
+    first = len(probes)
+    assert first > 0
+    await checker.check_health(fresh=True, fresh_models=False)
+    assert len(probes) == first
+
+    # 用户显式 ?fresh=1 时仍然重新探测模型
+    await checker.check_health(fresh=True)
+    assert len(probes) == 2 * first
@@ -0,0 +1,88 @@
+"""
+认证相关单元测试（密码哈希在线程池执行、JWT 验证缓存、纯 ASGI 中间件）
+"""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from jose import JWTError
+
+from app.core import security
+from app.middleware.access_guard import AccessGuardMiddleware, _derive_token
+from app.middleware.request_id import RequestIDMiddleware
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_does_not_block_event_loop():
+    """bcrypt 在专用线程池执行，期间事件循环仍能调度其他任务"""
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    task = asyncio.create_task(ticker())
+    try:
+        hashed = await security.get_password_hash_async("secret")
+        assert await security.verify_password_async("secret", hashed)
+        assert not await security.verify_password_async("wrong", hashed)
+    finally:
+        task.cancel()
+    assert ticks > 3
+
+
+def test_decode_access_token_caches_until_expiry(monkeypatch):
+    token = security.create_access_token({"sub": "alice"}, expires_delta=timedelta(minutes=5))
+    assert security.decode_access_token(token)["sub"] == "alice"
+
+    # 命中缓存时不再调用 jwt.decode
+    def fail(*args, **kwargs):
+        raise AssertionError("decode should be cached")
+
+    monkeypatch.setattr(security.jwt, "decode", fail)
+    assert security.decode_access_token(token)["sub"] == "alice"
+
+    monkeypatch.undo()
+    expired = security.create_access_token({"sub": "bob"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(JWTError):
+        security.decode_access_token(expired)
+
+
+def _make_app(password: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/index.html")
+    async def index():
+        return {"page": True}
+
+    app.add_middleware(RequestIDMiddleware)
+    app.add_middleware(AccessGuardMiddleware, password=password)
+    return app
+
+
+def test_access_guard_and_request_id():
+    client = TestClient(_make_app("pw"))
+
+    resp = client.get("/api/ping")
+    assert resp.status_code == 401
+    assert resp.headers["X-Auth-Required"] == "access-password"
+
+    assert client.get("/index.html").status_code == 200
+
+    resp = client.get(
+        "/api/ping",
+        headers={"Authorization": f"Bearer {_derive_token('pw')}", "X-Request-ID": "req-1"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["X-Request-ID"] == "req-1"
+
+    generated = client.get("/index.html").headers["X-Request-ID"]
+    assert len(generated) == 36
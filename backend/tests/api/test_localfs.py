@@ -0,0 +1,104 @@
+"""
+/localfs 本地文件服务单元测试（项目根目录索引、条件请求与 Range、HTML 流式注入 <base>）
+"""
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.routers import localfs
+from app.core.database import Base, get_db
+from app.models.project import Project
+from app.repositories.project_repository import ProjectRepository
+from app.services import project_root_index
+
+
+@pytest.fixture
+async def db_session(monkeypatch):
+    monkeypatch.setattr(project_root_index, "_project_root_index", None)
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with async_session() as session:
+        yield session
+
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(db_session):
+    app = FastAPI()
+    app.include_router(localfs.router, prefix="/api")
+    app.dependency_overrides[get_db] = lambda: db_session
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+@pytest.fixture
+def site(tmp_path):
+    root = tmp_path / "proj"
+    root.mkdir()
+    (root / "index.html").write_text(
+        "<html><HEAD><title>x</title></head><body>" + "a" * 200_000 + "</body></html>"
+    )
+    (root / "app.js").write_bytes(bytes(range(256)) * 4)
+    (tmp_path / "proj-other").mkdir()
+    (tmp_path / "proj-other" / "secret.txt").write_text("no")
+    return root
+
+
+def _url(path):
+    return "/api/localfs" + str(path)
+
+
+@pytest.mark.asyncio
+async def test_only_registered_roots_are_served(client, db_session, site):
+    assert (await client.get(_url(site / "app.js"))).status_code == 403
+
+    # 新增项目后索引立即失效
+    await ProjectRepository(db_session).create(Project(name="p", path=str(site)))
+    assert (await client.get(_url(site / "app.js"))).status_code == 200
+    # 前缀相同的兄弟目录不属于该项目
+    assert (await client.get(_url(site.parent / "proj-other" / "secret.txt"))).status_code == 403
+    assert (await client.get(_url(site / "missing.js"))).status_code == 404
+    assert (await client.get(_url(site / ".." / "proj-other" / "secret.txt"))).status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_and_range(client, db_session, site):
+    await ProjectRepository(db_session).create(Project(name="p", path=str(site)))
+
+    resp = await client.get(_url(site / "app.js"))
+    etag = resp.headers["etag"]
+    assert resp.headers["last-modified"]
+
+    resp = await client.get(_url(site / "app.js"), headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    resp = await client.get(
+        _url(site / "app.js"), headers={"If-Modified-Since": resp.headers["last-modified"]}
+    )
+    assert resp.status_code == 304
+
+    resp = await client.get(_url(site / "app.js"), headers={"Range": "bytes=10-19"})
+    assert resp.status_code == 206
+    assert resp.content == bytes(range(10, 20))
+
+
+@pytest.mark.asyncio
+async def test_html_base_injection_is_streamed(client, db_session, site):
+    await ProjectRepository(db_session).create(Project(name="p", path=str(site)))
+
+    resp = await client.get(_url(site / "index.html"))
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/html")
+    assert resp.text.startswith(
+        f'<html><HEAD>\n  <base href="/api/localfs{site}/"><title>x</title>'
+    )
+    assert resp.text.endswith("a" * 1000 + "</body></html>")
+
+    (site / "page.html").write_text('<head><base href="/x/"></head>')
+    assert (await client.get(_url(site / "page.html"))).text == '<head><base href="/x/"></head>'
@@ -0,0 +1,121 @@
+"""
+运行时指标单元测试（Prometheus 输出、路由模板与每请求 SQL 统计、事件循环阻塞检测、子进程计数、扫描耗时）
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import APIRouter, FastAPI
+from sqlalchemy import text
+
+from app.core import metrics
+from app.core.database import create_db_engine
+from app.middleware.metrics import MetricsMiddleware
+
+
+def test_registry_renders_prometheus_text():
+    registry = metrics.MetricsRegistry()
+    counter = registry.register(metrics.Counter("demo_events", "Demo events", ("kind",)))
+    histogram = registry.register(metrics.Histogram("demo_seconds", "Demo latency", buckets=(0.1, 1.0)))
+    counter.inc(kind='a"b')
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    text_output = registry.render()
+    assert "# TYPE demo_events counter" in text_output
+    assert 'demo_events_total{kind="a\\"b"} 1' in text_output
+    assert 'demo_seconds_bucket{le="0.1"} 1' in text_output
+    assert 'demo_seconds_bucket{le="1"} 2' in text_output
+    assert 'demo_seconds_bucket{le="+Inf"} 3' in text_output
+    assert "demo_seconds_count 3" in text_output
+
+    stats = histogram.stats()[()]
+    assert 0.1 <= stats.quantile(0.5) <= 1.0
+    assert stats.quantile(0.99) <= stats.max == 5
+
+
+@pytest.mark.asyncio
+async def test_middleware_records_route_template_and_sql():
+    engine = create_db_engine("sqlite+aiosqlite:///:memory:", sqlite_profile=False)
+    router = APIRouter(prefix="/teams/{team_id}")
+
+    @router.get("/items/{item_id}")
+    async def get_item(team_id: int, item_id: int):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+        return {"item_id": item_id}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.add_middleware(MetricsMiddleware)
+
+    route = "/api/teams/{team_id}/items/{item_id}"
+    before = metrics.HTTP_REQUEST_DURATION.stats().get(("GET", route, "200"))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.get("/api/teams/7/items/42")).status_code == 200
+        assert (await client.get("/api/teams/8/items/43")).status_code == 200
+        assert (await client.get("/nowhere")).status_code == 404
+    await engine.dispose()
+
+    after = metrics.HTTP_REQUEST_DURATION.stats()[("GET", route, "200")]
+    assert after.count - (before.count if before else 0) == 2
+    assert metrics.HTTP_REQUEST_DURATION.stats()[("GET", "unmatched", "404")].count >= 1
+    db_queries = metrics.HTTP_REQUEST_DB_QUERIES.stats()[(route,)]
+    assert db_queries.max == 2
+
+    snapshot = metrics.dashboard_snapshot()
+    entry = next(r for r in snapshot["routes"] if r["route"] == route)
+    assert entry["db_queries_avg"] == 2
+    assert "http_request_duration_seconds_bucket" in metrics.get_registry().render()
+
+
+@pytest.mark.asyncio
+async def test_event_loop_monitor_detects_blocking_call():
+    monitor = metrics.EventLoopMonitor(interval=0.01, stall_threshold=0.05)
+    stalls = metrics.EVENT_LOOP_STALLS.values().get((), 0)
+    monitor.start()
+    await asyncio.sleep(0.03)
+    time.sleep(0.1)  # 同步阻塞事件循环
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+    assert metrics.EVENT_LOOP_STALLS.values()[()] > stalls
+    assert metrics.EVENT_LOOP_LAG.stats()[()].max >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_subprocess_spawns_and_scan_durations():
+    metrics.install_subprocess_hook()
+    before = metrics.SUBPROCESS_SPAWNS.values().get(("true",), 0)
+    process = await asyncio.create_subprocess_exec("true")
+    await process.wait()
+    assert metrics.SUBPROCESS_SPAWNS.values()[("true",)] == before + 1
+
+    @metrics.timed_scan("test_sync")
+    def sync_scan():
+        return 1
+
+    @metrics.timed_scan("test_async")
+    async def async_scan():
+        await asyncio.sleep(0.01)
+        return 2
+
+    assert sync_scan() == 1
+    assert await async_scan() == 2
+    scans = metrics.SCAN_DURATION.stats()
+    assert scans[("test_sync",)].count == 1
+    assert scans[("test_async",)].max >= 0.01
+
+
+def test_queue_source_gauges():
+    queues = [asyncio.Queue(), asyncio.Queue()]
+    queues[0].put_nowait(1)
+    queues[0].put_nowait(2)
+    queues[1].put_nowait(3)
+    metrics.register_queue_source("test_source", lambda: queues)
+
+    snapshot = metrics.dashboard_snapshot()["queues"]["test_source"]
+    assert snapshot == {"subscribers": 2, "max_depth": 2, "total_depth": 3}
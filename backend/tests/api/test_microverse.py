@@ -9,6 +9,7 @@ from datetime import datetime
 from app.services.microverse_agent_service import MicroverseAgentService
 from app.models.task import ExecutionStatus, ExecutionType
 from app.models.microverse import MicroverseCharacter
+from app.repositories.execution_message_repository import ExecutionMessageRepository
 
 
 @pytest.mark.asyncio
@@ -76,11 +77,11 @@ async def test_send_message():
     db = AsyncMock()
     service = MicroverseAgentService(db)
 
-    # Mock execution with chat history
+    # Mock execution (chat history is stored in execution_messages)
     execution = MagicMock()
+    execution.id = 1
     execution.session_id = "test-session-id"
     execution.agent_id = 1
-    execution.chat_history = "[]"
 
     # Mock agent
     agent = MagicMock()
@@ -94,14 +95,20 @@ async def test_send_message():
     ])
     db.commit = AsyncMock()
 
-    # Mock AI API call
-    with patch.object(service, '_call_ai_api', return_value="Test response"):
+    # Mock AI API call and message storage
+    with patch.object(service, '_call_ai_api', return_value="Test response"), \
+            patch.object(ExecutionMessageRepository, 'list', AsyncMock(return_value=[])), \
+            patch.object(ExecutionMessageRepository, 'append', AsyncMock()) as append:
         result = await service.send_message(
             session_id="test-session-id",
             message="Hello",
             context=None
         )
 
+    # 本轮的用户消息和助手消息一起追加
+    _, user_message, assistant_message = append.await_args.args
+    assert user_message["content"] == "Hello"
+    assert assistant_message is result
     assert result["role"] == "assistant"
     assert result["content"] == "Test response"
     assert "message_id" in result
@@ -114,8 +121,7 @@ async def test_get_conversation_history():
     db = AsyncMock()
     service = MicroverseAgentService(db)
 
-    # Mock execution with chat history
-    import json
+    # Mock stored chat messages
     chat_history = [
         {
             "message_id": "msg-1",
@@ -132,16 +138,18 @@ async def test_get_conversation_history():
     ]
 
     execution = MagicMock()
+    execution.id = 1
     execution.session_id = "test-session-id"
-    execution.chat_history = json.dumps(chat_history)
 
     db.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=execution)))
 
-    result = await service.get_conversation_history(
-        session_id="test-session-id",
-        offset=0,
-        limit=50
-    )
+    with patch.object(ExecutionMessageRepository, 'count', AsyncMock(return_value=2)), \
+            patch.object(ExecutionMessageRepository, 'list', AsyncMock(return_value=chat_history)):
+        result = await service.get_conversation_history(
+            session_id="test-session-id",
+            offset=0,
+            limit=50
+        )
 
     assert result["session_id"] == "test-session-id"
     assert len(result["messages"]) == 2
@@ -156,25 +164,29 @@ async def test_get_conversation_history_pagination():
     db = AsyncMock()
     service = MicroverseAgentService(db)
 
-    # Mock execution with multiple messages
-    import json
+    # Mock stored chat messages
     chat_history = [
         {"message_id": f"msg-{i}", "role": "user", "content": f"Message {i}", "timestamp": "2024-01-01T00:00:00"}
         for i in range(10)
     ]
 
     execution = MagicMock()
+    execution.id = 1
     execution.session_id = "test-session-id"
-    execution.chat_history = json.dumps(chat_history)
 
     db.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=execution)))
 
+    async def list_messages(execution_id, offset=0, limit=None):
+        return chat_history[offset:offset + limit]
+
     # Test pagination
-    result = await service.get_conversation_history(
-        session_id="test-session-id",
-        offset=0,
-        limit=5
-    )
+    with patch.object(ExecutionMessageRepository, 'count', AsyncMock(return_value=10)), \
+            patch.object(ExecutionMessageRepository, 'list', side_effect=list_messages):
+        result = await service.get_conversation_history(
+            session_id="test-session-id",
+            offset=0,
+            limit=5
+        )
 
     assert len(result["messages"]) == 5
     assert result["total"] == 10
@@ -182,11 +194,13 @@ async def test_get_conversation_history_pagination():
     assert result["messages"][4]["message_id"] == "msg-4"
 
     # Test second page
-    result = await service.get_conversation_history(
-        session_id="test-session-id",
-        offset=5,
-        limit=5
-    )
+    with patch.object(ExecutionMessageRepository, 'count', AsyncMock(return_value=10)), \
+            patch.object(ExecutionMessageRepository, 'list', side_effect=list_messages):
+        result = await service.get_conversation_history(
+            session_id="test-session-id",
+            offset=5,
+            limit=5
+        )
 
     assert len(result["messages"]) == 5
     assert result["total"] == 10
@@ -0,0 +1,119 @@
+"""
+采样性能分析测试（慢请求剖面的栈与 SQL 时间线、折叠栈格式、运行时开关接口）
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from app.api.routers import profiler as profiler_router
+from app.core.database import create_db_engine
+from app.core.profiler import AWAIT_ROOT, SamplingProfiler, get_profiler
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilerMiddleware
+
+
+def _busy_wait(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_slow_request_captures_stacks_and_sql_timeline():
+    engine = create_db_engine("sqlite+aiosqlite:///:memory:", sqlite_profile=False)
+    profiler = SamplingProfiler(
+        sample_interval=0.005, slow_request_threshold=0.2, max_profiles=2, max_sql_statements=10,
+    )
+    app = FastAPI()
+
+    @app.get("/slow/{item_id}")
+    async def slow(item_id: int):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            _busy_wait(0.15)
+            await asyncio.sleep(0.1)
+            await conn.execute(text("SELECT 2"))
+        return {"item_id": item_id}
+
+    @app.get("/fast")
+    async def fast():
+        return {}
+
+    app.add_middleware(ProfilerMiddleware, profiler=profiler)
+    app.add_middleware(MetricsMiddleware)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        # 未开启时不记录
+        assert (await client.get("/slow/1")).status_code == 200
+        assert profiler.profiles() == []
+
+        profiler.start()
+        try:
+            assert (await client.get("/fast")).status_code == 200
+            assert (await client.get("/slow/2")).status_code == 200
+        finally:
+            profiler.stop()
+    await engine.dispose()
+
+    [profile] = profiler.profiles()
+    assert profile.route == "/slow/{item_id}" and profile.path == "/slow/2"
+    assert profile.status == 200 and profile.duration_ms >= 250
+
+    folded = profile.folded()
+    # 运行中的采样包含阻塞调用，挂起时的采样是 await 链
+    assert "_busy_wait" in folded
+    assert any(line.startswith(f"{AWAIT_ROOT};") and "slow (" in line for line in folded.splitlines())
+    for line in folded.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+
+    assert profile.sql_count == 2
+    statements = [entry.statement for entry in profile.sql]
+    assert statements == ["SELECT 1", "SELECT 2"]
+    # 第二条 SQL 在阻塞和 sleep 之后执行
+    assert profile.sql[1].offset_ms - profile.sql[0].offset_ms >= 240
+    assert "_busy_wait" in profiler.folded()
+
+
+@pytest.mark.asyncio
+async def test_profiler_endpoints_toggle_and_download():
+    app = FastAPI()
+    app.include_router(profiler_router.router, prefix="/api/system")
+    app.add_middleware(ProfilerMiddleware)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        try:
+            response = await client.post(
+                "/api/system/profiler/start",
+                json={"sample_interval": 0.005, "slow_request_threshold": 0},
+            )
+            assert response.status_code == 200
+            assert response.json()["enabled"] is True
+            # 阈值为 0：每个请求都保存剖面
+            assert (await client.get("/api/system/profiler")).status_code == 200
+            profiles = (await client.get("/api/system/profiler/profiles")).json()
+            assert profiles["total"] >= 1
+            profile_id = profiles["items"][0]["id"]
+
+            detail = await client.get(f"/api/system/profiler/profiles/{profile_id}")
+            assert detail.status_code == 200 and "sql" in detail.json()
+            download = await client.get(f"/api/system/profiler/profiles/{profile_id}/folded")
+            assert download.status_code == 200
+            assert "attachment" in download.headers["content-disposition"]
+            assert (await client.get("/api/system/profiler/profiles/missing")).status_code == 404
+
+            await asyncio.sleep(0.05)
+            folded = await client.get("/api/system/profiler/folded", params={"reset": True})
+            assert folded.status_code == 200 and folded.text
+            assert (await client.get("/api/system/profiler")).json()["samples"] < 5
+        finally:
+            response = await client.post("/api/system/profiler/stop")
+            get_profiler().clear_profiles()
+            get_profiler().slow_request_threshold = 2.0
+    assert response.json()["enabled"] is False
@@ -0,0 +1,147 @@
+"""
+目录响应缓存单元测试（命中与 304、版本失效、查询参数规范化、非 200 不缓存、强制刷新、提交后自动递增版本）
+"""
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import update
+
+from app.core.catalog import bump_catalog_version, get_catalog_version, track_catalog_writes
+from app.core.database import Base, create_db_engine, create_session_factory
+from app.core.response_cache import CacheRule, ResponseCache
+from app.middleware.response_cache import ResponseCacheMiddleware
+from app.models.agent_team import AgentTeam
+
+
+@pytest.fixture
+def cached_app():
+    calls = {"items": 0, "fail": 0, "other": 0}
+    app = FastAPI()
+
+    @app.get("/api/items")
+    async def list_items(limit: int = 10, skip: int = 0):
+        calls["items"] += 1
+        return {"calls": calls["items"], "limit": limit, "skip": skip}
+
+    @app.get("/api/fail")
+    async def fail():
+        calls["fail"] += 1
+        raise HTTPException(status_code=404, detail="missing")
+
+    @app.get("/api/other")
+    async def other():
+        calls["other"] += 1
+        return {"calls": calls["other"]}
+
+    cache = ResponseCache(rules=[CacheRule("/api/items", ("test_items",)), CacheRule("/api/fail", ("test_items",))])
+    app.add_middleware(ResponseCacheMiddleware, cache=cache)
+    return app, cache, calls
+
+
+@pytest.fixture
+async def client(cached_app):
+    transport = httpx.ASGITransport(app=cached_app[0])
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_repeat_requests_are_served_from_cache_with_etag(cached_app, client):
+    _, cache, calls = cached_app
+    first = await client.get("/api/items?limit=5&skip=1")
+    second = await client.get("/api/items?skip=1&limit=5")
+
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json() == {"calls": 1, "limit": 5, "skip": 1}
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+    assert first.headers["etag"] == second.headers["etag"]
+    assert second.headers["cache-control"] == "no-cache"
+    assert calls["items"] == 1
+
+    revalidated = await client.get("/api/items?limit=5&skip=1", headers={"If-None-Match": f'W/{first.headers["etag"]}'})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == first.headers["etag"]
+    assert calls["items"] == 1
+    assert cache.stats() == {"entries": 1, "hits": 2, "misses": 1, "not_modified": 1}
+
+    # 不同查询参数是不同的条目
+    assert (await client.get("/api/items?limit=6")).json()["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_catalog_version_bump_invalidates(cached_app, client):
+    _, _, calls = cached_app
+    first = await client.get("/api/items")
+    bump_catalog_version("test_items")
+    second = await client.get("/api/items")
+
+    assert second.headers["x-cache"] == "MISS"
+    assert second.json()["calls"] == 2
+    assert second.headers["etag"] != first.headers["etag"]
+    assert calls["items"] == 2
+
+    # 内容变化后旧 ETag 不再命中
+    stale = await client.get("/api/items", headers={"If-None-Match": first.headers["etag"]})
+    assert stale.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_errors_and_unlisted_routes_are_not_cached(cached_app, client):
+    _, cache, calls = cached_app
+    for _ in range(2):
+        assert (await client.get("/api/fail")).status_code == 404
+        response = await client.get("/api/other")
+        assert "x-cache" not in response.headers
+    assert calls == {"items": 0, "fail": 2, "other": 2}
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_hard_reload_bypasses_and_refreshes(cached_app, client):
+    _, _, calls = cached_app
+    await client.get("/api/items")
+    reloaded = await client.get("/api/items", headers={"Cache-Control": "no-cache"})
+    assert reloaded.headers["x-cache"] == "MISS"
+    assert (await client.get("/api/items")).json()["calls"] == 2
+    assert calls["items"] == 2
+
+
+def test_lru_evicts_oldest_entry():
+    rule = CacheRule("/api/items", ("test_items",))
+    cache = ResponseCache(rules=[rule], max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, rule, (0,), 200, [], key.encode())
+    assert cache.get("a", (0,)) is not None  # a 变为最近使用
+    cache.put("c", rule, (0,), 200, [], b"c")
+    assert cache.get("b", (0,)) is None
+    assert cache.get("a", (0,)).body == b"a"
+    assert cache.get("a", (1,)) is None  # 版本不一致即失效
+
+
+@pytest.mark.asyncio
+async def test_committed_writes_bump_catalog_version(tmp_path):
+    track_catalog_writes()
+    engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'catalog.db'}", sqlite_profile=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = create_session_factory(engine)
+    try:
+        async with sessions() as db:
+            before = get_catalog_version("agent_teams")
+            db.add(AgentTeam(name="team", description="d", members=[], tags=[]))
+            await db.flush()
+            assert get_catalog_version("agent_teams") == before  # 提交前不递增
+            await db.commit()
+            assert get_catalog_version("agent_teams") == before + 1
+
+            await db.execute(update(AgentTeam).values(description="changed"))
+            await db.commit()
+            assert get_catalog_version("agent_teams") == before + 2
+
+            # 只读事务不递增
+            await db.get(AgentTeam, 1)
+            await db.commit()
+            assert get_catalog_version("agent_teams") == before + 2
+    finally:
+        await engine.dispose()
@@ -0,0 +1,127 @@
+"""
+会话粘性路由单元测试：两个 worker（各自的 app + 内部 Unix socket 服务）共享协调数据库，
+请求经 worker A 进入，属于 worker B 的会话被转发到 B（HTTP 与 WebSocket），原始客户端地址随之转发
+"""
+import aiohttp
+import pytest
+from fastapi import FastAPI, Request, WebSocket
+
+from app.core.coordination import SqliteCoordinator
+from app.core.worker_server import WorkerServer
+from app.middleware.session_affinity import (
+    CLIENT_HEADER,
+    SessionAffinityMiddleware,
+    _forward_headers,
+    close_affinity_clients,
+    match_affinity,
+)
+
+
+def _worker_app(coordinator):
+    app = FastAPI()
+    app.add_middleware(SessionAffinityMiddleware, coordinator=coordinator)
+
+    @app.get("/api/agents/{agent_id}/status")
+    async def status(agent_id: int, request: Request):
+        client = request.client.host if request.client else None
+        return {"agent_id": agent_id, "worker": coordinator.worker_id, "client": client}
+
+    @app.post("/api/jobs/{job_id}/cancel")
+    async def cancel(job_id: str, payload: dict):
+        return {"job_id": job_id, "worker": coordinator.worker_id, "payload": payload}
+
+    @app.websocket("/api/terminal/ws")
+    async def terminal(websocket: WebSocket, session_id: str):
+        await websocket.accept()
+        async for text in websocket.iter_text():
+            await websocket.send_text(f"{coordinator.worker_id}:{session_id}:{text}")
+
+    return app
+
+
+@pytest.fixture
+async def cluster(tmp_path):
+    db_path = tmp_path / "coordination.db"
+    workers = []
+    for name in ("a", "b"):
+        socket_path = tmp_path / f"{name}.sock"
+        coordinator = SqliteCoordinator(db_path, address=str(socket_path), poll_interval=0.01)
+        server = WorkerServer(_worker_app(coordinator), socket_path)
+        await server.start()
+        await coordinator.start()
+        workers.append((coordinator, server))
+
+    session = aiohttp.ClientSession(connector=aiohttp.UnixConnector(path=workers[0][1].path))
+    yield session, workers[0][0], workers[1][0]
+
+    await session.close()
+    await close_affinity_clients()
+    for coordinator, server in workers:
+        await server.stop()
+        await coordinator.close()
+
+
+def test_match_affinity():
+    assert match_affinity("/api/agents/3/session-ws")[1] == "3"
+    assert match_affinity("/api/agents/3/sessions") is None
+    assert match_affinity("/api/terminal/ws", b"session_id=abc&use_tmux=true")[1] == "abc"
+    assert match_affinity("/api/terminal/ws") is None
+    assert match_affinity("/api/projects/5/workspace/logs/ws")[0].kind == "workspace"
+    assert match_affinity("/api/api/team-tasks/12/assign")[1] == "all"
+
+
+def test_forward_headers_replace_client_address():
+    scope = {
+        "client": ("203.0.113.7", 51000),
+        "headers": [(b"host", b"example.com"), (CLIENT_HEADER, b"127.0.0.1:1"), (b"accept", b"*/*")],
+    }
+    headers = dict(_forward_headers(scope, "w1"))
+    assert headers[CLIENT_HEADER.decode()] == "203.0.113.7:51000"
+    assert "host" not in headers and headers["accept"] == "*/*"
+
+
+@pytest.mark.asyncio
+async def test_original_client_reaches_owner(cluster):
+    client, a, b = cluster
+    await b.claim("agent", "4")
+    # 经 A 的内部 socket 进入时由转发头给出客户端地址；A 再把它转发给 B
+    async with client.get("http://worker/api/agents/4/status", headers={CLIENT_HEADER.decode(): "203.0.113.7:51000"}) as resp:
+        body = await resp.json()
+    assert body["worker"] == b.worker_id
+    assert body["client"] == "203.0.113.7"
+
+
+@pytest.mark.asyncio
+async def test_http_routed_to_owner(cluster):
+    client, a, b = cluster
+
+    # 未被持有的 agent 由接收请求的 worker 持有
+    async with client.get("http://worker/api/agents/1/status") as resp:
+        assert (await resp.json())["worker"] == a.worker_id
+    assert (await b.owner("agent", "1")).worker_id == a.worker_id
+
+    await b.claim("agent", "2")
+    async with client.get("http://worker/api/agents/2/status") as resp:
+        assert resp.status == 200
+        assert (await resp.json())["worker"] == b.worker_id
+
+    # 请求体原样转发；没有持有者的 job 在本地处理
+    await b.claim("job", "abc123")
+    async with client.post("http://worker/api/jobs/abc123/cancel", json={"k": "v"}) as resp:
+        assert await resp.json() == {"job_id": "abc123", "worker": b.worker_id, "payload": {"k": "v"}}
+    async with client.post("http://worker/api/jobs/fff/cancel", json={}) as resp:
+        assert (await resp.json())["worker"] == a.worker_id
+
+
+@pytest.mark.asyncio
+async def test_websocket_routed_to_owner(cluster):
+    client, a, b = cluster
+    await b.claim("terminal", "s1")
+
+    async with client.ws_connect("http://worker/api/terminal/ws?session_id=s1") as ws:
+        await ws.send_str("ls")
+        assert await ws.receive_str() == f"{b.worker_id}:s1:ls"
+
+    async with client.ws_connect("http://worker/api/terminal/ws?session_id=new") as ws:
+        await ws.send_str("pwd")
+        assert await ws.receive_str() == f"{a.worker_id}:new:pwd"
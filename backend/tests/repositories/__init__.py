@@ -0,0 +1,3 @@
+"""
+Repository tests package
+"""
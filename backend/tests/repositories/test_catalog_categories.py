@@ -0,0 +1,102 @@
+"""
+Tests for SQL-side skill / agent category aggregation
+"""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.catalog import catalog_etag, get_catalog_version
+from app.core.database import Base
+from app.models.skill import SkillSource
+from app.repositories.agent_repository import AgentRepository
+from app.repositories.search_index import ensure_search_index
+from app.repositories.skill_repository import SkillRepository
+from app.schemas.agent import AgentCreate
+from app.schemas.skill import SkillCreate, SkillUpdate
+from app.services.agent_service import AgentService
+from app.services.skill_service import SkillService
+
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest.fixture
+async def db_session():
+    """创建测试数据库会话"""
+    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(ensure_search_index)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with async_session() as session:
+        yield session
+
+    await engine.dispose()
+
+
+def _skill(name: str, source: SkillSource, **meta) -> SkillCreate:
+    return SkillCreate(
+        name=name, full_name=name, type="command", description=f"{name} skill",
+        source=source, meta=meta or None,
+    )
+
+
+@pytest.mark.asyncio
+async def test_skill_categories_grouped_in_sql(db_session):
+    """技能分类统计与子分类由派生列 GROUP BY 得到"""
+    repo = SkillRepository(db_session)
+    version = get_catalog_version("skills")
+
+    await repo.create(_skill("a", SkillSource.GLOBAL))
+    await repo.create(_skill("b", SkillSource.USER, path="/home/me/.claude/skills/b"))
+    await repo.create(_skill("c", SkillSource.PROJECT, path="/work/alpha/.claude/skills/c"))
+    await repo.create(_skill("d", SkillSource.PROJECT, path="/work/beta/.claude/skills/d"))
+    plugin = await repo.create(_skill(
+        "e", SkillSource.PLUGIN, plugin_name="docs",
+        path="/home/me/.claude/plugins/docs/skills/e",
+    ))
+
+    assert get_catalog_version("skills") == version + 5
+
+    categories = await SkillService(repo).get_categories()
+    assert categories["counts"] == {"builtin": 1, "user": 1, "project": 2, "plugin": 1}
+    assert categories["plugins"] == [{"id": "docs", "name": "docs", "count": 1}]
+    assert [p["id"] for p in categories["projects"]] == ["alpha", "beta"]
+    assert categories["users"] == [
+        {"id": "plugin:docs", "name": "plugin/docs", "count": 1},
+        {"id": "public", "name": "public", "count": 1},
+    ]
+
+    # 更新 meta 后分类字段同步刷新
+    await repo.update(plugin.id, SkillUpdate(meta={"plugin_name": "tools", "path": "/srv/tools/e"}))
+    categories = await SkillService(repo).get_categories()
+    assert categories["plugins"] == [{"id": "tools", "name": "tools", "count": 1}]
+    assert [u["id"] for u in categories["users"]] == ["public"]
+
+
+@pytest.mark.asyncio
+async def test_agent_categories_and_etag(db_session):
+    """子代理分类统计包含插件和项目子分类，写入后 ETag 变化"""
+    repo = AgentRepository(db_session)
+    etag = catalog_etag("agents")
+
+    await repo.create(AgentCreate(
+        name="reviewer", description="Reviews code", scope="project",
+        meta={"path": "/work/alpha/.claude/agents/reviewer.md"},
+    ))
+    await repo.bulk_upsert([{
+        "name": "writer", "description": "Writes docs", "scope": "plugin",
+        "meta": {"plugin_name": "docs", "path": "/home/me/.claude/plugins/docs/agents/writer.md"},
+    }])
+
+    assert catalog_etag("agents") != etag
+
+    categories = await AgentService(repo).get_categories()
+    assert categories["counts"]["project"] == 1
+    assert categories["counts"]["plugin"] == 1
+    assert categories["counts"]["builtin"] == 0
+    assert categories["plugins"] == [{"id": "docs", "name": "docs", "count": 1}]
+    assert categories["projects"] == [{"id": "alpha", "name": "alpha", "count": 1}]
@@ -0,0 +1,86 @@
+"""
+SQLite 性能配置与串行写队列单元测试（WAL pragma、批量提交、单个写操作失败隔离、关闭前执行完排队的写操作）
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import func, select, text
+
+from app.core.database import Base, create_db_engine, create_session_factory
+from app.core.db_writer import WriteQueue
+from app.models.task import Execution, ExecutionType
+
+
+@pytest.fixture
+async def engines(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    reader = create_db_engine(url, sqlite_profile=True)
+    writer = create_db_engine(url, sqlite_profile=True, writer=True)
+    async with reader.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield reader, writer
+    await writer.dispose()
+    await reader.dispose()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_profile_pragmas(engines):
+    reader, _ = engines
+    async with reader.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1  # NORMAL
+        assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+
+
+@pytest.mark.asyncio
+async def test_write_queue_batches_and_isolates_failures(engines):
+    reader, writer = engines
+    queue = WriteQueue(create_session_factory(writer), max_batch=64)
+
+    async def insert(db, i):
+        if i == 7:
+            db.add(Execution(execution_type=ExecutionType.AGENT_TEST, session_id="doomed"))
+            await db.flush()
+            raise ValueError("boom")
+        execution = Execution(execution_type=ExecutionType.AGENT_TEST, session_id=f"s{i}")
+        db.add(execution)
+        await db.flush()
+        return execution.id
+
+    results = await asyncio.gather(
+        *(queue.submit(lambda db, i=i: insert(db, i)) for i in range(100)),
+        return_exceptions=True,
+    )
+    await queue.close()
+
+    errors = [r for r in results if isinstance(r, Exception)]
+    assert len(errors) == 1 and str(errors[0]) == "boom"
+    assert len(set(r for r in results if isinstance(r, int))) == 99
+    # 100 个并发写操作合并为少数几个事务
+    assert queue.operations == 100
+    assert queue.batches <= 3
+
+    async with create_session_factory(reader)() as db:
+        count = (await db.execute(select(func.count()).select_from(Execution))).scalar_one()
+        doomed = (await db.execute(
+            select(func.count()).where(Execution.session_id == "doomed")
+        )).scalar_one()
+    assert count == 99
+    assert doomed == 0
+
+
+@pytest.mark.asyncio
+async def test_close_drains_pending_writes(engines):
+    reader, writer = engines
+    queue = WriteQueue(create_session_factory(writer), max_batch=8)
+
+    async def insert(db, i):
+        db.add(Execution(execution_type=ExecutionType.AGENT_TEST, session_id=f"s{i}"))
+
+    pending = [asyncio.create_task(queue.submit(lambda db, i=i: insert(db, i))) for i in range(50)]
+    await asyncio.sleep(0)
+    await queue.close()
+
+    assert all(task.done() and task.exception() is None for task in pending)
+    async with create_session_factory(reader)() as db:
+        assert (await db.execute(select(func.count()).select_from(Execution))).scalar_one() == 50
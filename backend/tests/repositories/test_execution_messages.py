@@ -0,0 +1,81 @@
+"""
+Tests for append-only execution chat message storage
+"""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.task import Execution, ExecutionType
+from app.repositories.execution_message_repository import ExecutionMessageRepository
+
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest.fixture
+async def db_session():
+    """创建测试数据库会话"""
+    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with async_session() as session:
+        yield session
+
+    await engine.dispose()
+
+
+async def _execution(db: AsyncSession) -> Execution:
+    execution = Execution(execution_type=ExecutionType.AGENT_TEST, session_id="s")
+    db.add(execution)
+    await db.flush()
+    return execution
+
+
+@pytest.mark.asyncio
+async def test_append_and_tail_pagination(db_session):
+    """追加写入分配连续 seq，tail 支持按 before_seq 向前翻页"""
+    execution = await _execution(db_session)
+    repo = ExecutionMessageRepository(db_session)
+
+    for i in range(5):
+        await repo.append(
+            execution.id,
+            {"id": f"user-{i}", "role": "user", "content": f"q{i}", "status": "success"},
+            {"id": f"agent-{i}", "role": "agent", "content": f"a{i}", "content_type": "plan"},
+        )
+    await db_session.commit()
+
+    assert await repo.count(execution.id) == 10
+
+    latest = await repo.tail(execution.id, limit=3)
+    assert [m["seq"] for m in latest] == [7, 8, 9]
+    assert latest[-1] == {"id": "agent-4", "role": "agent", "content": "a4", "content_type": "plan", "seq": 9}
+
+    older = await repo.tail(execution.id, limit=3, before_seq=latest[0]["seq"])
+    assert [m["content"] for m in older] == ["q2", "a2", "q3"]
+
+    page = await repo.list(execution.id, offset=8)
+    assert [m["content"] for m in page] == ["q4", "a4"]
+
+
+@pytest.mark.asyncio
+async def test_copy_count_many_and_clear(db_session):
+    """fork 复制到分叉点，批量计数，清空后 seq 从 0 重新开始"""
+    source = await _execution(db_session)
+    target = await _execution(db_session)
+    repo = ExecutionMessageRepository(db_session)
+
+    await repo.append(source.id, *({"role": "user", "content": str(i)} for i in range(4)))
+    assert await repo.copy(source.id, target.id, upto_seq=1) == 2
+    await db_session.commit()
+
+    assert await repo.count_many([source.id, target.id]) == {source.id: 4, target.id: 2}
+
+    await repo.clear(source.id)
+    rows = await repo.append(source.id, {"role": "user", "content": "again"})
+    assert rows[0].seq == 0
@@ -0,0 +1,80 @@
+"""
+Tests for keyset pagination of execution history
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.task import Execution, ExecutionStatus, ExecutionType
+from app.repositories.executions_repo import ExecutionRepository, decode_cursor, encode_cursor
+
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest.fixture
+async def db_session():
+    """创建测试数据库会话，预置 25 条执行记录（部分 updated_at 相同）"""
+    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with async_session() as session:
+        base = datetime(2026, 1, 1)
+        for i in range(25):
+            # 每两条共享同一个 updated_at，验证 id 作为次级排序键
+            timestamp = base + timedelta(minutes=i // 2)
+            session.add(Execution(
+                execution_type=ExecutionType.TERMINAL if i % 3 == 0 else ExecutionType.WORKFLOW,
+                status=ExecutionStatus.SUCCEEDED,
+                created_at=timestamp,
+                updated_at=timestamp,
+            ))
+        await session.commit()
+        yield session
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_cover_all_rows_in_order(db_session):
+    """游标翻页不重复、不遗漏，顺序与 offset 分页一致"""
+    repo = ExecutionRepository(db_session)
+    expected = [e.id for e in await repo.list_for_history(limit=100)]
+
+    seen = []
+    cursor = None
+    while True:
+        page = await repo.list_for_history(limit=4, cursor=cursor)
+        seen.extend(e.id for e in page)
+        if len(page) < 4:
+            break
+        cursor = encode_cursor(page[-1])
+
+    assert seen == expected
+    assert len(seen) == 25
+
+
+@pytest.mark.asyncio
+async def test_cursor_with_filters_and_capped_count(db_session):
+    """过滤条件与游标组合，count 支持上限"""
+    repo = ExecutionRepository(db_session)
+    filters = {"execution_type": ExecutionType.TERMINAL}
+
+    first = await repo.list_for_history(limit=5, filters=filters)
+    rest = await repo.list_for_history(limit=100, filters=filters, cursor=encode_cursor(first[-1]))
+
+    assert all(e.execution_type == ExecutionType.TERMINAL for e in first + rest)
+    assert len(first) + len(rest) == await repo.count_for_history(filters=filters) == 9
+    assert await repo.count_for_history(cap=10) == 10
+
+
+def test_invalid_cursor():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
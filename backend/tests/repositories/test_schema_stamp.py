@@ -0,0 +1,50 @@
+"""
+Tests for the schema fingerprint used by fast start
+"""
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine
+
+from app.core.database import Base
+from app.database.schema_stamp import read_schema_stamp, schema_fingerprint, write_schema_stamp
+
+
+def test_fingerprint_tracks_table_definitions():
+    import app.models  # noqa: F401  注册所有模型
+
+    assert schema_fingerprint(Base.metadata) == schema_fingerprint(Base.metadata)
+
+    metadata = MetaData()
+    Table("demo", metadata, Column("id", Integer, primary_key=True))
+    before = schema_fingerprint(metadata)
+    Table("demo", metadata, Column("name", String(50)), extend_existing=True)
+    assert schema_fingerprint(metadata) != before
+
+
+def test_stamp_roundtrip():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        assert read_schema_stamp(conn) is None
+        write_schema_stamp(conn, "abc")
+        write_schema_stamp(conn, "def")
+        assert read_schema_stamp(conn) == "def"
+
+
+async def _init_db_with_migration_result(monkeypatch, tmp_path, success):
+    from app.core import database
+    from app.database import migration
+
+    engine = database.create_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'stamp.db'}", sqlite_profile=False)
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database.settings, "fast_start", True)
+    monkeypatch.setattr(migration, "auto_migrate", lambda url: success)
+    try:
+        await database.init_db()
+        async with engine.connect() as conn:
+            return await conn.run_sync(read_schema_stamp)
+    finally:
+        await engine.dispose()
+
+
+async def test_failed_migration_is_not_stamped(monkeypatch, tmp_path):
+    # 迁移失败时不记录指纹，下次启动重新迁移
+    assert await _init_db_with_migration_result(monkeypatch, tmp_path, False) is None
+    assert await _init_db_with_migration_result(monkeypatch, tmp_path, True) == schema_fingerprint(Base.metadata)
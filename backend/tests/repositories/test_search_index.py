@@ -0,0 +1,113 @@
+"""
+Tests for the FTS5 catalog search index (skills / agents)
+"""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.skill import SkillSource
+from app.repositories.agent_repository import AgentRepository
+from app.repositories.search_index import build_match_query, ensure_search_index
+from app.repositories.skill_repository import SkillRepository
+from app.schemas.agent import AgentCreate, AgentUpdate
+from app.schemas.skill import SkillCreate
+
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest.fixture
+async def db_session():
+    """创建带 FTS5 索引的测试数据库会话"""
+    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(ensure_search_index)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with async_session() as session:
+        yield session
+
+    await engine.dispose()
+
+
+def test_build_match_query():
+    """用户输入转换为带引号的前缀查询"""
+    assert build_match_query("pdf ext") == '"pdf"* "ext"*'
+    assert build_match_query('say "hi"') == '"say"* "hi"*'
+    assert build_match_query("  ?? ") is None
+    # CJK 需要子串匹配，交给 ILIKE
+    assert build_match_query("代码审查") is None
+
+
+@pytest.mark.asyncio
+async def test_skill_search_prefix_tags_and_body(db_session, tmp_path):
+    """技能搜索覆盖前缀、标签和 SKILL.md 正文"""
+    skill_dir = tmp_path / "pdf-tools"
+    skill_dir.mkdir()
+    (skill_dir / "SKILL.md").write_text("# PDF tools\n\nUse pdfplumber to extract tables.")
+
+    repo = SkillRepository(db_session)
+    await repo.create(SkillCreate(
+        name="pdf-tools", full_name="user/pdf-tools", type="command",
+        description="Work with PDF documents", tags=["documents"],
+        source=SkillSource.USER, meta={"path": str(skill_dir)},
+    ))
+    await repo.create(SkillCreate(
+        name="git-helper", full_name="user/git-helper", type="command",
+        description="Helps with git commits", tags=["vcs"], source=SkillSource.USER,
+    ))
+
+    skills, total = await repo.search("pdfplu")
+    assert total == 1
+    assert skills[0].name == "pdf-tools"
+    assert "<mark>" in skills[0].search_snippet
+
+    skills, total = await repo.search("vcs")
+    assert [s.name for s in skills] == ["git-helper"]
+
+    await repo.delete(skills[0].id)
+    assert await repo.search("vcs") == ([], 0)
+
+
+@pytest.mark.asyncio
+async def test_agent_search_ranks_name_matches_first(db_session):
+    """名称命中的 agent 排在仅正文命中的前面，更新后索引同步"""
+    repo = AgentRepository(db_session)
+    prompt_only = await repo.create(AgentCreate(
+        name="writer", description="Writes docs", system_prompt="You review code carefully.",
+    ))
+    await repo.create(AgentCreate(
+        name="code-reviewer", description="Reviews pull requests", system_prompt="Be concise.",
+    ))
+
+    agents, total = await repo.search("review")
+    assert total == 2
+    assert agents[0].name == "code-reviewer"
+
+    await repo.update(prompt_only.id, AgentUpdate(system_prompt="You write changelogs."))
+    agents, total = await repo.search("review")
+    assert [a.name for a in agents] == ["code-reviewer"]
+
+
+@pytest.mark.asyncio
+async def test_cjk_substring_search_falls_back_to_ilike(db_session):
+    """中文词内子串（unicode61 会把整段中文当作一个词）仍能搜到"""
+    repo = AgentRepository(db_session)
+    await repo.create(AgentCreate(name="reviewer", description="负责代码审查和质量把关"))
+    await repo.create(AgentCreate(name="writer", description="撰写技术文档"))
+
+    agents, total = await repo.search("审查")
+    assert total == 1
+    assert agents[0].name == "reviewer"
+
+    skills = SkillRepository(db_session)
+    await skills.create(SkillCreate(
+        name="lint", full_name="user/lint", type="command",
+        description="代码质量检查", source=SkillSource.USER,
+    ))
+    found, total = await skills.search("质量")
+    assert [s.name for s in found] == ["lint"]
@@ -0,0 +1,169 @@
+"""
+Agent 进程管理单元测试（写回式活动持久化、事件驱动 PTY 读取与多订阅者广播）
+"""
+import asyncio
+import os
+import pty
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.core.db_writer import WriteQueue
+from app.models.task import Execution, ExecutionType
+from app.repositories.execution_message_repository import ExecutionMessageRepository
+from app.services.agent_process_manager import (
+    TERMINAL_OUTPUT_PERSIST_BYTES,
+    ActivityWriter,
+    AgentProcessManager,
+    ChatMessage,
+    OutputRing,
+    ProcessInfo,
+)
+
+
+@pytest.fixture
+async def session_factory(tmp_path):
+    # 写队列使用独立连接，内存库无法共享，使用临时文件
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'agents.db'}", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db_session(session_factory):
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+async def write_queue(session_factory):
+    queue = WriteQueue(session_factory)
+    yield queue
+    await queue.close()
+
+
+async def _process_info(db: AsyncSession) -> ProcessInfo:
+    execution = Execution(execution_type=ExecutionType.AGENT_TEST, session_id="s")
+    db.add(execution)
+    await db.commit()
+    now = datetime.utcnow()
+    return ProcessInfo(
+        agent_id=1, session_id="s", pid=0, master_fd=-1,
+        created_at=now, last_activity_at=now, execution_id=execution.id,
+    )
+
+
+def test_output_ring_keeps_latest_bytes():
+    ring = OutputRing(8)
+    for chunk in (b"abc", b"defg", b"hijk"):
+        ring.append(chunk)
+    assert len(ring) == 8
+    assert ring.total == 11
+    assert ring.text() == "defghijk"
+    assert ring.text(3) == "ijk"
+
+    ring.append(b"0123456789")
+    assert ring.text() == "23456789"
+
+    # 截断在多字节字符中间时跳过残缺字节
+    ring = OutputRing(4, "中文".encode())
+    assert ring.text() == "文"
+
+
+@pytest.mark.asyncio
+async def test_chatty_output_is_coalesced(db_session, write_queue):
+    """大量小块输出在间隔内只产生一次提交，且只保留最近的输出"""
+    info = await _process_info(db_session)
+    writer = ActivityWriter(interval=3600, max_bytes=64 * 1024, write_queue=write_queue)
+
+    for i in range(1000):
+        writer.record_output(info, b"x" * 4095 + b"\n")
+        await writer.maybe_flush(info)
+
+    # 4 MB 输出，按 64 KB 合并
+    assert write_queue.batches == 4096 * 1000 // (64 * 1024)
+    assert len(info.output) <= info.output.capacity
+
+    info.chat_history.append(ChatMessage(id="u1", role="user", content="hi", timestamp=""))
+    assert not await writer.maybe_flush(info)
+    assert await writer.flush(info)
+    assert not await writer.flush(info)
+
+    execution = (await db_session.execute(
+        select(Execution).where(Execution.id == info.execution_id)
+        .execution_options(populate_existing=True)
+    )).scalar_one()
+    assert len(execution.terminal_output) == TERMINAL_OUTPUT_PERSIST_BYTES
+    assert execution.last_activity_at == info.last_activity_at
+    messages = await ExecutionMessageRepository(db_session).list(info.execution_id)
+    assert [m["content"] for m in messages] == ["hi"]
+
+
+@pytest.mark.asyncio
+async def test_interval_triggers_flush(db_session, write_queue):
+    info = await _process_info(db_session)
+    writer = ActivityWriter(interval=5, max_bytes=1 << 30, write_queue=write_queue)
+
+    writer.record_output(info, b"hello")
+    assert not await writer.maybe_flush(info)
+
+    info.last_flush_at -= 10
+    assert await writer.maybe_flush(info)
+    # 没有新的脏字段时不再提交
+    info.last_flush_at -= 10
+    assert not await writer.maybe_flush(info)
+    assert write_queue.batches == 1
+
+
+async def _collect(aiter, out: list):
+    async for item in aiter:
+        out.append((time.perf_counter(), item))
+
+
+@pytest.mark.asyncio
+async def test_pty_output_is_broadcast_without_polling(db_session, write_queue):
+    """多个订阅者各收到一份输出，延迟远低于旧的 100 ms 轮询；PTY 关闭后全部结束"""
+    master_fd, slave_fd = pty.openpty()
+    manager = AgentProcessManager()
+    manager._activity = ActivityWriter(write_queue=write_queue)
+    info = await _process_info(db_session)
+    info.master_fd = master_fd
+    manager._processes[1] = info
+
+    raw_a, raw_b, chats = [], [], []
+    readers = [
+        asyncio.create_task(_collect(manager.read_from_process(1), raw_a)),
+        asyncio.create_task(_collect(manager.read_from_process(1), raw_b)),
+        asyncio.create_task(_collect(manager.read_chat_from_process(1), chats)),
+    ]
+    await asyncio.sleep(0.05)
+
+    sent_at = time.perf_counter()
+    os.write(slave_fd, "你好 agent\n".encode())
+    await asyncio.sleep(0.1)
+    os.close(slave_fd)
+    await asyncio.wait_for(asyncio.gather(*readers), timeout=5)
+    os.close(master_fd)
+
+    for received in (raw_a, raw_b):
+        assert "".join(text for _, text in received).strip() == "你好 agent"
+        assert received[0][0] - sent_at < 0.05
+    # 对话消息只解析一次
+    assert len(info.chat_history) == 1
+    assert [msg for _, msg in chats] == info.chat_history
+    assert not info.reading and info.subscribers == {}
+
+    execution = (await db_session.execute(
+        select(Execution).where(Execution.id == info.execution_id)
+        .execution_options(populate_existing=True)
+    )).scalar_one()
+    assert "你好 agent" in execution.terminal_output
@@ -0,0 +1,120 @@
+"""
+基准测试套件单元测试（合成目录树可被扫描器解析、生成可复现、fake claude 输出格式、终端负载命令、结果对比）
+"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+from app.adapters.claude.file_scanner import ClaudeFileScanner
+from benchmarks.datagen import TreeSpec, generate_tree, load_or_generate
+from benchmarks.results import compare
+from benchmarks.server import FAKE_CLAUDE
+from benchmarks.terminal import DONE_MARKER, TerminalLoad, _output_command
+
+SPEC = TreeSpec(skills=4, agents=3, teams=2, plugins=1, plugin_skills=2, plugin_agents=1,
+                projects=2, sessions_per_project=2, transcript_mb=0.2, seed=7)
+
+
+def _snapshot(root):
+    return {
+        str(path.relative_to(root)): (path.read_bytes(), path.stat().st_mtime)
+        for path in sorted(root.rglob("*")) if path.is_file()
+    }
+
+
+@pytest.mark.asyncio
+async def test_generated_tree_is_scannable(tmp_path):
+    manifest = generate_tree(tmp_path / "home", SPEC)
+    claude_dir = tmp_path / "home" / ".claude"
+
+    scanner = ClaudeFileScanner()
+    scanner.config_dir = claude_dir
+    scanner.skills_dir = claude_dir / "skills"
+    scanner.plugins_dir = claude_dir / "plugins"
+    skills = await scanner.scan_skills()
+    assert len(skills) == manifest["skill_files"] == 8
+    assert {skill["name"] for skill in skills} >= {"bench-skill-0000", "bench-plugin-000-skill-01"}
+
+    transcripts = sorted(claude_dir.glob("projects/*/*.jsonl"), key=lambda path: path.stat().st_mtime)
+    assert len(transcripts) == manifest["sessions"] == 4
+    # 最大的会话 mtime 最新，dashboard / token-usage 读取的正是它
+    assert transcripts[-1].stat().st_size == max(path.stat().st_size for path in transcripts)
+    records = [json.loads(line) for line in transcripts[-1].read_text().splitlines()[:4]]
+    assert [record["type"] for record in records] == ["user", "assistant", "user", "assistant"]
+    assert records[1]["message"]["usage"]["output_tokens"] > 0
+    assert records[1]["message"]["content"][1]["name"] in ("Skill", "Task")
+
+
+def test_generation_is_deterministic_and_reused(tmp_path):
+    first = load_or_generate(tmp_path / "a", SPEC)
+    load_or_generate(tmp_path / "b", SPEC)
+    assert _snapshot(tmp_path / "a" / "home") == _snapshot(tmp_path / "b" / "home")
+
+    marker = tmp_path / "a" / "home" / ".claude" / "skills" / "bench-skill-0000" / "SKILL.md"
+    marker.write_text("changed")
+    assert load_or_generate(tmp_path / "a", SPEC) == first
+    assert marker.read_text() == "changed"  # spec 相同时不重新生成
+
+
+def _fake_claude(tmp_path, *args, stdin=None):
+    env = {"HOME": str(tmp_path), "PATH": "/usr/bin:/bin", "FAKE_CLAUDE_LATENCY": "0",
+           "FAKE_CLAUDE_TOKENS": "30", "FAKE_CLAUDE_TOKEN_RATE": "0"}
+    return subprocess.run([sys.executable, str(FAKE_CLAUDE), *args], input=stdin, env=env, cwd=tmp_path,
+                          capture_output=True, text=True, timeout=30)
+
+
+def test_fake_claude_output_formats(tmp_path):
+    assert "Claude Code" in _fake_claude(tmp_path, "--version").stdout
+
+    text = _fake_claude(tmp_path, "-p", "hello", "--output-format", "text").stdout
+    assert len(text.split()) == 30
+    assert _fake_claude(tmp_path, "-p", "hello").stdout == text  # 同一 prompt 回复相同
+
+    events = [json.loads(line) for line in
+              _fake_claude(tmp_path, "-p", "hello", "--output-format", "stream-json").stdout.splitlines()]
+    assert events[0]["type"] == "system" and events[-1]["type"] == "result"
+    assert sum(event["type"] == "stream_event" for event in events) == 30
+    assert events[-1]["result"] == text.strip()
+
+    result = json.loads(_fake_claude(tmp_path, "-p", "hello", "--output-format", "json",
+                                     "--session-id", "s-1").stdout)
+    assert result["session_id"] == "s-1" and not result["is_error"]
+    transcript = tmp_path / ".claude" / "projects" / str(tmp_path).replace("/", "-") / "s-1.jsonl"
+    assert len(transcript.read_text().splitlines()) == 2
+
+    interactive = _fake_claude(tmp_path, "--agent", "reviewer", stdin="first\nsecond\n").stdout
+    assert "reviewer" in interactive and interactive.count("> ") == 3
+
+
+@pytest.mark.parametrize("generator", ["bulk", "ansi"])
+def test_terminal_output_command_emits_exact_size(generator):
+    command = _output_command(generator, 10000).rstrip("\r")
+    output = subprocess.run(["bash", "-c", command], capture_output=True, check=True).stdout
+    payload, marker = output.rsplit(b"\n", 2)[0], output.rsplit(b"\n", 2)[1]
+    assert len(payload) == 10000
+    assert marker.decode() == DONE_MARKER
+    # 命令行本身的回显不能包含结束标记
+    assert DONE_MARKER not in command
+
+
+def test_terminal_load_assigns_generators_round_robin():
+    load = TerminalLoad(sessions=5, generators=("bulk", "echo"))
+    assert load.assignments() == ["bulk", "echo", "bulk", "echo", "bulk"]
+
+
+def test_compare_flags_regressions_by_direction():
+    baseline = {"scenarios": {"dashboard": {"headline": {"p50_ms": 100.0, "requests_per_s": 50.0}},
+                              "websocket_fanout": {"headline": {"missed": 0}}}}
+    current = {"scenarios": {"dashboard": {"headline": {"p50_ms": 90.0, "requests_per_s": 30.0}},
+                             "websocket_fanout": {"headline": {"missed": 0}}}}
+    rows, regressed = compare(baseline, current, threshold=0.15)
+    status = {row["metric"]: row["status"] for row in rows}
+    assert status == {"p50_ms": "ok", "requests_per_s": "regression", "missed": "ok"}
+    assert regressed
+
+    current["scenarios"]["dashboard"]["headline"]["requests_per_s"] = 50.0
+    current["scenarios"]["websocket_fanout"]["headline"]["missed"] = 3
+    rows, regressed = compare(baseline, current)
+    assert regressed and {row["metric"] for row in rows if row["status"] == "regression"} == {"missed"}
@@ -0,0 +1,113 @@
+"""
+多 worker 协调层单元测试（两个 SqliteCoordinator 共享同一个数据库文件模拟两个 worker）
+"""
+import asyncio
+
+import pytest
+
+from app.core.coordination import LocalCoordinator, SqliteCoordinator
+
+
+@pytest.fixture
+async def workers(tmp_path):
+    db_path = tmp_path / "coordination.db"
+    a = SqliteCoordinator(db_path, address="a.sock", poll_interval=0.01, heartbeat_interval=0.05, worker_ttl=0.5)
+    b = SqliteCoordinator(db_path, address="b.sock", poll_interval=0.01, heartbeat_interval=0.05, worker_ttl=0.5)
+    await a.start()
+    await b.start()
+    yield a, b
+    await b.close()
+    await a.close()
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_every_worker(workers):
+    a, b = workers
+    received = {"a": [], "b": []}
+
+    async def on_a(message):
+        received["a"].append(message)
+
+    async def on_b(message):
+        received["b"].append(message)
+
+    a.subscribe("ws.broadcast", on_a)
+    b.subscribe("ws.broadcast", on_b)
+
+    await a.publish("ws.broadcast", {"n": 1})
+    await b.publish("ws.broadcast", {"n": 2})
+    await _wait_for(lambda: len(received["a"]) == 2 and len(received["b"]) == 2)
+    # 本 worker 的订阅者直接回调，不会从共享表再收到一次
+    await asyncio.sleep(0.05)
+    assert sorted(m["n"] for m in received["a"]) == [1, 2]
+    assert sorted(m["n"] for m in received["b"]) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_session_ownership(workers):
+    a, b = workers
+    assert await a.owner("agent", "1") is None
+
+    owner = await a.claim_if_absent("agent", "1")
+    assert owner.worker_id == a.worker_id
+    assert (await b.claim_if_absent("agent", "1")).worker_id == a.worker_id
+    assert (await b.owner("agent", "1")).address == "a.sock"
+
+    # 只有持有者能释放
+    await b.release("agent", "1")
+    assert (await b.owner("agent", "1")).worker_id == a.worker_id
+    await a.release("agent", "1")
+    assert await b.owner("agent", "1") is None
+
+    # 持有者失联（停止心跳）后归属失效，可被其他 worker 接管
+    await a.claim("terminal", "s1")
+    for task in a._tasks:
+        task.cancel()
+    await asyncio.sleep(0.6)
+    assert await b.owner("terminal", "s1") is None
+    assert (await b.claim_if_absent("terminal", "s1")).worker_id == b.worker_id
+
+
+@pytest.mark.asyncio
+async def test_leader_and_lock_are_exclusive(workers):
+    a, b = workers
+    assert await a.is_leader("monitor")
+    assert not await b.is_leader("monitor")
+    assert await a.is_leader("monitor")
+
+    order = []
+
+    async def critical(worker, name):
+        async with worker.lock("scan"):
+            order.append(f"{name}-in")
+            await asyncio.sleep(0.05)
+            order.append(f"{name}-out")
+
+    await asyncio.gather(critical(a, "a"), critical(b, "b"), critical(a, "a2"))
+    for i in range(0, len(order), 2):
+        assert order[i].replace("-in", "") == order[i + 1].replace("-out", "")
+
+
+@pytest.mark.asyncio
+async def test_local_coordinator():
+    coordinator = LocalCoordinator()
+    received = []
+
+    async def handler(message):
+        received.append(message)
+
+    unsubscribe = coordinator.subscribe("c", handler)
+    await coordinator.publish("c", {"x": 1})
+    unsubscribe()
+    await coordinator.publish("c", {"x": 2})
+    assert received == [{"x": 1}]
+    assert coordinator.distributed is False
+    assert await coordinator.is_leader("anything")
+    assert (await coordinator.claim_if_absent("job", "j")).worker_id == coordinator.worker_id
@@ -0,0 +1,72 @@
+"""
+Git 仓库扫描单元测试（并行遍历、黑名单剪枝、按目录 mtime 缓存的增量重扫）
+"""
+import os
+
+from app.services import git_repo_scanner
+from app.services.git_repo_scanner import GitRepoScanner
+
+
+def _make_repo(path):
+    (path / ".git").mkdir(parents=True)
+
+
+def _build_tree(root):
+    _make_repo(root / "work" / "alpha")
+    # 仓库内部的嵌套仓库不再向下扫描
+    _make_repo(root / "work" / "alpha" / "vendor" / "inner")
+    _make_repo(root / "work" / "group" / "beta")
+    # worktree / submodule 形式：.git 是文件
+    (root / "work" / "gamma").mkdir(parents=True)
+    (root / "work" / "gamma" / ".git").write_text("gitdir: ../elsewhere\n")
+    # 黑名单与隐藏目录被剪枝
+    _make_repo(root / "work" / "node_modules" / "dep")
+    _make_repo(root / ".hidden" / "secret")
+    _make_repo(root / "go" / "pkg" / "mod")
+    _make_repo(root / "a" / "b" / "c" / "too-deep")
+
+
+def _count_scandir(monkeypatch):
+    calls = []
+    real_scandir = os.scandir
+
+    def counting_scandir(path):
+        calls.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(git_repo_scanner.os, "scandir", counting_scandir)
+    return calls
+
+
+def test_scan_finds_repos_and_prunes(tmp_path):
+    _build_tree(tmp_path)
+    scanner = GitRepoScanner(workers=4)
+
+    repos = scanner.scan_directories([str(tmp_path)], max_depth=3)
+
+    work = tmp_path / "work"
+    assert repos == [str(work / "alpha"), str(work / "gamma"), str(work / "group" / "beta")]
+    assert len(scanner.scan_directories([str(tmp_path)], max_depth=4)) == 4
+
+
+def test_rescan_only_lists_changed_directories(tmp_path, monkeypatch):
+    """目录未变化时复用缓存；新增仓库只需重新读取发生变化的目录"""
+    _build_tree(tmp_path)
+    cache_path = tmp_path / "cache" / "scan.json"
+    scanner = GitRepoScanner(cache_path=cache_path, workers=4)
+    first = scanner.scan_directories([str(tmp_path / "work")], max_depth=3)
+
+    calls = _count_scandir(monkeypatch)
+    assert scanner.scan_directories([str(tmp_path / "work")], max_depth=3) == first
+    assert calls == []
+
+    _make_repo(tmp_path / "work" / "group" / "delta")
+    # 新实例从持久化文件加载缓存
+    reloaded = GitRepoScanner(cache_path=cache_path, workers=4)
+    repos = reloaded.scan_directories([str(tmp_path / "work")], max_depth=3)
+
+    assert str(tmp_path / "work" / "group" / "delta") in repos
+    assert sorted(calls) == sorted([
+        str(tmp_path / "work" / "group"),
+        str(tmp_path / "work" / "group" / "delta"),
+    ])
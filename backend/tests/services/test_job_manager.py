@@ -0,0 +1,146 @@
+"""
+JobManager 单元测试
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import job_manager as job_manager_module
+from app.services.job_manager import JobManager, JobStatus
+
+
+async def _wait(job):
+    await asyncio.wait_for(job._done.wait(), timeout=2)
+
+
+@pytest.mark.asyncio
+async def test_job_reports_progress_and_result():
+    """Job 上报进度，结束后晚到的订阅者可以回放全部事件"""
+    manager = JobManager()
+
+    async def work(job):
+        job.report("step 1", 0.5)
+        return {"value": 42}
+
+    job = await manager.submit("demo", work)
+    await _wait(job)
+
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.to_dict()["result"] == {"value": 42}
+    assert job.progress == 1.0
+
+    events = [event async for event in manager.events(job.id)]
+    assert [e["type"] for e in events] == ["status", "status", "progress", "status"]
+    assert events[2]["message"] == "step 1"
+    assert events[-1]["status"] == "succeeded"
+    assert events[-1]["result"] == {"value": 42}
+
+
+@pytest.mark.asyncio
+async def test_max_workers_bounds_concurrency():
+    """超出并发上限的 Job 保持 pending，直到前一个 Job 结束"""
+    manager = JobManager(max_workers=1)
+    release = asyncio.Event()
+
+    async def blocking(job):
+        await release.wait()
+        return "first"
+
+    async def quick(job):
+        return "second"
+
+    first = await manager.submit("demo", blocking)
+    second = await manager.submit("demo", quick)
+    await asyncio.sleep(0.01)
+
+    assert first.status == JobStatus.RUNNING
+    assert second.status == JobStatus.PENDING
+
+    release.set()
+    await _wait(second)
+    assert first.result == "first"
+    assert second.result == "second"
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_job():
+    """取消运行中的 Job，订阅者收到 cancelled 后结束"""
+    manager = JobManager()
+
+    async def forever(job):
+        await asyncio.Event().wait()
+
+    job = await manager.submit("demo", forever)
+    await asyncio.sleep(0.01)
+
+    async def collect():
+        return [event async for event in manager.events(job.id)]
+
+    collector = asyncio.create_task(collect())
+    await asyncio.sleep(0.01)
+    assert manager.cancel(job.id) is True
+
+    events = await asyncio.wait_for(collector, timeout=2)
+    assert job.status == JobStatus.CANCELLED
+    assert events[-1]["status"] == "cancelled"
+    assert manager.cancel(job.id) is False
+
+
+@pytest.mark.asyncio
+async def test_submit_claims_ownership_before_returning(monkeypatch):
+    """submit 返回前 Job 归属已登记（客户端随后的请求可以路由到执行它的 worker）"""
+    claimed = []
+
+    class RecordingCoordinator:
+        async def claim(self, kind, key):
+            await asyncio.sleep(0.01)
+            claimed.append((kind, key))
+
+    monkeypatch.setattr(job_manager_module, "get_coordinator", lambda: RecordingCoordinator())
+    manager = JobManager()
+
+    async def work(job):
+        return "done"
+
+    job = await manager.submit("demo", work)
+    assert claimed == [(job_manager_module.JOB_OWNER_KIND, job.id)]
+    await _wait(job)
+    assert job.result == "done"
+
+
+@pytest.mark.asyncio
+async def test_run_propagates_http_error():
+    """同步等待时，Job 中的 HTTPException 原样传给调用方"""
+    manager = JobManager()
+
+    async def fail(job):
+        raise HTTPException(status_code=504, detail="timeout")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await manager.run("demo", fail)
+
+    assert exc_info.value.status_code == 504
+    job = manager.list(kind="demo")[0]
+    assert job.status == JobStatus.FAILED
+    assert job.error_status == 504
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_are_pruned():
+    """过期或超出保留数量的已结束 Job 被清理"""
+    manager = JobManager(retention_seconds=60, max_retained=2)
+
+    async def work(job):
+        return None
+
+    jobs = [await manager.submit("demo", work) for _ in range(3)]
+    for job in jobs:
+        await _wait(job)
+
+    assert len(manager.list()) == 2
+    assert manager.get(jobs[0].id) is None
+
+    jobs[1].finished_at = datetime.utcnow() - timedelta(seconds=120)
+    assert [job.id for job in manager.list()] == [jobs[2].id]
@@ -0,0 +1,128 @@
+"""
+测试执行引擎单元测试（并行执行、依赖哈希缓存、逐套件进度）
+"""
+import asyncio
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.testing.models import TestExecution as ExecutionRecord, TestNode as Node
+from app.testing.result_cache import TestResultCache as ResultCache
+from app.testing.test_runner import TestRunner as Runner
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+@pytest.fixture
+def project(tmp_path):
+    """临时项目：三个测试文件，其中两个依赖同一个本地模块"""
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "pkg" / "helpers.py").write_text("VALUE = 1\n")
+    (tmp_path / "tests").mkdir()
+    for name in ("a", "b"):
+        (tmp_path / "tests" / f"test_{name}.py").write_text("from pkg.helpers import VALUE\n")
+    (tmp_path / "tests" / "test_c.py").write_text("def test_c():\n    pass\n")
+    return tmp_path
+
+
+@pytest.fixture
+async def db_session():
+    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with async_session() as session:
+        session.add(Node(id="root", name="root", type="category", order=1))
+        session.add(Node(id="root.unit", name="unit", type="category", parent_id="root", order=1))
+        for order, name in enumerate(("a", "b", "c")):
+            session.add(Node(
+                id=f"root.unit.{name}", name=name, type="test_suite", parent_id="root.unit",
+                test_file=f"tests/test_{name}.py", test_command="pytest", order=order,
+            ))
+        await session.commit()
+        yield session
+
+    await engine.dispose()
+
+
+def _make_runner(project, calls):
+    runner = Runner(max_workers=3, cache=ResultCache(project / "cache.json", project))
+    runner.project_root = project
+
+    async def fake_pytest(test_file):
+        calls.append(test_file)
+        await asyncio.sleep(0.2)
+        return {"total": 2, "passed": 2, "failed": 0, "skipped": 0, "output": "2 passed"}
+
+    runner._run_pytest = fake_pytest
+    return runner
+
+
+@pytest.mark.asyncio
+async def test_category_runs_suites_in_parallel(project, db_session):
+    """分类下的套件并行执行，结果逐级汇总并写入执行记录"""
+    calls = []
+    events = []
+    runner = _make_runner(project, calls)
+
+    started = time.perf_counter()
+    execution = await runner.run_test_node("root", db_session, on_progress=events.append)
+    elapsed = time.perf_counter() - started
+
+    assert sorted(calls) == ["tests/test_a.py", "tests/test_b.py", "tests/test_c.py"]
+    assert elapsed < 0.5
+    assert execution.status == "passed"
+    assert execution.total_tests == 6
+
+    completes = [e for e in events if e["type"] == "suite_complete"]
+    assert len(completes) == 3
+    assert completes[-1]["completed"] == completes[-1]["suites"] == 3
+
+    records = {
+        r.test_node_id: r
+        for r in (await db_session.execute(ExecutionRecord.__table__.select())).all()
+    }
+    assert set(records) == {"root", "root.unit", "root.unit.a", "root.unit.b", "root.unit.c"}
+    assert records["root.unit"].total_tests == 6
+
+
+@pytest.mark.asyncio
+async def test_unchanged_suites_are_cached(project, db_session):
+    """依赖未变化的套件报告为 cached-pass；修改被依赖模块只会重跑相关套件"""
+    calls = []
+    runner = _make_runner(project, calls)
+    await runner.run_test_node("root", db_session)
+
+    calls.clear()
+    events = []
+    execution = await runner.run_test_node("root", db_session, on_progress=events.append)
+    assert calls == []
+    assert execution.status == "passed"
+    assert all(e["cached"] for e in events if e["type"] == "suite_complete")
+
+    (project / "pkg" / "helpers.py").write_text("VALUE = 2\n")
+    await runner.run_test_node("root", db_session)
+    assert sorted(calls) == ["tests/test_a.py", "tests/test_b.py"]
+
+
+@pytest.mark.asyncio
+async def test_failed_suites_are_not_cached(project, db_session):
+    """失败的结果不会被缓存"""
+    calls = []
+    runner = _make_runner(project, calls)
+
+    async def failing_pytest(test_file):
+        calls.append(test_file)
+        return {"total": 1, "passed": 0, "failed": 1, "skipped": 0, "output": "1 failed"}
+
+    runner._run_pytest = failing_pytest
+    execution = await runner.run_test_node("root.unit.c", db_session)
+    assert execution.status == "failed"
+
+    await runner.run_test_node("root.unit.c", db_session)
+    assert calls == ["tests/test_c.py", "tests/test_c.py"]
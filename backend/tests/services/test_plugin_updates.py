@@ -0,0 +1,108 @@
+"""
+插件更新检查单元测试（并发检查、按仓库缓存远程 head、marketplace 剪枝遍历）
+"""
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.plugin import PluginStatus
+from app.repositories.plugin_repository import PluginRepository
+from app.schemas.plugin import PluginCreate
+from app.services import plugin_service
+from app.services.plugin_service import PluginService, find_plugin_roots
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+
+class FakeGitAdapter:
+    """模拟 git：每个插件位于 repo-<n> 仓库中，远程查询耗时 0.1 秒"""
+
+    def __init__(self):
+        self.remote_calls = []
+
+    async def get_head_async(self, repo_path: Path):
+        repo = repo_path.parent
+        return str(repo), "local-hash"
+
+    async def get_remote_head_async(self, repo_path: Path, branch: str = "main"):
+        self.remote_calls.append(str(repo_path))
+        await asyncio.sleep(0.1)
+        return "remote-hash" if repo_path.name == "repo-0" else "local-hash"
+
+
+@pytest.fixture
+async def db_session():
+    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with async_session() as session:
+        yield session
+
+    await engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clear_remote_head_cache():
+    plugin_service._remote_head_cache.invalidate()
+    yield
+    plugin_service._remote_head_cache.invalidate()
+
+
+async def _create_plugins(repository: PluginRepository, root: Path, count: int, repos: int):
+    for i in range(count):
+        path = root / f"repo-{i % repos}" / f"plugin-{i}"
+        path.mkdir(parents=True)
+        await repository.create(PluginCreate(
+            name=f"plugin-{i}", display_name=f"plugin-{i}", description="test",
+            git_repo_url="https://example.com/repo.git", local_path=str(path),
+        ))
+
+
+@pytest.mark.asyncio
+async def test_check_all_updates_batches_remote_lookups(db_session, tmp_path):
+    """100 个插件并发检查，远程 head 每个仓库只查询一次，并在 TTL 内复用"""
+    repository = PluginRepository(db_session)
+    await _create_plugins(repository, tmp_path, count=100, repos=10)
+
+    service = PluginService(repository)
+    service.git_adapter = FakeGitAdapter()
+
+    started = time.perf_counter()
+    result = await service.check_all_updates()
+    elapsed = time.perf_counter() - started
+
+    assert result.total == 100
+    assert len(service.git_adapter.remote_calls) == 10
+    assert elapsed < 1.0
+
+    statuses = {item.name: item.status for item in result.items}
+    assert statuses["plugin-0"] == PluginStatus.UPDATE_AVAILABLE
+    assert statuses["plugin-1"] == PluginStatus.INSTALLED
+    assert all(item.last_check_time is not None for item in result.items)
+
+    # 缓存命中：不再查询远程；fresh=True 时重新查询
+    await service.check_all_updates()
+    assert len(service.git_adapter.remote_calls) == 10
+    await service.check_all_updates(fresh=True)
+    assert len(service.git_adapter.remote_calls) == 20
+
+
+def test_find_plugin_roots_stops_at_plugin_root(tmp_path):
+    """找到插件根目录后不再向下遍历，跳过隐藏目录"""
+    (tmp_path / "group" / "alpha" / "skills").mkdir(parents=True)
+    # 插件内部嵌套的 agents/ 目录不应被当作新的插件
+    (tmp_path / "group" / "alpha" / "skills" / "nested" / "agents").mkdir(parents=True)
+    (tmp_path / "beta" / "agents").mkdir(parents=True)
+    (tmp_path / ".git" / "hidden" / "skills").mkdir(parents=True)
+    (tmp_path / "empty" / "docs").mkdir(parents=True)
+
+    roots = find_plugin_roots(tmp_path)
+
+    assert roots == [tmp_path / "beta", tmp_path / "group" / "alpha"]
@@ -0,0 +1,115 @@
+"""
+截图服务单元测试（页面池并行、同项目请求合并、页面失败时名额归还、最新缩略图索引）
+
+用假的浏览器对象代替 Playwright。
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.services import screenshot_service
+from app.services.screenshot_service import ScreenshotService
+
+
+class FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def set_viewport_size(self, size):
+        pass
+
+    async def goto(self, url, **kwargs):
+        if url != "about:blank":
+            self.browser.loads.append(url)
+            await asyncio.sleep(0.1)
+
+    async def wait_for_timeout(self, ms):
+        pass
+
+    async def screenshot(self, **kwargs):
+        return b"\x89PNG fake"
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def new_page(self):
+        return self.browser.page_class(self.browser)
+
+    async def close(self):
+        pass
+
+
+class FailingPage(FakePage):
+    async def goto(self, url, **kwargs):
+        await super().goto(url, **kwargs)
+        if url != "about:blank":
+            raise RuntimeError("net::ERR_CONNECTION_REFUSED")
+
+
+class FakeBrowser:
+    def __init__(self, page_class=FakePage):
+        self.loads = []
+        self.contexts = 0
+        self.page_class = page_class
+
+    async def new_context(self):
+        self.contexts += 1
+        return FakeContext(self)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(screenshot_service, "THUMBNAILS_DIR", tmp_path)
+    svc = ScreenshotService(pool_size=4)
+    svc._browser = FakeBrowser()
+    return svc
+
+
+@pytest.mark.asyncio
+async def test_duplicate_requests_share_one_capture(service):
+    paths = await asyncio.gather(*(service.capture(1, "http://localhost:5173") for _ in range(5)))
+
+    assert len(set(paths)) == 1
+    assert service._browser.loads == ["http://localhost:5173"]
+    assert service.get_thumbnail_path(1) == paths[0]
+
+
+@pytest.mark.asyncio
+async def test_bulk_capture_runs_in_parallel_on_bounded_pool(service, tmp_path):
+    targets = {pid: f"http://localhost:{5000 + pid}" for pid in range(20)}
+
+    started = time.perf_counter()
+    results = await service.capture_many(targets)
+    elapsed = time.perf_counter() - started
+
+    assert all(result["error"] is None for result in results.values())
+    assert service._browser.contexts == 4
+    # 串行需要 2 秒，4 个页面并行约 0.5 秒
+    assert elapsed < 1.5
+    assert service.get_thumbnail_path(7) == results[7]["path"]
+
+    # 新实例从目录重建索引
+    fresh = ScreenshotService()
+    assert fresh.get_thumbnail_path(7) == results[7]["path"]
+    assert fresh.get_thumbnail_path(99) is None
+
+
+@pytest.mark.asyncio
+async def test_failed_pages_release_their_slots(tmp_path, monkeypatch):
+    monkeypatch.setattr(screenshot_service, "THUMBNAILS_DIR", tmp_path)
+    svc = ScreenshotService(pool_size=2)
+    svc._browser = FakeBrowser(page_class=FailingPage)
+    targets = {pid: f"http://localhost:{5000 + pid}" for pid in range(4)}
+
+    results = await asyncio.wait_for(svc.capture_many(targets), timeout=10)
+
+    assert all(result["path"] is None and result["error"] for result in results.values())
+    # 每个项目重试 3 次，每次都新建上下文（失败的上下文不复用）
+    assert svc._browser.contexts == 12
+    assert svc._idle.empty()
@@ -0,0 +1,79 @@
+"""
+Workspace 开发服务器托管单元测试（异步探活缓存、日志采集与订阅）
+
+用 python 脚本模拟 dev server，无需安装 Node.js。
+"""
+import asyncio
+import json
+import sys
+
+import pytest
+
+from app.services import workspace_process_service as wps
+from app.services.workspace_process_service import WorkspaceProcessService
+
+DEV_SERVER = """
+import http.server, sys
+port = int(sys.argv[sys.argv.index("--port") + 1])
+print("dev server ready on", port, flush=True)
+http.server.HTTPServer(("127.0.0.1", port), http.server.SimpleHTTPRequestHandler).serve_forever()
+"""
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    (tmp_path / "web").mkdir()
+    (tmp_path / "web" / "package.json").write_text(json.dumps({"name": "demo"}))
+    (tmp_path / "web" / "server.py").write_text(DEV_SERVER)
+    monkeypatch.setattr(wps, "_log_path", lambda project_id: tmp_path / "logs" / f"{project_id}.log")
+    wps._health_cache.invalidate()
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_status_probes_are_cached_and_shared(project, monkeypatch):
+    """并发的状态查询共享一次探活，TTL 内不再探测"""
+    probes = []
+
+    async def fake_probe(port):
+        probes.append(port)
+        await asyncio.sleep(0.2)
+        return "healthy", None
+
+    monkeypatch.setattr(wps, "_probe_health", fake_probe)
+    service = WorkspaceProcessService()
+    await service.start(1, str(project), start_command=f"{sys.executable} server.py")
+    try:
+        statuses = await asyncio.gather(*(service.status(1) for _ in range(30)))
+        assert all(st["phase"] == "running" for st in statuses)
+        assert len(probes) == 1
+    finally:
+        await service.stop(1)
+
+    assert (await service.status(1))["phase"] == "stopped"
+
+
+@pytest.mark.asyncio
+async def test_dev_server_output_is_captured(project):
+    """输出写入环形缓冲、日志文件，并推送给订阅者；停止后仍可从文件读取"""
+    service = WorkspaceProcessService()
+    st = await service.start(2, str(project), start_command=f"{sys.executable} server.py")
+    try:
+        queue = service.subscribe_logs(2)
+        lines = await asyncio.wait_for(queue.get(), timeout=10)
+        assert lines == [f"dev server ready on {st['port']}"]
+
+        for _ in range(50):
+            wps._health_cache.invalidate()
+            if (await service.status(2))["health"] == "healthy":
+                break
+            await asyncio.sleep(0.1)
+        else:
+            pytest.fail("dev server never became healthy")
+    finally:
+        assert (await service.stop(2))["success"]
+
+    logs = await service.get_logs(2)
+    assert logs[0].startswith("$ ")
+    assert f"dev server ready on {st['port']}" in logs
+    assert (project / "logs" / "2.log").is_file()
@@ -172,7 +172,7 @@ export default function ProjectWorkspace() {
                   const logs = last.streaming_logs || [];
                   newMessages[newMessages.length - 1] = {
                     ...last,
-                    streaming_logs: [...logs, data.message]
+                    streaming_logs: [...logs, ...(data.lines ?? [data.message])]
                   };
                   return newMessages;
                 });
@@ -323,11 +323,13 @@ export default function ProjectWorkspace() {
       try {
         const res = await fetch(`/api/executions/session/${sessionId}`);
         const execution = await res.json();
-        if (execution.chat_history) {
-          setMessages(JSON.parse(execution.chat_history));
-        } else {
+        if (!execution.id) {
           setMessages([]);
+          return;
         }
+        const msgRes = await fetch(`/api/executions/${execution.id}/messages?limit=200`);
+        const { messages: history } = await msgRes.json();
+        setMessages(history ?? []);
       } catch (err) {
         console.error('Failed to load chat history:', err);
         setMessages([]);
@@ -0,0 +1,282 @@
+import { useEffect, useState, type ReactNode } from 'react';
+import { Activity, Clock, Database, Download, Gauge, RefreshCw } from 'lucide-react';
+import { systemApi } from '@/lib/api';
+import type { MetricsSummary, ProfilerStatus, ProfileSummary } from '@/lib/api';
+
+const REFRESH_INTERVAL = 5000;
+
+const formatMs = (ms: number | null | undefined) =>
+  ms === null || ms === undefined ? '-' : ms >= 1000 ? `${(ms / 1000).toFixed(2)}s` : `${ms.toFixed(1)}ms`;
+
+const formatUptime = (seconds: number) => {
+  const h = Math.floor(seconds / 3600);
+  const m = Math.floor((seconds % 3600) / 60);
+  return h > 0 ? `${h}h ${m}m` : `${m}m ${Math.floor(seconds % 60)}s`;
+};
+
+function StatCard({ icon: Icon, label, value, hint, alert }: {
+  icon: typeof Activity;
+  label: string;
+  value: string;
+  hint?: string;
+  alert?: boolean;
+}) {
+  return (
+    <div className="bg-white/5 rounded-xl p-4 border border-white/10">
+      <div className="flex items-center gap-2 text-gray-400 text-sm">
+        <Icon size={16} />
+        <span>{label}</span>
+      </div>
+      <div className={`text-2xl font-bold mt-2 ${alert ? 'text-red-400' : 'text-white'}`}>{value}</div>
+      {hint && <div className="text-xs text-gray-500 mt-1">{hint}</div>}
+    </div>
+  );
+}
+
+function Section({ title, children }: { title: string; children: ReactNode }) {
+  return (
+    <section className="bg-white/5 rounded-xl p-4 border border-white/10">
+      <h2 className="text-sm font-bold uppercase tracking-wide text-gray-300 mb-3">{title}</h2>
+      {children}
+    </section>
+  );
+}
+
+const SystemMetrics = () => {
+  const [data, setData] = useState<MetricsSummary | null>(null);
+  const [profiler, setProfiler] = useState<ProfilerStatus | null>(null);
+  const [profiles, setProfiles] = useState<ProfileSummary[]>([]);
+  const [error, setError] = useState<string | null>(null);
+
+  const loadProfiler = async () => {
+    const [status, list] = await Promise.all([systemApi.getProfilerStatus(), systemApi.listProfiles()]);
+    setProfiler(status);
+    setProfiles(list.items);
+  };
+
+  const toggleProfiler = async () => {
+    try {
+      if (profiler?.enabled) {
+        await systemApi.stopProfiler();
+      } else {
+        await systemApi.startProfiler();
+      }
+      await loadProfiler();
+    } catch (e) {
+      setError(e instanceof Error ? e.message : String(e));
+    }
+  };
+
+  useEffect(() => {
+    let cancelled = false;
+    const load = async () => {
+      try {
+        const [summary, status, list] = await Promise.all([
+          systemApi.getMetrics(),
+          systemApi.getProfilerStatus(),
+          systemApi.listProfiles(),
+        ]);
+        if (!cancelled) {
+          setData(summary);
+          setProfiler(status);
+          setProfiles(list.items);
+          setError(null);
+        }
+      } catch (e) {
+        if (!cancelled) setError(e instanceof Error ? e.message : String(e));
+      }
+    };
+    load();
+    const timer = setInterval(load, REFRESH_INTERVAL);
+    return () => {
+      cancelled = true;
+      clearInterval(timer);
+    };
+  }, []);
+
+  return (
+    <div className="space-y-6 pt-6">
+      <header className="flex items-start justify-between gap-3">
+        <div className="flex-1 min-w-0">
+          <h1 className="text-2xl md:text-3xl font-bold tracking-tight uppercase">METRICS</h1>
+          <p className="text-sm md:text-base text-gray-400">
+            路由耗时、事件循环延迟、SQL、子进程与 WebSocket 队列（每 5 秒刷新，Prometheus 抓取地址 /metrics）
+          </p>
+        </div>
+        <RefreshCw size={18} className="text-gray-500 mt-2" />
+      </header>
+
+      {error && <div className="text-red-400 text-sm">加载失败：{error}</div>}
+
+      {data && (
+        <>
+          <div className="grid grid-cols-2 md:grid-cols-4 gap-4">
+            <StatCard icon={Clock} label="运行时长" value={formatUptime(data.uptime_s)} hint={`进行中请求 ${data.in_flight.length}`} />
+            <StatCard
+              icon={Gauge}
+              label="事件循环延迟"
+              value={formatMs(data.event_loop.lag_ms)}
+              hint={`p99 ${formatMs(data.event_loop.p99_ms)} · 最大 ${formatMs(data.event_loop.max_ms)}`}
+              alert={data.event_loop.stalls > 0}
+            />
+            <StatCard
+              icon={Activity}
+              label="阻塞次数"
+              value={String(data.event_loop.stalls)}
+              hint={`${data.event_loop.samples} 次采样`}
+              alert={data.event_loop.stalls > 0}
+            />
+            <StatCard
+              icon={Database}
+              label="SQL 查询"
+              value={String(data.db.queries)}
+              hint={`平均 ${formatMs(data.db.avg_ms)} · p99 ${formatMs(data.db.p99_ms)}`}
+            />
+          </div>
+
+          <Section title="路由耗时（按 p99 排序）">
+            <div className="overflow-x-auto">
+              <table className="w-full text-sm">
+                <thead className="text-gray-400 text-left">
+                  <tr>
+                    <th className="py-2 pr-4">路由</th>
+                    <th className="py-2 pr-4 text-right">次数</th>
+                    <th className="py-2 pr-4 text-right">5xx</th>
+                    <th className="py-2 pr-4 text-right">p50</th>
+                    <th className="py-2 pr-4 text-right">p95</th>
+                    <th className="py-2 pr-4 text-right">p99</th>
+                    <th className="py-2 pr-4 text-right">最大</th>
+                    <th className="py-2 pr-4 text-right">SQL/请求</th>
+                    <th className="py-2 text-right">SQL 耗时</th>
+                  </tr>
+                </thead>
+                <tbody className="font-mono">
+                  {data.routes.slice(0, 30).map((r) => (
+                    <tr key={`${r.method} ${r.route}`} className="border-t border-white/5">
+                      <td className="py-1.5 pr-4 truncate max-w-md">
+                        <span className="text-blue-400 mr-2">{r.method}</span>
+                        {r.route}
+                      </td>
+                      <td className="py-1.5 pr-4 text-right">{r.count}</td>
+                      <td className={`py-1.5 pr-4 text-right ${r.errors ? 'text-red-400' : 'text-gray-500'}`}>{r.errors}</td>
+                      <td className="py-1.5 pr-4 text-right">{formatMs(r.p50_ms)}</td>
+                      <td className="py-1.5 pr-4 text-right">{formatMs(r.p95_ms)}</td>
+                      <td className="py-1.5 pr-4 text-right">{formatMs(r.p99_ms)}</td>
+                      <td className="py-1.5 pr-4 text-right">{formatMs(r.max_ms)}</td>
+                      <td className="py-1.5 pr-4 text-right">{r.db_queries_avg}</td>
+                      <td className="py-1.5 text-right">{formatMs(r.db_ms_avg)}</td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </div>
+          </Section>
+
+          <div className="grid md:grid-cols-2 gap-4">
+            <Section title="进行中的请求">
+              {data.in_flight.length === 0 ? (
+                <div className="text-gray-500 text-sm">无</div>
+              ) : (
+                <ul className="space-y-1 font-mono text-sm">
+                  {data.in_flight.map((item, index) => (
+                    <li key={index} className="flex justify-between gap-4">
+                      <span className="truncate">{item.request}</span>
+                      <span className="text-gray-400">{formatMs(item.elapsed_ms)}</span>
+                    </li>
+                  ))}
+                </ul>
+              )}
+            </Section>
+
+            <Section title="子进程启动">
+              <ul className="space-y-1 font-mono text-sm">
+                {Object.entries(data.subprocesses)
+                  .sort((a, b) => b[1] - a[1])
+                  .map(([name, count]) => (
+                    <li key={name} className="flex justify-between">
+                      <span>{name}</span>
+                      <span className="text-gray-400">{count}</span>
+                    </li>
+                  ))}
+              </ul>
+            </Section>
+
+            <Section title="WebSocket">
+              <ul className="space-y-1 font-mono text-sm">
+                {Object.entries(data.websockets).map(([route, count]) => (
+                  <li key={route} className="flex justify-between">
+                    <span className="truncate">{route}</span>
+                    <span className="text-gray-400">{count} 连接</span>
+                  </li>
+                ))}
+                {Object.entries(data.queues).map(([source, q]) => (
+                  <li key={source} className="flex justify-between">
+                    <span>{source}</span>
+                    <span className={(q.max_depth ?? 0) > 100 ? 'text-yellow-400' : 'text-gray-400'}>
+                      {q.subscribers ?? 0} 队列 · 最大积压 {q.max_depth ?? 0} · 共 {q.total_depth ?? 0}
+                    </span>
+                  </li>
+                ))}
+              </ul>
+            </Section>
+
+            <Section title="扫描耗时">
+              <ul className="space-y-1 font-mono text-sm">
+                {data.scans.map((scan) => (
+                  <li key={scan.scanner} className="flex justify-between">
+                    <span>{scan.scanner}</span>
+                    <span className="text-gray-400">
+                      {scan.count} 次 · 平均 {formatMs(scan.avg_ms)} · 最大 {formatMs(scan.max_ms)}
+                    </span>
+                  </li>
+                ))}
+              </ul>
+            </Section>
+          </div>
+
+          {profiler && (
+            <Section title="采样性能分析">
+              <div className="flex flex-wrap items-center gap-4 text-sm mb-3">
+                <button
+                  onClick={toggleProfiler}
+                  className={`px-3 py-1 rounded-lg border ${profiler.enabled ? 'border-red-400 text-red-400' : 'border-white/20 text-gray-300'}`}
+                >
+                  {profiler.enabled ? '停止采样' : '开启采样'}
+                </button>
+                <span className="text-gray-400">
+                  间隔 {formatMs(profiler.sample_interval * 1000)} · 慢请求阈值 {profiler.slow_request_threshold}s · {profiler.samples} 次采样 · 开销 {(profiler.overhead_ratio * 100).toFixed(2)}%
+                </span>
+                <a href={systemApi.profileFoldedUrl()} className="flex items-center gap-1 text-blue-400">
+                  <Download size={14} />
+                  全局火焰图
+                </a>
+              </div>
+              {profiles.length === 0 ? (
+                <div className="text-gray-500 text-sm">暂无慢请求剖面</div>
+              ) : (
+                <ul className="space-y-1 font-mono text-sm">
+                  {profiles.map((profile) => (
+                    <li key={profile.id} className="flex justify-between gap-4">
+                      <span className="truncate">
+                        <span className="text-blue-400 mr-2">{profile.method}</span>
+                        {profile.path}
+                      </span>
+                      <span className="flex items-center gap-3 text-gray-400 shrink-0">
+                        {formatMs(profile.duration_ms)} · SQL {profile.sql_count}（{formatMs(profile.sql_ms)}）
+                        <a href={systemApi.profileFoldedUrl(profile.id)} className="text-blue-400" title="下载折叠栈">
+                          <Download size={14} />
+                        </a>
+                      </span>
+                    </li>
+                  ))}
+                </ul>
+              )}
+            </Section>
+          )}
+        </>
+      )}
+    </div>
+  );
+};
+
+export default SystemMetrics;
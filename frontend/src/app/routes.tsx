@@ -17,6 +17,7 @@ import DevCheck from './pages/DevCheck';
 import Projects from './pages/Projects';
 import ProjectDetail from './pages/ProjectDetail';
 import ProjectWorkspace from './pages/ProjectWorkspace';
+import SystemMetrics from './pages/SystemMetrics';
 
 export const router = createBrowserRouter([
   {
@@ -79,6 +80,10 @@ export const router = createBrowserRouter([
         path: 'dev-check',
         Component: DevCheck,
       },
+      {
+        path: 'system-metrics',
+        Component: SystemMetrics,
+      },
       {
         path: 'projects',
         Component: Projects,
@@ -14,6 +14,7 @@ export { tasksApi } from './services/tasks';
 export { executionsApi } from './services/executions';
 export { dashboardApi } from './services/dashboard';
 export { statsApi } from './services/stats';
+export { systemApi, type MetricsSummary, type RouteMetrics, type ProfilerStatus, type ProfileSummary } from './services/system';
 export { claudeApi } from './services/claude';
 export { configApi, type AppConfig, type ConfigResponse, type ConfigUpdateResponse, type ModelConfig, type ModelsConfigResponse, type ModelsConfigUpdateResponse } from './services/config';
 export * as projectPathsApi from './services/project-paths';
@@ -189,7 +189,7 @@ export const agentsApi = {
               const event = JSON.parse(jsonStr);
 
               if (event.type === 'log') {
-                onLog(event.message);
+                (event.lines ?? [event.message]).forEach((message: string) => onLog(message));
               } else if (event.type === 'complete') {
                 onComplete(event.data);
               } else if (event.type === 'error') {
@@ -209,7 +209,7 @@ export const agentsApi = {
           if (jsonStr) {
             const event = JSON.parse(jsonStr);
             if (event.type === 'log') {
-              onLog(event.message);
+              (event.lines ?? [event.message]).forEach((message: string) => onLog(message));
             } else if (event.type === 'complete') {
               onComplete(event.data);
             } else if (event.type === 'error') {
@@ -3,7 +3,7 @@
  */
 
 import { apiClient } from '../client';
-import type { Execution, ExecutionListResponse, ExecutionType, ExecutionStatsByType } from '../types';
+import type { Execution, ExecutionListResponse, ExecutionMessagesResponse, ExecutionType, ExecutionStatsByType } from '../types';
 
 export const executionsApi = {
   /**
@@ -15,6 +15,9 @@ export const executionsApi = {
     task_id?: number;
     workflow_id?: number;
     execution_type?: ExecutionType;
+    status?: string;
+    cursor?: string;
+    count?: 'exact' | 'estimate' | 'none';
   }) =>
     apiClient.get<ExecutionListResponse>('/executions/', { params, cache: true, cacheTTL: 300 }),
 
@@ -24,6 +27,12 @@ export const executionsApi = {
   get: (id: number) =>
     apiClient.get<Execution>(`/executions/${id}`, { cache: true, cacheTTL: 300 }),
 
+  /**
+   * 获取会话聊天消息（从最新往前分页，before_seq 传入已加载的最早一条消息的 seq）
+   */
+  getMessages: (id: number, params?: { limit?: number; before_seq?: number }) =>
+    apiClient.get<ExecutionMessagesResponse>(`/executions/${id}/messages`, { params }),
+
   /**
    * 获取 Dashboard 历史卡片数据
    */
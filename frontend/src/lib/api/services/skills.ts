@@ -219,7 +219,7 @@ export const skillsApi = {
               const event = JSON.parse(jsonStr);
 
               if (event.type === 'log') {
-                onLog(event.message);
+                (event.lines ?? [event.message]).forEach((message: string) => onLog(message));
               } else if (event.type === 'complete') {
                 onComplete(event.data);
               } else if (event.type === 'error') {
@@ -239,7 +239,7 @@ export const skillsApi = {
           if (jsonStr) {
             const event = JSON.parse(jsonStr);
             if (event.type === 'log') {
-              onLog(event.message);
+              (event.lines ?? [event.message]).forEach((message: string) => onLog(message));
             } else if (event.type === 'complete') {
               onComplete(event.data);
             } else if (event.type === 'error') {
@@ -0,0 +1,105 @@
+/**
+ * System API 服务（运行时指标、采样性能分析）
+ */
+
+import { apiClient } from '../client';
+
+export interface RouteMetrics {
+  method: string;
+  route: string;
+  count: number;
+  errors: number;
+  avg_ms: number;
+  p50_ms: number;
+  p95_ms: number;
+  p99_ms: number;
+  max_ms: number;
+  db_queries_avg: number;
+  db_ms_avg: number;
+}
+
+export interface QueueMetrics {
+  subscribers?: number;
+  max_depth?: number;
+  total_depth?: number;
+}
+
+export interface MetricsSummary {
+  uptime_s: number;
+  routes: RouteMetrics[];
+  in_flight: { request: string; elapsed_ms: number }[];
+  event_loop: {
+    lag_ms: number | null;
+    p99_ms: number;
+    max_ms: number;
+    samples: number;
+    stalls: number;
+  };
+  db: { queries: number; avg_ms: number; p99_ms: number };
+  subprocesses: Record<string, number>;
+  websockets: Record<string, number>;
+  queues: Record<string, QueueMetrics>;
+  scans: { scanner: string; count: number; avg_ms: number; max_ms: number }[];
+}
+
+export interface ProfilerStatus {
+  enabled: boolean;
+  sample_interval: number;
+  slow_request_threshold: number;
+  all_threads: boolean;
+  started_at: string | null;
+  samples: number;
+  unique_stacks: number;
+  overhead_ratio: number;
+  active_requests: number;
+  profiles: number;
+  max_profiles: number | null;
+}
+
+export interface ProfileSummary {
+  id: string;
+  method: string;
+  path: string;
+  route: string;
+  status: number;
+  duration_ms: number;
+  started_at: string;
+  samples: number;
+  sql_count: number;
+  sql_ms: number;
+}
+
+export const systemApi = {
+  /**
+   * 获取运行时指标汇总
+   */
+  getMetrics: () =>
+    apiClient.get<MetricsSummary>('/system/metrics'),
+
+  /**
+   * 采样性能分析器状态
+   */
+  getProfilerStatus: () =>
+    apiClient.get<ProfilerStatus>('/system/profiler'),
+
+  /**
+   * 开启 / 停止采样
+   */
+  startProfiler: (options?: { sample_interval?: number; slow_request_threshold?: number }) =>
+    apiClient.post<ProfilerStatus>('/system/profiler/start', options ?? {}),
+
+  stopProfiler: () =>
+    apiClient.post<ProfilerStatus>('/system/profiler/stop'),
+
+  /**
+   * 最近的慢请求剖面
+   */
+  listProfiles: () =>
+    apiClient.get<{ items: ProfileSummary[]; total: number }>('/system/profiler/profiles'),
+
+  /**
+   * 折叠栈下载地址（flamegraph.pl / speedscope 可直接读取）
+   */
+  profileFoldedUrl: (profileId?: string) =>
+    `${apiClient.getBaseURL()}/system/profiler/${profileId ? `profiles/${profileId}/folded` : 'folded'}`,
+};
@@ -542,7 +542,17 @@ export interface ExecutionStatsByType {
   terminal: number;
 }
 
-export type ExecutionListResponse = PaginatedResponse<Execution>;
+export interface ExecutionListResponse extends Omit<PaginatedResponse<Execution>, 'total'> {
+  total: number | null;
+  total_is_estimate: boolean;
+  next_cursor: string | null;
+}
+
+export interface ExecutionMessagesResponse {
+  execution_id: number;
+  messages: Array<Record<string, unknown> & { seq: number; role: string; content: string }>;
+  has_more: boolean;
+}
 
 // ============ Dashboard 相关类型 ============
 export interface PopularItem {